@@ -3,13 +3,15 @@
 # backend/apps/abastecimento/api.py
 # ----------------------------------------------------------------
 
-from rest_framework import viewsets, status
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from .models import RegistroAbastecimento, TipoCombustivel
 from .serializers import RegistroAbastecimentoSerializer, TipoCombustivelSerializer
+from backend.apps.shared.idempotencia import idempotente
 
 class TipoCombustivelViewSet(viewsets.ModelViewSet):
     queryset = TipoCombustivel.objects.all()
@@ -154,6 +156,15 @@ class RegistroAbastecimentoViewSet(viewsets.ModelViewSet):
             'data_aprovacao': abastecimento.data_aprovacao
         })
     
+    @idempotente
+    def create(self, request, *args, **kwargs):
+        """Criação aceita Idempotency-Key (reenvios do bot não duplicam o registro)"""
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """Override para definir usuário criador"""
-        serializer.save(criado_por=self.request.user)
\ No newline at end of file
+        try:
+            serializer.save(criado_por=self.request.user)
+        except DjangoValidationError as e:
+            # Baixa do almoxarifado recusada (estoque consumido por outro abastecimento)
+            raise serializers.ValidationError(e.message_dict if hasattr(e, 'error_dict') else e.messages)
\ No newline at end of file
@@ -3,7 +3,7 @@
 # backend/apps/abastecimento/models.py - VERSÃO CORRIGIDA
 # ----------------------------------------------------------------
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from decimal import Decimal
@@ -141,50 +141,61 @@ class RegistroAbastecimento(models.Model):
             self._validar_estoque_almoxarifado()
 
     def _validar_estoque_almoxarifado(self):
-        """Valida se há estoque suficiente no almoxarifado"""
+        """
+        Confere se há estoque suficiente no almoxarifado
+
+        Só antecipa o erro para o formulário: a baixa em si é a saída
+        condicional de almoxarifado/estoque.py:baixar_combustivel.
+        """
+        from backend.apps.almoxarifado.models import EstoqueCombustivel
+
         try:
-            from backend.apps.almoxarifado.models import EstoqueCombustivel
-            
             estoque = EstoqueCombustivel.objects.get(
                 tipo_combustivel=self.tipo_combustivel,
                 ativo=True
             )
-            
-            if estoque.quantidade_em_estoque < self.quantidade_litros:
-                raise ValidationError({
-                    'quantidade_litros': f'Estoque insuficiente no almoxarifado. '
-                                       f'Disponível: {estoque.quantidade_em_estoque}L, '
-                                       f'Solicitado: {self.quantidade_litros}L'
-                })
-            
-            # Alerta de estoque baixo após o abastecimento
-            estoque_pos_abastecimento = estoque.quantidade_em_estoque - self.quantidade_litros
-            if estoque_pos_abastecimento <= estoque.estoque_minimo:
-                self.observacoes += f"\n⚠️ ALERTA: Estoque ficará baixo após abastecimento ({estoque_pos_abastecimento}L)"
-                
-        except:
+        except EstoqueCombustivel.DoesNotExist:
             raise ValidationError({
                 'tipo_combustivel': f'Combustível {self.tipo_combustivel.nome} não cadastrado no almoxarifado. '
                                   f'Configure o estoque antes de usar como origem.'
             })
 
-    def save(self, *args, **kwargs):
-        if not self.numero:
-            self.numero = self.gerar_numero()
+        if estoque.quantidade_em_estoque < self.quantidade_litros:
+            raise ValidationError({
+                'quantidade_litros': f'Estoque insuficiente no almoxarifado. '
+                                   f'Disponível: {estoque.quantidade_em_estoque}L, '
+                                   f'Solicitado: {self.quantidade_litros}L'
+            })
+
+        # Alerta de estoque baixo após o abastecimento
+        estoque_pos_abastecimento = estoque.quantidade_em_estoque - self.quantidade_litros
+        if estoque_pos_abastecimento <= estoque.estoque_minimo:
+            self.observacoes += f"\n⚠️ ALERTA: Estoque ficará baixo após abastecimento ({estoque_pos_abastecimento}L)"
 
+    def save(self, *args, **kwargs):
         self.valor_total = self.quantidade_litros * self.preco_litro
 
         if not self.medicao_anterior:
             self.medicao_anterior = self._obter_medicao_anterior()
 
-        super().save(*args, **kwargs)
+        # Número e INSERT na mesma transação: a sequência fica travada só até aqui
+        with transaction.atomic():
+            if not self.numero:
+                self.numero = self.gerar_numero()
+            super().save(*args, **kwargs)
 
     def gerar_numero(self):
-        hoje = date.today()
-        prefixo = f"AB{hoje.strftime('%Y%m')}"
-        ultimo = RegistroAbastecimento.objects.filter(numero__startswith=prefixo).order_by('numero').last()
-        novo_num = 1 if not ultimo else int(ultimo.numero[-4:]) + 1
-        return f"{prefixo}{novo_num:04d}"
+        from backend.apps.shared.sequencias import proximo
+
+        prefixo = f"AB{date.today().strftime('%Y%m')}"
+        numero = proximo(f"abastecimento:{prefixo}", inicial=lambda: self._ultimo_numero_existente(prefixo))
+        return f"{prefixo}{numero:04d}"
+
+    @staticmethod
+    def _ultimo_numero_existente(prefixo):
+        """Maior número do mês gravado antes da sequência existir"""
+        numeros = RegistroAbastecimento.objects.filter(numero__startswith=prefixo).values_list('numero', flat=True)
+        return max((int(numero[len(prefixo):]) for numero in numeros if numero[len(prefixo):].isdigit()), default=0)
 
     def _obter_medicao_anterior(self):
         """Método para obter medição anterior"""
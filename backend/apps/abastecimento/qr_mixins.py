@@ -1,7 +1,4 @@
 # backend/apps/abastecimento/qr_mixins.py
-import qrcode
-from io import BytesIO
-from django.core.files.base import ContentFile
 from django.db import models
 
 class EquipamentoQRMixin(models.Model):
@@ -14,13 +11,16 @@ class EquipamentoQRMixin(models.Model):
         if not self.id:
             return  # Garante que o ID já existe
 
-        qr_text = f"https://t.me/{self.bot_nome()}?start=eq{self.id}"
-        qr_img = qrcode.make(qr_text)
-        buffer = BytesIO()
-        qr_img.save(buffer, format='PNG')
-        file_name = f"qr_equipamento_{self.id}.png"
-        self.qr_code.save(file_name, ContentFile(buffer.getvalue()), save=False)
+        from django.conf import settings
+        from backend.apps.shared import qr_render
+
+        # Mesma imagem do cache compartilhado: o campo só aponta para o arquivo
+        tamanho = getattr(settings, 'QR_DEFAULT_SIZE', 'medium')
+        payload = qr_render.PayloadEquipamento(self)
+        registro, _ = qr_render.obter_qr(payload, tamanho)
+        self.qr_code.name = registro.arquivo
         super().save(update_fields=["qr_code"])
+        qr_render.referenciar([(payload, registro)], campo=True)
 
     def bot_nome(self):
         from django.conf import settings
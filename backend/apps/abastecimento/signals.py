@@ -3,7 +3,7 @@
 # backend/apps/abastecimento/signals.py
 # ----------------------------------------------------------------
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.db import transaction
 from .models import RegistroAbastecimento
@@ -11,91 +11,47 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-@receiver(pre_save, sender=RegistroAbastecimento)
-def capturar_estoque_antes_abastecimento(sender, instance, **kwargs):
-    """Captura o estoque antes do abastecimento para auditoria"""
-    if instance.origem_combustivel == 'ALMOXARIFADO':
-        try:
-            from backend.apps.almoxarifado.models import EstoqueCombustivel
-            
-            estoque = EstoqueCombustivel.objects.get(
-                tipo_combustivel=instance.tipo_combustivel,
-                ativo=True
-            )
-            instance.estoque_antes_abastecimento = estoque.quantidade_em_estoque
-            
-        except:
-            logger.warning(f"Estoque não encontrado para {instance.tipo_combustivel.nome}")
-
 @receiver(post_save, sender=RegistroAbastecimento)
 def processar_baixa_estoque_almoxarifado(sender, instance, created, **kwargs):
     """
-    Processa a baixa automática no estoque do almoxarifado
-    quando a origem for ALMOXARIFADO
+    Baixa o combustível do almoxarifado quando a origem for ALMOXARIFADO
+
+    A saída é condicional (almoxarifado/estoque.py): sem saldo, levanta
+    EstoqueInsuficiente e o INSERT do abastecimento é desfeito junto, pois
+    RegistroAbastecimento.save() grava dentro de uma transação.
     """
-    if not created:
+    if not created or kwargs.get('raw'):
         return
-    
+
     if instance.origem_combustivel != 'ALMOXARIFADO':
         return
 
-    try:
-        from backend.apps.almoxarifado.models import EstoqueCombustivel, MovimentacaoEstoque, Produto
-        from django.db.models import F
-        
-        with transaction.atomic():
-            # 1. Buscar estoque do combustível
-            estoque_combustivel = EstoqueCombustivel.objects.select_for_update().get(
-                tipo_combustivel=instance.tipo_combustivel,
-                ativo=True
-            )
-            
-            # 2. Verificar estoque suficiente (dupla verificação)
-            if estoque_combustivel.quantidade_em_estoque < instance.quantidade_litros:
-                logger.error(f"Estoque insuficiente para abastecimento {instance.numero}")
-                return
-            
-            # 3. Realizar baixa no estoque
-            estoque_anterior = estoque_combustivel.quantidade_em_estoque
-            estoque_combustivel.quantidade_em_estoque -= instance.quantidade_litros
-            estoque_combustivel.save()
-            
-            # 4. Registrar estoque após baixa para auditoria
-            instance.estoque_depois_abastecimento = estoque_combustivel.quantidade_em_estoque
-            RegistroAbastecimento.objects.filter(id=instance.id).update(
-                estoque_depois_abastecimento=estoque_combustivel.quantidade_em_estoque
-            )
-            
-            # 5. Criar movimentação no produto (se existir)
-            try:
-                produto = Produto.objects.get(codigo=f"COMB_{instance.tipo_combustivel.id}")
-                MovimentacaoEstoque.objects.create(
-                    produto=produto,
-                    tipo='SAIDA',
-                    quantidade=instance.quantidade_litros,
-                    origem=f"Abastecimento {instance.numero} - {instance.equipamento.nome}"
-                )
-            except Produto.DoesNotExist:
-                # Criar produto automaticamente se não existir
-                produto = Produto.objects.create(
-                    codigo=f"COMB_{instance.tipo_combustivel.id}",
-                    descricao=f"Combustível - {instance.tipo_combustivel.nome}",
-                    unidade_medida="L",
-                    estoque_atual=estoque_combustivel.quantidade_em_estoque
-                )
-                
-                MovimentacaoEstoque.objects.create(
-                    produto=produto,
-                    tipo='SAIDA',
-                    quantidade=instance.quantidade_litros,
-                    origem=f"Abastecimento {instance.numero} - {instance.equipamento.nome}"
-                )
-            
-            logger.info(
-                f"✅ Baixa automática realizada: {instance.numero} - "
-                f"{instance.quantidade_litros}L de {instance.tipo_combustivel.nome} - "
-                f"Estoque: {estoque_anterior}L → {estoque_combustivel.quantidade_em_estoque}L"
-            )
-            
-    except Exception as e:
-        logger.error(f"❌ Erro na baixa automática: {str(e)}")
\ No newline at end of file
+    from backend.apps.almoxarifado.estoque import baixar_combustivel, espelhar_combustivel
+
+    litros = instance.quantidade_litros
+    with transaction.atomic():
+        baixa = baixar_combustivel(instance.tipo_combustivel_id, litros)
+        if baixa is None:
+            logger.warning(f"Estoque não encontrado para {instance.tipo_combustivel.nome}")
+            return
+        estoque_anterior, estoque_atual = baixa
+
+        # Estoque antes/depois para auditoria
+        instance.estoque_antes_abastecimento = estoque_anterior
+        instance.estoque_depois_abastecimento = estoque_atual
+        RegistroAbastecimento.objects.filter(id=instance.id).update(
+            estoque_antes_abastecimento=estoque_anterior,
+            estoque_depois_abastecimento=estoque_atual
+        )
+
+        # Espelho no livro do almoxarifado; o saldo já foi conferido acima
+        espelhar_combustivel(
+            instance.tipo_combustivel, estoque_anterior, estoque_atual,
+            origem=f"Abastecimento {instance.numero} - {instance.equipamento.nome}"
+        )
+
+    logger.info(
+        f"✅ Baixa automática realizada: {instance.numero} - "
+        f"{litros}L de {instance.tipo_combustivel.nome} - "
+        f"Estoque: {estoque_anterior}L → {estoque_atual}L"
+    )
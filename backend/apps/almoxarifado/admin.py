@@ -1,13 +1,14 @@
 # backend/apps/almoxarifado/admin.py
 
 from django.contrib import admin
-from .models import Produto, MovimentacaoEstoque, EstoqueCombustivel
+from .models import Produto, MovimentacaoEstoque, EstoqueCombustivel, SaldoEstoque
 
 
 @admin.register(Produto)
 class ProdutoAdmin(admin.ModelAdmin):
     list_display = ('codigo', 'descricao', 'unidade_medida', 'estoque_atual')
     search_fields = ('codigo', 'descricao')
+    readonly_fields = ('estoque_atual',)
 
 
 @admin.register(MovimentacaoEstoque)
@@ -16,6 +17,26 @@ class MovimentacaoEstoqueAdmin(admin.ModelAdmin):
     list_filter = ('tipo', 'data')
     search_fields = ('produto__descricao', 'origem')
 
+    # Livro só recebe inclusões; correções são estornos
+    def has_change_permission(self, request, obj=None):
+        return obj is None
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SaldoEstoque)
+class SaldoEstoqueAdmin(admin.ModelAdmin):
+    list_display = ('produto', 'data', 'saldo', 'entradas', 'saidas')
+    list_filter = ('data',)
+    search_fields = ('produto__codigo', 'produto__descricao')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(EstoqueCombustivel)
 class EstoqueCombustivelAdmin(admin.ModelAdmin):
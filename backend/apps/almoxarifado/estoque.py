@@ -0,0 +1,330 @@
+# ================================================================
+# ARQUIVO: backend/apps/almoxarifado/estoque.py
+# Livro de movimentações de estoque e saldos
+# ================================================================
+#
+# MovimentacaoEstoque é o livro (só recebe INSERT). Cada movimentação
+# ajusta Produto.estoque_atual com um UPDATE atômico; a saída é condicional
+# (UPDATE ... WHERE estoque_atual >= quantidade) e, se nenhuma linha for
+# afetada, não havia saldo: EstoqueInsuficiente e a transação é desfeita.
+# Nada de ler o saldo, subtrair em Python e salvar de volta, que perde
+# atualizações quando dois pedidos chegam juntos.
+#
+# SaldoEstoque guarda o saldo de fechamento de cada produto por dia (só nos
+# dias com movimentação). O saldo pelo livro, hoje ou em qualquer data, é o
+# último fechamento mais as movimentações depois dele (saldos_em);
+# reconciliar_estoques() compara esse valor com estoque_atual numa única
+# consulta.
+#
+# Combustível (EstoqueCombustivel) segue a mesma regra em baixar_combustivel().
+# Toda variação desse estoque (abastecimento, entrada de compra, ajuste) vira
+# uma movimentação no produto espelho COMB_<id> (espelhar_combustivel), para
+# que o saldo de combustível também saia do livro.
+
+import logging
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
+
+from .models import EstoqueCombustivel, MovimentacaoEstoque, Produto, SaldoEstoque, arredondar_quantidade
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0')
+# Limite inferior das movimentações de produto ainda sem fechamento
+INICIO_DO_LIVRO = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class EstoqueInsuficiente(ValidationError):
+    """Saída maior que o saldo disponível"""
+
+
+def _atualizar_kpi_estoque(antes, depois):
+    """O UPDATE não passa pelos signals de Produto: aplica o delta do dashboard aqui"""
+    try:
+        from backend.apps.dashboard.kpis import aplicar_delta, contribuicao, diferenca
+
+        aplicar_delta(diferenca(
+            contribuicao(Produto(estoque_atual=antes)),
+            contribuicao(Produto(estoque_atual=depois)),
+        ))
+    except Exception as e:
+        logger.error(f"❌ Erro ao atualizar KPIs de estoque: {e}")
+
+
+def aplicar_movimentacao(produto_id, tipo, quantidade, permitir_negativo=False):
+    """
+    Ajusta o estoque do produto com um UPDATE atômico
+
+    Chamado por MovimentacaoEstoque.save(), na mesma transação do INSERT.
+
+    Args:
+        produto_id (int): Produto movimentado
+        tipo (str): 'ENTRADA' ou 'SAIDA'
+        quantidade (Decimal): Quantidade positiva
+        permitir_negativo (bool): Saída sem conferir saldo (espelhos de
+            estoques conferidos em outro lugar, ex.: combustível)
+
+    Returns:
+        Decimal: Estoque depois da movimentação
+
+    Raises:
+        EstoqueInsuficiente: Saída maior que o estoque atual
+    """
+    if quantidade is None or quantidade <= 0:
+        raise ValidationError({'quantidade': 'A quantidade deve ser positiva.'})
+
+    delta = quantidade if tipo == 'ENTRADA' else -quantidade
+    produtos = Produto.objects.filter(pk=produto_id)
+    condicao = produtos
+    if tipo == 'SAIDA' and not permitir_negativo:
+        condicao = produtos.filter(estoque_atual__gte=quantidade)
+
+    with transaction.atomic():
+        if not condicao.update(estoque_atual=F('estoque_atual') + delta):
+            disponivel = produtos.values_list('estoque_atual', flat=True).first()
+            if disponivel is None:
+                raise ValidationError({'produto': 'Produto não encontrado.'})
+            raise EstoqueInsuficiente({
+                'quantidade': f'Estoque insuficiente. Disponível: {disponivel}, Solicitado: {quantidade}'
+            })
+        # A linha está travada por esta transação: o valor lido é o nosso
+        depois = produtos.values_list('estoque_atual', flat=True).get()
+
+    _atualizar_kpi_estoque(depois - delta, depois)
+    return depois
+
+
+def baixar_combustivel(tipo_combustivel_id, litros):
+    """
+    Saída condicional do estoque de combustível do almoxarifado
+
+    Returns:
+        tuple: (estoque antes, estoque depois) ou None se o combustível não
+        tem estoque ativo cadastrado
+
+    Raises:
+        EstoqueInsuficiente: Litros maiores que o estoque
+    """
+    estoques = EstoqueCombustivel.objects.filter(tipo_combustivel_id=tipo_combustivel_id, ativo=True)
+
+    with transaction.atomic():
+        baixados = estoques.filter(quantidade_em_estoque__gte=litros).update(
+            quantidade_em_estoque=F('quantidade_em_estoque') - litros,
+            atualizado_em=Now(),
+        )
+        if not baixados:
+            disponivel = estoques.values_list('quantidade_em_estoque', flat=True).first()
+            if disponivel is None:
+                return None
+            raise EstoqueInsuficiente({
+                'quantidade_litros': f'Estoque insuficiente no almoxarifado. '
+                                     f'Disponível: {disponivel}L, Solicitado: {litros}L'
+            })
+        depois = estoques.values_list('quantidade_em_estoque', flat=True).get()
+
+    return depois + litros, depois
+
+
+def espelhar_combustivel(tipo_combustivel, antes, depois, origem):
+    """
+    Registra no produto espelho COMB_<id> a variação do estoque de combustível
+
+    O saldo já foi conferido em EstoqueCombustivel; a movimentação só
+    acompanha a variação (entrada se subiu, saída se desceu). O espelho
+    criado aqui parte do estoque anterior à variação. Litros têm 3 casas e o
+    livro 2: antes e depois são arredondados, então o espelho segue o
+    estoque arredondado sem acumular diferença.
+
+    Returns:
+        MovimentacaoEstoque ou None se o estoque não mudou
+    """
+    antes, depois = arredondar_quantidade(antes), arredondar_quantidade(depois)
+    if antes == depois:
+        return None
+
+    produto, _ = Produto.objects.get_or_create(
+        codigo=f"COMB_{tipo_combustivel.pk}",
+        defaults={
+            'descricao': f"Combustível - {tipo_combustivel.nome}",
+            'unidade_medida': "L",
+            'estoque_atual': antes,
+        }
+    )
+    movimentacao = MovimentacaoEstoque(
+        produto=produto,
+        tipo='ENTRADA' if depois > antes else 'SAIDA',
+        quantidade=abs(depois - antes),
+        origem=origem[:100],
+    )
+    movimentacao.save(permitir_negativo=True)
+    return movimentacao
+
+
+# ================================================================
+# SALDOS PELO LIVRO
+# ================================================================
+
+def _valor(expressao):
+    return Coalesce(expressao, ZERO, output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def fim_do_dia(dia):
+    """Início do dia seguinte no fuso do sistema (limite exclusivo do dia)"""
+    return timezone.make_aware(datetime.combine(dia + timedelta(days=1), time.min))
+
+
+def _total(tipo, **periodo):
+    """Total das movimentações do produto no período, pelo índice (produto, data)"""
+    movimentacoes = MovimentacaoEstoque.objects.filter(
+        produto=OuterRef('pk'), tipo=tipo, **periodo
+    ).order_by().values('produto').annotate(total=Sum('quantidade')).values('total')
+    return _valor(Subquery(movimentacoes))
+
+
+def _com_saldo_do_livro(produtos, ate=None, fechamento_do_dia=True):
+    """
+    Anota o saldo de cada produto pelo livro
+
+    Campos: saldo_base e fechado_ate (último fechamento até `ate`), entradas
+    e saidas (movimentações entre o fechamento e o fim de `ate`) e saldo.
+    Cada total é uma subconsulta correlacionada que lê só as movimentações
+    posteriores ao fechamento do produto, não o histórico inteiro.
+
+    Produto sem fechamento parte do estoque_atual menos o que foi movimentado
+    depois de `ate` (estoque inicial lançado no cadastro não está no livro).
+
+    Args:
+        ate (date): Dia consultado; sem ele, o saldo é o de agora
+        fechamento_do_dia (bool): False ignora o fechamento do próprio dia
+            (usado para refazer esse fechamento)
+    """
+    fechamentos = SaldoEstoque.objects.filter(produto=OuterRef('pk'))
+    if ate is not None:
+        fechamentos = fechamentos.filter(data__lte=ate) if fechamento_do_dia else fechamentos.filter(data__lt=ate)
+    fechamentos = fechamentos.order_by('-data')
+
+    produtos = produtos.annotate(
+        saldo_base=Subquery(fechamentos.values('saldo')[:1]),
+        fechado_ate=Subquery(fechamentos.values('fechado_ate')[:1]),
+    )
+
+    periodo = {'data__gte': Coalesce(OuterRef('fechado_ate'), Value(INICIO_DO_LIVRO))}
+    posteriores = Value(ZERO)
+    if ate is not None:
+        limite = fim_do_dia(ate)
+        periodo['data__lt'] = limite
+        posteriores = _total('ENTRADA', data__gte=limite) - _total('SAIDA', data__gte=limite)
+
+    produtos = produtos.annotate(
+        entradas=_total('ENTRADA', **periodo),
+        saidas=_total('SAIDA', **periodo),
+    )
+    return produtos.annotate(saldo=Case(
+        When(fechado_ate__isnull=True, then=F('estoque_atual') - posteriores),
+        default=F('saldo_base') + F('entradas') - F('saidas'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    ))
+
+
+def fechar_saldos(dia=None):
+    """
+    Grava o saldo de fechamento do dia para os produtos movimentados
+
+    Uma única consulta calcula, para todos os produtos, o fechamento
+    anterior mais as entradas e saídas até o fim do dia; só produtos sem
+    fechamento ou com movimentação no período ganham linha nova. Refazer o
+    fechamento de um dia sobrescreve os valores.
+
+    Returns:
+        int: Fechamentos gravados
+    """
+    dia = dia or date.today()
+    fechamentos = []
+
+    for produto in _com_saldo_do_livro(Produto.objects.all(), ate=dia, fechamento_do_dia=False):
+        if produto.fechado_ate is not None and not (produto.entradas or produto.saidas):
+            continue
+        fechamentos.append(SaldoEstoque(
+            produto_id=produto.pk,
+            data=dia,
+            fechado_ate=fim_do_dia(dia),
+            saldo=produto.saldo,
+            entradas=produto.entradas,
+            saidas=produto.saidas,
+        ))
+
+    SaldoEstoque.objects.bulk_create(
+        fechamentos,
+        update_conflicts=True,
+        unique_fields=['produto', 'data'],
+        update_fields=['saldo', 'entradas', 'saidas', 'fechado_ate', 'atualizado_em'],
+    )
+    logger.info(f"📦 Saldos de {dia} fechados: {len(fechamentos)} produtos")
+    return len(fechamentos)
+
+
+def saldos_em(dia, produtos=None):
+    """
+    Saldo de cada produto no fim do dia
+
+    Último fechamento até o dia mais as movimentações ainda não fechadas,
+    numa consulta só. Combustível entra pelos produtos espelho COMB_<id>,
+    que recebem as entradas e saídas de EstoqueCombustivel.
+
+    Args:
+        dia (date): Dia consultado
+        produtos: Queryset de Produto (padrão: todos)
+
+    Returns:
+        QuerySet: Produtos anotados com saldo, saldo_base, fechado_ate,
+        entradas e saidas
+    """
+    produtos = Produto.objects.all() if produtos is None else produtos
+    return _com_saldo_do_livro(produtos, ate=dia)
+
+
+def saldos_do_livro(produtos=None):
+    """
+    Saldo atual de cada produto pelo livro (último fechamento + movimentações)
+
+    Returns:
+        dict: {produto_id: Decimal}
+    """
+    produtos = Produto.objects.all() if produtos is None else produtos
+    return {produto.pk: produto.saldo for produto in _com_saldo_do_livro(produtos)}
+
+
+def reconciliar_estoques():
+    """
+    Confere estoque_atual com o saldo pelo livro
+
+    Só entram produtos que já têm fechamento. Divergência indica estoque
+    alterado fora do livro (ex.: edição direta do cadastro).
+
+    Returns:
+        list: [{'produto_id', 'codigo', 'estoque_atual', 'livro', 'diferenca'}]
+    """
+    divergencias = []
+    produtos = _com_saldo_do_livro(Produto.objects.filter(pk__in=SaldoEstoque.objects.values('produto')))
+
+    for produto in produtos:
+        livro = produto.saldo
+        if livro != produto.estoque_atual:
+            divergencias.append({
+                'produto_id': produto.pk,
+                'codigo': produto.codigo,
+                'estoque_atual': produto.estoque_atual,
+                'livro': livro,
+                'diferenca': produto.estoque_atual - livro,
+            })
+            logger.warning(
+                f"⚠️ Estoque de {produto.codigo} diverge do livro: "
+                f"{produto.estoque_atual} no cadastro, {livro} pelas movimentações"
+            )
+    return divergencias
@@ -5,6 +5,7 @@
 
 from django.core.management.base import BaseCommand
 from backend.apps.abastecimento.models import TipoCombustivel
+from backend.apps.almoxarifado.estoque import espelhar_combustivel
 from backend.apps.almoxarifado.models import EstoqueCombustivel, Produto
 from decimal import Decimal
 
@@ -124,10 +125,12 @@ class Command(BaseCommand):
             if prod_created:
                 self.stdout.write(f"    📦 Produto criado: {produto.codigo}")
                 produtos_criados += 1
-            else:
-                # Sincronizar estoque do produto com estoque de combustível
-                produto.estoque_atual = estoque.quantidade_em_estoque
-                produto.save()
+            elif produto.estoque_atual != estoque.quantidade_em_estoque:
+                # Sincronizar pelo livro: a diferença vira movimentação de ajuste
+                espelhar_combustivel(
+                    tipo, produto.estoque_atual, estoque.quantidade_em_estoque,
+                    origem=f"Ajuste de sincronização - {tipo.nome}"
+                )
                 self.stdout.write(f"    🔄 Produto sincronizado: {produto.codigo}")
         
         # Resumo
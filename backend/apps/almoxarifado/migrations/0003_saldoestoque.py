@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almoxarifado', '0002_estoquecombustivel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('saldo', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('entradas', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('saidas', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='almoxarifado.produto')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Estoque',
+                'verbose_name_plural': 'Saldos de Estoque',
+                'ordering': ['-data'],
+                'constraints': [models.UniqueConstraint(fields=('produto', 'data'), name='saldo_estoque_produto_data')],
+            },
+        ),
+    ]
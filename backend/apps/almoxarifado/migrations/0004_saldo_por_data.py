@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:23
+
+from datetime import datetime, time, timedelta
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def preencher_fechado_ate(apps, schema_editor):
+    SaldoEstoque = apps.get_model('almoxarifado', 'SaldoEstoque')
+    for saldo in SaldoEstoque.objects.all():
+        saldo.fechado_ate = timezone.make_aware(datetime.combine(saldo.data + timedelta(days=1), time.min))
+        saldo.save(update_fields=['fechado_ate'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almoxarifado', '0003_saldoestoque'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saldoestoque',
+            name='fechado_ate',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Fim do dia no fuso do sistema; movimentações a partir daqui não entram'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(preencher_fechado_ate, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='movimentacaoestoque',
+            index=models.Index(fields=['produto', 'data'], name='almoxarifad_produto_70340b_idx'),
+        ),
+    ]
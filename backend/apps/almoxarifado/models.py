@@ -1,15 +1,15 @@
 # backend/apps/almoxarifado/models.py
 
-# backend/apps/almoxarifado/models.py
-
-from django.db import models
-from decimal import Decimal
+from django.db import models, transaction
+from decimal import ROUND_HALF_UP, Decimal
 from django.core.exceptions import ValidationError
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from django.db.models import F
 
-from backend.apps.abastecimento.models import TipoCombustivel, RegistroAbastecimento
+from backend.apps.abastecimento.models import TipoCombustivel
+
+
+def arredondar_quantidade(valor):
+    """Quantidade na precisão de Produto.estoque_atual e MovimentacaoEstoque.quantidade"""
+    return Decimal(valor).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
 
 class Produto(models.Model):
@@ -23,6 +23,10 @@ class Produto(models.Model):
 
 
 class MovimentacaoEstoque(models.Model):
+    """
+    Livro de entradas e saídas (só INSERT; correções são movimentações de estorno).
+    O estoque do produto é ajustado em almoxarifado/estoque.py.
+    """
     TIPO_CHOICES = [
         ('ENTRADA', 'Entrada'),
         ('SAIDA', 'Saída'),
@@ -34,18 +38,32 @@ class MovimentacaoEstoque(models.Model):
     data = models.DateTimeField(auto_now_add=True)
     origem = models.CharField(max_length=100, blank=True, null=True)
 
-    def save(self, *args, **kwargs):
-        is_new = self._state.adding
+    class Meta:
+        indexes = [
+            # Saldos por data leem só as movimentações do produto depois do último fechamento
+            models.Index(fields=['produto', 'data']),
+        ]
+
+    def save(self, *args, permitir_negativo=False, **kwargs):
+        from .estoque import aplicar_movimentacao
 
-        if is_new:
-            if self.tipo == 'ENTRADA':
-                self.produto.estoque_atual += self.quantidade
-            elif self.tipo == 'SAIDA':
-                self.produto.estoque_atual -= self.quantidade
+        if not self._state.adding:
+            raise ValidationError('Movimentações de estoque não podem ser alteradas; registre um estorno.')
 
-            self.produto.save()
+        # Arredonda uma vez, na precisão do livro: a linha gravada e o UPDATE
+        # do estoque usam o mesmo valor (combustível chega com 3 casas)
+        if self.quantidade is not None:
+            self.quantidade = arredondar_quantidade(self.quantidade)
 
-        super().save(*args, **kwargs)
+        # Baixa condicional e INSERT na mesma transação
+        with transaction.atomic():
+            self.produto.estoque_atual = aplicar_movimentacao(
+                self.produto_id, self.tipo, self.quantidade, permitir_negativo=permitir_negativo
+            )
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError('Movimentações de estoque não podem ser excluídas; registre um estorno.')
 
     def __str__(self):
         return f"{self.tipo} - {self.produto} - {self.quantidade}"
@@ -96,6 +114,26 @@ class EstoqueCombustivel(models.Model):
     def __str__(self):
         return f"{self.tipo_combustivel.nome}: {self.quantidade_em_estoque} {self.tipo_combustivel.unidade_medida}"
 
+    def save(self, *args, **kwargs):
+        """Entradas e ajustes de quantidade vão para o livro pelo produto espelho"""
+        from .estoque import espelhar_combustivel
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'quantidade_em_estoque' not in update_fields:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            anterior = Decimal('0')
+            if not self._state.adding:
+                anterior = EstoqueCombustivel.objects.select_for_update().filter(pk=self.pk).values_list(
+                    'quantidade_em_estoque', flat=True
+                ).first() or Decimal('0')
+            super().save(*args, **kwargs)
+            espelhar_combustivel(
+                self.tipo_combustivel, anterior, self.quantidade_em_estoque,
+                origem=f"Estoque de combustível - {self.tipo_combustivel.nome}"
+            )
+
     def clean(self):
         super().clean()
         erros = {}
@@ -117,17 +155,27 @@ class EstoqueCombustivel(models.Model):
         return self.quantidade_em_estoque <= self.estoque_minimo
 
 
-@receiver(post_save, sender=RegistroAbastecimento)
-def baixa_estoque_combustivel(sender, instance, created, **kwargs):
+
+class SaldoEstoque(models.Model):
     """
-    Quando um novo RegistroAbastecimento é criado,
-    subtrai a quantidade de litros do EstoqueCombustivel correspondente.
+    Saldo de fechamento do produto no fim do dia (gravado só nos dias com
+    movimentação, por almoxarifado/estoque.py:fechar_saldos)
     """
-    if not created:
-        return
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE)
+    data = models.DateField()
+    fechado_ate = models.DateTimeField(help_text='Fim do dia no fuso do sistema; movimentações a partir daqui não entram')
+    saldo = models.DecimalField(max_digits=12, decimal_places=2)
+    entradas = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    saidas = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
 
-    EstoqueCombustivel.objects.filter(
-        tipo_combustivel=instance.tipo_combustivel
-    ).update(
-        quantidade_em_estoque=F('quantidade_em_estoque') - instance.quantidade_litros
-    )
+    class Meta:
+        verbose_name = 'Saldo de Estoque'
+        verbose_name_plural = 'Saldos de Estoque'
+        ordering = ['-data']
+        constraints = [
+            models.UniqueConstraint(fields=['produto', 'data'], name='saldo_estoque_produto_data'),
+        ]
+
+    def __str__(self):
+        return f"{self.produto.codigo} em {self.data}: {self.saldo}"
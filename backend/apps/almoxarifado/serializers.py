@@ -8,12 +8,15 @@ class ProdutoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Produto
         fields = '__all__'
+        # Estoque muda só pelo livro (MovimentacaoEstoque)
+        read_only_fields = ('estoque_atual',)
 
 
 class MovimentacaoEstoqueSerializer(serializers.ModelSerializer):
     class Meta:
         model = MovimentacaoEstoque
         fields = '__all__'
+        read_only_fields = ('data',)
 
 
 class EstoqueCombustivelSerializer(serializers.ModelSerializer):
@@ -4,7 +4,6 @@
 # ----------------------------------------------------------------
 
 from celery import shared_task
-from django.utils import timezone
 from datetime import date, timedelta
 from .models import EstoqueCombustivel
 from .notifications import NotificacaoEstoque
@@ -46,50 +45,25 @@ def enviar_relatorio_consumo_diario():
         raise
 
 @shared_task
-def consolidar_movimentacoes_diarias():
-    """Task para consolidar movimentações diárias"""
+def consolidar_movimentacoes_diarias(dia=None):
+    """
+    Fecha os saldos do dia (padrão: ontem) e confere o estoque com o livro
+
+    Args:
+        dia (str): Data ISO do fechamento
+    """
     try:
-        from .models import MovimentacaoEstoque, Produto
-        from django.db.models import Sum
-        
-        ontem = date.today() - timedelta(days=1)
-        
-        # Atualizar estoques dos produtos baseado nas movimentações
-        produtos_combustivel = Produto.objects.filter(
-            codigo__startswith='COMB_'
-        )
-        
-        atualizados = 0
-        
-        for produto in produtos_combustivel:
-            # Calcular saldo das movimentações de ontem
-            movimentacoes_ontem = MovimentacaoEstoque.objects.filter(
-                produto=produto,
-                data__date=ontem
-            )
-            
-            entradas = movimentacoes_ontem.filter(tipo='ENTRADA').aggregate(
-                total=Sum('quantidade')
-            )['total'] or 0
-            
-            saidas = movimentacoes_ontem.filter(tipo='SAIDA').aggregate(
-                total=Sum('quantidade')
-            )['total'] or 0
-            
-            if entradas > 0 or saidas > 0:
-                # Atualizar estoque do produto
-                produto.estoque_atual = max(0, produto.estoque_atual + entradas - saidas)
-                produto.save()
-                atualizados += 1
-                
-                logger.info(
-                    f"📦 {produto.descricao}: "
-                    f"Entradas: {entradas}L, Saídas: {saidas}L, "
-                    f"Estoque: {produto.estoque_atual}L"
-                )
-        
-        return f"Produtos atualizados: {atualizados}"
-        
+        from .estoque import fechar_saldos, reconciliar_estoques
+
+        dia = date.fromisoformat(dia) if dia else date.today() - timedelta(days=1)
+        fechados = fechar_saldos(dia)
+        divergencias = reconciliar_estoques()
+
+        if divergencias:
+            logger.warning(f"⚠️ {len(divergencias)} produtos com estoque diferente do livro")
+
+        return f"Saldos fechados: {fechados}, divergências: {len(divergencias)}"
+
     except Exception as e:
         logger.error(f"❌ Erro na consolidação: {e}")
         raise
@@ -0,0 +1,159 @@
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.apps.abastecimento.models import TipoCombustivel
+
+from .estoque import (
+    EstoqueInsuficiente, baixar_combustivel, espelhar_combustivel, fechar_saldos,
+    reconciliar_estoques, saldos_do_livro, saldos_em,
+)
+from .models import EstoqueCombustivel, MovimentacaoEstoque, Produto, SaldoEstoque
+
+
+class BaixaConcorrenteTest(TransactionTestCase):
+    """Saídas simultâneas nunca deixam o estoque negativo nem se perdem"""
+
+    def test_saidas_simultaneas(self):
+        produto = Produto.objects.create(codigo='P1', descricao='Filtro', unidade_medida='UN')
+        MovimentacaoEstoque.objects.create(produto=produto, tipo='ENTRADA', quantidade=Decimal('10'))
+
+        barreira = threading.Barrier(15)
+        baixas, recusadas, erros = [], [], []
+
+        def baixar():
+            try:
+                barreira.wait()
+                MovimentacaoEstoque.objects.create(produto_id=produto.pk, tipo='SAIDA', quantidade=Decimal('1'))
+                baixas.append(1)
+            except EstoqueInsuficiente:
+                recusadas.append(1)
+            except Exception as e:
+                erros.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=baixar) for _ in range(15)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(erros, [])
+        self.assertEqual((len(baixas), len(recusadas)), (10, 5))
+        produto.refresh_from_db()
+        self.assertEqual(produto.estoque_atual, 0)
+        self.assertEqual(MovimentacaoEstoque.objects.filter(tipo='SAIDA').count(), 10)
+
+
+class LivroEstoqueTest(TestCase):
+
+    def setUp(self):
+        self.produto = Produto.objects.create(
+            codigo='P2', descricao='Óleo', unidade_medida='L', estoque_atual=Decimal('5')
+        )
+        self.hoje = date.today()
+
+    def _movimentar(self, tipo, quantidade, dias_atras):
+        movimentacao = MovimentacaoEstoque.objects.create(
+            produto=self.produto, tipo=tipo, quantidade=Decimal(quantidade)
+        )
+        MovimentacaoEstoque.objects.filter(pk=movimentacao.pk).update(
+            data=timezone.now() - timedelta(days=dias_atras)
+        )
+
+    def test_movimentacao_nao_pode_ser_alterada(self):
+        self._movimentar('ENTRADA', '1', 0)
+        movimentacao = MovimentacaoEstoque.objects.get()
+        with self.assertRaises(ValidationError):
+            movimentacao.save()
+        with self.assertRaises(ValidationError):
+            movimentacao.delete()
+
+    def test_fechamentos_e_saldo_pelo_livro(self):
+        self._movimentar('ENTRADA', '10', 3)
+        self._movimentar('SAIDA', '4', 2)
+        self._movimentar('ENTRADA', '2', 0)
+
+        # Primeiro fechamento parte do estoque inicial do cadastro
+        self.assertEqual(fechar_saldos(self.hoje - timedelta(days=3)), 1)
+        self.assertEqual(fechar_saldos(self.hoje - timedelta(days=2)), 1)
+        # Dia sem movimentação não grava fechamento
+        self.assertEqual(fechar_saldos(self.hoje - timedelta(days=1)), 0)
+
+        saldos = dict(SaldoEstoque.objects.values_list('data', 'saldo'))
+        self.assertEqual(saldos, {
+            self.hoje - timedelta(days=3): Decimal('15'),
+            self.hoje - timedelta(days=2): Decimal('11'),
+        })
+        self.assertEqual(saldos_do_livro()[self.produto.pk], Decimal('13'))
+        self.assertEqual(reconciliar_estoques(), [])
+
+        Produto.objects.filter(pk=self.produto.pk).update(estoque_atual=Decimal('20'))
+        divergencias = reconciliar_estoques()
+        self.assertEqual([d['diferenca'] for d in divergencias], [Decimal('7')])
+
+    def test_saldo_em_data(self):
+        self._movimentar('ENTRADA', '10', 5)
+        fechar_saldos(self.hoje - timedelta(days=5))
+        self._movimentar('SAIDA', '4', 3)
+        self._movimentar('SAIDA', '1', 1)
+        outro = Produto.objects.create(codigo='P3', descricao='Graxa', unidade_medida='KG')
+
+        def saldo(dias_atras):
+            produtos = Produto.objects.filter(pk=self.produto.pk)
+            return saldos_em(self.hoje - timedelta(days=dias_atras), produtos).get().saldo
+
+        # Sem fechamento dos dias 3 e 1: fechamento do dia 5 mais as movimentações
+        self.assertEqual([saldo(5), saldo(4), saldo(3), saldo(2), saldo(0)], [15, 15, 11, 11, 10])
+        fechar_saldos(self.hoje - timedelta(days=3))
+        self.assertEqual([saldo(3), saldo(0)], [11, 10])
+
+        cliente = APIClient()
+        cliente.force_authenticate(get_user_model().objects.create(username='estoque'))
+        dia = (self.hoje - timedelta(days=4)).isoformat()
+        resposta = cliente.get('/api/almoxarifado/saldo/', {'data': dia, 'produto': f'P2,{outro.pk}'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(
+            [(item['codigo'], Decimal(item['saldo'])) for item in resposta.data['saldos']],
+            [('P2', Decimal('15')), ('P3', Decimal('0'))],
+        )
+        self.assertEqual(cliente.get('/api/almoxarifado/saldo/', {'data': 'ontem'}).status_code, 400)
+
+    def test_combustivel_no_livro(self):
+        tipo = TipoCombustivel.objects.create(nome='Diesel S10')
+        estoque = EstoqueCombustivel.objects.create(tipo_combustivel=tipo, quantidade_em_estoque=Decimal('100'))
+        estoque.quantidade_em_estoque = Decimal('150')
+        estoque.save()
+        estoque.estoque_minimo = Decimal('10')
+        estoque.save(update_fields=['estoque_minimo'])
+
+        antes, depois = baixar_combustivel(tipo.pk, Decimal('30'))
+        espelhar_combustivel(tipo, antes, depois, origem='Abastecimento')
+
+        espelho = Produto.objects.get(codigo=f'COMB_{tipo.pk}')
+        self.assertEqual(
+            list(MovimentacaoEstoque.objects.filter(produto=espelho).values_list('tipo', 'quantidade')),
+            [('ENTRADA', Decimal('100')), ('ENTRADA', Decimal('50')), ('SAIDA', Decimal('30'))],
+        )
+        espelho.refresh_from_db()
+        self.assertEqual(espelho.estoque_atual, 120)
+
+        # Litros com 3 casas: linha do livro e estoque arredondados juntos
+        antes, depois = baixar_combustivel(tipo.pk, Decimal('10.125'))
+        espelhar_combustivel(tipo, antes, depois, origem='Abastecimento')
+        espelho.refresh_from_db()
+        self.assertEqual(espelho.estoque_atual, Decimal('109.88'))
+        self.assertEqual(saldos_do_livro()[espelho.pk], espelho.estoque_atual)
+        fechar_saldos(self.hoje)
+        self.assertEqual(reconciliar_estoques(), [])
+        # Antes da primeira entrada o combustível não tinha saldo
+        ontem = self.hoje - timedelta(days=1)
+        self.assertEqual(saldos_em(ontem, Produto.objects.filter(pk=espelho.pk)).get().saldo, 0)
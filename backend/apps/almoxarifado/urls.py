@@ -6,6 +6,7 @@ from .views import (
     ProdutoViewSet,
     MovimentacaoEstoqueViewSet,
     EstoqueCombustivelViewSet,  # importe o novo viewset
+    saldo_estoque,
 )
 
 router = DefaultRouter()
@@ -14,5 +15,6 @@ router.register(r'movimentacoes', MovimentacaoEstoqueViewSet)
 router.register(r'estoques-combustivel', EstoqueCombustivelViewSet)  # nova rota
 
 urlpatterns = [
+    path('saldo/', saldo_estoque, name='saldo-estoque'),
     path('', include(router.urls)),
 ]
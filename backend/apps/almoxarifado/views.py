@@ -1,6 +1,14 @@
 # backend/apps/almoxarifado/views.py
 
-from rest_framework import viewsets
+from datetime import date
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework import serializers, viewsets
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .estoque import saldos_em
 from .models import Produto, MovimentacaoEstoque, EstoqueCombustivel
 from .serializers import (
     ProdutoSerializer,
@@ -15,8 +23,16 @@ class ProdutoViewSet(viewsets.ModelViewSet):
 
 
 class MovimentacaoEstoqueViewSet(viewsets.ModelViewSet):
-    queryset = MovimentacaoEstoque.objects.all()
+    """Livro de movimentações: só consulta e inclusão"""
+    queryset = MovimentacaoEstoque.objects.select_related('produto').order_by('-data')
     serializer_class = MovimentacaoEstoqueSerializer
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def perform_create(self, serializer):
+        try:
+            serializer.save()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict if hasattr(e, 'error_dict') else e.messages)
 
 
 class EstoqueCombustivelViewSet(viewsets.ModelViewSet):
@@ -24,3 +40,47 @@ class EstoqueCombustivelViewSet(viewsets.ModelViewSet):
     serializer_class = EstoqueCombustivelSerializer
     filterset_fields = ('tipo_combustivel', 'ativo')
     search_fields = ('tipo_combustivel__nome',)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def saldo_estoque(request):
+    """
+    Saldo dos produtos no fim de um dia
+
+    Parâmetros:
+        data: AAAA-MM-DD (padrão: hoje)
+        produto: ID ou código, repetido ou separado por vírgula (padrão: todos)
+
+    Lê o último fechamento de cada produto até a data e só as movimentações
+    depois dele, numa consulta (almoxarifado/estoque.py:saldos_em).
+    """
+    try:
+        dia = date.fromisoformat(request.query_params['data']) if request.query_params.get('data') else date.today()
+    except ValueError:
+        return Response({'error': 'Data inválida; use AAAA-MM-DD'}, status=400)
+    if dia > date.today():
+        return Response({'error': 'Data no futuro'}, status=400)
+
+    produtos = Produto.objects.all()
+    filtro = [
+        valor.strip()
+        for parametro in request.query_params.getlist('produto')
+        for valor in parametro.split(',')
+        if valor.strip()
+    ]
+    if filtro:
+        ids = [valor for valor in filtro if valor.isdigit()]
+        produtos = produtos.filter(Q(pk__in=ids) | Q(codigo__in=filtro))
+
+    saldos = [
+        {
+            'produto': produto.pk,
+            'codigo': produto.codigo,
+            'descricao': produto.descricao,
+            'unidade_medida': produto.unidade_medida,
+            'saldo': produto.saldo,
+        }
+        for produto in saldos_em(dia, produtos.order_by('codigo'))
+    ]
+    return Response({'data': dia.isoformat(), 'saldos': saldos})
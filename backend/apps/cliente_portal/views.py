@@ -5,9 +5,10 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
 from datetime import datetime, timedelta, date
-from django.db.models import Q, Count, Avg
+from django.db.models import Q, Count, Avg, OuterRef, Subquery
 from django.shortcuts import get_object_or_404
 
 from backend.apps.equipamentos.models import Equipamento
@@ -15,6 +16,7 @@ from backend.apps.equipamentos.serializers import EquipamentoSerializer
 from backend.apps.empreendimentos.models import Empreendimento
 from backend.apps.manutencao.models import HistoricoManutencao
 from backend.apps.nr12_checklist.models import ChecklistNR12, AlertaManutencao
+from backend.apps.shared.cache_resumos import obter_resumo
 
 class ClientePortalPermissionMixin:
     """Garante que cliente só acesse seus próprios dados"""
@@ -36,35 +38,71 @@ class DashboardClienteViewSet(ClientePortalPermissionMixin, viewsets.ViewSet):
 
     @action(detail=False, methods=['get'])
     def resumo(self, request):
-        """Resumo geral para dashboard"""
-        # Para teste, vamos mostrar dados de todos os clientes
-        # Em produção, usar apenas: cliente = self.get_cliente()
-        
+        """
+        Resumo geral para dashboard
+
+        Usuário cliente vê apenas os próprios dados; admin da Mandacaru
+        (sem cliente vinculado) vê todos. A lista de equipamentos é
+        paginada (?page=N) e traz o status do checklist de hoje de cada
+        equipamento sem queries por linha.
+        """
+        cliente = self.get_cliente()
+        if cliente is None and not request.user.is_staff:
+            return Response(
+                {'error': 'Usuário não vinculado a um cliente'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        cliente_id = cliente.id if cliente else None
+
+        resumo = obter_resumo(
+            'portal_resumo',
+            lambda: self._calcular_resumo(cliente_id),
+            cliente_id=cliente_id
+        )
+
+        paginator = PageNumberPagination()
+        pagina = paginator.paginate_queryset(
+            self._equipamentos_com_checklist_hoje(cliente_id), request, view=self
+        )
+        resumo['equipamentos'] = paginator.get_paginated_response(
+            [self._equipamento_data(eq) for eq in pagina]
+        ).data
+        return Response(resumo)
+
+    def _calcular_resumo(self, cliente_id):
+        """Estatísticas e últimas manutenções do cliente (sem cache)"""
         hoje = date.today()
-        
-        # Estatísticas básicas - mostrando todos os dados para teste
-        total_equipamentos = Equipamento.objects.count()
-        equipamentos_ativos_nr12 = Equipamento.objects.filter(ativo_nr12=True).count()
-        
+        filtro_equipamento = Q() if cliente_id is None else Q(equipamento__cliente_id=cliente_id)
+        equipamentos = Equipamento.objects.all()
+        if cliente_id is not None:
+            equipamentos = equipamentos.filter(cliente_id=cliente_id)
+
+        # Estatísticas básicas
+        estatisticas_equipamentos = equipamentos.aggregate(
+            total_equipamentos=Count('id'),
+            equipamentos_ativos_nr12=Count('id', filter=Q(ativo_nr12=True)),
+        )
+
         # Checklists pendentes hoje
         checklists_pendentes = ChecklistNR12.objects.filter(
+            filtro_equipamento,
             data_checklist=hoje,
             status='PENDENTE'
         ).count()
-        
-        # Alertas ativos
-        alertas_ativos = AlertaManutencao.objects.filter(
+
+        # Alertas ativos e críticos (vencimento < 7 dias)
+        alertas = AlertaManutencao.objects.filter(
+            filtro_equipamento,
             status__in=['ATIVO', 'NOTIFICADO']
-        ).count()
-        
-        # Alertas críticos (vencimento < 7 dias)
-        alertas_criticos = AlertaManutencao.objects.filter(
-            status__in=['ATIVO', 'NOTIFICADO'],
-            data_prevista__lte=hoje + timedelta(days=7)
-        ).count()
+        ).aggregate(
+            ativos=Count('id'),
+            criticos=Count('id', filter=Q(data_prevista__lte=hoje + timedelta(days=7))),
+        )
 
         # Últimas manutenções
-        ultimas_manutencoes = HistoricoManutencao.objects.order_by('-data')[:5]
+        ultimas_manutencoes = HistoricoManutencao.objects.filter(
+            filtro_equipamento
+        ).select_related('equipamento').order_by('-data')[:5]
 
         manutencoes_data = []
         for m in ultimas_manutencoes:
@@ -75,44 +113,52 @@ class DashboardClienteViewSet(ClientePortalPermissionMixin, viewsets.ViewSet):
                 'tecnico': m.tecnico_responsavel
             })
 
-        # Lista de equipamentos
-        equipamentos = Equipamento.objects.all()[:10]  # Primeiros 10
-        equipamentos_data = []
-        for eq in equipamentos:
-            # Status do checklist de hoje
-            checklist_hoje = ChecklistNR12.objects.filter(
-                equipamento=eq,
-                data_checklist=hoje
-            ).first()
-            
-            equipamentos_data.append({
-                'id': eq.id,
-                'nome': eq.nome,
-                'tipo': eq.tipo,
-                'marca': eq.marca,
-                'modelo': eq.modelo,
-                'cliente': eq.cliente.razao_social,
-                'empreendimento': eq.empreendimento.nome,
-                'ativo_nr12': eq.ativo_nr12,
-                'checklist_hoje': {
-                    'existe': checklist_hoje is not None,
-                    'status': checklist_hoje.status if checklist_hoje else 'PENDENTE',
-                    'uuid': str(checklist_hoje.uuid) if checklist_hoje else None
-                }
-            })
-
-        return Response({
+        return {
             'estatisticas': {
-                'total_equipamentos': total_equipamentos,
-                'equipamentos_ativos_nr12': equipamentos_ativos_nr12,
+                'total_equipamentos': estatisticas_equipamentos['total_equipamentos'],
+                'equipamentos_ativos_nr12': estatisticas_equipamentos['equipamentos_ativos_nr12'],
                 'checklists_pendentes_hoje': checklists_pendentes,
-                'alertas_ativos': alertas_ativos,
-                'alertas_criticos': alertas_criticos
+                'alertas_ativos': alertas['ativos'],
+                'alertas_criticos': alertas['criticos']
             },
             'ultimas_manutencoes': manutencoes_data,
-            'equipamentos_recentes': equipamentos_data,
             'data_atual': hoje
-        })
+        }
+
+    def _equipamentos_com_checklist_hoje(self, cliente_id):
+        """Equipamentos anotados com o checklist de hoje mais recente"""
+        checklist_hoje = ChecklistNR12.objects.filter(
+            equipamento=OuterRef('pk'),
+            data_checklist=date.today()
+        ).order_by('-created_at')
+
+        equipamentos = Equipamento.objects.select_related(
+            'categoria', 'cliente', 'empreendimento'
+        ).annotate(
+            checklist_hoje_status=Subquery(checklist_hoje.values('status')[:1]),
+            checklist_hoje_uuid=Subquery(checklist_hoje.values('uuid')[:1]),
+        ).order_by('nome', 'id')
+
+        if cliente_id is not None:
+            equipamentos = equipamentos.filter(cliente_id=cliente_id)
+        return equipamentos
+
+    def _equipamento_data(self, eq):
+        return {
+            'id': eq.id,
+            'nome': eq.nome,
+            'tipo': eq.tipo,
+            'marca': eq.marca,
+            'modelo': eq.modelo,
+            'cliente': eq.cliente.razao_social,
+            'empreendimento': eq.empreendimento.nome,
+            'ativo_nr12': eq.ativo_nr12,
+            'checklist_hoje': {
+                'existe': eq.checklist_hoje_uuid is not None,
+                'status': eq.checklist_hoje_status or 'PENDENTE',
+                'uuid': str(eq.checklist_hoje_uuid) if eq.checklist_hoje_uuid else None
+            }
+        }
 
     @action(detail=False, methods=['post'])
     def gerar_checklist_teste(self, request):
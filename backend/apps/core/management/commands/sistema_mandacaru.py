@@ -21,6 +21,7 @@ class Command(BaseCommand):
                 'status',
                 'inicializar',
                 'backup',
+                'restaurar',
                 'limpeza',
                 'diagnostico',
                 'resetar_demo',
@@ -42,6 +43,30 @@ class Command(BaseCommand):
             default=30,
             help='Número de dias para operações de limpeza/backup'
         )
+        
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Backup só do que mudou desde o último backup'
+        )
+        
+        parser.add_argument(
+            '--destino',
+            help='Diretório base dos backups (padrão: settings.BACKUP_DIR)'
+        )
+        
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=2000,
+            help='Registros lidos do banco por vez no backup'
+        )
+        
+        parser.add_argument(
+            '--origem',
+            action='append',
+            help='Diretório do backup a restaurar (repita para aplicar incrementais em ordem)'
+        )
     
     def handle(self, *args, **options):
         acao = options['acao']
@@ -55,7 +80,11 @@ class Command(BaseCommand):
             elif acao == 'inicializar':
                 self._inicializar_sistema(options['force'])
             elif acao == 'backup':
-                self._fazer_backup(options['dias'])
+                self._fazer_backup(
+                    options['dias'], options['incremental'], options['destino'], options['chunk']
+                )
+            elif acao == 'restaurar':
+                self._restaurar_backup(options['origem'], options['force'])
             elif acao == 'limpeza':
                 self._limpeza_sistema(options['dias'], options['force'])
             elif acao == 'diagnostico':
@@ -282,100 +311,62 @@ class Command(BaseCommand):
         
         self.stdout.write("\n🎉 Sistema inicializado com sucesso!")
     
-    def _fazer_backup(self, dias):
-        """Faz backup dos dados importantes"""
-        self.stdout.write(f"💾 FAZENDO BACKUP ({dias} dias)")
+    def _fazer_backup(self, dias, incremental=False, destino=None, chunk=2000):
+        """Faz backup dos dados importantes (NDJSON comprimido por modelo)"""
+        from backend.apps.shared.backup import executar_backup
+        
+        tipo = 'incremental' if incremental else 'completo'
+        self.stdout.write(f"💾 FAZENDO BACKUP {tipo.upper()} ({dias} dias)")
         self.stdout.write("-" * 30)
         
         try:
-            from django.core import serializers
-            import json
-            import os
-            from datetime import datetime
-            
-            # Criar diretório de backup
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_dir = f"backups/{timestamp}"
-            os.makedirs(backup_dir, exist_ok=True)
-            
-            # Backup de modelos principais
-            modelos_backup = [
-                ('clientes', 'backend.apps.clientes.models.Cliente'),
-                ('equipamentos', 'backend.apps.equipamentos.models.Equipamento'),
-                ('categorias_eq', 'backend.apps.equipamentos.models.CategoriaEquipamento'),
-                ('tipos_nr12', 'backend.apps.nr12_checklist.models.TipoEquipamentoNR12'),
-                ('itens_checklist', 'backend.apps.nr12_checklist.models.ItemChecklistPadrao'),
-                ('usuarios', 'backend.apps.auth_cliente.models.UsuarioCliente'),
-            ]
-            
-            # Backup dos últimos N dias
-            data_limite = date.today() - timedelta(days=dias)
-            modelos_recentes = [
-                ('checklists', 'backend.apps.nr12_checklist.models.ChecklistNR12', 'data_checklist'),
-                ('alertas', 'backend.apps.nr12_checklist.models.AlertaManutencao', 'data_identificacao'),
-                ('kpis', 'backend.apps.dashboard.models.KPISnapshot', 'data_snapshot'),
-            ]
-            
-            arquivos_criados = 0
-            
-            # Backup dos modelos principais
-            for nome, model_path in modelos_backup:
-                try:
-                    module_name, class_name = model_path.rsplit('.', 1)
-                    module = __import__(module_name, fromlist=[class_name])
-                    model_class = getattr(module, class_name)
-                    
-                    data = serializers.serialize('json', model_class.objects.all())
-                    
-                    with open(f"{backup_dir}/{nome}.json", 'w', encoding='utf-8') as f:
-                        f.write(data)
-                    
-                    count = model_class.objects.count()
-                    self.stdout.write(f"   ✅ {nome}: {count} registros")
-                    arquivos_criados += 1
-                    
-                except Exception as e:
-                    self.stdout.write(f"   ❌ {nome}: {e}")
-            
-            # Backup dos dados recentes
-            for nome, model_path, date_field in modelos_recentes:
-                try:
-                    module_name, class_name = model_path.rsplit('.', 1)
-                    module = __import__(module_name, fromlist=[class_name])
-                    model_class = getattr(module, class_name)
-                    
-                    filter_kwargs = {f"{date_field}__gte": data_limite}
-                    queryset = model_class.objects.filter(**filter_kwargs)
-                    data = serializers.serialize('json', queryset)
-                    
-                    with open(f"{backup_dir}/{nome}_recentes.json", 'w', encoding='utf-8') as f:
-                        f.write(data)
-                    
-                    count = queryset.count()
-                    self.stdout.write(f"   ✅ {nome} (últimos {dias} dias): {count} registros")
-                    arquivos_criados += 1
-                    
-                except Exception as e:
-                    self.stdout.write(f"   ❌ {nome}: {e}")
-            
-            # Salvar metadados do backup
-            metadata = {
-                'data_backup': datetime.now().isoformat(),
-                'dias_incluidos': dias,
-                'arquivos_criados': arquivos_criados,
-                'versao_sistema': '1.0.0'
-            }
-            
-            with open(f"{backup_dir}/metadata.json", 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            metadata = executar_backup(
+                destino=destino,
+                dias=dias,
+                incremental=incremental,
+                chunk_size=chunk,
+                progresso=self._mostrar_progresso_backup,
+            )
             
-            self.stdout.write(f"\n💾 Backup concluído em: {backup_dir}")
-            self.stdout.write(f"📁 {arquivos_criados} arquivos criados")
+            if metadata['desde']:
+                self.stdout.write(f"\n🕒 Alterações desde {metadata['desde']}")
+            self.stdout.write(f"\n💾 Backup concluído em: {metadata['diretorio']}")
+            self.stdout.write(f"📁 {metadata['arquivos_criados']} arquivos criados")
             
         except Exception as e:
             self.stdout.write(f"❌ Erro no backup: {e}")
             raise
     
+    def _restaurar_backup(self, origens, force=False):
+        """Restaura um ou mais backups, na ordem informada"""
+        from backend.apps.shared.backup import restaurar_backup
+        
+        if not origens:
+            self.stdout.write("❌ Informe o backup com --origem <diretório>")
+            return
+        
+        if not force:
+            confirmacao = input("⚠️ Registros com o mesmo ID serão sobrescritos. Continuar? (s/N): ")
+            if confirmacao.lower() != 's':
+                self.stdout.write("❌ Operação cancelada")
+                return
+        
+        for origem in origens:
+            self.stdout.write(f"♻️ RESTAURANDO {origem}")
+            self.stdout.write("-" * 30)
+            restaurar_backup(origem, progresso=self._mostrar_progresso_backup)
+        
+        self.stdout.write("\n✅ Restauração concluída")
+    
+    def _mostrar_progresso_backup(self, nome, estatisticas):
+        tamanho = f", {estatisticas['bytes'] / 1024:.1f} KB" if 'bytes' in estatisticas else ''
+        filtro = f" (alterados por {estatisticas['filtro']})" if estatisticas.get('filtro') else ''
+        self.stdout.write(
+            f"   ✅ {nome}{filtro}: {estatisticas['registros']} registros{tamanho} em "
+            f"{estatisticas['segundos']:.2f}s ({estatisticas['registros_por_segundo']:.0f}/s, "
+            f"pico {estatisticas['pico_memoria_kb']} KB)"
+        )
+    
     def _limpeza_sistema(self, dias, force=False):
         """Limpa dados antigos do sistema"""
         self.stdout.write(f"🧹 LIMPEZA DO SISTEMA (>{dias} dias)")
@@ -10,7 +10,6 @@ from django.db.models import Q, Count
 from django.core.mail import send_mail
 from django.conf import settings
 import logging
-import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +18,7 @@ logger = logging.getLogger(__name__)
 # ================================================================
 
 @shared_task
-def gerar_checklists_automatico():
+def gerar_checklists_automatico(dry_run=False):
     """
     Task principal para gerar checklists automaticamente
     
@@ -29,91 +28,28 @@ def gerar_checklists_automatico():
     - Mensal: Todo dia 1º às 6h da manhã
     
     LÓGICA:
-    - Verifica a frequência configurada em cada equipamento
-    - Cria checklists para os turnos: MANHA, TARDE, NOITE
-    - Evita duplicação verificando se já existe checklist para a data
+    - Delega para nr12_checklist.gerador.gerar_checklists_agendados, que
+      consulta o calendário de frequências e o registro de execuções do dia
+    - Disparos repetidos no mesmo dia não refazem a geração
     """
     try:
-        from backend.apps.equipamentos.models import Equipamento
-        from backend.apps.nr12_checklist.models import ChecklistNR12
+        from backend.apps.nr12_checklist.gerador import gerar_checklists_agendados
         
         hoje = date.today()
-        dia_semana = hoje.weekday()  # 0=segunda, 6=domingo
-        dia_mes = hoje.day
-        
-        # Log início da execução
         logger.info(f"🚀 Iniciando geração automática de checklists para {hoje}")
-        logger.info(f"   Dia da semana: {dia_semana} (0=segunda)")
-        logger.info(f"   Dia do mês: {dia_mes}")
-        
-        # Buscar equipamentos ativos com frequência configurada
-        equipamentos_ativos = Equipamento.objects.filter(
-            ativo_nr12=True,
-            frequencias_checklist__isnull=False
-        ).exclude(frequencias_checklist=[]).select_related('categoria', 'cliente', 'tipo_nr12')
-        
-        if not equipamentos_ativos.exists():
-            logger.warning("⚠️ Nenhum equipamento ativo com frequência configurada")
-            return "Nenhum equipamento configurado para gerar checklists"
         
-        logger.info(f"📊 {equipamentos_ativos.count()} equipamentos ativos encontrados")
-        
-        checklists_criados = 0
-        equipamentos_processados = 0
-        turnos = ['MANHA', 'TARDE', 'NOITE']
-        
-        # Processar cada equipamento
-        for equipamento in equipamentos_ativos:
-            equipamento_gerou_hoje = False
-            
-            # Verificar cada frequência configurada no equipamento
-            for frequencia in equipamento.frequencias_checklist:
-                deve_gerar = _deve_gerar_checklist(frequencia, dia_semana, dia_mes)
-                
-                if deve_gerar:
-                    logger.info(f"✅ {equipamento.nome} - Gerando checklist {frequencia}")
-                    
-                    # Gerar checklist para cada turno
-                    for turno in turnos:
-                        # Verificar se já existe checklist para esta data/turno
-                        checklist_existente = ChecklistNR12.objects.filter(
-                            equipamento=equipamento,
-                            data_checklist=hoje,
-                            turno=turno
-                        ).exists()
-                        
-                        if not checklist_existente:
-                            # Criar novo checklist
-                            checklist = ChecklistNR12.objects.create(
-                                equipamento=equipamento,
-                                data_checklist=hoje,
-                                turno=turno,
-                                status='PENDENTE',
-                                uuid=uuid.uuid4(),
-                                necessita_manutencao=False,
-                                observacoes=f'Checklist {frequencia.lower()} gerado automaticamente'
-                            )
-                            
-                            # Criar itens do checklist
-                            itens_criados = _criar_itens_checklist(checklist)
-                            checklists_criados += 1
-                            equipamento_gerou_hoje = True
-                            
-                            logger.info(f"   📋 Checklist {turno} criado com {itens_criados} itens")
-                        else:
-                            logger.info(f"   ℹ️ Checklist {turno} já existe para hoje")
-                else:
-                    logger.debug(f"❌ {equipamento.nome} - {frequencia}: não deve gerar hoje")
-            
-            if equipamento_gerou_hoje:
-                equipamentos_processados += 1
+        resultado = gerar_checklists_agendados(hoje, dry_run=dry_run)
         
-        # Log resultado final
-        resultado = f"✅ Automação concluída: {checklists_criados} checklists criados para {equipamentos_processados} equipamentos"
-        logger.info(resultado)
+        checklists_criados = sum(
+            stats.get('checklists_criados', 0) for stats in resultado['frequencias'].values()
+        )
+        logger.info(f"✅ Automação concluída: {checklists_criados} checklists criados")
         
         # Enviar notificação se configurado
-        if checklists_criados > 0:
+        if checklists_criados > 0 and not dry_run:
+            equipamentos_processados = max(
+                stats.get('equipamentos', 0) for stats in resultado['frequencias'].values()
+            )
             _notificar_checklists_gerados(checklists_criados, equipamentos_processados, hoje)
         
         return resultado
@@ -123,74 +59,6 @@ def gerar_checklists_automatico():
         logger.error(erro, exc_info=True)
         raise
 
-def _deve_gerar_checklist(frequencia, dia_semana, dia_mes):
-    """
-    Determina se deve gerar checklist baseado na frequência
-    
-    Args:
-        frequencia (str): DIARIA, SEMANAL ou MENSAL
-        dia_semana (int): 0=segunda, 1=terça, ..., 6=domingo
-        dia_mes (int): Dia do mês (1-31)
-    
-    Returns:
-        bool: True se deve gerar checklist
-    """
-    if frequencia == 'DIARIA':
-        return True
-    elif frequencia == 'SEMANAL':
-        return dia_semana == 0  # Segunda-feira
-    elif frequencia == 'MENSAL':
-        return dia_mes == 1  # Dia 1º do mês
-    else:
-        logger.warning(f"⚠️ Frequência desconhecida: {frequencia}")
-        return False
-
-def _criar_itens_checklist(checklist):
-    """
-    Cria itens do checklist baseado no tipo NR12 do equipamento
-    
-    Args:
-        checklist: Instância do ChecklistNR12
-    
-    Returns:
-        int: Número de itens criados
-    """
-    try:
-        from backend.apps.nr12_checklist.models import ItemChecklistRealizado, ItemChecklistPadrao
-        
-        if not checklist.equipamento.tipo_nr12:
-            logger.warning(f"⚠️ Equipamento {checklist.equipamento.nome} não tem tipo NR12 configurado")
-            return 0
-        
-        # Buscar itens padrão para este tipo de equipamento
-        itens_padrao = ItemChecklistPadrao.objects.filter(
-            tipo_equipamento=checklist.equipamento.tipo_nr12,
-            ativo=True
-        ).order_by('ordem')
-        
-        if not itens_padrao.exists():
-            logger.warning(f"⚠️ Nenhum item padrão encontrado para tipo {checklist.equipamento.tipo_nr12.nome}")
-            return 0
-        
-        itens_criados = 0
-        
-        # Criar cada item do checklist
-        for item_padrao in itens_padrao:
-            ItemChecklistRealizado.objects.create(
-                checklist=checklist,
-                item_padrao=item_padrao,
-                status='PENDENTE'
-                # Removido 'observacoes' - o campo correto é 'observacao' (singular)
-            )
-            itens_criados += 1
-        
-        logger.debug(f"✅ {itens_criados} itens criados para checklist {checklist.uuid}")
-        return itens_criados
-        
-    except Exception as e:
-        logger.error(f"❌ Erro ao criar itens do checklist {checklist.uuid}: {e}")
-        return 0
-
 def _notificar_checklists_gerados(total_checklists, total_equipamentos, data):
     """
     Envia notificação sobre checklists gerados
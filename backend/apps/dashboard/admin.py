@@ -17,8 +17,9 @@ class KPISnapshotAdmin(admin.ModelAdmin):
     actions = ['recalcular_kpis']
     
     def recalcular_kpis(self, request, queryset):
+        from .kpis import reconciliar_kpis
         for snapshot in queryset:
-            KPISnapshot.calcular_kpis_hoje()
+            reconciliar_kpis(snapshot.data_snapshot)
         self.message_user(request, 'KPIs recalculados com sucesso!')
     recalcular_kpis.short_description = 'Recalcular KPIs selecionados'
 
@@ -8,3 +8,6 @@ class DashboardConfig(AppConfig):
     name = 'backend.apps.dashboard'
     verbose_name = 'Dashboard'
 
+    def ready(self):
+        from .signals import conectar_signals
+        conectar_signals()
@@ -0,0 +1,430 @@
+# backend/apps/dashboard/kpis.py
+# ================================================================
+# STORE INCREMENTAL DE KPIs DO DASHBOARD
+# ================================================================
+#
+# O KPISnapshot do dia é a fonte de leitura do dashboard. Ele é montado
+# do zero uma vez (primeira leitura do dia ou reconciliação noturna) e,
+# entre uma reconstrução e outra, os signals de dashboard/signals.py
+# aplicam apenas a diferença que cada save/delete causa nos contadores.
+#
+# Cada regra de contribuição abaixo tem o seu equivalente agregado em
+# calcular_valores_kpis; as duas precisam contar a mesma coisa, senão a
+# reconciliação acusa divergência todos os dias.
+
+import logging
+from collections import OrderedDict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_DECIMAIS = ['contas_vencidas', 'contas_a_vencer', 'faturamento_mes']
+
+# Status das contas financeiras ainda em aberto
+STATUS_CONTAS_ABERTAS = ['pendente', 'vencido']
+
+LIMITE_ESTOQUE_BAIXO = 5
+
+# Janelas e agrupamentos aceitos pelo histórico
+JANELAS_HISTORICO = [7, 30, 90, 365]
+AGRUPAMENTOS_HISTORICO = ['diario', 'semanal', 'mensal']
+
+# Contadores que medem o movimento do próprio dia; são somados ao agrupar.
+# Os demais são posições (estoque de equipamentos, alertas, contas) e são
+# agrupados pela média e repetidos nos dias sem snapshot.
+CAMPOS_FLUXO = [
+    'checklists_pendentes', 'checklists_concluidos', 'checklists_com_problemas',
+    'movimentacoes_estoque',
+]
+
+
+# ================================================================
+# CÁLCULO COMPLETO (RECONSTRUÇÃO)
+# ================================================================
+
+def calcular_valores_kpis(hoje=None):
+    """
+    Calcula todos os KPIs do dia a partir das tabelas de origem
+
+    Usa uma query agregada por tabela em vez de um COUNT por métrica.
+
+    Returns:
+        dict: {campo_do_snapshot: valor}
+    """
+    hoje = hoje or date.today()
+    kpis = {
+        'total_equipamentos': 0,
+        'equipamentos_operacionais': 0,
+        'equipamentos_manutencao': 0,
+        'equipamentos_parados': 0,
+        'equipamentos_nr12_ativos': 0,
+        'checklists_pendentes': 0,
+        'checklists_concluidos': 0,
+        'checklists_com_problemas': 0,
+        'manutencoes_vencidas': 0,
+        'manutencoes_proximas': 0,
+        'alertas_criticos': 0,
+        'alertas_ativos': 0,
+        'contas_vencidas': Decimal('0'),
+        'contas_a_vencer': Decimal('0'),
+        'faturamento_mes': Decimal('0'),
+        'produtos_estoque_baixo': 0,
+        'movimentacoes_estoque': 0,
+    }
+
+    def preencher(valores):
+        kpis.update({campo: valor for campo, valor in valores.items() if valor is not None})
+
+    # Equipamentos
+    try:
+        from backend.apps.equipamentos.models import Equipamento
+
+        preencher(Equipamento.objects.filter(ativo=True).aggregate(
+            total_equipamentos=Count('id'),
+            equipamentos_operacionais=Count('id', filter=Q(status='OPERACIONAL')),
+            equipamentos_manutencao=Count('id', filter=Q(status='MANUTENCAO')),
+            equipamentos_parados=Count('id', filter=Q(status='PARADO')),
+            equipamentos_nr12_ativos=Count('id', filter=Q(ativo_nr12=True)),
+            manutencoes_vencidas=Count('id', filter=Q(proxima_manutencao_preventiva__lt=hoje)),
+            manutencoes_proximas=Count('id', filter=Q(
+                proxima_manutencao_preventiva__range=[hoje, hoje + timedelta(days=7)]
+            )),
+        ))
+    except Exception as e:
+        logger.error(f"Erro ao calcular KPIs de equipamentos: {e}")
+
+    # Checklists NR12 e alertas
+    try:
+        from backend.apps.nr12_checklist.models import ChecklistNR12, AlertaManutencao
+
+        preencher(ChecklistNR12.objects.filter(data_checklist=hoje).aggregate(
+            checklists_pendentes=Count('id', filter=Q(status='PENDENTE')),
+            checklists_concluidos=Count('id', filter=Q(status='CONCLUIDO')),
+            checklists_com_problemas=Count('id', filter=Q(status='CONCLUIDO', necessita_manutencao=True)),
+        ))
+        preencher(AlertaManutencao.objects.filter(status__in=['ATIVO', 'NOTIFICADO']).aggregate(
+            alertas_ativos=Count('id'),
+            alertas_criticos=Count('id', filter=Q(criticidade='CRITICA')),
+        ))
+    except Exception as e:
+        logger.error(f"Erro ao calcular KPIs de checklists: {e}")
+
+    # Financeiro
+    try:
+        from backend.apps.financeiro.models import ContaFinanceira
+
+        preencher(ContaFinanceira.objects.aggregate(
+            contas_vencidas=Sum('valor', filter=Q(
+                status__in=STATUS_CONTAS_ABERTAS, vencimento__lt=hoje
+            )),
+            contas_a_vencer=Sum('valor', filter=Q(
+                status__in=STATUS_CONTAS_ABERTAS,
+                vencimento__range=[hoje, hoje + timedelta(days=30)]
+            )),
+            faturamento_mes=Sum('valor', filter=Q(
+                tipo='receber', status='pago',
+                data_pagamento__year=hoje.year, data_pagamento__month=hoje.month
+            )),
+        ))
+    except Exception as e:
+        logger.error(f"Erro ao calcular KPIs financeiros: {e}")
+
+    # Estoque
+    try:
+        from backend.apps.almoxarifado.models import Produto, MovimentacaoEstoque
+
+        kpis['produtos_estoque_baixo'] = Produto.objects.filter(
+            estoque_atual__lt=LIMITE_ESTOQUE_BAIXO
+        ).count()
+        kpis['movimentacoes_estoque'] = MovimentacaoEstoque.objects.filter(
+            data__date=hoje
+        ).count()
+    except Exception as e:
+        logger.error(f"Erro ao calcular KPIs de estoque: {e}")
+
+    return kpis
+
+
+# ================================================================
+# CONTRIBUIÇÃO DE CADA REGISTRO (DELTAS)
+# ================================================================
+
+def _contribuicao_equipamento(eq, hoje):
+    if not eq.ativo:
+        return {}
+    proxima = eq.proxima_manutencao_preventiva
+    return {
+        'total_equipamentos': 1,
+        'equipamentos_operacionais': int(eq.status == 'OPERACIONAL'),
+        'equipamentos_manutencao': int(eq.status == 'MANUTENCAO'),
+        'equipamentos_parados': int(eq.status == 'PARADO'),
+        'equipamentos_nr12_ativos': int(bool(eq.ativo_nr12)),
+        'manutencoes_vencidas': int(proxima is not None and proxima < hoje),
+        'manutencoes_proximas': int(
+            proxima is not None and hoje <= proxima <= hoje + timedelta(days=7)
+        ),
+    }
+
+
+def _contribuicao_checklist(checklist, hoje):
+    if checklist.data_checklist != hoje:
+        return {}
+    concluido = checklist.status == 'CONCLUIDO'
+    return {
+        'checklists_pendentes': int(checklist.status == 'PENDENTE'),
+        'checklists_concluidos': int(concluido),
+        'checklists_com_problemas': int(concluido and checklist.necessita_manutencao),
+    }
+
+
+def _contribuicao_alerta(alerta, hoje):
+    if alerta.status not in ['ATIVO', 'NOTIFICADO']:
+        return {}
+    return {
+        'alertas_ativos': 1,
+        'alertas_criticos': int(alerta.criticidade == 'CRITICA'),
+    }
+
+
+def _contribuicao_conta(conta, hoje):
+    valor = Decimal(conta.valor or 0)
+    contribuicao = {}
+    if conta.status in STATUS_CONTAS_ABERTAS and conta.vencimento:
+        if conta.vencimento < hoje:
+            contribuicao['contas_vencidas'] = valor
+        elif conta.vencimento <= hoje + timedelta(days=30):
+            contribuicao['contas_a_vencer'] = valor
+    pagamento = conta.data_pagamento
+    if (conta.tipo == 'receber' and conta.status == 'pago' and pagamento
+            and (pagamento.year, pagamento.month) == (hoje.year, hoje.month)):
+        contribuicao['faturamento_mes'] = valor
+    return contribuicao
+
+
+def _contribuicao_produto(produto, hoje):
+    return {
+        'produtos_estoque_baixo': int(produto.estoque_atual < LIMITE_ESTOQUE_BAIXO),
+    }
+
+
+def _contribuicao_movimentacao(movimentacao, hoje):
+    if not movimentacao.data:
+        return {}
+    return {
+        'movimentacoes_estoque': int(timezone.localtime(movimentacao.data).date() == hoje),
+    }
+
+
+# label do model -> função (instância, hoje) -> {campo: valor}
+CONTRIBUICOES = {
+    'equipamentos.Equipamento': _contribuicao_equipamento,
+    'nr12_checklist.ChecklistNR12': _contribuicao_checklist,
+    'nr12_checklist.AlertaManutencao': _contribuicao_alerta,
+    'financeiro.ContaFinanceira': _contribuicao_conta,
+    'almoxarifado.Produto': _contribuicao_produto,
+    'almoxarifado.MovimentacaoEstoque': _contribuicao_movimentacao,
+}
+
+# label do model -> campos lidos pelas funções acima (estado anterior ao save)
+CAMPOS_CONTRIBUICAO = {
+    'equipamentos.Equipamento': ('ativo', 'status', 'ativo_nr12', 'proxima_manutencao_preventiva'),
+    'nr12_checklist.ChecklistNR12': ('data_checklist', 'status', 'necessita_manutencao'),
+    'nr12_checklist.AlertaManutencao': ('status', 'criticidade'),
+    'financeiro.ContaFinanceira': ('valor', 'status', 'vencimento', 'tipo', 'data_pagamento'),
+    'almoxarifado.Produto': ('estoque_atual',),
+    'almoxarifado.MovimentacaoEstoque': ('data',),
+}
+
+
+def contribuicao(instancia, hoje=None):
+    """Quanto a instância soma em cada contador do dia"""
+    if instancia is None:
+        return {}
+    regra = CONTRIBUICOES.get(instancia._meta.label)
+    if regra is None:
+        return {}
+    return regra(instancia, hoje or date.today())
+
+
+def diferenca(antes, depois):
+    """Delta entre duas contribuições, sem os campos que não mudaram"""
+    campos = set(antes) | set(depois)
+    delta = {campo: depois.get(campo, 0) - antes.get(campo, 0) for campo in campos}
+    return {campo: valor for campo, valor in delta.items() if valor}
+
+
+def aplicar_delta(delta, hoje=None):
+    """
+    Soma o delta ao snapshot do dia com um UPDATE atômico
+
+    Se o snapshot do dia ainda não existe, nada é feito: ele será montado
+    do zero na primeira leitura e já incluirá a alteração.
+    """
+    if not delta:
+        return 0
+
+    from .models import KPISnapshot, invalidar_resumo_dashboard
+
+    atualizados = KPISnapshot.objects.filter(data_snapshot=hoje or date.today()).update(
+        **{campo: F(campo) + valor for campo, valor in delta.items()}
+    )
+    if atualizados:
+        invalidar_resumo_dashboard()
+    return atualizados
+
+
+# ================================================================
+# LEITURA E RECONCILIAÇÃO
+# ================================================================
+
+def obter_snapshot_hoje():
+    """Snapshot do dia; monta do zero apenas se ainda não existir"""
+    from .models import KPISnapshot
+
+    snapshot = KPISnapshot.objects.filter(data_snapshot=date.today()).first()
+    if snapshot is None:
+        snapshot = KPISnapshot.calcular_kpis_hoje()
+    return snapshot
+
+
+def reconciliar_kpis(hoje=None):
+    """
+    Recalcula o snapshot do dia do zero e informa a divergência encontrada
+
+    Returns:
+        dict: {'data', 'divergencias': {campo: {'armazenado', 'calculado'}}}
+    """
+    from .models import KPISnapshot, invalidar_resumo_dashboard
+
+    hoje = hoje or date.today()
+    calculado = calcular_valores_kpis(hoje)
+    armazenado = KPISnapshot.objects.filter(data_snapshot=hoje).values(*calculado).first()
+
+    divergencias = {}
+    if armazenado is not None:
+        for campo, valor in calculado.items():
+            if Decimal(armazenado[campo]) != Decimal(valor):
+                divergencias[campo] = {
+                    'armazenado': float(armazenado[campo]),
+                    'calculado': float(valor),
+                }
+
+    KPISnapshot.objects.update_or_create(data_snapshot=hoje, defaults=calculado)
+    invalidar_resumo_dashboard()
+
+    if divergencias:
+        logger.warning(f"⚠️ KPIs de {hoje} divergentes: {divergencias}")
+    else:
+        logger.info(f"✅ KPIs de {hoje} reconciliados sem divergência")
+
+    return {
+        'data': hoje.isoformat(),
+        'snapshot_existia': armazenado is not None,
+        'divergencias': divergencias,
+    }
+
+
+# ================================================================
+# HISTÓRICO
+# ================================================================
+
+def _inicio_do_grupo(dia, agrupamento):
+    if agrupamento == 'semanal':
+        return dia - timedelta(days=dia.weekday())
+    if agrupamento == 'mensal':
+        return dia.replace(day=1)
+    return dia
+
+
+def historico_kpis(dias=7, agrupamento='diario', campos=None, fim=None):
+    """
+    Série histórica dos snapshots em uma única query por intervalo
+
+    Dias sem snapshot entram na série: campos de posição repetem o último
+    valor conhecido (inclusive de antes da janela, com uma consulta extra
+    limitada a uma linha) e campos de fluxo (CAMPOS_FLUXO) ficam None. No
+    agrupamento semanal/mensal, fluxos são somados e posições viram média.
+
+    Args:
+        dias (int): Tamanho da janela, terminando em `fim`
+        agrupamento (str): diario, semanal ou mensal
+        campos (list): Campos do snapshot (padrão: todos)
+        fim (date): Último dia da janela (padrão: hoje)
+
+    Returns:
+        list: [{'data': date, 'dias_com_dados': int, campo: valor, ...}]
+    """
+    from .models import KPISnapshot
+
+    if agrupamento not in AGRUPAMENTOS_HISTORICO:
+        raise ValueError(f"Agrupamento inválido: {agrupamento}")
+
+    campos_validos = [
+        f.name for f in KPISnapshot._meta.concrete_fields
+        if f.name not in ('id', 'data_snapshot', 'calculado_em')
+    ]
+    campos = list(campos or campos_validos)
+    invalidos = set(campos) - set(campos_validos)
+    if invalidos:
+        raise ValueError(f"Campos inválidos: {', '.join(sorted(invalidos))}")
+
+    fim = fim or date.today()
+    inicio = fim - timedelta(days=dias - 1)
+
+    por_dia = {
+        linha.pop('data_snapshot'): linha
+        for linha in KPISnapshot.objects.filter(
+            data_snapshot__range=[inicio, fim]
+        ).values('data_snapshot', *campos)
+    }
+
+    # Série diária contínua; sem snapshot no primeiro dia, parte do último anterior
+    ultimo = {}
+    if inicio not in por_dia:
+        ultimo = KPISnapshot.objects.filter(
+            data_snapshot__lt=inicio
+        ).order_by('-data_snapshot').values(*campos).first() or {}
+
+    serie = []
+    for i in range(dias):
+        dia = inicio + timedelta(days=i)
+        linha = por_dia.get(dia)
+        if linha is not None:
+            ultimo = linha
+            serie.append((dia, linha, True))
+        else:
+            serie.append((dia, {
+                campo: None if campo in CAMPOS_FLUXO else ultimo.get(campo)
+                for campo in campos
+            }, False))
+
+    # Agrupamento
+    grupos = OrderedDict()
+    for dia, linha, com_dados in serie:
+        grupos.setdefault(_inicio_do_grupo(dia, agrupamento), []).append((linha, com_dados))
+
+    pontos = []
+    for inicio_grupo, linhas in grupos.items():
+        ponto = {
+            'data': inicio_grupo,
+            'dias_com_dados': sum(1 for _, com_dados in linhas if com_dados),
+        }
+        for campo in campos:
+            valores = [linha[campo] for linha, _ in linhas if linha[campo] is not None]
+            if not valores:
+                ponto[campo] = None
+            elif campo in CAMPOS_FLUXO:
+                ponto[campo] = sum(valores)
+            elif len(valores) == 1:
+                ponto[campo] = valores[0]
+            else:
+                ponto[campo] = round(sum(valores) / len(valores), 2)
+            if isinstance(ponto[campo], Decimal):
+                ponto[campo] = float(ponto[campo])
+        pontos.append(ponto)
+
+    return pontos
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:32
+
+# Tabelas como já existiam em bancos criados com migrate --run-syncdb
+# (o app não tinha migrações): nesses bancos, migrate --fake-initial marca
+# esta migração como aplicada e roda só a 0002.
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KPISnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_snapshot', models.DateField(default=datetime.date.today, unique=True)),
+                ('total_equipamentos', models.IntegerField(default=0)),
+                ('equipamentos_operacionais', models.IntegerField(default=0)),
+                ('equipamentos_manutencao', models.IntegerField(default=0)),
+                ('equipamentos_parados', models.IntegerField(default=0)),
+                ('equipamentos_nr12_ativos', models.IntegerField(default=0)),
+                ('checklists_pendentes', models.IntegerField(default=0)),
+                ('checklists_concluidos', models.IntegerField(default=0)),
+                ('checklists_com_problemas', models.IntegerField(default=0)),
+                ('manutencoes_vencidas', models.IntegerField(default=0)),
+                ('manutencoes_proximas', models.IntegerField(default=0)),
+                ('alertas_criticos', models.IntegerField(default=0)),
+                ('alertas_ativos', models.IntegerField(default=0)),
+                ('contas_vencidas', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('contas_a_vencer', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('faturamento_mes', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('produtos_estoque_baixo', models.IntegerField(default=0)),
+                ('movimentacoes_estoque', models.IntegerField(default=0)),
+                ('calculado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Snapshot de KPIs',
+                'verbose_name_plural': 'Snapshots de KPIs',
+                'ordering': ['-data_snapshot'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MetricaPersonalizada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100)),
+                ('descricao', models.TextField(blank=True)),
+                ('tipo_calculo', models.CharField(choices=[('COUNT', 'Contagem'), ('SUM', 'Soma'), ('AVG', 'Média'), ('PERCENTAGE', 'Percentual')], max_length=15)),
+                ('query_sql', models.TextField(help_text='Query SQL para calcular a métrica')),
+                ('formato_numero', models.CharField(default='decimal', help_text='Formato: decimal, integer, currency, percentage', max_length=20)),
+                ('cor_fundo', models.CharField(default='#f8f9fa', max_length=7)),
+                ('icone', models.CharField(blank=True, max_length=50)),
+                ('ativo', models.BooleanField(default=True)),
+                ('ordem_exibicao', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Métrica Personalizada',
+                'verbose_name_plural': 'Métricas Personalizadas',
+                'ordering': ['ordem_exibicao', 'nome'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AlertaDashboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('EQUIPAMENTO', 'Equipamento'), ('CHECKLIST', 'Checklist'), ('MANUTENCAO', 'Manutenção'), ('FINANCEIRO', 'Financeiro'), ('ESTOQUE', 'Estoque'), ('SISTEMA', 'Sistema')], max_length=15)),
+                ('titulo', models.CharField(max_length=200)),
+                ('descricao', models.TextField()),
+                ('prioridade', models.CharField(choices=[('BAIXA', 'Baixa'), ('MEDIA', 'Média'), ('ALTA', 'Alta'), ('CRITICA', 'Crítica')], max_length=10)),
+                ('link_acao', models.URLField(blank=True, help_text='Link para ação do alerta')),
+                ('icone', models.CharField(blank=True, help_text='Ícone do alerta', max_length=50)),
+                ('ativo', models.BooleanField(default=True)),
+                ('exibir_ate', models.DateTimeField(blank=True, null=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Alerta do Dashboard',
+                'verbose_name_plural': 'Alertas do Dashboard',
+                'ordering': ['-prioridade', '-criado_em'],
+            },
+        ),
+    ]
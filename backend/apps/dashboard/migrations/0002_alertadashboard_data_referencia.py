@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alertadashboard',
+            name='data_referencia',
+            field=models.DateField(blank=True, help_text='Dia avaliado (apenas alertas gerados pelo avaliador automático)', null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='alertadashboard',
+            constraint=models.UniqueConstraint(fields=('tipo', 'data_referencia'), name='alerta_dashboard_tipo_dia'),
+        ),
+    ]
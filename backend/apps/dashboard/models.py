@@ -2,12 +2,19 @@
 # CORRIGIR backend/apps/dashboard/models.py
 # ================================================================
 
-from django.db import models
+import hashlib
+import json
+import logging
+
+from django.core.cache import cache
+from django.db import models, transaction
 from django.utils import timezone
 from datetime import date, timedelta
 from django.db.models import Count, Sum, Avg, Q
 from decimal import Decimal
 
+logger = logging.getLogger(__name__)
+
 class KPISnapshot(models.Model):
     """Snapshot diário dos KPIs para histórico"""
     
@@ -53,115 +60,11 @@ class KPISnapshot(models.Model):
     
     @classmethod
     def calcular_kpis_hoje(cls):
-        """Calcula e salva KPIs do dia atual"""
-        hoje = date.today()
-        
-        # Inicializar contadores
-        kpis = {
-            'total_equipamentos': 0,
-            'equipamentos_operacionais': 0,
-            'equipamentos_manutencao': 0,
-            'equipamentos_parados': 0,
-            'equipamentos_nr12_ativos': 0,
-            'checklists_pendentes': 0,
-            'checklists_concluidos': 0,
-            'checklists_com_problemas': 0,
-            'manutencoes_vencidas': 0,
-            'manutencoes_proximas': 0,
-            'alertas_criticos': 0,
-            'alertas_ativos': 0,
-            'contas_vencidas': 0,
-            'contas_a_vencer': 0,
-            'faturamento_mes': 0,
-            'produtos_estoque_baixo': 0,
-            'movimentacoes_estoque': 0,
-        }
-        
-        # Calcular KPIs de Equipamentos
-        try:
-            from backend.apps.equipamentos.models import Equipamento
-            equipamentos = Equipamento.objects.filter(ativo=True)
-            
-            kpis['total_equipamentos'] = equipamentos.count()
-            kpis['equipamentos_operacionais'] = equipamentos.filter(status='OPERACIONAL').count()
-            kpis['equipamentos_manutencao'] = equipamentos.filter(status='MANUTENCAO').count()
-            kpis['equipamentos_parados'] = equipamentos.filter(status='PARADO').count()
-            kpis['equipamentos_nr12_ativos'] = equipamentos.filter(ativo_nr12=True).count()
-            
-            # Manutenções
-            kpis['manutencoes_vencidas'] = equipamentos.filter(
-                proxima_manutencao_preventiva__lt=hoje
-            ).count()
-            kpis['manutencoes_proximas'] = equipamentos.filter(
-                proxima_manutencao_preventiva__range=[hoje, hoje + timedelta(days=7)]
-            ).count()
-            
-        except Exception as e:
-            print(f"Erro ao calcular KPIs de equipamentos: {e}")
-        
-        # Calcular KPIs de Checklists NR12
-        try:
-            from backend.apps.nr12_checklist.models import ChecklistNR12, AlertaManutencao
-            
-            kpis['checklists_pendentes'] = ChecklistNR12.objects.filter(
-                data_checklist=hoje, status='PENDENTE'
-            ).count()
-            kpis['checklists_concluidos'] = ChecklistNR12.objects.filter(
-                data_checklist=hoje, status='CONCLUIDO'
-            ).count()
-            kpis['checklists_com_problemas'] = ChecklistNR12.objects.filter(
-                data_checklist=hoje, status='CONCLUIDO', necessita_manutencao=True
-            ).count()
-            
-            # Alertas
-            alertas_ativos = AlertaManutencao.objects.filter(status__in=['ATIVO', 'NOTIFICADO'])
-            kpis['alertas_ativos'] = alertas_ativos.count()
-            kpis['alertas_criticos'] = alertas_ativos.filter(criticidade='CRITICA').count()
-            
-        except Exception as e:
-            print(f"Erro ao calcular KPIs de checklists: {e}")
-        
-        # Calcular KPIs Financeiros
-        try:
-            from backend.apps.financeiro.models import ContaFinanceira
-            
-            vencidas = ContaFinanceira.objects.filter(
-                status='VENCIDO'
-            ).aggregate(total=Sum('valor_restante'))['total'] or 0
-            
-            a_vencer = ContaFinanceira.objects.filter(
-                status='PENDENTE',
-                data_vencimento__range=[hoje, hoje + timedelta(days=30)]
-            ).aggregate(total=Sum('valor_restante'))['total'] or 0
-            
-            faturamento = ContaFinanceira.objects.filter(
-                tipo='RECEBER',
-                status='PAGO',
-                data_pagamento__month=hoje.month,
-                data_pagamento__year=hoje.year
-            ).aggregate(total=Sum('valor_pago'))['total'] or 0
-            
-            kpis['contas_vencidas'] = float(vencidas)
-            kpis['contas_a_vencer'] = float(a_vencer)
-            kpis['faturamento_mes'] = float(faturamento)
-            
-        except Exception as e:
-            print(f"Erro ao calcular KPIs financeiros: {e}")
+        """Calcula do zero e salva KPIs do dia atual"""
+        from .kpis import calcular_valores_kpis
         
-        # Calcular KPIs de Estoque
-        try:
-            from backend.apps.almoxarifado.models import Produto, MovimentacaoEstoque
-            
-            kpis['produtos_estoque_baixo'] = Produto.objects.filter(
-                estoque_atual__lt=5
-            ).count()
-            
-            kpis['movimentacoes_estoque'] = MovimentacaoEstoque.objects.filter(
-                data__date=hoje
-            ).count()
-            
-        except Exception as e:
-            print(f"Erro ao calcular KPIs de estoque: {e}")
+        hoje = date.today()
+        kpis = calcular_valores_kpis(hoje)
         
         # Salvar snapshot
         snapshot, created = cls.objects.update_or_create(
@@ -204,12 +107,23 @@ class AlertaDashboard(models.Model):
     # Controle
     ativo = models.BooleanField(default=True)
     exibir_ate = models.DateTimeField(null=True, blank=True)
+    data_referencia = models.DateField(
+        null=True, blank=True,
+        help_text="Dia avaliado (apenas alertas gerados pelo avaliador automático)"
+    )
     criado_em = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-prioridade', '-criado_em']
         verbose_name = 'Alerta do Dashboard'
         verbose_name_plural = 'Alertas do Dashboard'
+        constraints = [
+            # Um alerta automático por tipo e dia
+            models.UniqueConstraint(
+                fields=['tipo', 'data_referencia'],
+                name='alerta_dashboard_tipo_dia',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.get_prioridade_display()} - {self.titulo}"
@@ -298,21 +212,27 @@ class MetricaPersonalizada(models.Model):
 # FUNÇÕES AUXILIARES PARA O DASHBOARD
 # ================================================================
 
+CHAVE_CACHE_RESUMO = 'dashboard:resumo'
+TEMPO_CACHE_RESUMO = 60  # segundos
+
+
+def alertas_visiveis():
+    """Alertas ativos ainda dentro do prazo de exibição"""
+    return AlertaDashboard.objects.filter(ativo=True).filter(
+        Q(exibir_ate__isnull=True) | Q(exibir_ate__gte=timezone.now())
+    )
+
+
 def obter_resumo_dashboard():
     """Retorna resumo completo para o dashboard principal"""
     hoje = date.today()
     
-    # Tentar obter snapshot de hoje, senão calcular
-    try:
-        snapshot = KPISnapshot.objects.get(data_snapshot=hoje)
-    except KPISnapshot.DoesNotExist:
-        snapshot = KPISnapshot.calcular_kpis_hoje()
+    # Snapshot de hoje, mantido incrementalmente pelos signals
+    from .kpis import obter_snapshot_hoje
+    snapshot = obter_snapshot_hoje()
     
     # Alertas ativos
-    alertas = AlertaDashboard.objects.filter(
-        ativo=True,
-        exibir_ate__isnull=True
-    ).order_by('-prioridade')[:5]
+    alertas = alertas_visiveis().order_by('-prioridade')[:5]
     
     # Tendências (comparar com semana passada)
     semana_passada = hoje - timedelta(days=7)
@@ -367,6 +287,30 @@ def obter_resumo_dashboard():
     }
 
 
+def obter_resumo_dashboard_cache():
+    """
+    Resumo do dashboard servido do cache, com ETag do conteúdo
+
+    Returns:
+        tuple: (resumo, etag)
+    """
+    dados = cache.get(CHAVE_CACHE_RESUMO)
+    if dados is None:
+        resumo = obter_resumo_dashboard()
+        conteudo = json.dumps(resumo, sort_keys=True, default=str)
+        dados = {
+            'resumo': resumo,
+            'etag': hashlib.md5(conteudo.encode()).hexdigest(),
+        }
+        cache.set(CHAVE_CACHE_RESUMO, dados, TEMPO_CACHE_RESUMO)
+    return dados['resumo'], dados['etag']
+
+
+def invalidar_resumo_dashboard():
+    """Descarta o resumo em cache após mudança em KPIs ou alertas (no commit da transação atual)"""
+    transaction.on_commit(lambda: cache.delete(CHAVE_CACHE_RESUMO))
+
+
 def calcular_tendencia(valor_atual, valor_anterior):
     """Calcula tendência percentual entre dois valores"""
     if valor_anterior == 0:
@@ -375,82 +319,110 @@ def calcular_tendencia(valor_atual, valor_anterior):
     return round(((valor_atual - valor_anterior) / valor_anterior) * 100, 1)
 
 
+def _registrar_alerta_do_dia(tipo, hoje, disparado, **campos):
+    """
+    Upsert do alerta automático de um tipo no dia
+
+    Se a condição deixou de valer, o alerta do dia é removido. Um alerta
+    que o usuário já marcou como lido continua inativo enquanto a condição
+    persistir.
+
+    Returns:
+        bool: True se algo foi gravado
+    """
+    if not disparado:
+        removidos, _ = AlertaDashboard.objects.filter(tipo=tipo, data_referencia=hoje).delete()
+        return bool(removidos)
+
+    alerta, criado = AlertaDashboard.objects.get_or_create(
+        tipo=tipo,
+        data_referencia=hoje,
+        defaults=dict(campos, icone='⚠️'),
+    )
+    if criado:
+        return True
+
+    alterados = [campo for campo, valor in campos.items() if getattr(alerta, campo) != valor]
+    if alterados:
+        for campo in alterados:
+            setattr(alerta, campo, campos[campo])
+        alerta.save(update_fields=alterados)
+    return bool(alterados)
+
+
 def criar_alertas_automaticos():
-    """Cria alertas automáticos baseado no estado atual do sistema"""
+    """
+    Avalia o estado do sistema e mantém um alerta automático por tipo e dia
+
+    Executado em segundo plano (task verificar_alertas_manutencao); os
+    endpoints de leitura apenas consultam os alertas gravados.
+
+    Returns:
+        int: Quantidade de alertas criados, alterados ou removidos
+    """
+    from .kpis import STATUS_CONTAS_ABERTAS, obter_snapshot_hoje
+
     hoje = date.today()
-    
-    # Limpar alertas automáticos antigos
-    AlertaDashboard.objects.filter(
-        tipo='SISTEMA',
-        exibir_ate__lt=timezone.now()
-    ).delete()
-    
+    alteracoes = 0
+
+    # Alertas automáticos de dias anteriores saem de exibição
+    alteracoes += AlertaDashboard.objects.filter(
+        data_referencia__lt=hoje, ativo=True
+    ).update(ativo=False)
+
     try:
+        snapshot = obter_snapshot_hoje()
+
         # Alerta de checklists pendentes
-        from backend.apps.nr12_checklist.models import ChecklistNR12
-        
-        pendentes = ChecklistNR12.objects.filter(
-            data_checklist=hoje,
-            status='PENDENTE'
-        ).count()
-        
-        if pendentes > 10:
-            AlertaDashboard.criar_alerta_automatico(
-                tipo='CHECKLIST',
-                titulo=f"{pendentes} checklists pendentes hoje",
-                descricao=f"Existem {pendentes} checklists NR12 pendentes para hoje. Verifique se todos os equipamentos foram inspecionados.",
-                prioridade='ALTA',
-                link_acao='/admin/nr12_checklist/checklistnr12/?status=PENDENTE'
-            )
-        
+        pendentes = snapshot.checklists_pendentes
+        alteracoes += _registrar_alerta_do_dia(
+            'CHECKLIST', hoje, pendentes > 10,
+            titulo=f"{pendentes} checklists pendentes hoje",
+            descricao=f"Existem {pendentes} checklists NR12 pendentes para hoje. Verifique se todos os equipamentos foram inspecionados.",
+            prioridade='ALTA',
+            link_acao='/admin/nr12_checklist/checklistnr12/?status=PENDENTE'
+        )
+
         # Alerta de manutenções vencidas
-        from backend.apps.equipamentos.models import Equipamento
-        
-        vencidas = Equipamento.objects.filter(
-            ativo=True,
-            proxima_manutencao_preventiva__lt=hoje
-        ).count()
-        
-        if vencidas > 0:
-            AlertaDashboard.criar_alerta_automatico(
-                tipo='MANUTENCAO',
-                titulo=f"{vencidas} equipamentos com manutenção vencida",
-                descricao=f"{vencidas} equipamentos estão com manutenção preventiva vencida. Agende as manutenções urgentemente.",
-                prioridade='CRITICA',
-                link_acao='/admin/equipamentos/equipamento/'
-            )
-        
+        vencidas = snapshot.manutencoes_vencidas
+        alteracoes += _registrar_alerta_do_dia(
+            'MANUTENCAO', hoje, vencidas > 0,
+            titulo=f"{vencidas} equipamentos com manutenção vencida",
+            descricao=f"{vencidas} equipamentos estão com manutenção preventiva vencida. Agende as manutenções urgentemente.",
+            prioridade='CRITICA',
+            link_acao='/admin/equipamentos/equipamento/'
+        )
+
         # Alerta de estoque baixo
-        from backend.apps.almoxarifado.models import Produto
-        
-        estoque_baixo = Produto.objects.filter(estoque_atual__lt=5).count()
-        
-        if estoque_baixo > 0:
-            AlertaDashboard.criar_alerta_automatico(
-                tipo='ESTOQUE',
-                titulo=f"{estoque_baixo} produtos com estoque baixo",
-                descricao=f"{estoque_baixo} produtos estão com estoque abaixo de 5 unidades. Considere fazer pedidos de reposição.",
-                prioridade='MEDIA',
-                link_acao='/admin/almoxarifado/produto/'
-            )
-        
+        estoque_baixo = snapshot.produtos_estoque_baixo
+        alteracoes += _registrar_alerta_do_dia(
+            'ESTOQUE', hoje, estoque_baixo > 0,
+            titulo=f"{estoque_baixo} produtos com estoque baixo",
+            descricao=f"{estoque_baixo} produtos estão com estoque abaixo de 5 unidades. Considere fazer pedidos de reposição.",
+            prioridade='MEDIA',
+            link_acao='/admin/almoxarifado/produto/'
+        )
+
         # Alerta de contas vencidas
         from backend.apps.financeiro.models import ContaFinanceira
-        
+
         contas_vencidas = ContaFinanceira.objects.filter(
-            status='VENCIDO'
+            status__in=STATUS_CONTAS_ABERTAS,
+            vencimento__lt=hoje
         ).count()
-        
-        if contas_vencidas > 0:
-            AlertaDashboard.criar_alerta_automatico(
-                tipo='FINANCEIRO',
-                titulo=f"{contas_vencidas} contas vencidas",
-                descricao=f"Existem {contas_vencidas} contas financeiras vencidas que precisam de atenção.",
-                prioridade='ALTA',
-                link_acao='/admin/financeiro/contafinanceira/?status=VENCIDO'
-            )
-        
+        alteracoes += _registrar_alerta_do_dia(
+            'FINANCEIRO', hoje, contas_vencidas > 0,
+            titulo=f"{contas_vencidas} contas vencidas",
+            descricao=f"Existem {contas_vencidas} contas financeiras vencidas que precisam de atenção.",
+            prioridade='ALTA',
+            link_acao='/admin/financeiro/contafinanceira/?status=vencido'
+        )
+
     except Exception as e:
-        print(f"Erro ao criar alertas automáticos: {e}")
-    
-    print("✅ Alertas automáticos verificados e atualizados")
\ No newline at end of file
+        logger.error(f"❌ Erro ao avaliar alertas automáticos: {e}")
+
+    if alteracoes:
+        invalidar_resumo_dashboard()
+
+    logger.info(f"✅ Alertas automáticos verificados ({alteracoes} alterações)")
+    return alteracoes
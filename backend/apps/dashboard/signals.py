@@ -0,0 +1,75 @@
+# backend/apps/dashboard/signals.py
+# ================================================================
+# ATUALIZAÇÃO INCREMENTAL DOS KPIs DO DASHBOARD
+# ================================================================
+
+import logging
+from datetime import date
+
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from backend.apps.equipamentos.importacao import equipamentos_importados
+from backend.apps.nr12_checklist.gerador import checklists_gerados
+from backend.apps.shared.estado_anterior import estado_anterior, registrar_campos
+
+from .kpis import CAMPOS_CONTRIBUICAO, CONTRIBUICOES, aplicar_delta, contribuicao, diferenca
+
+logger = logging.getLogger(__name__)
+
+
+def _aplicar_alteracao(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        # Quanto o registro somava nos KPIs antes de ser salvo
+        antes = contribuicao(estado_anterior(instance))
+        aplicar_delta(diferenca(antes, contribuicao(instance)))
+    except Exception as e:
+        logger.error(f"❌ Erro ao atualizar KPIs ({sender.__name__}): {e}")
+
+
+def _aplicar_remocao(sender, instance, **kwargs):
+    try:
+        aplicar_delta(diferenca(contribuicao(instance), {}))
+    except Exception as e:
+        logger.error(f"❌ Erro ao atualizar KPIs ({sender.__name__}): {e}")
+
+
+def _aplicar_checklists_gerados(sender, data_checklist, quantidade, **kwargs):
+    """Checklists criados em lote entram como pendentes do dia"""
+    if data_checklist != date.today():
+        return
+    try:
+        aplicar_delta({'checklists_pendentes': quantidade})
+    except Exception as e:
+        logger.error(f"❌ Erro ao atualizar KPIs de checklists gerados: {e}")
+
+
+def _aplicar_equipamentos_importados(sender, equipamentos, **kwargs):
+    """Equipamentos importados em lote somam o que somariam pelo post_save"""
+    try:
+        total = {}
+        for equipamento in equipamentos:
+            for campo, valor in contribuicao(equipamento).items():
+                total[campo] = total.get(campo, 0) + valor
+        aplicar_delta(diferenca({}, total))
+    except Exception as e:
+        logger.error(f"❌ Erro ao atualizar KPIs de equipamentos importados: {e}")
+
+
+def conectar_signals():
+    """Conecta os handlers a todos os models que alimentam os KPIs"""
+    for label in CONTRIBUICOES:
+        model = apps.get_model(label)
+        uid = f'dashboard_kpis_{label}'
+        registrar_campos(model, CAMPOS_CONTRIBUICAO[label])
+        post_save.connect(_aplicar_alteracao, sender=model, dispatch_uid=uid)
+        post_delete.connect(_aplicar_remocao, sender=model, dispatch_uid=uid)
+
+    checklists_gerados.connect(
+        _aplicar_checklists_gerados, dispatch_uid='dashboard_kpis_checklists_gerados'
+    )
+    equipamentos_importados.connect(
+        _aplicar_equipamentos_importados, dispatch_uid='dashboard_kpis_equipamentos_importados'
+    )
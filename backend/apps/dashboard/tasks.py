@@ -7,6 +7,7 @@ from django.utils import timezone
 from datetime import date, timedelta
 from .models import KPISnapshot, criar_alertas_automaticos
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +22,25 @@ def calcular_kpis_diarios():
         logger.error(f"❌ Erro ao calcular KPIs: {e}")
         raise
 
+@shared_task
+def reconciliar_kpis_diarios():
+    """Reconstrói o snapshot do dia e registra divergências dos contadores incrementais"""
+    try:
+        from .kpis import reconciliar_kpis
+        resultado = reconciliar_kpis()
+        return resultado
+    except Exception as e:
+        logger.error(f"❌ Erro ao reconciliar KPIs: {e}")
+        raise
+
 @shared_task
 def gerar_checklists_automatico():
     """Task para gerar checklists automaticamente"""
     try:
-        from django.core.management import call_command
-        call_command('gerar_checklists_diarios')
+        from backend.apps.nr12_checklist.gerador import gerar_checklists_agendados
+        resultado = gerar_checklists_agendados()
         logger.info("✅ Checklists diários gerados automaticamente")
-        return "Checklists diários gerados"
+        return resultado
     except Exception as e:
         logger.error(f"❌ Erro ao gerar checklists: {e}")
         raise
@@ -100,23 +112,19 @@ def notificar_telegram_checklist_pendente():
 def backup_dados_importantes():
     """Task para backup de dados importantes"""
     try:
-        import json
-        from django.core import serializers
-        from backend.apps.equipamentos.models import Equipamento
-        from backend.apps.nr12_checklist.models import ChecklistNR12
+        from backend.apps.shared.backup import diretorio_padrao, executar_backup
         
-        # Fazer backup dos equipamentos
-        equipamentos = serializers.serialize('json', Equipamento.objects.all())
-        
-        # Fazer backup dos checklists dos últimos 30 dias
-        data_corte = date.today() - timedelta(days=30)
-        checklists = serializers.serialize(
-            'json', 
-            ChecklistNR12.objects.filter(data_checklist__gte=data_corte)
+        # Equipamentos completos e checklists dos últimos 30 dias, em
+        # subdiretório próprio: backup parcial não serve de base para incrementais
+        metadata = executar_backup(
+            modelos=[
+                ('equipamentos', 'equipamentos.Equipamento', None),
+                ('checklists', 'nr12_checklist.ChecklistNR12', 'data_checklist'),
+            ],
+            destino=os.path.join(diretorio_padrao(), 'dados_importantes'),
+            dias=30,
         )
-        
-        # Salvar backups (você pode implementar envio para S3, etc.)
-        timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = os.path.basename(metadata['diretorio'])
         
         logger.info(f"✅ Backup realizado: {timestamp}")
         return f"Backup realizado: {timestamp}"
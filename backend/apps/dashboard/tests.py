@@ -0,0 +1,21 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from .kpis import historico_kpis
+from .models import KPISnapshot
+
+
+class HistoricoKpisTest(TestCase):
+
+    def test_lacuna_no_inicio_parte_do_snapshot_anterior(self):
+        fim = date(2026, 10, 16)
+        KPISnapshot.objects.create(data_snapshot=fim - timedelta(days=10), total_equipamentos=8, checklists_pendentes=4)
+        KPISnapshot.objects.create(data_snapshot=fim - timedelta(days=1), total_equipamentos=9, checklists_pendentes=2)
+
+        with self.assertNumQueries(2):
+            pontos = historico_kpis(dias=7, campos=['total_equipamentos', 'checklists_pendentes'], fim=fim)
+
+        self.assertEqual([p['total_equipamentos'] for p in pontos], [8, 8, 8, 8, 8, 9, 9])
+        # Fluxos não são repetidos: dia sem snapshot não teve movimento conhecido
+        self.assertEqual([p['checklists_pendentes'] for p in pontos], [None] * 5 + [2, None])
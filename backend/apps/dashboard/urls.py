@@ -14,12 +14,16 @@ urlpatterns = [
     
     # APIs para dados específicos
     path('api/kpis/', views.kpis_api, name='kpis_api'),
+    path('api/kpis/historico/', views.kpis_historico, name='kpis_historico'),
     path('api/equipamentos/', views.equipamentos_resumo, name='equipamentos_api'),
     path('api/checklists/', views.checklist_resumo, name='checklists_api'),
     path('api/financeiro/', views.financeiro_resumo, name='financeiro_api'),
     path('api/estoque/', views.estoque_resumo, name='estoque_api'),
     path('api/alertas/', views.alertas_dashboard, name='alertas_api'),
     
+    # Monitoramento
+    path('api/cache/', views.cache_estatisticas, name='cache_estatisticas'),
+    
     # Ações
     path('api/recalcular-kpis/', views.recalcular_kpis, name='recalcular_kpis'),
     path('api/alertas/<int:alerta_id>/marcar-lido/', views.marcar_alerta_lido, name='marcar_alerta_lido'),
@@ -9,28 +9,44 @@ from django.shortcuts import render
 from django.db.models import Count, Sum, Q
 from datetime import date, timedelta, datetime
 from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
-from .models import KPISnapshot, AlertaDashboard, obter_resumo_dashboard, criar_alertas_automaticos
+from .models import (
+    KPISnapshot, AlertaDashboard, alertas_visiveis, criar_alertas_automaticos,
+    invalidar_resumo_dashboard, obter_resumo_dashboard_cache
+)
+from backend.apps.shared.cache_resumos import estatisticas_cache, obter_resumo
+from .kpis import JANELAS_HISTORICO, historico_kpis, obter_snapshot_hoje, reconciliar_kpis
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def dashboard_principal(request):
-    """API principal do dashboard"""
+    """
+    API principal do dashboard
+    
+    Somente leitura: os alertas automáticos são avaliados em segundo plano.
+    Responde 304 quando o If-None-Match do cliente bate com o ETag atual.
+    """
     try:
-        # Atualizar alertas automáticos
-        criar_alertas_automaticos()
-        
-        # Obter resumo completo
-        resumo = obter_resumo_dashboard()
+        resumo, etag = obter_resumo_dashboard_cache()
+        etag = quote_etag(etag)
+        
+        etags_cliente = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in etags_cliente or '*' in etags_cliente:
+            response = Response(status=304)
+        else:
+            response = Response({
+                'success': True,
+                'data': resumo,
+                'timestamp': timezone.now().isoformat()
+            })
         
-        return Response({
-            'success': True,
-            'data': resumo,
-            'timestamp': timezone.now().isoformat()
-        })
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
         
     except Exception as e:
         return Response({
@@ -44,53 +60,47 @@ def dashboard_principal(request):
 def kpis_api(request):
     """API com KPIs em tempo real"""
     try:
-        # Calcular KPIs atuais
-        snapshot = KPISnapshot.calcular_kpis_hoje()
+        # KPIs atuais, mantidos incrementalmente pelos signals
+        snapshot = obter_snapshot_hoje()
         
         # Dados adicionais
         hoje = date.today()
         
-        # Tendências (comparar com semana passada)
-        semana_passada = hoje - timedelta(days=7)
-        snapshot_anterior = KPISnapshot.objects.filter(
-            data_snapshot=semana_passada
-        ).first()
+        # Histórico de 8 dias em uma query: o primeiro ponto é a semana
+        # passada (tendências), os 7 últimos alimentam o gráfico
+        campos_numericos = [
+            'total_equipamentos', 'equipamentos_operacionais', 
+            'checklists_concluidos', 'alertas_criticos'
+        ]
+        historico = historico_kpis(
+            dias=8, campos=campos_numericos + ['checklists_pendentes']
+        )
+        snapshot_anterior = historico[0]
         
         # Calcular tendências
         tendencias = {}
-        if snapshot_anterior:
-            campos_numericos = [
-                'total_equipamentos', 'equipamentos_operacionais', 
-                'checklists_concluidos', 'alertas_criticos'
-            ]
+        if snapshot_anterior['dias_com_dados']:
             for campo in campos_numericos:
                 atual = getattr(snapshot, campo, 0)
-                anterior = getattr(snapshot_anterior, campo, 0)
+                anterior = snapshot_anterior[campo] or 0
                 if anterior > 0:
                     tendencias[campo] = round(((atual - anterior) / anterior) * 100, 1)
                 else:
                     tendencias[campo] = 0
         
-        # Dados para gráficos
-        ultimos_7_dias = []
-        for i in range(7):
-            data = hoje - timedelta(days=i)
-            snap = KPISnapshot.objects.filter(data_snapshot=data).first()
-            if snap:
-                ultimos_7_dias.append({
-                    'data': data.strftime('%d/%m'),
-                    'checklists_concluidos': snap.checklists_concluidos,
-                    'checklists_pendentes': snap.checklists_pendentes,
-                    'equipamentos_operacionais': snap.equipamentos_operacionais
-                })
-        
-        ultimos_7_dias.reverse()  # Ordem cronológica
+        # Dados para gráficos (ordem cronológica)
+        ultimos_7_dias = [
+            {
+                'data': ponto['data'].strftime('%d/%m'),
+                'checklists_concluidos': ponto['checklists_concluidos'],
+                'checklists_pendentes': ponto['checklists_pendentes'],
+                'equipamentos_operacionais': ponto['equipamentos_operacionais']
+            }
+            for ponto in historico[1:]
+        ]
         
         # Alertas ativos
-        alertas = AlertaDashboard.objects.filter(
-            ativo=True,
-            exibir_ate__isnull=True  # Ou maior que agora
-        )[:5]
+        alertas = alertas_visiveis()[:5]
         
         alertas_data = []
         for alerta in alertas:
@@ -153,50 +163,90 @@ def kpis_api(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def equipamentos_resumo(request):
-    """Resumo detalhado dos equipamentos"""
+def kpis_historico(request):
+    """
+    Histórico dos KPIs para gráficos
+    
+    Parâmetros: dias (7, 30, 90 ou 365), agrupamento (diario, semanal,
+    mensal) e campos (lista separada por vírgula; padrão: todos).
+    """
     try:
-        from backend.apps.equipamentos.models import Equipamento
-        
-        # Equipamentos por status
-        por_status = Equipamento.objects.filter(ativo=True).values('status').annotate(
-            total=Count('id')
-        ).order_by('-total')
-        
-        # Equipamentos por categoria
-        por_categoria = Equipamento.objects.filter(ativo=True).values(
-            'categoria__nome', 'categoria__codigo'
-        ).annotate(
-            total=Count('id'),
-            operacionais=Count('id', filter=Q(status='OPERACIONAL')),
-            manutencao=Count('id', filter=Q(status='MANUTENCAO'))
-        ).order_by('-total')
-        
-        # Equipamentos com manutenção próxima
-        hoje = date.today()
-        manutencao_proxima = Equipamento.objects.filter(
-            ativo=True,
-            proxima_manutencao_preventiva__range=[hoje, hoje + timedelta(days=30)]
-        ).select_related('categoria').order_by('proxima_manutencao_preventiva')[:10]
-        
-        manutencao_data = []
-        for eq in manutencao_proxima:
-            dias = (eq.proxima_manutencao_preventiva - hoje).days
-            manutencao_data.append({
-                'id': eq.id,
-                'codigo': eq.codigo,
-                'nome': eq.nome,
-                'categoria': eq.categoria.nome if eq.categoria else 'Sem categoria',
-                'dias_restantes': dias,
-                'urgente': dias <= 7,
-                'data_manutencao': eq.proxima_manutencao_preventiva.isoformat()
-            })
-        
+        dias = int(request.query_params.get('dias', 7))
+    except ValueError:
+        dias = None
+    agrupamento = request.query_params.get('agrupamento', 'diario')
+    campos = [c for c in request.query_params.get('campos', '').split(',') if c] or None
+    
+    if dias not in JANELAS_HISTORICO:
         return Response({
-            'por_status': list(por_status),
-            'por_categoria': list(por_categoria),
-            'manutencao_proxima': manutencao_data
+            'error': f"Parâmetro 'dias' deve ser um de {JANELAS_HISTORICO}"
+        }, status=400)
+    
+    try:
+        pontos = historico_kpis(dias=dias, agrupamento=agrupamento, campos=campos)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    
+    for ponto in pontos:
+        ponto['data'] = ponto['data'].isoformat()
+    
+    return Response({
+        'dias': dias,
+        'agrupamento': agrupamento,
+        'total': len(pontos),
+        'pontos': pontos
+    })
+
+def _calcular_equipamentos_resumo():
+    """Resumo detalhado dos equipamentos (sem cache)"""
+    from backend.apps.equipamentos.models import Equipamento
+    
+    # Equipamentos por status
+    por_status = Equipamento.objects.filter(ativo=True).values('status').annotate(
+        total=Count('id')
+    ).order_by('-total')
+    
+    # Equipamentos por categoria
+    por_categoria = Equipamento.objects.filter(ativo=True).values(
+        'categoria__nome', 'categoria__codigo'
+    ).annotate(
+        total=Count('id'),
+        operacionais=Count('id', filter=Q(status='OPERACIONAL')),
+        manutencao=Count('id', filter=Q(status='MANUTENCAO'))
+    ).order_by('-total')
+    
+    # Equipamentos com manutenção próxima
+    hoje = date.today()
+    manutencao_proxima = Equipamento.objects.filter(
+        ativo=True,
+        proxima_manutencao_preventiva__range=[hoje, hoje + timedelta(days=30)]
+    ).select_related('categoria').order_by('proxima_manutencao_preventiva')[:10]
+    
+    manutencao_data = []
+    for eq in manutencao_proxima:
+        dias = (eq.proxima_manutencao_preventiva - hoje).days
+        manutencao_data.append({
+            'id': eq.id,
+            'codigo': eq.codigo,
+            'nome': eq.nome,
+            'categoria': eq.categoria.nome if eq.categoria else 'Sem categoria',
+            'dias_restantes': dias,
+            'urgente': dias <= 7,
+            'data_manutencao': eq.proxima_manutencao_preventiva.isoformat()
         })
+    
+    return {
+        'por_status': list(por_status),
+        'por_categoria': list(por_categoria),
+        'manutencao_proxima': manutencao_data
+    }
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def equipamentos_resumo(request):
+    """Resumo detalhado dos equipamentos"""
+    try:
+        return Response(obter_resumo('dashboard_equipamentos', _calcular_equipamentos_resumo))
         
     except Exception as e:
         return Response({
@@ -204,49 +254,60 @@ def equipamentos_resumo(request):
             'message': str(e)
         }, status=500)
 
+def _calcular_checklist_resumo():
+    """Resumo dos checklists NR12 (sem cache)"""
+    from backend.apps.nr12_checklist.models import ChecklistNR12
+    
+    hoje = date.today()
+    
+    # Checklists de hoje
+    hoje_stats = ChecklistNR12.objects.filter(data_checklist=hoje).aggregate(
+        total=Count('id'),
+        pendentes=Count('id', filter=Q(status='PENDENTE')),
+        concluidos=Count('id', filter=Q(status='CONCLUIDO')),
+        problemas=Count('id', filter=Q(status='CONCLUIDO', necessita_manutencao=True))
+    )
+    
+    # Últimos 7 dias
+    semana_passada = hoje - timedelta(days=7)
+    ultimos_7_dias = ChecklistNR12.objects.filter(
+        data_checklist__gte=semana_passada
+    ).values('data_checklist').annotate(
+        total=Count('id'),
+        concluidos=Count('id', filter=Q(status='CONCLUIDO')),
+        problemas=Count('id', filter=Q(necessita_manutencao=True))
+    ).order_by('data_checklist')
+    
+    # Performance por equipamento
+    performance = ChecklistNR12.objects.filter(
+        data_checklist__gte=semana_passada,
+        status='CONCLUIDO'
+    ).values(
+        'equipamento_id', 'equipamento__nome', 'equipamento__categoria__prefixo_codigo'
+    ).annotate(
+        total_checklists=Count('id'),
+        com_problemas=Count('id', filter=Q(necessita_manutencao=True))
+    ).order_by('-total_checklists')[:10]
+    
+    # Equipamento.codigo é uma property (prefixo da categoria + id)
+    performance_data = []
+    for linha in performance:
+        prefixo = linha.pop('equipamento__categoria__prefixo_codigo') or 'EQ'
+        linha['equipamento__codigo'] = f"{prefixo}{linha.pop('equipamento_id'):04d}"
+        performance_data.append(linha)
+    
+    return {
+        'hoje': hoje_stats,
+        'ultimos_7_dias': list(ultimos_7_dias),
+        'performance_equipamentos': performance_data
+    }
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def checklist_resumo(request):
     """Resumo dos checklists NR12"""
     try:
-        from backend.apps.nr12_checklist.models import ChecklistNR12
-        
-        hoje = date.today()
-        
-        # Checklists de hoje
-        hoje_stats = ChecklistNR12.objects.filter(data_checklist=hoje).aggregate(
-            total=Count('id'),
-            pendentes=Count('id', filter=Q(status='PENDENTE')),
-            concluidos=Count('id', filter=Q(status='CONCLUIDO')),
-            problemas=Count('id', filter=Q(status='CONCLUIDO', necessita_manutencao=True))
-        )
-        
-        # Últimos 7 dias
-        semana_passada = hoje - timedelta(days=7)
-        ultimos_7_dias = ChecklistNR12.objects.filter(
-            data_checklist__gte=semana_passada
-        ).values('data_checklist').annotate(
-            total=Count('id'),
-            concluidos=Count('id', filter=Q(status='CONCLUIDO')),
-            problemas=Count('id', filter=Q(necessita_manutencao=True))
-        ).order_by('data_checklist')
-        
-        # Performance por equipamento
-        performance = ChecklistNR12.objects.filter(
-            data_checklist__gte=semana_passada,
-            status='CONCLUIDO'
-        ).values(
-            'equipamento__codigo', 'equipamento__nome'
-        ).annotate(
-            total_checklists=Count('id'),
-            com_problemas=Count('id', filter=Q(necessita_manutencao=True))
-        ).order_by('-total_checklists')[:10]
-        
-        return Response({
-            'hoje': hoje_stats,
-            'ultimos_7_dias': list(ultimos_7_dias),
-            'performance_equipamentos': list(performance)
-        })
+        return Response(obter_resumo('dashboard_checklists', _calcular_checklist_resumo))
         
     except Exception as e:
         return Response({
@@ -257,16 +318,18 @@ def checklist_resumo(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def recalcular_kpis(request):
-    """Força recálculo dos KPIs"""
+    """Força recálculo dos KPIs e informa divergências do valor incremental"""
     try:
-        snapshot = KPISnapshot.calcular_kpis_hoje()
+        resultado = reconciliar_kpis()
         criar_alertas_automaticos()
+        snapshot = KPISnapshot.objects.get(data_snapshot=date.today())
         
         return Response({
             'success': True,
             'message': 'KPIs recalculados com sucesso',
             'data_snapshot': snapshot.data_snapshot,
-            'calculado_em': snapshot.calculado_em.isoformat()
+            'calculado_em': snapshot.calculado_em.isoformat(),
+            'divergencias': resultado['divergencias']
         })
         
     except Exception as e:
@@ -275,65 +338,68 @@ def recalcular_kpis(request):
             'error': str(e)
         }, status=500)
 
+def _calcular_financeiro_resumo():
+    """Resumo financeiro (sem cache)"""
+    from backend.apps.financeiro.models import ContaFinanceira
+    
+    hoje = date.today()
+    
+    # Contas por status
+    contas_stats = ContaFinanceira.objects.aggregate(
+        total_pendentes=Count('id', filter=Q(status='pendente')),
+        total_vencidas=Count('id', filter=Q(status='vencido')),
+        total_pagas=Count('id', filter=Q(status='pago')),
+        valor_vencido=Sum('valor', filter=Q(status='vencido')),
+        valor_pendente=Sum('valor', filter=Q(status='pendente')),
+    )
+    
+    # Contas a vencer nos próximos 30 dias
+    proximas_vencer = ContaFinanceira.objects.filter(
+        status='pendente',
+        vencimento__range=[hoje, hoje + timedelta(days=30)]
+    ).order_by('vencimento')[:10]
+    
+    vencimentos_data = []
+    for conta in proximas_vencer:
+        dias = (conta.vencimento - hoje).days
+        vencimentos_data.append({
+            'id': conta.id,
+            'descricao': conta.descricao,
+            'valor': float(conta.valor),
+            'data_vencimento': conta.vencimento.isoformat(),
+            'dias_restantes': dias,
+            'urgente': dias <= 7,
+            'tipo': conta.tipo
+        })
+    
+    # Faturamento mensal
+    faturamento_mensal = ContaFinanceira.objects.filter(
+        tipo='receber',
+        status='pago',
+        data_pagamento__month=hoje.month,
+        data_pagamento__year=hoje.year
+    ).aggregate(
+        total=Sum('valor')
+    )
+    
+    return {
+        'contas_stats': {
+            'pendentes': contas_stats['total_pendentes'],
+            'vencidas': contas_stats['total_vencidas'],
+            'pagas': contas_stats['total_pagas'],
+            'valor_vencido': float(contas_stats['valor_vencido'] or 0),
+            'valor_pendente': float(contas_stats['valor_pendente'] or 0),
+        },
+        'proximas_vencer': vencimentos_data,
+        'faturamento_mes': float(faturamento_mensal['total'] or 0)
+    }
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def financeiro_resumo(request):
     """Resumo financeiro"""
     try:
-        from backend.apps.financeiro.models import ContaFinanceira
-        
-        hoje = date.today()
-        
-        # Contas por status
-        contas_stats = ContaFinanceira.objects.aggregate(
-            total_pendentes=Count('id', filter=Q(status='PENDENTE')),
-            total_vencidas=Count('id', filter=Q(status='VENCIDO')),
-            total_pagas=Count('id', filter=Q(status='PAGO')),
-            valor_vencido=Sum('valor_restante', filter=Q(status='VENCIDO')) or 0,
-            valor_pendente=Sum('valor_restante', filter=Q(status='PENDENTE')) or 0,
-        )
-        
-        # Contas a vencer nos próximos 30 dias
-        proximas_vencer = ContaFinanceira.objects.filter(
-            status='PENDENTE',
-            data_vencimento__range=[hoje, hoje + timedelta(days=30)]
-        ).order_by('data_vencimento')[:10]
-        
-        vencimentos_data = []
-        for conta in proximas_vencer:
-            dias = (conta.data_vencimento - hoje).days
-            vencimentos_data.append({
-                'id': conta.id,
-                'numero': conta.numero,
-                'descricao': conta.descricao,
-                'valor': float(conta.valor_restante),
-                'data_vencimento': conta.data_vencimento.isoformat(),
-                'dias_restantes': dias,
-                'urgente': dias <= 7,
-                'tipo': conta.tipo
-            })
-        
-        # Faturamento mensal
-        faturamento_mensal = ContaFinanceira.objects.filter(
-            tipo='RECEBER',
-            status='PAGO',
-            data_pagamento__month=hoje.month,
-            data_pagamento__year=hoje.year
-        ).aggregate(
-            total=Sum('valor_pago') or 0
-        )
-        
-        return Response({
-            'contas_stats': {
-                'pendentes': contas_stats['total_pendentes'],
-                'vencidas': contas_stats['total_vencidas'],
-                'pagas': contas_stats['total_pagas'],
-                'valor_vencido': float(contas_stats['valor_vencido']),
-                'valor_pendente': float(contas_stats['valor_pendente']),
-            },
-            'proximas_vencer': vencimentos_data,
-            'faturamento_mes': float(faturamento_mensal['total'])
-        })
+        return Response(obter_resumo('dashboard_financeiro', _calcular_financeiro_resumo))
         
     except Exception as e:
         return Response({
@@ -407,6 +473,15 @@ def estoque_resumo(request):
             'message': str(e)
         }, status=500)
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_estatisticas(request):
+    """Contadores de hit/miss do cache dos resumos"""
+    return Response({
+        'resumos': estatisticas_cache(),
+        'timestamp': timezone.now().isoformat()
+    })
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def alertas_dashboard(request):
@@ -448,6 +523,7 @@ def marcar_alerta_lido(request, alerta_id):
         alerta = AlertaDashboard.objects.get(id=alerta_id)
         alerta.ativo = False
         alerta.save()
+        invalidar_resumo_dashboard()
         
         return Response({
             'success': True,
@@ -470,9 +546,8 @@ def marcar_alerta_lido(request, alerta_id):
 def dashboard_completo(request):
     """Dashboard completo com todos os dados"""
     try:
-        # Calcular KPIs atuais
-        snapshot = KPISnapshot.calcular_kpis_hoje()
-        criar_alertas_automaticos()
+        # KPIs atuais, mantidos incrementalmente pelos signals
+        snapshot = obter_snapshot_hoje()
         
         # Obter dados de todas as APIs
         kpis_data = kpis_api(request).data
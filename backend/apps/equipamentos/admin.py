@@ -5,6 +5,7 @@
 
 from django.contrib import admin
 from django import forms
+from django.db import transaction
 from django.utils.html import format_html
 from django.urls import reverse
 from .models import Equipamento, CategoriaEquipamento
@@ -179,29 +180,40 @@ class EquipamentoAdmin(admin.ModelAdmin):
     actions = ['gerar_qr_codes', 'ativar_nr12', 'desativar_nr12']
 
     def gerar_qr_codes(self, request, queryset):
-        """Ação para gerar QR codes dos equipamentos selecionados"""
-        gerados = 0
-        for equipamento in queryset:
-            try:
-                equipamento.gerar_qr_png()
-                gerados += 1
-            except Exception as e:
-                self.message_user(
-                    request,
-                    f"Erro ao gerar QR para {equipamento.nome}: {str(e)}",
-                    level='ERROR'
-                )
-        
-        if gerados > 0:
+        """Ação para gerar QR codes dos equipamentos selecionados (um lote só)"""
+        from backend.apps.equipamentos.tasks import gerar_qr_equipamentos
+
+        resultado = gerar_qr_equipamentos(list(queryset.values_list('pk', flat=True)))
+        if resultado['erros']:
+            self.message_user(
+                request,
+                f"Erro ao gerar {resultado['erros']} QR code(s); veja o log",
+                level='ERROR'
+            )
+
+        if resultado['gerados'] > 0:
             self.message_user(
                 request,
-                f"✅ {gerados} QR code(s) gerado(s) com sucesso!"
+                f"✅ {resultado['gerados']} QR code(s) gerado(s) com sucesso!"
             )
     gerar_qr_codes.short_description = "🔗 Gerar QR Codes"
 
+    def _alterar_nr12(self, queryset, ativo):
+        """
+        Salva um a um (só os que mudam): queryset.update() pularia os signals
+        que invalidam o escopo dos operadores, os KPIs e os resumos em cache
+        """
+        alterados = 0
+        with transaction.atomic():
+            for equipamento in queryset.exclude(ativo_nr12=ativo):
+                equipamento.ativo_nr12 = ativo
+                equipamento.save(update_fields=['ativo_nr12'])
+                alterados += 1
+        return alterados
+
     def ativar_nr12(self, request, queryset):
         """Ativa NR12 para equipamentos selecionados"""
-        updated = queryset.update(ativo_nr12=True)
+        updated = self._alterar_nr12(queryset, True)
         self.message_user(
             request,
             f"✅ {updated} equipamento(s) ativado(s) para NR12"
@@ -210,7 +222,7 @@ class EquipamentoAdmin(admin.ModelAdmin):
 
     def desativar_nr12(self, request, queryset):
         """Desativa NR12 para equipamentos selecionados"""
-        updated = queryset.update(ativo_nr12=False)
+        updated = self._alterar_nr12(queryset, False)
         self.message_user(
             request,
             f"❌ {updated} equipamento(s) desativado(s) para NR12"
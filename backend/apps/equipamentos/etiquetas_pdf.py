@@ -0,0 +1,183 @@
+# ================================================================
+# ARQUIVO: backend/apps/equipamentos/etiquetas_pdf.py
+# Folhas de etiquetas QR (PDF vetorial) geradas em streaming
+# ================================================================
+#
+# O canvas do ReportLab guarda o documento inteiro até o save(), então uma
+# frota com centenas de equipamentos ocupa memória proporcional ao número
+# de etiquetas e só começa a ser enviada no fim. Aqui o PDF é escrito
+# objeto a objeto: cada folha A4 é montada, comprimida e entregue ao
+# StreamingHttpResponse antes da próxima; o que fica em memória até o fim
+# são só os offsets da tabela xref (um inteiro por objeto).
+#
+# Os QR codes são desenhados como retângulos (um por sequência horizontal
+# de módulos, shared/qr_render.modulos_qr), sem imagens embutidas: a
+# etiqueta imprime nítida em qualquer tamanho e a folha fica pequena. Os
+# textos usam as fontes padrão do PDF (Helvetica), que não são embutidas.
+
+import zlib
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from backend.apps.shared import qr_render
+
+# Etiquetas por folha A4
+COLUNAS_ETIQUETAS = 3
+LINHAS_ETIQUETAS = 4
+
+MARGEM = 1 * cm
+ESPACAMENTO = 0.3 * cm
+FONTE_TITULO = 10
+FONTE_TEXTO = 8
+
+# Objetos fixos; as folhas começam em PRIMEIRO_OBJETO_FOLHA
+_CATALOGO, _PAGINAS, _FONTE, _FONTE_NEGRITO = 1, 2, 3, 4
+PRIMEIRO_OBJETO_FOLHA = 5
+
+_CORES = {'black': '0 g', 'gray': '0.45 g'}
+
+
+def _winansi(texto):
+    """Texto restrito ao WinAnsi das fontes padrão (caracteres fora dele viram '?')"""
+    return texto.encode('cp1252', errors='replace').decode('cp1252')
+
+
+def _texto_pdf(texto):
+    """String literal PDF; o conteúdo é gravado em latin-1, byte a byte igual ao cp1252"""
+    codificado = _winansi(texto).encode('cp1252').decode('latin-1')
+    return '(' + codificado.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+
+def _numero(valor):
+    return f"{valor:.2f}".rstrip('0').rstrip('.')
+
+
+def _desenhar_etiqueta(payload, x, y, largura, altura):
+    """Operadores PDF de uma etiqueta com canto inferior esquerdo em (x, y)"""
+    linhas = payload.linhas()
+    altura_textos = FONTE_TITULO + 4 + (FONTE_TEXTO + 3) * (len(linhas) - 1) if linhas else 0
+    lado = min(largura, altura - altura_textos) - 2 * ESPACAMENTO
+
+    sequencias, modulos = qr_render.modulos_qr(payload.dados, payload.correcao)
+    modulo = lado / modulos
+    qr_x = x + (largura - lado) / 2
+    qr_topo = y + altura - ESPACAMENTO
+
+    partes = [
+        # Contorno de corte
+        f"q 0.85 G 0.5 w {_numero(x)} {_numero(y)} {_numero(largura)} {_numero(altura)} re S Q",
+        "0 g",
+    ]
+    for coluna, linha, comprimento in sequencias:
+        partes.append(
+            f"{_numero(qr_x + coluna * modulo)} {_numero(qr_topo - (linha + 1) * modulo)} "
+            f"{_numero(comprimento * modulo)} {_numero(modulo)} re"
+        )
+    partes.append("f")
+
+    base = qr_topo - lado - FONTE_TITULO
+    for indice, (texto, cor, pequena) in enumerate(linhas):
+        fonte, tamanho = ('F1', FONTE_TEXTO) if pequena else ('F2', FONTE_TITULO)
+        nome_fonte = 'Helvetica' if pequena else 'Helvetica-Bold'
+        largura_texto = stringWidth(_winansi(texto), nome_fonte, tamanho)
+        texto_x = x + max((largura - largura_texto) / 2, ESPACAMENTO)
+        partes.append(
+            f"{_CORES.get(cor, '0 g')} BT /{fonte} {tamanho} Tf "
+            f"{_numero(texto_x)} {_numero(base)} Td {_texto_pdf(texto)} Tj ET"
+        )
+        base -= (FONTE_TITULO + 4) if indice == 0 else (FONTE_TEXTO + 3)
+
+    return partes
+
+
+def _folha(payloads):
+    """Conteúdo (bytes) de uma folha com até COLUNAS x LINHAS etiquetas"""
+    largura_pagina, altura_pagina = A4
+    largura = (largura_pagina - 2 * MARGEM) / COLUNAS_ETIQUETAS
+    altura = (altura_pagina - 2 * MARGEM) / LINHAS_ETIQUETAS
+
+    partes = []
+    for posicao, payload in enumerate(payloads):
+        coluna, linha = posicao % COLUNAS_ETIQUETAS, posicao // COLUNAS_ETIQUETAS
+        x = MARGEM + coluna * largura
+        y = altura_pagina - MARGEM - (linha + 1) * altura
+        partes.extend(_desenhar_etiqueta(payload, x, y, largura, altura))
+
+    return '\n'.join(partes).encode('latin-1')
+
+
+def _agrupar(objetos, tamanho):
+    grupo = []
+    for objeto in objetos:
+        grupo.append(objeto)
+        if len(grupo) == tamanho:
+            yield grupo
+            grupo = []
+    if grupo:
+        yield grupo
+
+
+def gerar_etiquetas_pdf(payloads, titulo='Etiquetas QR'):
+    """
+    Escreve o PDF das etiquetas em pedaços (bytes), uma folha por vez
+
+    Args:
+        payloads: Iterável de payloads de QR (shared/qr_render), consumido
+            aos poucos — pode vir de um QuerySet.iterator()
+        titulo: Título do documento
+
+    Yields:
+        bytes: Partes do arquivo PDF, na ordem
+    """
+    offsets = {}
+    posicao = 0
+
+    def escrever(dados):
+        nonlocal posicao
+        posicao += len(dados)
+        return dados
+
+    def objeto(numero, corpo):
+        offsets[numero] = posicao
+        return escrever(f"{numero} 0 obj\n".encode() + corpo + b"\nendobj\n")
+
+    yield escrever(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    yield objeto(_CATALOGO, f"<< /Type /Catalog /Pages {_PAGINAS} 0 R >>".encode())
+    yield objeto(_FONTE, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    yield objeto(_FONTE_NEGRITO, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    largura_pagina, altura_pagina = A4
+    recursos = f"<< /Font << /F1 {_FONTE} 0 R /F2 {_FONTE_NEGRITO} 0 R >> >>"
+    folhas = []
+    numero = PRIMEIRO_OBJETO_FOLHA
+
+    for grupo in _agrupar(payloads, COLUNAS_ETIQUETAS * LINHAS_ETIQUETAS):
+        conteudo = zlib.compress(_folha(grupo))
+        yield objeto(
+            numero,
+            f"<< /Length {len(conteudo)} /Filter /FlateDecode >>\nstream\n".encode()
+            + conteudo + b"\nendstream"
+        )
+        yield objeto(numero + 1, (
+            f"<< /Type /Page /Parent {_PAGINAS} 0 R "
+            f"/MediaBox [0 0 {_numero(largura_pagina)} {_numero(altura_pagina)}] "
+            f"/Resources {recursos} /Contents {numero} 0 R >>"
+        ).encode())
+        folhas.append(numero + 1)
+        numero += 2
+
+    kids = ' '.join(f"{folha} 0 R" for folha in folhas)
+    yield objeto(_PAGINAS, f"<< /Type /Pages /Kids [{kids}] /Count {len(folhas)} >>".encode())
+    info = numero
+    yield objeto(info, f"<< /Title {_texto_pdf(titulo)} /Producer (Mandacaru) >>".encode('latin-1'))
+
+    inicio_xref = posicao
+    linhas_xref = [f"xref\n0 {info + 1}\n", "0000000000 65535 f \n"]
+    linhas_xref.extend(f"{offsets[n]:010d} 00000 n \n" for n in range(1, info + 1))
+    yield escrever(''.join(linhas_xref).encode())
+    yield escrever((
+        f"trailer\n<< /Size {info + 1} /Root {_CATALOGO} 0 R /Info {info} 0 R >>\n"
+        f"startxref\n{inicio_xref}\n%%EOF\n"
+    ).encode())
@@ -0,0 +1,101 @@
+# ================================================================
+# ARQUIVO: backend/apps/equipamentos/importacao.py
+# Importação de equipamentos em lote
+# ================================================================
+#
+# Equipamento.objects.create() agenda, para cada linha, uma tarefa de QR
+# code e outra de checklists. Na importação os equipamentos são gravados
+# com bulk_create (sem save() nem post_save) e cada lote gravado dispara
+# uma única tarefa de cada tipo com todos os IDs do lote. KPIs do dashboard
+# e cache de resumos acompanham cada lote pelo signal equipamentos_importados.
+
+import csv
+import logging
+from datetime import date
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.dispatch import Signal
+
+from backend.apps.equipamentos.models import Equipamento
+from backend.apps.equipamentos.tasks import gerar_checklists_equipamentos, gerar_qr_equipamentos
+from backend.apps.shared.tarefas import disparar_apos_commit
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 500
+
+# Enviado após cada lote gravado via bulk_create, que não dispara post_save.
+# kwargs: equipamentos (lista dos Equipamento criados)
+equipamentos_importados = Signal()
+
+
+def importar_equipamentos(equipamentos, tamanho_lote=TAMANHO_LOTE):
+    """
+    Grava equipamentos novos em lotes e agenda QR codes e checklists por lote
+
+    Args:
+        equipamentos: Iterável de Equipamento ainda não salvos
+        tamanho_lote (int): Equipamentos por transação e por tarefa
+
+    Returns:
+        dict: {'importados': int, 'lotes': int}
+    """
+    equipamentos = iter(equipamentos)
+    stats = {'importados': 0, 'lotes': 0}
+
+    while True:
+        lote = list(islice(equipamentos, tamanho_lote))
+        if not lote:
+            break
+
+        with transaction.atomic():
+            criados = Equipamento.objects.bulk_create(lote)
+            ids = [equipamento.pk for equipamento in criados]
+            disparar_apos_commit(gerar_qr_equipamentos, ids)
+            com_nr12 = [e.pk for e in criados if e.ativo_nr12 and e.tipo_nr12_id]
+            if com_nr12:
+                disparar_apos_commit(gerar_checklists_equipamentos, com_nr12, date.today().isoformat())
+            equipamentos_importados.send(sender=Equipamento, equipamentos=criados)
+
+        stats['importados'] += len(criados)
+        stats['lotes'] += 1
+
+    logger.info(f"📥 {stats['importados']} equipamentos importados em {stats['lotes']} lotes")
+    return stats
+
+
+def equipamentos_do_csv(arquivo):
+    """
+    Equipamentos (não salvos) a partir de um CSV com cabeçalho
+
+    As colunas são nomes de campos do modelo; chaves estrangeiras usam o ID
+    (categoria_id, cliente_id, empreendimento_id, tipo_nr12_id) e
+    frequencias_checklist é separada por vírgula (ex.: "DIARIA,SEMANAL").
+    Colunas vazias ficam com o valor padrão do campo. As chaves estrangeiras
+    são conferidas pelo banco no commit do lote, não linha a linha.
+    """
+    campos = {campo.attname for campo in Equipamento._meta.concrete_fields}
+    sem_validacao = ['qr_code'] + [
+        campo.name for campo in Equipamento._meta.concrete_fields if campo.is_relation
+    ]
+    for numero, linha in enumerate(csv.DictReader(arquivo), start=2):
+        valores = {
+            coluna: valor.strip()
+            for coluna, valor in linha.items()
+            if coluna in campos and valor and valor.strip()
+        }
+        if 'frequencias_checklist' in valores:
+            valores['frequencias_checklist'] = [
+                f.strip().upper() for f in valores['frequencias_checklist'].split(',') if f.strip()
+            ]
+        if 'ativo_nr12' in valores:
+            valores['ativo_nr12'] = valores['ativo_nr12'].lower() in ('1', 'true', 'sim', 's')
+
+        equipamento = Equipamento(**valores)
+        try:
+            equipamento.full_clean(exclude=sem_validacao, validate_unique=False)
+        except ValidationError as e:
+            raise ValueError(f"Linha {numero}: {e}") from e
+        yield equipamento
@@ -0,0 +1,27 @@
+# backend/apps/equipamentos/management/commands/importar_equipamentos.py
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.apps.equipamentos.importacao import (
+    TAMANHO_LOTE, equipamentos_do_csv, importar_equipamentos
+)
+
+
+class Command(BaseCommand):
+    help = 'Importa equipamentos de um CSV em lotes (QR codes e checklists gerados por lote no worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='CSV com cabeçalho (nomes dos campos do modelo)')
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help='Equipamentos por lote')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"📥 Importando equipamentos de {options['arquivo']}...")
+
+        try:
+            with open(options['arquivo'], newline='', encoding='utf-8-sig') as arquivo:
+                stats = importar_equipamentos(equipamentos_do_csv(arquivo), options['lote'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {stats['importados']} equipamentos importados em {stats['lotes']} lotes"
+        ))
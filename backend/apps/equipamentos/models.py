@@ -230,14 +230,18 @@ class Equipamento(EquipamentoQRMixin, models.Model):
     @property
     def bot_link(self):
         """Link direto para bot telegram"""
-        return f"https://t.me/{settings.TELEGRAM_BOT_USERNAME}?start=eq{self.id}"
+        from backend.apps.shared.qr_render import PayloadEquipamento
+        return PayloadEquipamento(self).dados
 
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         super().save(*args, **kwargs)
         if is_new:
-            # só depois do primeiro save teremos um ID definido
-            self.gerar_qr_png()
+            # QR code gerado pelo worker depois do commit (equipamentos/tasks.py)
+            from backend.apps.equipamentos.tasks import gerar_qr_equipamentos
+            from backend.apps.shared.tarefas import disparar_apos_commit
+
+            disparar_apos_commit(gerar_qr_equipamentos, [self.pk], using=kwargs.get('using'))
 
     def get_tipo_nr12(self):
         """Retorna o tipo NR12 do equipamento"""
@@ -3,13 +3,8 @@
 # backend/apps/equipamentos/qr_mixins.py (ou backend/apps/abastecimento/qr_mixins.py)
 # ================================================================
 
-import os
-import qrcode
-from io import BytesIO
 from django.db import models
 from django.conf import settings
-from django.core.files.base import ContentFile
-from PIL import Image
 
 class EquipamentoQRMixin(models.Model):
     """
@@ -27,48 +22,20 @@ class EquipamentoQRMixin(models.Model):
         abstract = True
 
     def gerar_qr_png(self):
-        """Gera QR code PNG com URL padronizada para bot"""
-        # ✅ URL PADRONIZADA PARA BOT
-        url = f"{settings.BASE_URL}/bot/equipamento/{self.id}/"
+        """Gera QR code PNG com o link padronizado do bot (cache compartilhado)"""
+        from backend.apps.shared import qr_render
 
-        # Tamanho da célula do QR
-        box_size = {
-            'small': 4,
-            'medium': 8,
-            'large': 12
-        }.get(getattr(settings, 'QR_DEFAULT_SIZE', 'medium'), 8)
-
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=box_size,
-            border=4
+        tamanho = getattr(settings, 'QR_DEFAULT_SIZE', 'medium')
+        payload = qr_render.PayloadEquipamento(self)
+        registro, _ = qr_render.obter_qr(
+            payload, tamanho, incluir_logo=getattr(settings, 'QR_INCLUDE_LOGO', False)
         )
-        qr.add_data(url)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
-
-        # Inserir logo se configurado
-        if getattr(settings, 'QR_INCLUDE_LOGO', False):
-            logo_path = getattr(settings, 'QR_LOGO_PATH', None)
-            if logo_path and os.path.exists(logo_path):
-                logo = Image.open(logo_path).convert("RGBA")
-                # Dimensiona o logo para 1/4 do QR
-                w, h = img.size
-                logo.thumbnail((w//4, h//4), Image.Resampling.LANCZOS)
-                pos = ((w - logo.width) // 2, (h - logo.height) // 2)
-                img.paste(logo, pos, mask=logo)
-
-        # Salvar em memória
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        filename = f"equip_{self.id}.png"
-
-        # Atualizar o campo qr_code sem disparar novo save completo
-        self.qr_code.save(filename, ContentFile(buffer.getvalue()), save=False)
 
-        # Persistir apenas o campo qr_code
+        # O campo só aponta para o arquivo do cache, sem novo save completo;
+        # a referência do campo mantém o arquivo vivo na limpeza do cache
+        self.qr_code.name = registro.arquivo
         super().save(update_fields=['qr_code'])
+        qr_render.referenciar([(payload, registro)], campo=True)
 
     @property
     def qr_url_completa(self):
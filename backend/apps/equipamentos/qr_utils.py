@@ -3,7 +3,6 @@
 # Utilitários para QR Codes - NOVO ARQUIVO
 # ===============================================
 
-import qrcode
 import json
 import uuid
 from io import BytesIO
@@ -12,6 +11,8 @@ from django.utils import timezone
 from typing import Dict, Any, Optional
 import logging
 
+from backend.apps.shared import qr_render
+
 logger = logging.getLogger(__name__)
 
 class QRCodeGenerator:
@@ -43,22 +44,8 @@ class QRCodeGenerator:
             # Gerar QR Code
             qr_text = json.dumps(qr_data, ensure_ascii=False)
             
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_M,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_text)
-            qr.make(fit=True)
-            
-            # Gerar imagem
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Salvar em BytesIO para retornar
-            img_buffer = BytesIO()
-            img.save(img_buffer, format='PNG')
-            img_buffer.seek(0)
+            # PNG sem cache: o JSON tem timestamp e muda a cada geração
+            img_buffer = BytesIO(qr_render.renderizar_simples(qr_text))
             
             # Salvar dados no equipamento
             equipamento.qr_code_data = qr_data
@@ -105,20 +92,8 @@ class QRCodeGenerator:
             # Gerar QR Code
             qr_text = json.dumps(qr_data, ensure_ascii=False)
             
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_M,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_text)
-            qr.make(fit=True)
-            
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            img_buffer = BytesIO()
-            img.save(img_buffer, format='PNG')
-            img_buffer.seek(0)
+            # PNG sem cache: o JSON tem timestamp e muda a cada geração
+            img_buffer = BytesIO(qr_render.renderizar_simples(qr_text))
             
             logger.info(f"✅ QR Code gerado para checklist {checklist.id}")
             
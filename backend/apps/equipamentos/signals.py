@@ -1,43 +1,31 @@
+from datetime import date
+
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.utils import timezone
 
 from backend.apps.equipamentos.models import Equipamento
-from backend.apps.nr12_checklist.models import (
-    ChecklistNR12,
-    ItemChecklistPadrao,
-    ItemChecklistRealizado
-)
+from backend.apps.equipamentos.tasks import gerar_checklists_equipamentos
+from backend.apps.shared.tarefas import disparar_apos_commit
+
+# Campos que mudam quais checklists o equipamento deve ter
+CAMPOS_CHECKLIST = {'ativo_nr12', 'tipo_nr12', 'frequencias_checklist'}
+
 
 @receiver(post_save, sender=Equipamento)
-def gerar_checklists_automaticamente(sender, instance, created, **kwargs):
+def gerar_checklists_automaticamente(sender, instance, created, update_fields=None, using=None, **kwargs):
     """
-    Ao salvar um equipamento, gera automaticamente checklists NR12 para cada
-    frequência marcada (DIARIA, SEMANAL, MENSAL), vinculando os itens padrão.
+    Ao salvar um equipamento, agenda para depois do commit a geração dos
+    checklists NR12 de hoje para as frequências marcadas (DIARIA, SEMANAL,
+    MENSAL) que o calendário prevê para a data.
+
+    Saves parciais que não tocam os campos de NR12 (qr_code, uso pelo
+    operador) não agendam nada.
     """
-    if not instance.ativo_nr12 or not instance.tipo_nr12:
+    if not instance.ativo_nr12 or not instance.tipo_nr12_id:
+        return
+    if update_fields is not None and not CAMPOS_CHECKLIST.intersection(update_fields):
         return
 
-    frequencias = instance.frequencias_checklist or []
-    hoje = timezone.now().date()
-
-    for freq in frequencias:
-        checklist, criado = ChecklistNR12.objects.get_or_create(
-            equipamento=instance,
-            data_checklist=hoje,
-            turno='MANHA',
-            defaults={
-                'status': 'PENDENTE',
-                'frequencia': freq
-            }
-        )
-        if criado:
-            itens_padrao = ItemChecklistPadrao.objects.filter(
-                tipo_equipamento=instance.tipo_nr12
-            )
-            for item in itens_padrao:
-                ItemChecklistRealizado.objects.create(
-                    checklist=checklist,
-                    item_padrao=item,
-                    status='PENDENTE'
-                )
+    disparar_apos_commit(
+        gerar_checklists_equipamentos, [instance.pk], date.today().isoformat(), using=using
+    )
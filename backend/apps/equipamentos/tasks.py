@@ -0,0 +1,88 @@
+# ================================================================
+# ARQUIVO: backend/apps/equipamentos/tasks.py
+# Efeitos colaterais da criação de equipamentos, fora da requisição
+# ================================================================
+#
+# Equipamento.save() e o sinal post_save só agendam estas tarefas (via
+# shared/tarefas.disparar_apos_commit); o QR code e os checklists do dia
+# são gerados pelo worker depois do commit. As tarefas recebem listas de
+# IDs, então a importação em lote (importacao.py) dispara uma tarefa por
+# lote em vez de uma por equipamento.
+
+import logging
+from datetime import date
+
+from celery import shared_task
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def gerar_qr_equipamentos(ids):
+    """
+    Gera (ou reaproveita do cache) o QR code dos equipamentos e grava o campo qr_code
+
+    Returns:
+        dict: {'gerados': int, 'erros': int}
+    """
+    from backend.apps.equipamentos.models import Equipamento
+    from backend.apps.shared import qr_render
+
+    equipamentos = Equipamento.objects.filter(pk__in=ids).select_related('cliente')
+    payloads = [qr_render.PayloadEquipamento(equipamento) for equipamento in equipamentos]
+
+    atualizados = []
+    referencias = []
+    erros = 0
+    lote = qr_render.obter_lote(
+        payloads, getattr(settings, 'QR_DEFAULT_SIZE', 'medium'),
+        incluir_logo=getattr(settings, 'QR_INCLUDE_LOGO', False)
+    )
+    for payload, registro, _, erro in lote:
+        if erro is not None:
+            logger.error(f"❌ Erro ao gerar QR do equipamento {payload.objeto.pk}: {erro}")
+            erros += 1
+            continue
+        # O campo só aponta para o arquivo do cache
+        payload.objeto.qr_code.name = registro.arquivo
+        atualizados.append(payload.objeto)
+        referencias.append((payload, registro))
+
+    # bulk_update não dispara post_save: não reagenda checklists
+    Equipamento.objects.bulk_update(atualizados, ['qr_code'], batch_size=500)
+    # Referência própria do campo: outra renderização do equipamento não a move
+    qr_render.referenciar(referencias, campo=True)
+    logger.info(f"🔗 QR codes de {len(atualizados)} equipamentos gerados ({erros} erros)")
+    return {'gerados': len(atualizados), 'erros': erros}
+
+
+@shared_task
+def gerar_checklists_equipamentos(ids, data_checklist=None):
+    """
+    Gera os checklists do dia para os equipamentos informados
+
+    Usa o mesmo motor da geração agendada (nr12_checklist/gerador.py), uma
+    vez por frequência do dia para o lote inteiro. Equipamentos já cobertos
+    não recebem checklist repetido.
+
+    Args:
+        ids: IDs dos equipamentos
+        data_checklist (str): Data ISO dos checklists (padrão: hoje)
+
+    Returns:
+        dict: {frequencia: checklists criados}
+    """
+    from backend.apps.equipamentos.models import Equipamento
+    from backend.apps.nr12_checklist.gerador import calendario, gerar_checklists_em_lote
+
+    data_checklist = date.fromisoformat(data_checklist) if data_checklist else date.today()
+    equipamentos = Equipamento.objects.filter(pk__in=ids, ativo_nr12=True)
+
+    return {
+        frequencia: gerar_checklists_em_lote(
+            frequencia, data_checklist,
+            equipamentos=equipamentos.filter(frequencias_checklist__contains=[frequencia]),
+        )['checklists_criados']
+        for frequencia in calendario.frequencias_do_dia(data_checklist)
+    }
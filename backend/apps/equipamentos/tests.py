@@ -0,0 +1,74 @@
+import re
+import tempfile
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from backend.apps.clientes.models import Cliente
+from backend.apps.empreendimentos.models import Empreendimento
+from backend.apps.nr12_checklist.models import TipoEquipamentoNR12
+from .etiquetas_pdf import COLUNAS_ETIQUETAS, LINHAS_ETIQUETAS
+from .models import CategoriaEquipamento, Equipamento
+from .views import etiquetas_qr_pdf
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), QR_INCLUDE_LOGO=False, CELERY_TASK_ALWAYS_EAGER=True)
+class EtiquetasPdfTest(TestCase):
+    """Folhas de etiquetas QR escritas em streaming"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = Cliente.objects.create(
+            razao_social='Ação (Nordeste)', cnpj='00000000000400', rua='Rua A',
+            numero='1', bairro='Centro', cidade='Cidade', estado='SP', cep='00000-000'
+        )
+        empreendimento = Empreendimento.objects.create(
+            cliente=cls.cliente, nome='Obra', endereco='Rua B', cidade='Cidade',
+            estado='SP', cep='00000-000', distancia_km=10
+        )
+        categoria = CategoriaEquipamento.objects.create(
+            codigo='ESC', nome='Escavadeira', prefixo_codigo='ESC'
+        )
+        tipo = TipoEquipamentoNR12.objects.create(nome='Escavadeira')
+        # Uma folha cheia e mais uma etiqueta
+        for indice in range(COLUNAS_ETIQUETAS * LINHAS_ETIQUETAS + 1):
+            Equipamento.objects.create(
+                nome=f'Pá (nº {indice:02d})', categoria=categoria, cliente=cls.cliente,
+                empreendimento=empreendimento, tipo_nr12=tipo
+            )
+        cls.usuario = get_user_model().objects.create(username='etiquetas')
+
+    def _baixar(self, **params):
+        request = APIRequestFactory().get('/api/equipamentos/etiquetas-qr/', params)
+        force_authenticate(request, user=self.usuario)
+        return etiquetas_qr_pdf(request)
+
+    def test_folhas_e_xref_consistentes(self):
+        resposta = self._baixar(cliente=self.cliente.pk)
+        self.assertEqual(resposta.status_code, 200)
+        pdf = b''.join(resposta.streaming_content)
+
+        self.assertEqual(len(re.findall(rb'/Type /Page ', pdf)), 2)
+        self.assertIn(b'/Count 2', pdf)
+
+        # Cada entrada da xref aponta para o início do objeto correspondente
+        inicio_xref = int(re.search(rb'startxref\n(\d+)\n%%EOF', pdf).group(1))
+        self.assertTrue(pdf[inicio_xref:].startswith(b'xref\n'))
+        cabecalho, _, resto = pdf[inicio_xref + len(b'xref\n'):].partition(b'\n0000000000 65535 f \n')
+        total = int(cabecalho.split()[1])
+        offsets = [int(linha[:10]) for linha in resto.split(b'\n')[:total - 1]]
+        for numero, offset in enumerate(offsets, start=1):
+            self.assertTrue(pdf[offset:].startswith(f'{numero} 0 obj\n'.encode()), numero)
+
+        # Texto em WinAnsi com parênteses escapados
+        conteudo = b''.join(
+            zlib.decompress(stream) for stream in re.findall(rb'stream\n(.*?)\nendstream', pdf, re.S)
+        )
+        for texto in ('(Pá \\(nº 00\\)) Tj', '(Ação \\(Nordeste\\)) Tj'):
+            self.assertTrue(texto.encode('cp1252') in conteudo, texto)
+
+    def test_filtro_nao_numerico(self):
+        self.assertEqual(self._baixar(cliente='abc').status_code, 400)
+        self.assertEqual(self._baixar(empreendimento='1.5').status_code, 400)
@@ -11,6 +11,8 @@ router = DefaultRouter()
 router.register(r'', EquipamentoViewSet)
 
 urlpatterns = [
+    # Antes do router: a rota de detalhe do router aceitaria "etiquetas-qr" como pk
+    path('etiquetas-qr/', views.etiquetas_qr_pdf, name='etiquetas_qr_pdf'),
     path('', include(router.urls)),
     path('<int:equipamento_id>/qr-pdf/', gerar_qr_pdf, name='qr_code_pdf'),
     path('por-uuid/<uuid:uuid>/', views.equipamento_por_uuid, name='equipamento-por-uuid'),
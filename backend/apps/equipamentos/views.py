@@ -1,15 +1,17 @@
 # backend/apps/equipamentos/views.py
-from django.http import Http404, HttpResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
 from reportlab.pdfgen import canvas
 from rest_framework import viewsets
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 import os
 
+from backend.apps.shared.qr_render import PayloadEquipamento
+from .etiquetas_pdf import gerar_etiquetas_pdf
 from .models import Equipamento
 from .serializers import EquipamentoSerializer
 
@@ -74,6 +76,49 @@ def gerar_qr_pdf(request, equipamento_id):
     return response
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def etiquetas_qr_pdf(request):
+    """Folhas A4 de etiquetas QR (vetoriais) dos equipamentos de um cliente ou empreendimento.
+
+    Query params: cliente, empreendimento e ativos (apenas ativos NR12, padrão 1).
+    O PDF é enviado em streaming, uma folha por vez.
+    """
+
+    try:
+        cliente_id = int(request.query_params["cliente"]) if request.query_params.get("cliente") else None
+        empreendimento_id = (
+            int(request.query_params["empreendimento"]) if request.query_params.get("empreendimento") else None
+        )
+    except ValueError:
+        return Response({"error": "cliente e empreendimento devem ser ids numéricos"}, status=400)
+    if hasattr(request.user, "cliente") and request.user.cliente:
+        cliente_id = request.user.cliente.id
+
+    if not (cliente_id or empreendimento_id):
+        return Response({"error": "Informe cliente ou empreendimento"}, status=400)
+
+    equipamentos = Equipamento.objects.select_related("cliente").order_by("empreendimento_id", "nome", "id")
+    if cliente_id:
+        equipamentos = equipamentos.filter(cliente_id=cliente_id)
+    if empreendimento_id:
+        equipamentos = equipamentos.filter(empreendimento_id=empreendimento_id)
+    if request.query_params.get("ativos", "1") != "0":
+        equipamentos = equipamentos.filter(ativo_nr12=True)
+
+    if not equipamentos.exists():
+        return Response({"error": "Nenhum equipamento encontrado"}, status=404)
+
+    payloads = (PayloadEquipamento(equipamento) for equipamento in equipamentos.iterator(chunk_size=200))
+    response = StreamingHttpResponse(
+        gerar_etiquetas_pdf(payloads, titulo="Etiquetas QR - Equipamentos"),
+        content_type="application/pdf",
+    )
+    sufixo = f"empreendimento_{empreendimento_id}" if empreendimento_id else f"cliente_{cliente_id}"
+    response["Content-Disposition"] = f"attachment; filename=etiquetas_qr_{sufixo}.pdf"
+    return response
+
+
 # \U0001f310 APIs públicas
 
 @api_view(["GET"])
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from datetime import date, timedelta
@@ -142,30 +142,26 @@ class ContaFinanceira(models.Model):
         return f"{self.numero} - {self.descricao} - R$ {self.valor_original}"
     
     def save(self, *args, **kwargs):
-        if not self.numero:
-            self.numero = self._gerar_numero()
-        
         # Atualizar status baseado no pagamento
         self._atualizar_status()
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if not self.numero:
+                self.numero = self._gerar_numero()
+            super().save(*args, **kwargs)
     
     def _gerar_numero(self):
         """Gera número sequencial"""
-        ano_atual = date.today().year
-        prefixo = f"{self.tipo[0]}{ano_atual}"
-        
-        ultimo = ContaFinanceira.objects.filter(
-            numero__startswith=prefixo
-        ).order_by('-numero').first()
-        
-        if ultimo:
-            ultimo_num = int(ultimo.numero.split('-')[-1])
-            proximo = ultimo_num + 1
-        else:
-            proximo = 1
-            
-        return f"{prefixo}-{proximo:06d}"
+        from backend.apps.shared.sequencias import proximo
+
+        prefixo = f"{self.tipo[0]}{date.today().year}"
+        numero = proximo(f"conta:{prefixo}", inicial=lambda: self._ultimo_numero_existente(prefixo))
+        return f"{prefixo}-{numero:06d}"
+
+    @staticmethod
+    def _ultimo_numero_existente(prefixo):
+        numeros = ContaFinanceira.objects.filter(numero__startswith=f"{prefixo}-").values_list('numero', flat=True)
+        return max((int(numero.split('-')[-1]) for numero in numeros), default=0)
     
     def _atualizar_status(self):
         """Atualiza status baseado nos valores"""
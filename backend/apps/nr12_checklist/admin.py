@@ -7,7 +7,8 @@ from .models import (
     ItemChecklistPadrao, 
     ChecklistNR12, 
     ItemChecklistRealizado, 
-    AlertaManutencao
+    AlertaManutencao,
+    ExecucaoGeracaoChecklist
 )
 
 @admin.register(TipoEquipamentoNR12)
@@ -284,4 +285,11 @@ class AlertaManutencaoAdmin(admin.ModelAdmin):
             data_resolucao=timezone.now()
         )
         messages.success(request, f"✅ {updated} alerta(s) marcado(s) como resolvido!")
-    marcar_como_resolvido.short_description = "✅ Marcar como resolvido"
\ No newline at end of file
+    marcar_como_resolvido.short_description = "✅ Marcar como resolvido"
+
+@admin.register(ExecucaoGeracaoChecklist)
+class ExecucaoGeracaoChecklistAdmin(admin.ModelAdmin):
+    list_display = ['data', 'frequencia', 'concluida', 'checklists_criados', 'itens_criados', 'concluida_em']
+    list_filter = ['frequencia', 'concluida']
+    readonly_fields = ['iniciada_em', 'concluida_em', 'estatisticas']
+    date_hierarchy = 'data'
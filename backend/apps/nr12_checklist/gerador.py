@@ -0,0 +1,379 @@
+# backend/apps/nr12_checklist/gerador.py
+# ================================================================
+# MOTOR DE GERAÇÃO EM LOTE DE CHECKLISTS NR12
+# ================================================================
+
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import date
+
+from django.db import connection, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from backend.apps.nr12_checklist.models import (
+    ChecklistNR12, ExecucaoGeracaoChecklist, ItemChecklistPadrao,
+    ItemChecklistRealizado
+)
+
+logger = logging.getLogger(__name__)
+
+TURNOS_PADRAO = ['MANHA', 'TARDE', 'NOITE']
+
+# Quantidade de checklists gravados por transação
+TAMANHO_LOTE = 500
+
+# Enviado após cada lote gravado via bulk_create, que não dispara post_save.
+# kwargs: data_checklist, quantidade (checklists PENDENTE criados)
+checklists_gerados = Signal()
+
+
+class CalendarioFrequencias:
+    """
+    Define em quais dias e turnos cada frequência gera checklists
+
+    Novas frequências podem ser registradas sem alterar o gerador:
+
+        calendario.registrar('QUINZENAL', lambda d: d.day in (1, 15), ['MANHA'])
+    """
+
+    def __init__(self):
+        self._regras = {}
+
+    def registrar(self, frequencia, regra, turnos=None):
+        """Registra a regra (data -> bool) e os turnos de uma frequência"""
+        self._regras[frequencia] = (regra, list(turnos or TURNOS_PADRAO))
+
+    @property
+    def frequencias(self):
+        return list(self._regras)
+
+    def deve_gerar(self, frequencia, data_checklist):
+        regra = self._regras.get(frequencia)
+        if regra is None:
+            logger.warning(f"⚠️ Frequência desconhecida: {frequencia}")
+            return False
+        return regra[0](data_checklist)
+
+    def turnos(self, frequencia):
+        regra = self._regras.get(frequencia)
+        return list(regra[1]) if regra else []
+
+    def frequencias_do_dia(self, data_checklist):
+        """Frequências que geram checklists na data informada"""
+        return [f for f in self._regras if self.deve_gerar(f, data_checklist)]
+
+
+calendario = CalendarioFrequencias()
+calendario.registrar('DIARIA', lambda d: True, ['MANHA', 'TARDE', 'NOITE'])
+calendario.registrar('SEMANAL', lambda d: d.weekday() == 0, ['MANHA'])  # Segunda-feira
+calendario.registrar('MENSAL', lambda d: d.day == 1, ['MANHA'])  # Dia 1º do mês
+
+
+class ContadorQueries:
+    """Conta as queries executadas na conexão padrão dentro do bloco"""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._wrapper.__exit__(*exc)
+
+
+def carregar_itens_padrao():
+    """
+    Carrega todos os itens padrão ativos em uma única query
+
+    Returns:
+        dict: {tipo_equipamento_id: [item_padrao_id, ...]} na ordem do checklist
+    """
+    itens_por_tipo = defaultdict(list)
+    itens = ItemChecklistPadrao.objects.filter(ativo=True).order_by(
+        'tipo_equipamento_id', 'ordem', 'item'
+    ).values_list('tipo_equipamento_id', 'id')
+
+    for tipo_id, item_id in itens:
+        itens_por_tipo[tipo_id].append(item_id)
+    return itens_por_tipo
+
+
+def calcular_pendencias(equipamentos, data_checklist, turnos):
+    """
+    Calcula as combinações (equipamento, data, turno) que ainda não têm checklist
+
+    Args:
+        equipamentos: iterável de (equipamento_id, tipo_nr12_id)
+        data_checklist (date): Data dos checklists
+        turnos (list): Turnos a gerar
+
+    Returns:
+        list: [(equipamento_id, tipo_nr12_id, turno), ...]
+    """
+    equipamentos = list(equipamentos)
+    if not equipamentos:
+        return []
+
+    existentes = set(
+        ChecklistNR12.objects.filter(
+            data_checklist=data_checklist,
+            turno__in=turnos,
+            equipamento_id__in=[eq_id for eq_id, _ in equipamentos],
+        ).values_list('equipamento_id', 'turno')
+    )
+
+    return [
+        (eq_id, tipo_id, turno)
+        for eq_id, tipo_id in equipamentos
+        for turno in turnos
+        if (eq_id, turno) not in existentes
+    ]
+
+
+def _gravar_lote(lote, data_checklist, frequencia, itens_por_tipo, observacoes):
+    """Grava um lote de checklists e seus itens em uma transação"""
+    checklists = []
+    tipo_por_uuid = {}
+    for eq_id, tipo_id, turno in lote:
+        checklist_uuid = uuid.uuid4()
+        tipo_por_uuid[checklist_uuid] = tipo_id
+        checklists.append(ChecklistNR12(
+            uuid=checklist_uuid,
+            equipamento_id=eq_id,
+            data_checklist=data_checklist,
+            turno=turno,
+            frequencia=frequencia,
+            status='PENDENTE',
+            observacoes=observacoes,
+        ))
+
+    with transaction.atomic():
+        # ignore_conflicts evita falha do lote se outro processo criou o mesmo
+        # checklist entre o cálculo das pendências e a gravação
+        ChecklistNR12.objects.bulk_create(checklists, ignore_conflicts=True)
+
+        criados = ChecklistNR12.objects.filter(
+            uuid__in=list(tipo_por_uuid)
+        ).values_list('uuid', 'id')
+
+        itens = []
+        total_checklists = 0
+        for checklist_uuid, checklist_id in criados:
+            total_checklists += 1
+            for item_id in itens_por_tipo[tipo_por_uuid[checklist_uuid]]:
+                itens.append(ItemChecklistRealizado(
+                    checklist_id=checklist_id,
+                    item_padrao_id=item_id,
+                    status='PENDENTE',
+                ))
+
+        ItemChecklistRealizado.objects.bulk_create(itens, batch_size=TAMANHO_LOTE * 10)
+
+    if total_checklists:
+        checklists_gerados.send(
+            sender=ChecklistNR12,
+            data_checklist=data_checklist,
+            quantidade=total_checklists,
+        )
+
+    return total_checklists, len(itens)
+
+
+def gerar_checklists_em_lote(frequencia, data_checklist=None, turnos=None,
+                             equipamentos=None, tamanho_lote=TAMANHO_LOTE,
+                             observacoes='', dry_run=False):
+    """
+    Gera checklists de uma frequência com operações em conjunto
+
+    Carrega os itens padrão uma única vez, calcula as pendências com uma
+    única consulta e grava checklists e itens com bulk_create em
+    transações de até `tamanho_lote` checklists.
+
+    Args:
+        frequencia (str): DIARIA, SEMANAL ou MENSAL
+        data_checklist (date): Data dos checklists (padrão: hoje)
+        turnos (list): Turnos a gerar (padrão: turnos da frequência no calendário)
+        equipamentos: QuerySet de Equipamento (padrão: ativos na frequência)
+        tamanho_lote (int): Checklists gravados por transação
+        observacoes (str): Observação gravada nos checklists criados
+        dry_run (bool): Apenas calcula o que seria criado, sem gravar
+
+    Returns:
+        dict: Estatísticas da execução
+    """
+    from backend.apps.equipamentos.models import Equipamento
+
+    data_checklist = data_checklist or date.today()
+    turnos = turnos or calendario.turnos(frequencia) or TURNOS_PADRAO
+    inicio = time.perf_counter()
+
+    stats = {
+        'data': data_checklist.isoformat(),
+        'frequencia': frequencia,
+        'equipamentos': 0,
+        'sem_itens_padrao': 0,
+        'ja_existentes': 0,
+        'checklists_criados': 0,
+        'itens_criados': 0,
+        'lotes': 0,
+        'dry_run': dry_run,
+        'queries': 0,
+        'tempo_segundos': 0.0,
+    }
+
+    with ContadorQueries() as contador:
+        if equipamentos is None:
+            equipamentos = Equipamento.objects.filter(
+                ativo_nr12=True,
+                frequencias_checklist__contains=[frequencia],
+            )
+        candidatos = list(
+            equipamentos.filter(tipo_nr12__isnull=False)
+            .order_by('id')
+            .values_list('id', 'tipo_nr12_id')
+        )
+        stats['equipamentos'] = len(candidatos)
+
+        itens_por_tipo = carregar_itens_padrao() if candidatos else {}
+
+        com_itens = []
+        for eq_id, tipo_id in candidatos:
+            if itens_por_tipo.get(tipo_id):
+                com_itens.append((eq_id, tipo_id))
+            else:
+                stats['sem_itens_padrao'] += 1
+
+        pendentes = calcular_pendencias(com_itens, data_checklist, turnos)
+        stats['ja_existentes'] = len(com_itens) * len(turnos) - len(pendentes)
+
+        if dry_run:
+            stats['checklists_criados'] = len(pendentes)
+            stats['itens_criados'] = sum(
+                len(itens_por_tipo[tipo_id]) for _, tipo_id, _ in pendentes
+            )
+            pendentes = []
+
+        for i in range(0, len(pendentes), tamanho_lote):
+            checklists, itens = _gravar_lote(
+                pendentes[i:i + tamanho_lote],
+                data_checklist, frequencia, itens_por_tipo, observacoes
+            )
+            stats['checklists_criados'] += checklists
+            stats['itens_criados'] += itens
+            stats['lotes'] += 1
+
+    stats['queries'] = contador.total
+    stats['tempo_segundos'] = round(time.perf_counter() - inicio, 3)
+
+    if stats['sem_itens_padrao']:
+        logger.warning(
+            f"⚠️ {stats['sem_itens_padrao']} equipamentos sem itens padrão configurados"
+        )
+    logger.info(
+        f"{'🔎 [dry-run] ' if dry_run else '✅ '}Checklists {frequencia.lower()} {data_checklist}: "
+        f"{stats['checklists_criados']} checklists, {stats['itens_criados']} itens, "
+        f"{stats['queries']} queries em {stats['tempo_segundos']}s"
+    )
+    return stats
+
+
+def gerar_checklists_agendados(data_checklist=None, frequencias=None,
+                               dry_run=False, forcar=False):
+    """
+    Ponto único de geração agendada de checklists
+
+    Consulta o calendário para saber quais frequências valem na data e usa
+    o registro de execuções (ExecucaoGeracaoChecklist) para que disparos
+    repetidos no mesmo dia não refaçam a varredura completa.
+
+    Args:
+        data_checklist (date): Data dos checklists (padrão: hoje)
+        frequencias (list): Restringe às frequências informadas
+        dry_run (bool): Apenas informa o que seria criado
+        forcar (bool): Executa mesmo se já houver execução concluída no dia
+
+    Returns:
+        dict: {'data', 'dry_run', 'frequencias': {frequencia: stats}}
+    """
+    data_checklist = data_checklist or date.today()
+    do_dia = calendario.frequencias_do_dia(data_checklist)
+    if frequencias is not None:
+        do_dia = [f for f in do_dia if f in frequencias]
+
+    resultado = {
+        'data': data_checklist.isoformat(),
+        'dry_run': dry_run,
+        'frequencias': {},
+    }
+    if not do_dia:
+        return resultado
+
+    concluidas = set()
+    if not forcar:
+        concluidas = set(
+            ExecucaoGeracaoChecklist.objects.filter(
+                data=data_checklist, frequencia__in=do_dia, concluida=True
+            ).values_list('frequencia', flat=True)
+        )
+
+    for frequencia in do_dia:
+        if frequencia in concluidas:
+            logger.info(f"ℹ️ Geração {frequencia.lower()} de {data_checklist} já concluída")
+            resultado['frequencias'][frequencia] = {'ja_executada': True}
+            continue
+
+        if dry_run:
+            resultado['frequencias'][frequencia] = gerar_checklists_em_lote(
+                frequencia, data_checklist, dry_run=True
+            )
+            continue
+
+        execucao, _ = ExecucaoGeracaoChecklist.objects.get_or_create(
+            data=data_checklist, frequencia=frequencia
+        )
+        stats = gerar_checklists_em_lote(
+            frequencia, data_checklist,
+            observacoes=f'Checklist {frequencia.lower()} gerado automaticamente'
+        )
+
+        execucao.concluida = True
+        execucao.concluida_em = timezone.now()
+        execucao.checklists_criados = stats['checklists_criados']
+        execucao.itens_criados = stats['itens_criados']
+        execucao.estatisticas = stats
+        execucao.save()
+
+        resultado['frequencias'][frequencia] = stats
+
+    return resultado
+
+
+def gerar_checklists_equipamento(equipamento, data_checklist=None):
+    """
+    Gera os checklists do dia para um único equipamento
+
+    Usado quando um equipamento é criado ou alterado depois da execução
+    agendada; não consulta nem altera o registro de execuções.
+    """
+    from backend.apps.equipamentos.models import Equipamento
+
+    if not equipamento.ativo_nr12 or not equipamento.tipo_nr12_id:
+        return []
+
+    data_checklist = data_checklist or date.today()
+    queryset = Equipamento.objects.filter(pk=equipamento.pk)
+    return [
+        gerar_checklists_em_lote(frequencia, data_checklist, equipamentos=queryset)
+        for frequencia in calendario.frequencias_do_dia(data_checklist)
+        if frequencia in (equipamento.frequencias_checklist or [])
+    ]
@@ -0,0 +1,89 @@
+# ================================================================
+# COMANDO PARA MEDIR A GERAÇÃO DE QR CODES EM LOTE
+# ARQUIVO: backend/apps/nr12_checklist/management/commands/benchmark_qr.py
+# ================================================================
+
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from backend.apps.shared.qr_render import numero_processos, preparar_pedido, renderizar_pedidos
+
+
+class Command(BaseCommand):
+    help = 'Mede QR codes por segundo (sequencial x pool de processos) em cada tamanho'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--quantidade',
+            type=int,
+            default=200,
+            help='QR codes por tamanho (padrão: 200)',
+        )
+        parser.add_argument(
+            '--processos',
+            type=int,
+            help='Processos do pool (padrão: QR_PROCESSOS ou número de CPUs)',
+        )
+        parser.add_argument(
+            '--tamanhos',
+            nargs='+',
+            choices=['small', 'medium', 'large'],
+            default=['small', 'medium', 'large'],
+        )
+        parser.add_argument(
+            '--formato',
+            choices=['png', 'svg'],
+            default='png',
+        )
+        parser.add_argument(
+            '--sem-logo',
+            action='store_true',
+            help='Não incluir o logo',
+        )
+    
+    def handle(self, *args, **options):
+        processos = numero_processos(options['processos'])
+        quantidade = options['quantidade']
+        formato = options['formato']
+        
+        # Renderiza em memória, fora do cache
+        self.stdout.write(
+            f"🔲 {quantidade} QR codes {formato.upper()} por tamanho, pool de {processos} processos"
+        )
+        self.stdout.write(f"{'tamanho':<8} {'sequencial':>14} {'pool':>14} {'ganho':>7}")
+        
+        for tamanho in options['tamanhos']:
+            pedidos = self._pedidos(tamanho, quantidade, not options['sem_logo'], formato)
+            sequencial = self._medir(pedidos, 1)
+            pool = self._medir(pedidos, processos)
+            self.stdout.write(
+                f"{tamanho:<8} {sequencial:>10.1f} QR/s {pool:>10.1f} QR/s {pool / sequencial:>6.2f}x"
+            )
+    
+    def _pedidos(self, tamanho, quantidade, incluir_logo, formato):
+        pedidos = []
+        for indice in range(quantidade):
+            codigo = uuid.uuid4()
+            pedido = preparar_pedido(
+                f"http://localhost:8000/qr/{codigo}/",
+                tamanho,
+                [
+                    (f"Escavadeira {indice:04d}", 'black', False),
+                    ("01/01/2025 - MANHA", 'black', True),
+                    (f"ID: {codigo}", 'gray', True),
+                ],
+                incluir_logo,
+                formato=formato,
+            )
+            pedidos.append(pedido)
+        return pedidos
+    
+    def _medir(self, pedidos, processos):
+        inicio = time.perf_counter()
+        erros = sum(1 for _, _, erro in renderizar_pedidos(pedidos, processos) if erro is not None)
+        duracao = time.perf_counter() - inicio
+        if erros:
+            self.stdout.write(self.style.WARNING(f"⚠️ {erros} erros de renderização"))
+        return len(pedidos) / duracao
@@ -3,7 +3,6 @@
 # ================================================================
 
 from django.core.management.base import BaseCommand
-from django.utils import timezone
 from datetime import date
 
 class Command(BaseCommand):
@@ -18,7 +17,12 @@ class Command(BaseCommand):
         parser.add_argument(
             '--force',
             action='store_true',
-            help='Força criação mesmo se já existir checklist para a data'
+            help='Executa mesmo se a geração do dia já estiver registrada como concluída'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas mostra quantos checklists seriam criados'
         )
         parser.add_argument(
             '--debug',
@@ -44,38 +48,38 @@ class Command(BaseCommand):
         self.stdout.write(f"📅 Data: {data_checklist}")
         
         try:
-            # Importar e executar task
-            from backend.apps.core.tasks import gerar_checklists_automatico
+            from backend.apps.nr12_checklist.gerador import gerar_checklists_agendados
             
-            # Executar task diretamente (sem Celery)
-            resultado = gerar_checklists_automatico()
+            resultado = gerar_checklists_agendados(
+                data_checklist,
+                dry_run=options['dry_run'],
+                forcar=options['force'],
+            )
             
-            if isinstance(resultado, dict):
-                criados = resultado.get('checklists_criados', 0)
-                erros = resultado.get('erros', 0)
+            if not resultado['frequencias']:
+                self.stdout.write("ℹ️ Nenhuma frequência prevista para esta data")
+            
+            for frequencia, stats in resultado['frequencias'].items():
+                if stats.get('ja_executada'):
+                    self.stdout.write(f"ℹ️ {frequencia}: geração já concluída (use --force para repetir)")
+                    continue
                 
-                if criados > 0:
-                    self.stdout.write(
-                        self.style.SUCCESS(f'✅ {criados} checklists criados com sucesso!')
+                verbo = 'seriam criados' if options['dry_run'] else 'criados'
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"✅ {frequencia}: {stats['checklists_criados']} checklists e "
+                        f"{stats['itens_criados']} itens {verbo}"
                     )
+                )
                 
-                if erros > 0:
+                if stats['sem_itens_padrao'] > 0:
                     self.stdout.write(
-                        self.style.WARNING(f'⚠️ {erros} erros encontrados')
+                        self.style.WARNING(f"⚠️ {stats['sem_itens_padrao']} equipamentos sem itens padrão")
                     )
-                
-                if options['debug']:
-                    self.stdout.write(f"📊 Resultado completo: {resultado}")
             
-            else:
-                self.stdout.write(f"✅ Processo concluído: {resultado}")
+            if options['debug']:
+                self.stdout.write(f"📊 Resultado completo: {resultado}")
                 
-        except ImportError as e:
-            self.stdout.write(
-                self.style.ERROR(f'❌ Erro de importação: {e}')
-            )
-            self.stdout.write('💡 Verifique se o arquivo backend/apps/core/tasks.py existe')
-            
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'❌ Erro na execução: {e}')
@@ -89,7 +89,7 @@ class Command(BaseCommand):
             checklists = ChecklistNR12.objects.filter(
                 data_checklist=date.today(),
                 status='PENDENTE'
-            )
+            ).select_related('equipamento__cliente')
             
             if not checklists.exists():
                 self.stdout.write("ℹ️ Nenhum checklist pendente encontrado")
@@ -104,7 +104,8 @@ class Command(BaseCommand):
             )
             
             sucesso = len([r for r in resultados if 'error' not in r])
-            self.stdout.write(f"✅ {sucesso}/{len(resultados)} QR codes gerados")
+            reaproveitados = len([r for r in resultados if r.get('cache')])
+            self.stdout.write(f"✅ {sucesso}/{len(resultados)} QR codes gerados ({reaproveitados} do cache)")
         
         else:
             self.stdout.write("⚠️ Especifique --checklist-id ou --todos")
@@ -166,35 +167,20 @@ class Command(BaseCommand):
         self.stdout.write("=" * 50)
         
         import os
-        from datetime import datetime
         
-        # Listar checklists
-        checklists_dir = os.path.join(qr_manager.qr_dir, 'checklists')
-        if os.path.exists(checklists_dir):
-            files = [f for f in os.listdir(checklists_dir) if f.endswith('.png')]
-            
-            self.stdout.write(f"\n📋 CHECKLISTS ({len(files)} arquivos):")
-            for filename in sorted(files):
-                filepath = os.path.join(checklists_dir, filename)
-                size = os.path.getsize(filepath) / 1024  # KB
-                modified = datetime.fromtimestamp(os.path.getmtime(filepath))
-                
-                self.stdout.write(f"  📄 {filename}")
-                self.stdout.write(f"     Tamanho: {size:.1f} KB")
-                self.stdout.write(f"     Criado: {modified.strftime('%d/%m/%Y %H:%M')}")
+        # Imagens do cache em uso por checklists e equipamentos
+        from backend.apps.nr12_checklist.models import ReferenciaQRCode
         
-        # Listar equipamentos
-        equipamentos_dir = os.path.join(qr_manager.qr_dir, 'equipamentos')
-        if os.path.exists(equipamentos_dir):
-            files = [f for f in os.listdir(equipamentos_dir) if f.endswith('.png')]
-            
-            self.stdout.write(f"\n🔧 EQUIPAMENTOS ({len(files)} arquivos):")
-            for filename in sorted(files):
-                filepath = os.path.join(equipamentos_dir, filename)
-                size = os.path.getsize(filepath) / 1024  # KB
-                modified = datetime.fromtimestamp(os.path.getmtime(filepath))
+        for prefixo, titulo in (('checklist:', '📋 CHECKLISTS'), ('equipamento:', '🔧 EQUIPAMENTOS')):
+            referencias = ReferenciaQRCode.objects.filter(
+                dono__startswith=prefixo
+            ).select_related('qr_code').order_by('dono')
+            
+            self.stdout.write(f"\n{titulo} ({len(referencias)} referências):")
+            for referencia in referencias:
+                size = referencia.qr_code.tamanho_bytes / 1024  # KB
                 
-                self.stdout.write(f"  📄 {filename}")
+                self.stdout.write(f"  📄 {referencia.dono}: {os.path.basename(referencia.qr_code.arquivo)}")
                 self.stdout.write(f"     Tamanho: {size:.1f} KB")
-                self.stdout.write(f"     Criado: {modified.strftime('%d/%m/%Y %H:%M')}")
+                self.stdout.write(f"     Criado: {referencia.qr_code.criado_em.strftime('%d/%m/%Y %H:%M')}")
 
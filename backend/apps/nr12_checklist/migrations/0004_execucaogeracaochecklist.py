@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nr12_checklist', '0003_tipoequipamentonr12_categoria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExecucaoGeracaoChecklist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('frequencia', models.CharField(max_length=10, verbose_name='Frequência')),
+                ('concluida', models.BooleanField(default=False, verbose_name='Concluída')),
+                ('checklists_criados', models.PositiveIntegerField(default=0, verbose_name='Checklists Criados')),
+                ('itens_criados', models.PositiveIntegerField(default=0, verbose_name='Itens Criados')),
+                ('estatisticas', models.JSONField(blank=True, default=dict, verbose_name='Estatísticas')),
+                ('iniciada_em', models.DateTimeField(auto_now_add=True, verbose_name='Iniciada em')),
+                ('concluida_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluída em')),
+            ],
+            options={
+                'verbose_name': 'Execução de Geração de Checklists',
+                'verbose_name_plural': 'Execuções de Geração de Checklists',
+                'ordering': ['-data', 'frequencia'],
+                'unique_together': {('data', 'frequencia')},
+            },
+        ),
+    ]
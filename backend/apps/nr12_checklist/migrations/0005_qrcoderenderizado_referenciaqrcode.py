@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nr12_checklist', '0004_execucaogeracaochecklist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QRCodeRenderizado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=64, unique=True, verbose_name='Hash do Conteúdo')),
+                ('arquivo', models.CharField(help_text='Caminho relativo a MEDIA_ROOT', max_length=255, verbose_name='Arquivo')),
+                ('largura', models.PositiveIntegerField(default=0)),
+                ('altura', models.PositiveIntegerField(default=0)),
+                ('tamanho_bytes', models.PositiveIntegerField(default=0)),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('usado_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Último Uso')),
+            ],
+            options={
+                'verbose_name': 'QR Code Renderizado',
+                'verbose_name_plural': 'QR Codes Renderizados',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReferenciaQRCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dono', models.CharField(max_length=100, unique=True, verbose_name='Dono')),
+                ('data_referencia', models.DateField(blank=True, help_text='Data do checklist; vazia para referências permanentes', null=True, verbose_name='Data de Referência')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('qr_code', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='referencias', to='nr12_checklist.qrcoderenderizado', verbose_name='QR Code')),
+            ],
+            options={
+                'verbose_name': 'Referência de QR Code',
+                'verbose_name_plural': 'Referências de QR Code',
+                'indexes': [models.Index(fields=['data_referencia'], name='nr12_checkl_data_re_77f2c6_idx')],
+            },
+        ),
+    ]
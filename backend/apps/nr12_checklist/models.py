@@ -870,6 +870,120 @@ class HistoricoHorimetro(models.Model):
         return f"{self.equipamento.nome} - {self.data_registro.strftime('%d/%m/%Y %H:%M')} - {self.horimetro_atual}h"
 
 
+class ExecucaoGeracaoChecklist(models.Model):
+    """Registro diário das execuções da geração automática de checklists"""
+
+    data = models.DateField(
+        verbose_name="Data"
+    )
+    frequencia = models.CharField(
+        max_length=10,
+        verbose_name="Frequência"
+    )
+    concluida = models.BooleanField(
+        default=False,
+        verbose_name="Concluída"
+    )
+    checklists_criados = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Checklists Criados"
+    )
+    itens_criados = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Itens Criados"
+    )
+    estatisticas = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Estatísticas"
+    )
+    iniciada_em = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Iniciada em"
+    )
+    concluida_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Concluída em"
+    )
+
+    class Meta:
+        ordering = ['-data', 'frequencia']
+        unique_together = [['data', 'frequencia']]
+        verbose_name = 'Execução de Geração de Checklists'
+        verbose_name_plural = 'Execuções de Geração de Checklists'
+
+    def __str__(self):
+        return f"{self.data} - {self.frequencia}"
+
+
+class QRCodeRenderizado(models.Model):
+    """Imagem de QR code no cache endereçado por conteúdo (qr_manager.py)"""
+
+    hash = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Hash do Conteúdo"
+    )
+    arquivo = models.CharField(
+        max_length=255,
+        verbose_name="Arquivo",
+        help_text="Caminho relativo a MEDIA_ROOT"
+    )
+    largura = models.PositiveIntegerField(default=0)
+    altura = models.PositiveIntegerField(default=0)
+    tamanho_bytes = models.PositiveIntegerField(default=0)
+    criado_em = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Criado em"
+    )
+    usado_em = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Último Uso"
+    )
+
+    class Meta:
+        verbose_name = 'QR Code Renderizado'
+        verbose_name_plural = 'QR Codes Renderizados'
+
+    def __str__(self):
+        return self.arquivo
+
+
+class ReferenciaQRCode(models.Model):
+    """Uso de uma imagem do cache por um objeto (ex.: 'checklist:12:medium')"""
+
+    dono = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Dono"
+    )
+    qr_code = models.ForeignKey(
+        QRCodeRenderizado,
+        on_delete=models.CASCADE,
+        related_name='referencias',
+        verbose_name="QR Code"
+    )
+    data_referencia = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Data de Referência",
+        help_text="Data do checklist; vazia para referências permanentes"
+    )
+    atualizado_em = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Atualizado em"
+    )
+
+    class Meta:
+        verbose_name = 'Referência de QR Code'
+        verbose_name_plural = 'Referências de QR Code'
+        indexes = [models.Index(fields=['data_referencia'])]
+
+    def __str__(self):
+        return f"{self.dono} -> {self.qr_code.hash[:12]}"
+
+
 
 
 # ================================================================
@@ -1,7 +1,4 @@
-import os
-import glob
 from django.db import models
-from django.conf import settings
 from .qr_manager import QRCodeManager
 from django.utils import timezone
 
@@ -11,19 +8,7 @@ class ChecklistQRMixin:
     @property
     def qr_code_png_url(self):
         """URL do QR code PNG se existir"""
-        qr_manager = QRCodeManager()
-        filename = f"checklist_{self.uuid}_*_medium_*.png"
-        
-        pattern = os.path.join(qr_manager.qr_dir, 'checklists', filename)
-        files = glob.glob(pattern)
-        
-        if files:
-            # Retornar o mais recente
-            latest_file = max(files, key=os.path.getctime)
-            filename = os.path.basename(latest_file)
-            return f"{settings.MEDIA_URL}qr_codes/checklists/{filename}"
-        
-        return None
+        return QRCodeManager().url_qr_checklist(self, 'medium')
     
     def gerar_qr_png(self, tamanho='medium', incluir_logo=True):
         """Gera QR code PNG para este checklist"""
@@ -41,13 +26,7 @@ class EquipamentoQRMixin:
     @property
     def qr_code_png_url(self):
         """URL do QR code PNG do equipamento"""
-        filename = f"eq_{self.id}_medium.png"
-        filepath = os.path.join(settings.MEDIA_ROOT, 'qr_codes', 'equipamentos', filename)
-        
-        if os.path.exists(filepath):
-            return f"{settings.MEDIA_URL}qr_codes/equipamentos/{filename}"
-        
-        return None
+        return QRCodeManager().url_qr_existente(self, 'medium')
     
     def gerar_qr_png(self, tamanho='medium'):
         """Gera QR code PNG para este equipamento"""
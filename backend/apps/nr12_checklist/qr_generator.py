@@ -3,43 +3,77 @@
 # ===============================================
 
 # backend/apps/nr12_checklist/qr_generator.py
-import qrcode
-import os
-from django.conf import settings
+import base64
 
-def gerar_qr_equipamento_para_bot(equipamento, bot_username='Mandacarusmbot'):
+from django.core.files.storage import default_storage
+
+from backend.apps.shared import qr_render
+
+
+def gerar_qr_equipamento_para_bot(equipamento, bot_username=None):
     """
-    Gera um QR Code com o link /start=eq:{uuid} para o bot Telegram
-    ✅ ATUALIZADO para usar @Mandacarusmbot
+    Gera um QR Code com o link /start=eq_{uuid} para o bot Telegram
+    ✅ Usa o núcleo de QR compartilhado (shared/qr_render.py)
     """
     if not equipamento.uuid:
         raise ValueError("Equipamento não possui UUID")
 
-    # Link completo para Telegram
-    qr_data = f"https://t.me/{bot_username}?start=eq_{equipamento.uuid}"
+    dados = None
+    if bot_username:
+        dados = f"https://t.me/{bot_username}?start=eq_{equipamento.uuid}"
+    payload = qr_render.PayloadEquipamento(equipamento, dados)
+    registro, _ = qr_render.obter_qr(payload)
+
+    return {
+        "uuid": equipamento.uuid,
+        "url": qr_render.url_arquivo(registro.arquivo),
+        "qr_data": payload.dados,
+        "equipamento_nome": equipamento.nome if hasattr(equipamento, 'nome') else str(equipamento)
+    }
 
-    # Caminho para salvar
-    pasta = os.path.join('media', 'qr_codes', 'equipamentos')
-    os.makedirs(pasta, exist_ok=True)
-    caminho_png = os.path.join(pasta, f"{equipamento.uuid}.png")
 
-    # Configurar QR Code
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(qr_data)
-    qr.make(fit=True)
+def _data_uri(payload, tamanho):
+    """Imagem do cache como data URI PNG"""
+    registro, _ = qr_render.obter_qr(payload, tamanho)
+    with default_storage.open(registro.arquivo, 'rb') as arquivo:
+        conteudo = base64.b64encode(arquivo.read()).decode()
+    return f"data:image/png;base64,{conteudo}"
 
-    # Gerar e salvar imagem
-    img = qr.make_image(fill_color="black", back_color="white")
-    img.save(caminho_png)
+
+def gerar_qr_code_base64(checklist, tamanho='medium'):
+    """QR code do checklist em base64 (API, admin e comandos)"""
+    payload = qr_render.PayloadChecklist(checklist)
 
     return {
-        "uuid": equipamento.uuid,
-        "url": f"/media/qr_codes/equipamentos/{equipamento.uuid}.png",
-        "qr_data": qr_data,
-        "equipamento_nome": equipamento.nome if hasattr(equipamento, 'nome') else str(equipamento)
-    }
\ No newline at end of file
+        'qr_code_base64': _data_uri(payload, tamanho),
+        'url': payload.dados,
+        'checklist_id': checklist.id,
+        'uuid': str(checklist.uuid),
+        'equipamento': checklist.equipamento.nome,
+        'data': checklist.data_checklist.strftime('%d/%m/%Y'),
+        'turno': checklist.turno,
+    }
+
+
+def gerar_qr_code_equipamento(equipamento, tamanho='medium'):
+    """QR code do equipamento (link do bot) em base64"""
+    payload = qr_render.PayloadEquipamento(equipamento)
+
+    return {
+        'qr_code_base64': _data_uri(payload, tamanho),
+        'url': payload.dados,
+        'equipamento': {
+            'id': equipamento.id,
+            'uuid': str(equipamento.uuid),
+            'nome': equipamento.nome,
+            'codigo': getattr(equipamento, 'codigo', f"EQ{equipamento.id}"),
+        }
+    }
+
+
+def gerar_qr_codes_todos_equipamentos(tamanho='medium'):
+    """QR codes em base64 de todos os equipamentos NR12 ativos"""
+    from backend.apps.equipamentos.models import Equipamento
+
+    equipamentos = Equipamento.objects.filter(ativo_nr12=True).select_related('cliente')
+    return [gerar_qr_code_equipamento(equipamento, tamanho) for equipamento in equipamentos]
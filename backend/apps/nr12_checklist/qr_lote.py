@@ -0,0 +1,165 @@
+# ================================================================
+# ARQUIVO: backend/apps/nr12_checklist/qr_lote.py
+# Geração de QR codes de checklist em lote com pool de processos
+# ================================================================
+#
+# A renderização (PIL) só usa CPU, então o lote é distribuído entre
+# processos pelo núcleo compartilhado (shared/qr_render.obter_lote):
+#   1. O processo principal monta os pedidos e consulta o cache com uma
+#      única query para o lote inteiro.
+#   2. Só as imagens que faltam vão para o pool (conteúdos repetidos vão
+#      uma vez); os workers recebem o pedido pronto e não acessam banco.
+#   3. Cada resultado é gravado e entregue assim que termina, então o
+#      chamador pode ir montando o ZIP/PDF enquanto o pool trabalha.
+#
+# Número de processos: argumento `processos`, senão settings.QR_PROCESSOS,
+# senão os.cpu_count(). Dentro de um processo daemon (worker Celery
+# prefork) não é possível criar filhos e o lote roda sequencialmente.
+
+import logging
+import zipfile
+from io import BytesIO
+
+from django.core.files.storage import default_storage
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from backend.apps.shared import qr_render
+from .qr_manager import QRCodeManager
+
+logger = logging.getLogger(__name__)
+
+# Etiquetas por folha A4 no PDF
+COLUNAS_ETIQUETAS = 3
+LINHAS_ETIQUETAS = 4
+
+
+def gerar_lote(checklists, tamanho='medium', incluir_logo=True, processos=None, formato='png'):
+    """
+    Gera os QR codes dos checklists, entregando cada um assim que fica pronto
+
+    Os que já estão no cache saem primeiro; os demais na ordem em que o pool
+    termina.
+
+    Args:
+        checklists: ChecklistNR12 (com equipamento e cliente carregados)
+        tamanho: 'small', 'medium', 'large'
+        incluir_logo: Se deve incluir logo
+        processos: Processos do pool (padrão: qr_render.numero_processos())
+        formato: 'png' ou 'svg'
+
+    Yields:
+        dict: Informações do QR code (formato de gerar_qr_checklist) ou
+            {'error', 'checklist_id'} em caso de falha
+    """
+    manager = QRCodeManager()
+    payloads = [qr_render.PayloadChecklist(checklist) for checklist in checklists]
+
+    for payload, registro, renderizado, erro in qr_render.obter_lote(
+        payloads, tamanho, formato, incluir_logo, processos
+    ):
+        if erro is not None:
+            yield {'error': str(erro), 'checklist_id': payload.objeto.id}
+            continue
+        yield manager.info_checklist(payload.objeto, registro, renderizado)
+
+
+# ================================================================
+# ARQUIVOS PARA IMPRESSÃO
+# ================================================================
+
+def _nome_etiqueta(qr_info):
+    checklist = qr_info['checklist']
+    extensao = qr_info['arquivo'].rsplit('.', 1)[-1]
+    return f"checklist_{checklist['id']}_{checklist['data'].replace('/', '-')}_{checklist['turno']}.{extensao}"
+
+
+def escrever_zip(resultados, destino):
+    """
+    Grava os QR codes em um ZIP à medida que os resultados chegam
+
+    Args:
+        resultados: Iterável de gerar_lote()
+        destino: Arquivo binário aberto para escrita
+
+    Returns:
+        dict: Totais de gerados, reaproveitados do cache e erros
+    """
+    totais = {'gerados': 0, 'cache': 0, 'erros': []}
+
+    # PNG já é comprimido: ZIP_STORED evita recomprimir
+    with zipfile.ZipFile(destino, 'w', zipfile.ZIP_STORED) as arquivo_zip:
+        for qr_info in resultados:
+            if 'error' in qr_info:
+                totais['erros'].append(qr_info)
+                continue
+            with default_storage.open(qr_info['arquivo'], 'rb') as imagem:
+                arquivo_zip.writestr(_nome_etiqueta(qr_info), imagem.read())
+            totais['cache' if qr_info['cache'] else 'gerados'] += 1
+
+        if totais['erros']:
+            arquivo_zip.writestr('erros.txt', '\n'.join(
+                f"checklist {erro['checklist_id']}: {erro['error']}" for erro in totais['erros']
+            ))
+
+    return totais
+
+
+def escrever_pdf(resultados, destino, ordem=None):
+    """
+    Grava os QR codes como etiquetas em folhas A4 (COLUNAS x LINHAS por folha)
+
+    Args:
+        resultados: Iterável de gerar_lote()
+        destino: Arquivo binário aberto para escrita
+        ordem: IDs de checklist na ordem de impressão (padrão: ordem de chegada)
+
+    Returns:
+        dict: Totais de gerados, reaproveitados do cache e erros
+    """
+    totais = {'gerados': 0, 'cache': 0, 'erros': []}
+    etiquetas = []
+    for qr_info in resultados:
+        if 'error' in qr_info:
+            totais['erros'].append(qr_info)
+            continue
+        etiquetas.append(qr_info)
+        totais['cache' if qr_info['cache'] else 'gerados'] += 1
+
+    if ordem:
+        posicao = {checklist_id: indice for indice, checklist_id in enumerate(ordem)}
+        etiquetas.sort(key=lambda qr_info: posicao.get(qr_info['checklist']['id'], len(posicao)))
+
+    largura_pagina, altura_pagina = A4
+    margem = 1 * cm
+    largura = (largura_pagina - 2 * margem) / COLUNAS_ETIQUETAS
+    altura = (altura_pagina - 2 * margem) / LINHAS_ETIQUETAS
+    por_pagina = COLUNAS_ETIQUETAS * LINHAS_ETIQUETAS
+
+    # Uma leitura do storage por imagem, mesmo que várias etiquetas a usem
+    imagens = {}
+
+    pdf = canvas.Canvas(destino, pagesize=A4)
+    pdf.setTitle("QR Codes - Checklists NR12")
+    for indice, qr_info in enumerate(etiquetas):
+        if indice and indice % por_pagina == 0:
+            pdf.showPage()
+        posicao = indice % por_pagina
+        coluna, linha = posicao % COLUNAS_ETIQUETAS, posicao // COLUNAS_ETIQUETAS
+        x = margem + coluna * largura
+        y = altura_pagina - margem - (linha + 1) * altura
+        imagem = imagens.get(qr_info['arquivo'])
+        if imagem is None:
+            with default_storage.open(qr_info['arquivo'], 'rb') as arquivo:
+                imagem = imagens[qr_info['arquivo']] = ImageReader(BytesIO(arquivo.read()))
+        # Mesma imagem para várias etiquetas: o reportlab embute uma vez só
+        pdf.drawImage(
+            imagem, x + 0.2 * cm, y + 0.2 * cm,
+            width=largura - 0.4 * cm, height=altura - 0.4 * cm,
+            preserveAspectRatio=True, anchor='c'
+        )
+    pdf.save()
+
+    return totais
@@ -1,23 +1,31 @@
 # ================================================================
 # ARQUIVO: backend/apps/nr12_checklist/qr_manager.py
-# Sistema completo de geração e gestão de QR codes PNG
+# Sistema completo de geração e gestão de QR codes (PNG e SVG)
 # ================================================================
+#
+# A renderização, o cache endereçado por conteúdo e a limpeza ficam em
+# backend/apps/shared/qr_render.py, compartilhados com os demais geradores
+# de QR do sistema. Este módulo monta as respostas das APIs de checklist e
+# equipamento, as views e as tasks.
 
-import qrcode
 import os
-from PIL import Image, ImageDraw, ImageFont
-from io import BytesIO
+from datetime import datetime, timedelta
+
 from django.conf import settings
-from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
+from django.utils import timezone
 import logging
-import base64
-from datetime import datetime
+
+from backend.apps.shared import qr_render
 
 logger = logging.getLogger(__name__)
 
+# Diretórios sem referências (arquivos avulsos e o formato antigo com
+# timestamp no nome), limpos pela data de modificação
+DIRETORIOS_AVULSOS = ('temp', 'checklists', 'equipamentos')
+
+
 class QRCodeManager:
-    """Gerenciador completo de QR codes PNG"""
+    """Gerenciador completo de QR codes de checklists e equipamentos"""
     
     def __init__(self):
         self.qr_dir = os.path.join(settings.MEDIA_ROOT, 'qr_codes')
@@ -28,144 +36,67 @@ class QRCodeManager:
         os.makedirs(self.qr_dir, exist_ok=True)
         
         # Criar subdiretórios
-        subdirs = ['checklists', 'equipamentos', 'temp']
+        subdirs = ['cache', 'checklists', 'equipamentos', 'temp']
         for subdir in subdirs:
             os.makedirs(os.path.join(self.qr_dir, subdir), exist_ok=True)
     
-    def gerar_qr_checklist(self, checklist, tamanho='medium', incluir_logo=True):
+    def gerar_qr_checklist(self, checklist, tamanho='medium', incluir_logo=True, formato='png'):
         """
-        Gera QR code PNG para checklist
+        Gera QR code para checklist (reaproveitando o cache)
         
         Args:
             checklist: Instância do ChecklistNR12
             tamanho: 'small', 'medium', 'large'
-            incluir_logo: Se deve incluir logo da empresa
+            incluir_logo: Se deve incluir logo da empresa (só PNG)
+            formato: 'png' ou 'svg'
         
         Returns:
             dict: Informações do QR code gerado
         """
         try:
-            # Configurações por tamanho
-            config = self._get_size_config(tamanho)
-            
-            # URL do checklist
-            base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-            url = f"{base_url}/qr/{checklist.uuid}/"
-            
-            # Criar QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_M,
-                box_size=config['box_size'],
-                border=4,
+            registro, renderizado = qr_render.obter_qr(
+                qr_render.PayloadChecklist(checklist), tamanho, formato, incluir_logo
             )
-            qr.add_data(url)
-            qr.make(fit=True)
-            
-            # Gerar imagem base
-            qr_img = qr.make_image(
-                fill_color="black", 
-                back_color="white"
-            ).convert('RGB')
-            
-            # Adicionar informações ao QR code
-            if config['add_text']:
-                qr_img = self._add_text_to_qr(qr_img, checklist, config)
-            
-            # Adicionar logo se solicitado
-            if incluir_logo and config['add_logo']:
-                qr_img = self._add_logo_to_qr(qr_img, config)
             
-            # Salvar arquivo
-            filename = self._generate_filename(checklist, tamanho)
-            filepath = os.path.join(self.qr_dir, 'checklists', filename)
+            qr_info = self.info_checklist(checklist, registro, renderizado)
             
-            qr_img.save(filepath, 'PNG', quality=95)
-            
-            # URL para acesso
-            qr_url = f"{settings.MEDIA_URL}qr_codes/checklists/{filename}"
-            
-            # Informações do QR gerado
-            qr_info = {
-                'filename': filename,
-                'filepath': filepath,
-                'url': qr_url,
-                'checklist_url': url,
-                'size': f"{qr_img.width}x{qr_img.height}",
-                'file_size': os.path.getsize(filepath),
-                'created_at': datetime.now().isoformat(),
-                'checklist': {
-                    'id': checklist.id,
-                    'uuid': str(checklist.uuid),
-                    'equipamento': checklist.equipamento.nome,
-                    'cliente': checklist.equipamento.cliente.razao_social,
-                    'data': checklist.data_checklist.strftime('%d/%m/%Y'),
-                    'turno': checklist.turno
-                }
-            }
-            
-            logger.info(f"✅ QR code gerado: {filename} ({qr_img.width}x{qr_img.height})")
+            if renderizado:
+                logger.info(f"✅ QR code gerado: {qr_info['filename']} ({qr_info['size']})")
             return qr_info
             
         except Exception as e:
             logger.error(f"❌ Erro ao gerar QR code: {e}")
             raise
     
-    def gerar_qr_equipamento(self, equipamento, tamanho='medium'):
+    def gerar_qr_equipamento(self, equipamento, tamanho='medium', formato='png'):
         """
-        Gera QR code PNG permanente para equipamento
+        Gera QR code permanente para equipamento
+        
+        O conteúdo é o link do bot (t.me/<bot>?start=eq_<uuid>), o mesmo
+        impresso nas etiquetas pelo campo qr_code do equipamento.
         
         Args:
             equipamento: Instância do Equipamento
             tamanho: 'small', 'medium', 'large'
+            formato: 'png' ou 'svg'
         
         Returns:
             dict: Informações do QR code gerado
         """
         try:
-            config = self._get_size_config(tamanho)
-            
-            # URL do equipamento
-            base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-            url = f"{base_url}/equipamento/{equipamento.id}/"
-            
-            # Criar QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_H,  # Alta correção para durabilidade
-                box_size=config['box_size'],
-                border=4,
-            )
-            qr.add_data(url)
-            qr.make(fit=True)
-            
-            # Gerar imagem
-            qr_img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
-            
-            # Adicionar informações do equipamento
-            if config['add_text']:
-                qr_img = self._add_equipment_text(qr_img, equipamento, config)
-            
-            # Adicionar logo
-            if config['add_logo']:
-                qr_img = self._add_logo_to_qr(qr_img, config)
-            
-            # Salvar arquivo
-            filename = f"eq_{equipamento.id}_{tamanho}.png"
-            filepath = os.path.join(self.qr_dir, 'equipamentos', filename)
-            
-            qr_img.save(filepath, 'PNG', quality=95)
-            
-            # URL para acesso
-            qr_url = f"{settings.MEDIA_URL}qr_codes/equipamentos/{filename}"
+            payload = qr_render.PayloadEquipamento(equipamento)
+            registro, renderizado = qr_render.obter_qr(payload, tamanho, formato)
             
             return {
-                'filename': filename,
-                'filepath': filepath,
-                'url': qr_url,
-                'equipamento_url': url,
-                'size': f"{qr_img.width}x{qr_img.height}",
-                'file_size': os.path.getsize(filepath),
+                'filename': os.path.basename(registro.arquivo),
+                'filepath': qr_render.caminho_local(registro.arquivo),
+                'arquivo': registro.arquivo,
+                'url': qr_render.url_arquivo(registro.arquivo),
+                'equipamento_url': payload.dados,
+                'size': f"{registro.largura}x{registro.altura}",
+                'file_size': registro.tamanho_bytes,
+                'hash': registro.hash,
+                'cache': not renderizado,
                 'equipamento': {
                     'id': equipamento.id,
                     'nome': equipamento.nome,
@@ -178,210 +109,122 @@ class QRCodeManager:
             logger.error(f"❌ Erro ao gerar QR equipamento: {e}")
             raise
     
-    def gerar_batch_qr_codes(self, checklists, tamanho='medium', incluir_logo=True):
+    def gerar_batch_qr_codes(self, checklists, tamanho='medium', incluir_logo=True, processos=None,
+                             formato='png'):
         """
-        Gera QR codes em lote para múltiplos checklists
+        Gera QR codes em lote para múltiplos checklists (pool de processos, qr_lote.py)
         
         Args:
             checklists: Lista de ChecklistNR12
             tamanho: Tamanho dos QR codes
             incluir_logo: Se deve incluir logo
+            processos: Processos do pool (padrão: settings.QR_PROCESSOS ou CPUs)
+            formato: 'png' ou 'svg'
         
         Returns:
             list: Lista com informações dos QR codes gerados
         """
-        resultados = []
-        
-        for checklist in checklists:
-            try:
-                qr_info = self.gerar_qr_checklist(checklist, tamanho, incluir_logo)
-                resultados.append(qr_info)
-            except Exception as e:
-                logger.error(f"❌ Erro no checklist {checklist.id}: {e}")
-                resultados.append({
-                    'error': str(e),
-                    'checklist_id': checklist.id
-                })
-        
-        logger.info(f"✅ Batch concluído: {len(resultados)} QR codes processados")
+        from .qr_lote import gerar_lote
+        
+        resultados = list(gerar_lote(checklists, tamanho, incluir_logo, processos, formato))
+        
+        reaproveitados = len([r for r in resultados if r.get('cache')])
+        logger.info(
+            f"✅ Batch concluído: {len(resultados)} QR codes processados "
+            f"({reaproveitados} do cache)"
+        )
         return resultados
     
-    def _get_size_config(self, tamanho):
-        """Retorna configurações baseadas no tamanho"""
-        configs = {
-            'small': {
-                'box_size': 8,
-                'font_size': 16,
-                'add_text': True,
-                'add_logo': False,
-                'text_height': 60,
-                'logo_size': (40, 40)
-            },
-            'medium': {
-                'box_size': 10,
-                'font_size': 20,
-                'add_text': True,
-                'add_logo': True,
-                'text_height': 80,
-                'logo_size': (60, 60)
-            },
-            'large': {
-                'box_size': 15,
-                'font_size': 28,
-                'add_text': True,
-                'add_logo': True,
-                'text_height': 120,
-                'logo_size': (80, 80)
-            }
-        }
-        return configs.get(tamanho, configs['medium'])
+    # ================================================================
+    # CHECKLISTS NO CACHE
+    # ================================================================
     
-    def _add_text_to_qr(self, qr_img, checklist, config):
-        """Adiciona texto informativo ao QR code"""
-        try:
-            # Criar nova imagem com espaço para texto
-            text_height = config['text_height']
-            new_height = qr_img.height + text_height
-            new_img = Image.new('RGB', (qr_img.width, new_height), 'white')
-            
-            # Colar QR code no topo
-            new_img.paste(qr_img, (0, 0))
-            
-            # Adicionar texto
-            draw = ImageDraw.Draw(new_img)
-            
-            try:
-                font = ImageFont.truetype("arial.ttf", config['font_size'])
-                font_small = ImageFont.truetype("arial.ttf", config['font_size'] - 4)
-            except:
-                font = ImageFont.load_default()
-                font_small = ImageFont.load_default()
-            
-            # Textos
-            equipamento = checklist.equipamento.nome[:25] + "..." if len(checklist.equipamento.nome) > 25 else checklist.equipamento.nome
-            data_texto = checklist.data_checklist.strftime('%d/%m/%Y')
-            
-            # Posições
-            y_start = qr_img.height + 10
-            center_x = qr_img.width // 2
-            
-            # Desenhar textos centralizados
-            draw.text((center_x, y_start), equipamento, fill='black', font=font, anchor='mt')
-            draw.text((center_x, y_start + 25), f"{data_texto} - {checklist.turno}", fill='black', font=font_small, anchor='mt')
-            draw.text((center_x, y_start + 45), f"ID: {checklist.uuid}", fill='gray', font=font_small, anchor='mt')
-            
-            return new_img
-            
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao adicionar texto: {e}")
-            return qr_img
+    @staticmethod
+    def dono_checklist(checklist, tamanho='medium', formato='png'):
+        """Identificador da referência de um checklist no cache"""
+        return qr_render.PayloadChecklist(checklist).dono(tamanho, formato)
     
-    def _add_equipment_text(self, qr_img, equipamento, config):
-        """Adiciona texto do equipamento ao QR code"""
-        try:
-            text_height = config['text_height']
-            new_height = qr_img.height + text_height
-            new_img = Image.new('RGB', (qr_img.width, new_height), 'white')
-            
-            # Colar QR code
-            new_img.paste(qr_img, (0, 0))
-            
-            # Adicionar texto
-            draw = ImageDraw.Draw(new_img)
-            
-            try:
-                font = ImageFont.truetype("arial.ttf", config['font_size'])
-                font_small = ImageFont.truetype("arial.ttf", config['font_size'] - 4)
-            except:
-                font = ImageFont.load_default()
-                font_small = ImageFont.load_default()
-            
-            # Textos do equipamento
-            nome = equipamento.nome[:20] + "..." if len(equipamento.nome) > 20 else equipamento.nome
-            codigo = getattr(equipamento, 'codigo', f"EQ{equipamento.id}")
-            
-            y_start = qr_img.height + 10
-            center_x = qr_img.width // 2
-            
-            draw.text((center_x, y_start), nome, fill='black', font=font, anchor='mt')
-            draw.text((center_x, y_start + 25), f"Código: {codigo}", fill='black', font=font_small, anchor='mt')
-            draw.text((center_x, y_start + 45), equipamento.cliente.razao_social[:25], fill='gray', font=font_small, anchor='mt')
-            
-            return new_img
-            
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao adicionar texto equipamento: {e}")
-            return qr_img
+    @staticmethod
+    def url_checklist(checklist):
+        """Conteúdo do QR code do checklist"""
+        return qr_render.PayloadChecklist(checklist).dados
     
-    def _add_logo_to_qr(self, qr_img, config):
-        """Adiciona logo da empresa ao QR code"""
-        try:
-            logo_path = getattr(settings, 'QR_LOGO_PATH', None)
-            if not logo_path or not os.path.exists(logo_path):
-                return qr_img
-            
-            # Carregar logo
-            logo = Image.open(logo_path).convert('RGBA')
-            
-            # Redimensionar logo
-            logo_size = config['logo_size']
-            logo = logo.resize(logo_size, Image.Resampling.LANCZOS)
-            
-            # Criar máscara circular para o logo
-            mask = Image.new('L', logo_size, 0)
-            draw_mask = ImageDraw.Draw(mask)
-            draw_mask.ellipse([0, 0, logo_size[0], logo_size[1]], fill=255)
-            
-            # Criar fundo branco circular
-            white_bg = Image.new('RGBA', logo_size, (255, 255, 255, 255))
-            
-            # Posição central do QR code
-            pos_x = (qr_img.width - logo_size[0]) // 2
-            pos_y = (qr_img.height - logo_size[1]) // 2
-            
-            # Colar fundo branco circular
-            qr_img.paste(white_bg, (pos_x, pos_y), mask)
-            
-            # Colar logo
-            logo_resized = logo.resize((logo_size[0] - 4, logo_size[1] - 4), Image.Resampling.LANCZOS)
-            logo_pos_x = pos_x + 2
-            logo_pos_y = pos_y + 2
-            
-            qr_img.paste(logo_resized, (logo_pos_x, logo_pos_y), logo_resized)
-            
-            return qr_img
-            
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao adicionar logo: {e}")
-            return qr_img
+    def info_checklist(self, checklist, registro, renderizado):
+        """Informações do QR code de um checklist (formato das APIs)"""
+        return {
+            'filename': os.path.basename(registro.arquivo),
+            'filepath': qr_render.caminho_local(registro.arquivo),
+            'arquivo': registro.arquivo,
+            'url': qr_render.url_arquivo(registro.arquivo),
+            'checklist_url': self.url_checklist(checklist),
+            'size': f"{registro.largura}x{registro.altura}",
+            'file_size': registro.tamanho_bytes,
+            'created_at': registro.criado_em.isoformat(),
+            'hash': registro.hash,
+            'cache': not renderizado,
+            'checklist': {
+                'id': checklist.id,
+                'uuid': str(checklist.uuid),
+                'equipamento': checklist.equipamento.nome,
+                'cliente': checklist.equipamento.cliente.razao_social,
+                'data': checklist.data_checklist.strftime('%d/%m/%Y'),
+                'turno': checklist.turno
+            }
+        }
+    
+    def url_qr_checklist(self, checklist, tamanho='medium', formato='png'):
+        """URL da imagem já gerada para o checklist, ou None"""
+        return self.url_qr_existente(checklist, tamanho, formato)
     
-    def _generate_filename(self, checklist, tamanho):
-        """Gera nome do arquivo baseado no checklist"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        equipamento_id = checklist.equipamento.id
-        return f"checklist_{checklist.uuid}_{equipamento_id}_{tamanho}_{timestamp}.png"
+    def url_qr_existente(self, objeto, tamanho='medium', formato='png'):
+        """URL da imagem já gerada para o objeto (checklist, equipamento, operador), ou None"""
+        from .models import ReferenciaQRCode
+        
+        referencia = ReferenciaQRCode.objects.select_related('qr_code').filter(
+            dono=qr_render.payload_para(objeto).dono(tamanho, formato)
+        ).first()
+        if referencia is None:
+            return None
+        return qr_render.url_arquivo(referencia.qr_code.arquivo)
     
     def limpar_qr_antigos(self, dias=7):
-        """Remove QR codes antigos"""
-        import time
-        
-        removed_count = 0
-        cutoff = time.time() - (dias * 24 * 60 * 60)
-        
-        for root, dirs, files in os.walk(self.qr_dir):
-            for file in files:
-                if file.endswith('.png'):
-                    filepath = os.path.join(root, file)
-                    if os.path.getmtime(filepath) < cutoff:
-                        try:
-                            os.remove(filepath)
-                            removed_count += 1
-                        except Exception as e:
-                            logger.warning(f"⚠️ Erro ao remover {filepath}: {e}")
-        
-        logger.info(f"🧹 {removed_count} QR codes antigos removidos")
+        """
+        Remove QR codes que não são mais usados
+        
+        Apaga as referências de checklists com mais de `dias` dias e as
+        imagens do cache que ficaram sem nenhuma referência. Referências
+        permanentes (sem data) mantêm suas imagens.
+        
+        Returns:
+            int: Arquivos removidos
+        """
+        removed_count, referencias = qr_render.limpar_cache(dias)
+        removed_count += self._limpar_avulsos(dias)
+        
+        logger.info(f"🧹 {removed_count} QR codes antigos removidos ({referencias} referências vencidas)")
         return removed_count
     
+    def _limpar_avulsos(self, dias):
+        """Remove arquivos antigos dos diretórios sem referências"""
+        removidos = 0
+        cutoff = (timezone.now() - timedelta(days=dias)).timestamp()
+        
+        for subdir in DIRETORIOS_AVULSOS:
+            diretorio = os.path.join(self.qr_dir, subdir)
+            if not os.path.isdir(diretorio):
+                continue
+            with os.scandir(diretorio) as entradas:
+                for entrada in entradas:
+                    if not entrada.name.endswith('.png') or entrada.stat().st_mtime >= cutoff:
+                        continue
+                    try:
+                        os.remove(entrada.path)
+                        removidos += 1
+                    except OSError as e:
+                        logger.warning(f"⚠️ Erro ao remover {entrada.path}: {e}")
+        
+        return removidos
+    
     def gerar_qr_customizado(self, dados, filename, config_custom=None):
         """
         Gera QR code customizado com dados específicos
@@ -395,20 +238,9 @@ class QRCodeManager:
             dict: Informações do QR code gerado
         """
         try:
-            config = config_custom or self._get_size_config('medium')
+            config = config_custom or qr_render.configuracao_tamanho('medium')
             
-            # Criar QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_M,
-                box_size=config['box_size'],
-                border=4,
-            )
-            qr.add_data(dados)
-            qr.make(fit=True)
-            
-            # Gerar imagem
-            qr_img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
+            qr_img = qr_render.renderizar_png(dados, config)
             
             # Salvar
             filepath = os.path.join(self.qr_dir, 'temp', filename)
@@ -454,10 +286,11 @@ def gerar_qr_checklist_view(request, checklist_id):
         # Parâmetros opcionais
         tamanho = request.data.get('tamanho', 'medium')
         incluir_logo = request.data.get('incluir_logo', True)
+        formato = request.data.get('formato', 'png')
         
         # Gerar QR code
         qr_manager = QRCodeManager()
-        qr_info = qr_manager.gerar_qr_checklist(checklist, tamanho, incluir_logo)
+        qr_info = qr_manager.gerar_qr_checklist(checklist, tamanho, incluir_logo, formato)
         
         return Response({
             'success': True,
@@ -484,9 +317,10 @@ def gerar_qr_equipamento_view(request, equipamento_id):
         
         equipamento = Equipamento.objects.get(id=equipamento_id)
         tamanho = request.data.get('tamanho', 'medium')
+        formato = request.data.get('formato', 'png')
         
         qr_manager = QRCodeManager()
-        qr_info = qr_manager.gerar_qr_equipamento(equipamento, tamanho)
+        qr_info = qr_manager.gerar_qr_equipamento(equipamento, tamanho, formato)
         
         return Response({
             'success': True,
@@ -504,6 +338,22 @@ def gerar_qr_equipamento_view(request, equipamento_id):
             'error': str(e)
         }, status=500)
 
+def _validar_lote(checklist_ids):
+    """Resposta 400 se a lista de checklists não é válida ou passa de QR_LOTE_MAXIMO, senão None"""
+    if not isinstance(checklist_ids, list):
+        return Response({
+            'success': False,
+            'error': 'checklist_ids deve ser uma lista'
+        }, status=400)
+    
+    maximo = getattr(settings, 'QR_LOTE_MAXIMO', 500)
+    if len(checklist_ids) > maximo:
+        return Response({
+            'success': False,
+            'error': f'Máximo de {maximo} checklists por lote (recebidos {len(checklist_ids)})'
+        }, status=400)
+    return None
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def gerar_qr_batch_view(request):
@@ -515,9 +365,16 @@ def gerar_qr_batch_view(request):
         checklist_ids = request.data.get('checklist_ids', [])
         tamanho = request.data.get('tamanho', 'medium')
         incluir_logo = request.data.get('incluir_logo', True)
+        formato = request.data.get('formato', 'png')
+        
+        erro = _validar_lote(checklist_ids)
+        if erro:
+            return erro
         
         # Buscar checklists
-        checklists = ChecklistNR12.objects.filter(id__in=checklist_ids)
+        checklists = ChecklistNR12.objects.filter(
+            id__in=checklist_ids
+        ).select_related('equipamento__cliente')
         
         if not checklists.exists():
             return Response({
@@ -527,7 +384,9 @@ def gerar_qr_batch_view(request):
         
         # Gerar QR codes
         qr_manager = QRCodeManager()
-        resultados = qr_manager.gerar_batch_qr_codes(checklists, tamanho, incluir_logo)
+        resultados = qr_manager.gerar_batch_qr_codes(
+            checklists, tamanho, incluir_logo, formato=formato
+        )
         
         return Response({
             'success': True,
@@ -541,45 +400,92 @@ def gerar_qr_batch_view(request):
             'error': str(e)
         }, status=500)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def gerar_qr_lote_arquivo_view(request):
+    """API para gerar QR codes em lote e baixar um ZIP (PNG) ou PDF (etiquetas A4)"""
+    import tempfile
+    from django.http import FileResponse
+    from backend.apps.nr12_checklist.models import ChecklistNR12
+    from backend.apps.nr12_checklist.qr_lote import escrever_pdf, escrever_zip, gerar_lote
+    
+    checklist_ids = request.data.get('checklist_ids', [])
+    formato = request.data.get('formato', 'zip')
+    tamanho = request.data.get('tamanho', 'medium')
+    incluir_logo = request.data.get('incluir_logo', True)
+    
+    # Processos do pool vêm só de settings.QR_PROCESSOS, nunca da requisição
+    erro = _validar_lote(checklist_ids)
+    if erro:
+        return erro
+    
+    if formato not in ('zip', 'pdf'):
+        return Response({
+            'success': False,
+            'error': "Formato deve ser 'zip' ou 'pdf'"
+        }, status=400)
+    
+    checklists = ChecklistNR12.objects.filter(
+        id__in=checklist_ids
+    ).select_related('equipamento__cliente')
+    if not checklists.exists():
+        return Response({
+            'success': False,
+            'error': 'Nenhum checklist encontrado'
+        }, status=404)
+    
+    try:
+        resultados = gerar_lote(checklists, tamanho, incluir_logo)
+        # Arquivo em disco acima de 10 MB: lotes grandes não ficam na memória
+        arquivo = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+        if formato == 'zip':
+            totais = escrever_zip(resultados, arquivo)
+        else:
+            totais = escrever_pdf(resultados, arquivo, ordem=checklist_ids)
+        arquivo.seek(0)
+    except Exception as e:
+        logger.error(f"❌ Erro ao gerar arquivo de QR codes: {e}")
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+    
+    response = FileResponse(
+        arquivo,
+        as_attachment=True,
+        filename=f"qr_codes_checklists.{formato}",
+        content_type='application/zip' if formato == 'zip' else 'application/pdf'
+    )
+    response['X-QR-Gerados'] = totais['gerados']
+    response['X-QR-Cache'] = totais['cache']
+    response['X-QR-Erros'] = len(totais['erros'])
+    return response
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def listar_qr_codes_view(request):
     """Lista QR codes gerados"""
     try:
-        qr_manager = QRCodeManager()
-        
-        # Listar arquivos nos diretórios
-        checklists_dir = os.path.join(qr_manager.qr_dir, 'checklists')
-        equipamentos_dir = os.path.join(qr_manager.qr_dir, 'equipamentos')
+        from backend.apps.nr12_checklist.models import ReferenciaQRCode
         
         qr_codes = {
             'checklists': [],
             'equipamentos': []
         }
         
-        # Listar checklists
-        if os.path.exists(checklists_dir):
-            for filename in os.listdir(checklists_dir):
-                if filename.endswith('.png'):
-                    filepath = os.path.join(checklists_dir, filename)
-                    qr_codes['checklists'].append({
-                        'filename': filename,
-                        'url': f"{settings.MEDIA_URL}qr_codes/checklists/{filename}",
-                        'size': os.path.getsize(filepath),
-                        'created': datetime.fromtimestamp(os.path.getctime(filepath)).isoformat()
-                    })
-        
-        # Listar equipamentos
-        if os.path.exists(equipamentos_dir):
-            for filename in os.listdir(equipamentos_dir):
-                if filename.endswith('.png'):
-                    filepath = os.path.join(equipamentos_dir, filename)
-                    qr_codes['equipamentos'].append({
-                        'filename': filename,
-                        'url': f"{settings.MEDIA_URL}qr_codes/equipamentos/{filename}",
-                        'size': os.path.getsize(filepath),
-                        'created': datetime.fromtimestamp(os.path.getctime(filepath)).isoformat()
-                    })
+        # Imagens do cache em uso por checklists e equipamentos
+        referencias = ReferenciaQRCode.objects.filter(
+            dono__regex=r'^(checklist|equipamento):'
+        ).select_related('qr_code')
+        for referencia in referencias:
+            tipo = 'checklists' if referencia.dono.startswith('checklist:') else 'equipamentos'
+            qr_codes[tipo].append({
+                'filename': os.path.basename(referencia.qr_code.arquivo),
+                'url': qr_render.url_arquivo(referencia.qr_code.arquivo),
+                'size': referencia.qr_code.tamanho_bytes,
+                'created': referencia.qr_code.criado_em.isoformat(),
+                'dono': referencia.dono
+            })
         
         return Response({
             'success': True,
@@ -592,6 +498,56 @@ def listar_qr_codes_view(request):
             'error': str(e)
         }, status=500)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def imagem_qr_view(request, tipo, objeto_id):
+    """
+    Imagem do QR code de um checklist, equipamento ou operador
+    
+    Query params: tamanho (small, medium, large) e formato (png, svg).
+    A resposta usa o hash do conteúdo como ETag: o navegador revalida sem
+    baixar a imagem de novo.
+    """
+    from django.apps import apps
+    from django.core.files.storage import default_storage
+    
+    modelos = {
+        'checklist': 'nr12_checklist.ChecklistNR12',
+        'equipamento': 'equipamentos.Equipamento',
+        'operador': 'operadores.Operador',
+    }
+    tamanho = request.query_params.get('tamanho', 'medium')
+    formato = request.query_params.get('formato', 'png')
+    
+    if tipo not in modelos:
+        return Response({
+            'success': False,
+            'error': f"Tipo deve ser um de: {', '.join(modelos)}"
+        }, status=400)
+    if formato not in qr_render.FORMATOS or tamanho not in qr_render.TAMANHOS:
+        return Response({
+            'success': False,
+            'error': "Formato deve ser 'png' ou 'svg' e tamanho 'small', 'medium' ou 'large'"
+        }, status=400)
+    
+    modelo = apps.get_model(modelos[tipo])
+    try:
+        objeto = modelo.objects.get(pk=objeto_id)
+    except modelo.DoesNotExist:
+        raise Http404
+    
+    registro, _ = qr_render.obter_qr(qr_render.PAYLOADS[tipo](objeto), tamanho, formato)
+    
+    etag = f'"{registro.hash}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+    else:
+        with default_storage.open(registro.arquivo, 'rb') as arquivo:
+            response = HttpResponse(arquivo.read(), content_type=qr_render.FORMATOS[formato])
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def limpar_qr_antigos_view(request):
@@ -623,7 +579,7 @@ from celery import shared_task
 
 @shared_task
 def gerar_qr_codes_diarios():
-    """Task para gerar QR codes dos checklists diários"""
+    """Task para gerar QR codes dos checklists diários (só renderiza os novos)"""
     try:
         from backend.apps.nr12_checklist.models import ChecklistNR12
         from datetime import date
@@ -632,7 +588,7 @@ def gerar_qr_codes_diarios():
         checklists_hoje = ChecklistNR12.objects.filter(
             data_checklist=hoje,
             status='PENDENTE'
-        )
+        ).select_related('equipamento__cliente')
         
         if not checklists_hoje.exists():
             return "Nenhum checklist pendente para hoje"
@@ -645,9 +601,10 @@ def gerar_qr_codes_diarios():
         )
         
         sucesso = len([r for r in resultados if 'error' not in r])
+        renderizados = len([r for r in resultados if 'error' not in r and not r['cache']])
         
-        logger.info(f"✅ QR codes diários gerados: {sucesso}/{len(resultados)}")
-        return f"QR codes gerados: {sucesso}/{len(resultados)}"
+        logger.info(f"✅ QR codes diários: {sucesso}/{len(resultados)} ({renderizados} renderizados)")
+        return f"QR codes gerados: {sucesso}/{len(resultados)} ({renderizados} renderizados)"
         
     except Exception as e:
         logger.error(f"❌ Erro ao gerar QR codes diários: {e}")
@@ -664,4 +621,4 @@ def limpar_qr_codes_antigos():
         
     except Exception as e:
         logger.error(f"❌ Erro na limpeza de QR codes: {e}")
-        raise
\ No newline at end of file
+        raise
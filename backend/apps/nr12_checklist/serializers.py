@@ -2,6 +2,7 @@
 # ================================================================
 
 from rest_framework import serializers
+from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import date
 from .models import (
@@ -49,8 +50,49 @@ class ItemChecklistRealizadoSerializer(serializers.ModelSerializer):
         
         return super().update(instance, validated_data)
 
+# Respostas por requisição em itens/lote (um checklist NR12 tem poucas dezenas)
+MAX_ITENS_LOTE = 500
+
+
+class RespostaItemLoteSerializer(serializers.Serializer):
+    """Resposta de um item enviada no lote do bot"""
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=ItemChecklistRealizado.STATUS_CHOICES)
+    observacao = serializers.CharField(required=False, allow_blank=True, default='')
+    verificado_em = serializers.DateTimeField(required=False)
+
+
+class RespostasItensLoteSerializer(serializers.Serializer):
+    """Lote de respostas de um checklist, opcionalmente finalizando-o"""
+    itens = RespostaItemLoteSerializer(many=True, max_length=MAX_ITENS_LOTE)
+    operador_id = serializers.IntegerField(required=False)
+    finalizar = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if not attrs['itens'] and not attrs['finalizar']:
+            raise serializers.ValidationError({'itens': 'Informe ao menos um item.'})
+        return attrs
+
+
+def anotar_contadores_itens(queryset):
+    """
+    Anota no queryset de ChecklistNR12 os contadores de itens usados pelo
+    ChecklistNR12Serializer, calculados em uma única query agregada
+    """
+    return queryset.annotate(
+        qtd_itens=Count('itens'),
+        qtd_itens_ok=Count('itens', filter=Q(itens__status='OK')),
+        qtd_itens_nok=Count('itens', filter=Q(itens__status='NOK')),
+        qtd_itens_pendentes=Count('itens', filter=Q(itens__status='PENDENTE')),
+    )
+
 class ChecklistNR12Serializer(serializers.ModelSerializer):
-    """Serializer para checklists NR12"""
+    """
+    Serializer para checklists NR12
+
+    Se o queryset vier de anotar_contadores_itens, os contadores são lidos
+    das anotações; caso contrário, são contados item a item.
+    """
     equipamento_nome = serializers.CharField(source='equipamento.nome', read_only=True)
     cliente_nome = serializers.CharField(source='equipamento.cliente.razao_social', read_only=True)
     responsavel_nome = serializers.CharField(source='responsavel.first_name', read_only=True)
@@ -71,18 +113,31 @@ class ChecklistNR12Serializer(serializers.ModelSerializer):
         read_only_fields = ['uuid', 'data_inicio', 'data_conclusao', 'created_at', 'updated_at']
     
     def get_total_itens(self, obj):
+        if hasattr(obj, 'qtd_itens'):
+            return obj.qtd_itens
         return obj.itens.count()
     
     def get_itens_ok(self, obj):
+        if hasattr(obj, 'qtd_itens_ok'):
+            return obj.qtd_itens_ok
         return obj.itens.filter(status='OK').count()
     
     def get_itens_nok(self, obj):
+        if hasattr(obj, 'qtd_itens_nok'):
+            return obj.qtd_itens_nok
         return obj.itens.filter(status='NOK').count()
     
     def get_itens_pendentes(self, obj):
+        if hasattr(obj, 'qtd_itens_pendentes'):
+            return obj.qtd_itens_pendentes
         return obj.itens.filter(status='PENDENTE').count()
     
     def get_percentual_conclusao(self, obj):
+        if hasattr(obj, 'qtd_itens'):
+            if obj.qtd_itens == 0:
+                return 0
+            concluidos = obj.qtd_itens - obj.qtd_itens_pendentes
+            return round((concluidos / obj.qtd_itens) * 100, 1)
         return obj.percentual_conclusao
     
     def get_qr_code_url(self, obj):
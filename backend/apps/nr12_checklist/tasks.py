@@ -4,8 +4,8 @@ from celery import shared_task
 from datetime import date, timedelta
 from django.utils import timezone
 from django.db.models import Q
-from backend.apps.nr12_checklist.models import ChecklistNR12, ItemChecklistPadrao, ItemChecklistRealizado
-from backend.apps.equipamentos.models import Equipamento
+from backend.apps.nr12_checklist.models import ChecklistNR12
+from backend.apps.nr12_checklist.gerador import gerar_checklists_agendados
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,68 +16,8 @@ def gerar_checklists_diarios():
     Gera checklists diários para equipamentos configurados
     """
     try:
-        hoje = date.today()
-        logger.info(f"🔄 Iniciando geração de checklists diários para {hoje}")
-        
-        # ✅ CORRIGIDO: Usar frequencias_checklist (plural) com __contains
-        equipamentos = Equipamento.objects.filter(
-            ativo_nr12=True,
-            frequencias_checklist__contains=['DIARIA'],
-            tipo_nr12__isnull=False
-        ).select_related('tipo_nr12', 'cliente')
-        
-        total_equipamentos = equipamentos.count()
-        logger.info(f"📊 Equipamentos encontrados para checklist diário: {total_equipamentos}")
-        
-        if total_equipamentos == 0:
-            logger.warning("⚠️ Nenhum equipamento configurado para checklist diário")
-            return "Nenhum equipamento configurado"
-        
-        checklists_criados = 0
-        turnos = ['MANHA', 'TARDE', 'NOITE']
-        
-        for equipamento in equipamentos:
-            logger.debug(f"🔧 Processando equipamento: {equipamento.nome}")
-            
-            # Verificar se tem itens padrão
-            itens_padrao = ItemChecklistPadrao.objects.filter(
-                tipo_equipamento=equipamento.tipo_nr12,
-                ativo=True
-            )
-            
-            if not itens_padrao.exists():
-                logger.warning(f"⚠️ Equipamento {equipamento.nome} não tem itens padrão configurados")
-                continue
-            
-            # Criar checklist para cada turno (se não existir)
-            for turno in turnos:
-                checklist, criado = ChecklistNR12.objects.get_or_create(
-                    equipamento=equipamento,
-                    data_checklist=hoje,
-                    turno=turno,
-                    defaults={
-                        'frequencia': 'DIARIA',
-                        'status': 'PENDENTE'
-                    }
-                )
-                
-                if criado:
-                    logger.debug(f"✅ Checklist criado: {equipamento.nome} - {turno}")
-                    checklists_criados += 1
-                    
-                    # Criar itens do checklist
-                    for item_padrao in itens_padrao:
-                        ItemChecklistRealizado.objects.create(
-                            checklist=checklist,
-                            item_padrao=item_padrao,
-                            status='PENDENTE'
-                        )
-                else:
-                    logger.debug(f"ℹ️ Checklist já existe: {equipamento.nome} - {turno}")
-        
-        logger.info(f"✅ Checklists diários criados: {checklists_criados}")
-        return f"Criados {checklists_criados} checklists diários"
-        
+        logger.info(f"🔄 Iniciando geração de checklists diários para {date.today()}")
+        return gerar_checklists_agendados(frequencias=['DIARIA'])
     except Exception as e:
         logger.error(f"❌ Erro ao gerar checklists diários: {e}")
         raise
@@ -89,66 +29,8 @@ def gerar_checklists_semanais():
     Executa toda segunda-feira
     """
     try:
-        hoje = date.today()
-        logger.info(f"🔄 Iniciando geração de checklists semanais para {hoje}")
-        
-        # ✅ CORRIGIDO: Usar frequencias_checklist (plural) com __contains
-        equipamentos = Equipamento.objects.filter(
-            ativo_nr12=True,
-            frequencias_checklist__contains=['SEMANAL'],
-            tipo_nr12__isnull=False
-        ).select_related('tipo_nr12', 'cliente')
-        
-        total_equipamentos = equipamentos.count()
-        logger.info(f"📊 Equipamentos encontrados para checklist semanal: {total_equipamentos}")
-        
-        if total_equipamentos == 0:
-            logger.warning("⚠️ Nenhum equipamento configurado para checklist semanal")
-            return "Nenhum equipamento configurado"
-        
-        checklists_criados = 0
-        
-        for equipamento in equipamentos:
-            logger.debug(f"🔧 Processando equipamento: {equipamento.nome}")
-            
-            # Verificar se tem itens padrão
-            itens_padrao = ItemChecklistPadrao.objects.filter(
-                tipo_equipamento=equipamento.tipo_nr12,
-                ativo=True
-            )
-            
-            if not itens_padrao.exists():
-                logger.warning(f"⚠️ Equipamento {equipamento.nome} não tem itens padrão configurados")
-                continue
-            
-            # Criar checklist semanal
-            checklist, criado = ChecklistNR12.objects.get_or_create(
-                equipamento=equipamento,
-                data_checklist=hoje,
-                turno='MANHA',  # Checklist semanal só no turno da manhã
-                defaults={
-                    'frequencia': 'SEMANAL',
-                    'status': 'PENDENTE'
-                }
-            )
-            
-            if criado:
-                logger.debug(f"✅ Checklist semanal criado: {equipamento.nome}")
-                checklists_criados += 1
-                
-                # Criar itens do checklist
-                for item_padrao in itens_padrao:
-                    ItemChecklistRealizado.objects.create(
-                        checklist=checklist,
-                        item_padrao=item_padrao,
-                        status='PENDENTE'
-                    )
-            else:
-                logger.debug(f"ℹ️ Checklist semanal já existe: {equipamento.nome}")
-        
-        logger.info(f"✅ Checklists semanais criados: {checklists_criados}")
-        return f"Criados {checklists_criados} checklists semanais"
-        
+        logger.info(f"🔄 Iniciando geração de checklists semanais para {date.today()}")
+        return gerar_checklists_agendados(frequencias=['SEMANAL'])
     except Exception as e:
         logger.error(f"❌ Erro ao gerar checklists semanais: {e}")
         raise
@@ -160,66 +42,8 @@ def gerar_checklists_mensais():
     Executa todo dia 1º do mês
     """
     try:
-        hoje = date.today()
-        logger.info(f"🔄 Iniciando geração de checklists mensais para {hoje}")
-        
-        # ✅ CORRIGIDO: Usar frequencias_checklist (plural) com __contains
-        equipamentos = Equipamento.objects.filter(
-            ativo_nr12=True,
-            frequencias_checklist__contains=['MENSAL'],
-            tipo_nr12__isnull=False
-        ).select_related('tipo_nr12', 'cliente')
-        
-        total_equipamentos = equipamentos.count()
-        logger.info(f"📊 Equipamentos encontrados para checklist mensal: {total_equipamentos}")
-        
-        if total_equipamentos == 0:
-            logger.warning("⚠️ Nenhum equipamento configurado para checklist mensal")
-            return "Nenhum equipamento configurado"
-        
-        checklists_criados = 0
-        
-        for equipamento in equipamentos:
-            logger.debug(f"🔧 Processando equipamento: {equipamento.nome}")
-            
-            # Verificar se tem itens padrão
-            itens_padrao = ItemChecklistPadrao.objects.filter(
-                tipo_equipamento=equipamento.tipo_nr12,
-                ativo=True
-            )
-            
-            if not itens_padrao.exists():
-                logger.warning(f"⚠️ Equipamento {equipamento.nome} não tem itens padrão configurados")
-                continue
-            
-            # Criar checklist mensal
-            checklist, criado = ChecklistNR12.objects.get_or_create(
-                equipamento=equipamento,
-                data_checklist=hoje,
-                turno='MANHA',  # Checklist mensal só no turno da manhã
-                defaults={
-                    'frequencia': 'MENSAL',
-                    'status': 'PENDENTE'
-                }
-            )
-            
-            if criado:
-                logger.debug(f"✅ Checklist mensal criado: {equipamento.nome}")
-                checklists_criados += 1
-                
-                # Criar itens do checklist
-                for item_padrao in itens_padrao:
-                    ItemChecklistRealizado.objects.create(
-                        checklist=checklist,
-                        item_padrao=item_padrao,
-                        status='PENDENTE'
-                    )
-            else:
-                logger.debug(f"ℹ️ Checklist mensal já existe: {equipamento.nome}")
-        
-        logger.info(f"✅ Checklists mensais criados: {checklists_criados}")
-        return f"Criados {checklists_criados} checklists mensais"
-        
+        logger.info(f"🔄 Iniciando geração de checklists mensais para {date.today()}")
+        return gerar_checklists_agendados(frequencias=['MENSAL'])
     except Exception as e:
         logger.error(f"❌ Erro ao gerar checklists mensais: {e}")
         raise
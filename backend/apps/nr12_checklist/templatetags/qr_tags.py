@@ -27,3 +27,16 @@ def gerar_qr_code(obj, tamanho='medium', incluir_logo=True):
             obj.gerar_qr_png(tamanho, incluir_logo)
         return obj.qr_code_png_url
     return ''
+
+@register.simple_tag
+def qr_code_svg(obj, tamanho='medium'):
+    """Retorna o QR code como SVG inline (checklist, equipamento ou operador)"""
+    from django.core.files.storage import default_storage
+    from backend.apps.shared import qr_render
+
+    try:
+        registro, _ = qr_render.obter_qr(qr_render.payload_para(obj), tamanho, 'svg')
+        with default_storage.open(registro.arquivo, 'rb') as arquivo:
+            return mark_safe(arquivo.read().decode())
+    except ValueError:
+        return ''
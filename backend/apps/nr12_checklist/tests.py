@@ -1,2 +1,473 @@
- 
-from django.test import TestCase
\ No newline at end of file
+import os
+import tempfile
+from datetime import date, timedelta
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from backend.apps.clientes.models import Cliente
+from backend.apps.dashboard.kpis import obter_snapshot_hoje, reconciliar_kpis
+from backend.apps.empreendimentos.models import Empreendimento
+from backend.apps.equipamentos.admin import EquipamentoAdmin
+from backend.apps.equipamentos.importacao import importar_equipamentos
+from backend.apps.equipamentos.models import CategoriaEquipamento, Equipamento
+from backend.apps.operadores.models import Operador
+from .gerador import gerar_checklists_agendados, gerar_checklists_em_lote
+from .models import (
+    ChecklistNR12, ExecucaoGeracaoChecklist, ItemChecklistPadrao, ItemChecklistRealizado,
+    QRCodeRenderizado, ReferenciaQRCode, TipoEquipamentoNR12
+)
+from .qr_manager import QRCodeManager, gerar_qr_lote_arquivo_view
+from .viewsets import ChecklistNR12ViewSet
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ChecklistNR12ListQueriesTest(TestCase):
+    """A listagem de checklists não pode fazer queries por linha"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cliente = Cliente.objects.create(
+            razao_social='Cliente Teste', cnpj='00000000000100', rua='Rua A',
+            numero='1', bairro='Centro', cidade='Cidade', estado='SP', cep='00000-000'
+        )
+        empreendimento = Empreendimento.objects.create(
+            cliente=cliente, nome='Obra', endereco='Rua B', cidade='Cidade',
+            estado='SP', cep='00000-000', distancia_km=10
+        )
+        categoria = CategoriaEquipamento.objects.create(
+            codigo='ESC', nome='Escavadeira', prefixo_codigo='ESC'
+        )
+        tipo = TipoEquipamentoNR12.objects.create(nome='Escavadeira')
+        cls.itens_padrao = [
+            ItemChecklistPadrao.objects.create(
+                tipo_equipamento=tipo, item=f'Item {i}', criticidade='MEDIA', ordem=i
+            )
+            for i in range(4)
+        ]
+        cls.equipamento = Equipamento.objects.create(
+            nome='Escavadeira 01', categoria=categoria, cliente=cliente,
+            empreendimento=empreendimento, tipo_nr12=tipo, ativo_nr12=False
+        )
+
+    def _criar_checklists(self, quantidade, inicio=0):
+        for i in range(inicio, inicio + quantidade):
+            checklist = ChecklistNR12.objects.create(
+                equipamento=self.equipamento,
+                data_checklist=date(2025, 1, 1) + timedelta(days=i),
+                turno='MANHA',
+            )
+            for indice, item_padrao in enumerate(self.itens_padrao):
+                ItemChecklistRealizado.objects.create(
+                    checklist=checklist,
+                    item_padrao=item_padrao,
+                    status=['OK', 'NOK', 'PENDENTE', 'PENDENTE'][indice],
+                )
+
+    def _listar(self):
+        view = ChecklistNR12ViewSet.as_view({'get': 'list'})
+        request = APIRequestFactory().get('/api/nr12/checklists/')
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_queries_constantes_independente_do_tamanho_da_pagina(self):
+        self._criar_checklists(2)
+        _, queries_poucos = self._listar()
+
+        self._criar_checklists(15, inicio=2)
+        response, queries_muitos = self._listar()
+
+        self.assertEqual(len(response.data['results']), 17)
+        self.assertEqual(queries_poucos, queries_muitos)
+
+    def test_contadores_anotados(self):
+        self._criar_checklists(1)
+        response, _ = self._listar()
+
+        checklist = response.data['results'][0]
+        self.assertEqual(checklist['total_itens'], 4)
+        self.assertEqual(checklist['itens_ok'], 1)
+        self.assertEqual(checklist['itens_nok'], 1)
+        self.assertEqual(checklist['itens_pendentes'], 2)
+        self.assertEqual(checklist['percentual_conclusao'], 50.0)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RespostasItensLoteTest(TestCase):
+    """Respostas do bot gravadas em lote numa única requisição"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cliente = Cliente.objects.create(
+            razao_social='Cliente Teste', cnpj='00000000000100', rua='Rua A',
+            numero='1', bairro='Centro', cidade='Cidade', estado='SP', cep='00000-000'
+        )
+        empreendimento = Empreendimento.objects.create(
+            cliente=cliente, nome='Obra', endereco='Rua B', cidade='Cidade',
+            estado='SP', cep='00000-000', distancia_km=10
+        )
+        categoria = CategoriaEquipamento.objects.create(
+            codigo='ESC', nome='Escavadeira', prefixo_codigo='ESC'
+        )
+        tipo = TipoEquipamentoNR12.objects.create(nome='Escavadeira')
+        itens_padrao = [
+            ItemChecklistPadrao.objects.create(
+                tipo_equipamento=tipo, item=f'Item {i}', criticidade='MEDIA', ordem=i
+            )
+            for i in range(20)
+        ]
+        equipamento = Equipamento.objects.create(
+            nome='Escavadeira 01', categoria=categoria, cliente=cliente,
+            empreendimento=empreendimento, tipo_nr12=tipo, ativo_nr12=False
+        )
+        cls.checklist = ChecklistNR12.objects.create(
+            equipamento=equipamento, data_checklist=date(2025, 1, 1),
+            turno='MANHA', status='EM_ANDAMENTO'
+        )
+        cls.itens = [
+            ItemChecklistRealizado.objects.create(checklist=cls.checklist, item_padrao=item_padrao)
+            for item_padrao in itens_padrao
+        ]
+        cls.bot = get_user_model().objects.create(username='bot', is_staff=True)
+
+    def _enviar(self, corpo, usuario=None, **headers):
+        # Mesmos initkwargs que o router aplica à action (permission_classes)
+        view = ChecklistNR12ViewSet.as_view({'post': 'itens_lote'}, **ChecklistNR12ViewSet.itens_lote.kwargs)
+        request = APIRequestFactory().post('/', corpo, format='json', headers=headers)
+        if usuario is not False:
+            force_authenticate(request, user=usuario or self.bot)
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request, pk=self.checklist.pk)
+        return response, len(queries)
+
+    def test_grava_todos_os_itens_com_queries_constantes(self):
+        corpo = {'itens': [{'id': item.id, 'status': 'OK'} for item in self.itens[:2]]}
+        _, queries_poucos = self._enviar(corpo)
+
+        corpo = {'itens': [
+            {'id': item.id, 'status': 'NOK', 'observacao': 'Vazamento'} for item in self.itens
+        ]}
+        response, queries_muitos = self._enviar(corpo)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['atualizados'], 20)
+        self.assertEqual(queries_poucos, queries_muitos)
+        self.assertEqual(self.checklist.itens.filter(status='NOK', observacao='Vazamento').count(), 20)
+
+    def test_reenvio_antigo_nao_sobrescreve_e_finaliza(self):
+        item = self.itens[0]
+        self._enviar({'itens': [{'id': item.id, 'status': 'NOK', 'verificado_em': '2025-01-01T10:00:00Z'}]})
+
+        response, _ = self._enviar({
+            'itens': [{'id': item.id, 'status': 'OK', 'verificado_em': '2025-01-01T09:00:00Z'}],
+            'finalizar': True,
+        })
+
+        self.assertEqual(response.data['ignorados'], 1)
+        self.assertEqual(response.data['status'], 'CONCLUIDO')
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'NOK')
+
+    def test_item_de_outro_checklist_rejeita_o_lote(self):
+        response, _ = self._enviar({'itens': [
+            {'id': self.itens[0].id, 'status': 'OK'}, {'id': 999999, 'status': 'OK'}
+        ]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['itens'], [999999])
+        self.assertFalse(self.checklist.itens.exclude(status='PENDENTE').exists())
+
+    def test_exige_autenticacao_e_acesso_ao_equipamento(self):
+        corpo = {'itens': [{'id': self.itens[0].id, 'status': 'OK'}], 'finalizar': True}
+        anonimo, _ = self._enviar(corpo, usuario=False)
+        self.assertIn(anonimo.status_code, (401, 403))
+
+        usuario = get_user_model().objects.create(username='operador')
+        operador = Operador.objects.create(
+            nome='Operador', cpf='52998224725', data_nascimento=date(1990, 1, 1), telefone='1',
+            endereco='Rua', cidade='Cidade', estado='SP', cep='0', funcao='Op', setor='Obra',
+            data_admissao=date(2020, 1, 1), numero_documento='1', user=usuario
+        )
+        # Equipamento fora do NR12 não está no escopo de nenhum operador
+        sem_acesso, _ = self._enviar(corpo, usuario=usuario)
+        outro_usuario = get_user_model().objects.create(username='outro')
+        outro_operador, _ = self._enviar(dict(corpo, operador_id=operador.pk), usuario=outro_usuario)
+
+        self.assertEqual((sem_acesso.status_code, outro_operador.status_code), (403, 403))
+        self.checklist.refresh_from_db()
+        self.assertEqual(self.checklist.status, 'EM_ANDAMENTO')
+        self.assertFalse(self.checklist.itens.exclude(status='PENDENTE').exists())
+
+    def test_acao_do_admin_atualiza_o_escopo(self):
+        equipamento = self.checklist.equipamento
+        operador = Operador.objects.create(
+            nome='Operador', cpf='52998224725', data_nascimento=date(1990, 1, 1), telefone='1',
+            endereco='Rua', cidade='Cidade', estado='SP', cep='0', funcao='Op', setor='Obra',
+            data_admissao=date(2020, 1, 1), numero_documento='1'
+        )
+        # Escopo em cache antes da ação: fora do NR12
+        self.assertFalse(operador.pode_acessar_equipamento(equipamento.pk))
+
+        admin_equipamentos = EquipamentoAdmin(Equipamento, admin.site)
+        self.assertEqual(admin_equipamentos._alterar_nr12(Equipamento.objects.filter(pk=equipamento.pk), True), 1)
+        self.assertTrue(operador.pode_acessar_equipamento(equipamento.pk))
+        admin_equipamentos._alterar_nr12(Equipamento.objects.all(), False)
+        self.assertFalse(operador.pode_acessar_equipamento(equipamento.pk))
+
+    def test_idempotency_key_repete_resposta_sem_executar(self):
+        corpo = {'itens': [{'id': self.itens[0].id, 'status': 'OK'}], 'finalizar': True}
+        primeira, _ = self._enviar(corpo, **{'Idempotency-Key': 'abc-1'})
+        repetida, queries = self._enviar(corpo, **{'Idempotency-Key': 'abc-1'})
+
+        self.assertEqual(primeira.status_code, 200)
+        self.assertEqual(repetida.status_code, 200)
+        self.assertEqual(repetida['Idempotent-Replayed'], 'true')
+        self.assertEqual(repetida.data['status'], 'CONCLUIDO')
+        self.assertEqual(queries, 0)
+
+        outro_corpo, _ = self._enviar({'itens': [], 'finalizar': True}, **{'Idempotency-Key': 'abc-1'})
+        self.assertEqual(outro_corpo.status_code, 422)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), QR_LOGO_PATH=None)
+class QRCodeCacheTest(TestCase):
+    """QR codes de checklist no cache endereçado por conteúdo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cliente = Cliente.objects.create(
+            razao_social='Cliente Teste', cnpj='00000000000200', rua='Rua A',
+            numero='1', bairro='Centro', cidade='Cidade', estado='SP', cep='00000-000'
+        )
+        empreendimento = Empreendimento.objects.create(
+            cliente=cliente, nome='Obra', endereco='Rua B', cidade='Cidade',
+            estado='SP', cep='00000-000', distancia_km=10
+        )
+        categoria = CategoriaEquipamento.objects.create(
+            codigo='TRT', nome='Trator', prefixo_codigo='TRT'
+        )
+        tipo = TipoEquipamentoNR12.objects.create(nome='Trator')
+        equipamento = Equipamento.objects.create(
+            nome='Trator 01', categoria=categoria, cliente=cliente,
+            empreendimento=empreendimento, tipo_nr12=tipo, ativo_nr12=False
+        )
+        cls.checklist = ChecklistNR12.objects.create(
+            equipamento=equipamento, data_checklist=date.today(), turno='MANHA'
+        )
+        cls.checklist_antigo = ChecklistNR12.objects.create(
+            equipamento=equipamento, data_checklist=date.today() - timedelta(days=30), turno='MANHA'
+        )
+
+    def test_mesmo_conteudo_renderiza_uma_vez(self):
+        manager = QRCodeManager()
+        primeiro = manager.gerar_qr_checklist(self.checklist)
+        segundo = manager.gerar_qr_checklist(self.checklist)
+
+        self.assertFalse(primeiro['cache'])
+        self.assertTrue(segundo['cache'])
+        self.assertEqual(primeiro['url'], segundo['url'])
+        self.assertEqual(
+            QRCodeRenderizado.objects.filter(referencias__dono__startswith='checklist:').count(), 1
+        )
+        self.assertEqual(manager.url_qr_checklist(self.checklist), primeiro['url'])
+
+    def test_limpeza_remove_apenas_imagens_sem_referencia(self):
+        manager = QRCodeManager()
+        atual = manager.gerar_qr_checklist(self.checklist)
+        antigo = manager.gerar_qr_checklist(self.checklist_antigo)
+        QRCodeRenderizado.objects.update(usado_em=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(manager.limpar_qr_antigos(dias=7), 1)
+        self.assertFalse(os.path.exists(antigo['filepath']))
+        self.assertTrue(os.path.exists(atual['filepath']))
+        self.assertEqual(ReferenciaQRCode.objects.filter(dono__startswith='checklist:').count(), 1)
+
+    def test_svg_vetorial_no_mesmo_layout(self):
+        manager = QRCodeManager()
+        png = manager.gerar_qr_checklist(self.checklist)
+        svg = manager.gerar_qr_checklist(self.checklist, formato='svg')
+
+        self.assertTrue(svg['filename'].endswith('.svg'))
+        self.assertNotEqual(png['hash'], svg['hash'])
+        self.assertEqual(png['size'], svg['size'])
+        with open(svg['filepath']) as arquivo:
+            conteudo = arquivo.read()
+        self.assertTrue(conteudo.startswith('<svg'))
+        self.assertIn(self.checklist.turno, conteudo)
+        self.assertLess(svg['file_size'], png['file_size'])
+
+    @override_settings(QR_LOTE_MAXIMO=1)
+    def test_lote_em_arquivo_limitado(self):
+        usuario = get_user_model().objects.create(username='etiquetas')
+
+        def baixar(ids):
+            request = APIRequestFactory().post(
+                '/api/nr12/qr/batch/arquivo/', {'checklist_ids': ids, 'processos': 64}, format='json'
+            )
+            force_authenticate(request, user=usuario)
+            return gerar_qr_lote_arquivo_view(request)
+
+        self.assertEqual(baixar([self.checklist.pk, self.checklist_antigo.pk]).status_code, 400)
+        resposta = baixar([self.checklist.pk])
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta['X-QR-Erros'], '0')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), QR_INCLUDE_LOGO=False)
+class GeracaoEmLoteTest(TestCase):
+    """Motor de geração em lote e registro de execuções"""
+
+    # Terça-feira que não é dia 1º: apenas a frequência diária (3 turnos)
+    DIA = date(2026, 10, 13)
+
+    @classmethod
+    def setUpTestData(cls):
+        cliente = Cliente.objects.create(
+            razao_social='Cliente Teste', cnpj='00000000000500', rua='Rua A',
+            numero='1', bairro='Centro', cidade='Cidade', estado='SP', cep='00000-000'
+        )
+        empreendimento = Empreendimento.objects.create(
+            cliente=cliente, nome='Obra', endereco='Rua B', cidade='Cidade',
+            estado='SP', cep='00000-000', distancia_km=10
+        )
+        categoria = CategoriaEquipamento.objects.create(
+            codigo='CAR', nome='Carregadeira', prefixo_codigo='CAR'
+        )
+        tipo = TipoEquipamentoNR12.objects.create(nome='Carregadeira')
+        for ordem, item in enumerate(['Freios', 'Buzina'], start=1):
+            ItemChecklistPadrao.objects.create(
+                tipo_equipamento=tipo, item=item, criticidade='ALTA', ordem=ordem
+            )
+        for indice in range(20):
+            Equipamento.objects.create(
+                nome=f'Carregadeira {indice:02d}', categoria=categoria, cliente=cliente,
+                empreendimento=empreendimento, tipo_nr12=tipo, frequencias_checklist=['DIARIA']
+            )
+
+    def test_segunda_execucao_nao_cria_nada(self):
+        primeira = gerar_checklists_agendados(self.DIA)['frequencias']['DIARIA']
+        self.assertEqual((primeira['checklists_criados'], primeira['itens_criados']), (60, 120))
+
+        self.assertEqual(gerar_checklists_agendados(self.DIA)['frequencias'], {'DIARIA': {'ja_executada': True}})
+        # Mesmo sem o registro de execuções, nada é duplicado
+        varredura = gerar_checklists_em_lote('DIARIA', self.DIA)
+        self.assertEqual((varredura['checklists_criados'], varredura['ja_existentes']), (0, 60))
+        self.assertEqual(ChecklistNR12.objects.filter(data_checklist=self.DIA).count(), 60)
+
+    def test_dry_run_nao_grava(self):
+        stats = gerar_checklists_agendados(self.DIA, dry_run=True)['frequencias']['DIARIA']
+
+        self.assertEqual((stats['checklists_criados'], stats['itens_criados']), (60, 120))
+        self.assertFalse(ChecklistNR12.objects.exists())
+        self.assertFalse(ItemChecklistRealizado.objects.exists())
+        self.assertFalse(ExecucaoGeracaoChecklist.objects.exists())
+
+    def test_forcar_refaz_execucao_registrada(self):
+        gerar_checklists_agendados(self.DIA)
+        ChecklistNR12.objects.filter(data_checklist=self.DIA, turno='NOITE').delete()
+
+        self.assertEqual(gerar_checklists_agendados(self.DIA)['frequencias']['DIARIA'], {'ja_executada': True})
+        stats = gerar_checklists_agendados(self.DIA, forcar=True)['frequencias']['DIARIA']
+        self.assertEqual(stats['checklists_criados'], 20)
+        self.assertEqual(ExecucaoGeracaoChecklist.objects.get(data=self.DIA).checklists_criados, 20)
+
+    def test_queries_nao_crescem_com_a_frota(self):
+        frota = Equipamento.objects.order_by('id')
+        pequena = gerar_checklists_em_lote(
+            'DIARIA', self.DIA, equipamentos=frota.filter(pk__in=list(frota.values_list('pk', flat=True)[:2]))
+        )
+        completa = gerar_checklists_em_lote('DIARIA', self.DIA + timedelta(days=1), equipamentos=frota)
+
+        self.assertEqual((pequena['checklists_criados'], completa['checklists_criados']), (6, 60))
+        self.assertEqual(pequena['queries'], completa['queries'])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), QR_INCLUDE_LOGO=False, CELERY_TASK_ALWAYS_EAGER=True)
+class EfeitosEquipamentoTest(TestCase):
+    """QR code e checklists do equipamento novo gerados depois do commit"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = Cliente.objects.create(
+            razao_social='Cliente Teste', cnpj='00000000000300', rua='Rua A',
+            numero='1', bairro='Centro', cidade='Cidade', estado='SP', cep='00000-000'
+        )
+        cls.empreendimento = Empreendimento.objects.create(
+            cliente=cls.cliente, nome='Obra', endereco='Rua B', cidade='Cidade',
+            estado='SP', cep='00000-000', distancia_km=10
+        )
+        cls.categoria = CategoriaEquipamento.objects.create(
+            codigo='RET', nome='Retroescavadeira', prefixo_codigo='RET'
+        )
+        cls.tipo = TipoEquipamentoNR12.objects.create(nome='Retroescavadeira')
+        ItemChecklistPadrao.objects.create(
+            tipo_equipamento=cls.tipo, item='Freios', criticidade='ALTA', ordem=1
+        )
+
+    @staticmethod
+    def _tarefas(callbacks):
+        # Os demais callbacks de on_commit são invalidações de cache
+        return [callback for callback in callbacks if callback.__name__ == 'disparar']
+
+    def _novo(self, nome):
+        return Equipamento(
+            nome=nome, categoria=self.categoria, cliente=self.cliente,
+            empreendimento=self.empreendimento, tipo_nr12=self.tipo,
+            frequencias_checklist=['DIARIA']
+        )
+
+    def test_save_so_agenda_e_efeitos_rodam_no_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            equipamento = self._novo('Retro 01')
+            equipamento.save()
+            self.assertFalse(Equipamento.objects.get(pk=equipamento.pk).qr_code)
+            self.assertFalse(ChecklistNR12.objects.filter(equipamento=equipamento).exists())
+
+        self.assertEqual(len(self._tarefas(callbacks)), 2)
+        self.assertTrue(Equipamento.objects.get(pk=equipamento.pk).qr_code.name.startswith('qr_codes/cache/'))
+        self.assertEqual(ChecklistNR12.objects.filter(equipamento=equipamento).count(), 3)
+
+    def test_save_le_o_estado_anterior_uma_vez(self):
+        equipamento = self._novo('Retro 01')
+        equipamento.save()
+        equipamento.status = 'MANUTENCAO'
+        tabela = Equipamento._meta.db_table
+        with CaptureQueriesContext(connection) as consultas:
+            equipamento.save()
+
+        leituras = [q['sql'] for q in consultas if q['sql'].startswith('SELECT') and f'FROM "{tabela}"' in q['sql']]
+        # KPIs, cache de resumos e escopo dos operadores dividem a mesma leitura
+        self.assertEqual(len(leituras), 1, leituras)
+        self.assertNotIn('"nome"', leituras[0].split(' FROM ')[0])
+
+    def test_importacao_agenda_uma_tarefa_por_lote(self):
+        obter_snapshot_hoje()
+        operador = Operador.objects.create(
+            nome='Operador', cpf='52998224725', data_nascimento=date(1990, 1, 1), telefone='1',
+            endereco='Rua', cidade='Cidade', estado='SP', cep='0', funcao='Op', setor='Obra',
+            data_admissao=date(2020, 1, 1), numero_documento='1'
+        )
+        escopo_antes = operador.get_equipamentos_ids()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            stats = importar_equipamentos((self._novo(f'Retro {i:02d}') for i in range(5)), tamanho_lote=2)
+
+        self.assertEqual(stats, {'importados': 5, 'lotes': 3})
+        self.assertEqual(len(self._tarefas(callbacks)), 6)
+        importados = Equipamento.objects.filter(nome__startswith='Retro ')
+        self.assertFalse(importados.filter(qr_code='').exists())
+        self.assertEqual(ChecklistNR12.objects.filter(equipamento__in=importados).count(), 15)
+        # bulk_create não passa pelo post_save: o snapshot do dia segue o lote
+        self.assertEqual(reconciliar_kpis()['divergencias'], {})
+        # ...e o escopo em cache dos operadores também
+        self.assertEqual(
+            set(operador.get_equipamentos_ids()) - set(escopo_antes),
+            set(importados.values_list('pk', flat=True)),
+        )
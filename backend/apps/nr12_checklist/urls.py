@@ -11,8 +11,8 @@ from .viewsets import (
     ChecklistNR12ViewSet,
     ItemChecklistRealizadoViewSet,
     AlertaManutencaoViewSet,
-    ChecklistsAbertosPorChatView
 )
+from .views import ChecklistsAbertosPorChatView
 
 # Tentar importar views_bot
 try:
@@ -57,6 +57,7 @@ if BOT_VIEWS_AVAILABLE:
 # POST /api/nr12/checklists/{id}/iniciar/        - Inicia checklist (autenticado)
 # POST /api/nr12/checklists/{id}/finalizar/      - Finaliza checklist (autenticado)
 # GET  /api/nr12/checklists/{id}/itens/          - Lista itens do checklist (autenticado)
+# POST /api/nr12/checklists/{id}/itens/lote/     - Grava respostas de vários itens (bot)
 # 
 # Bot Views (se disponíveis):
 # GET  /api/nr12/checklists/                     - Lista checklists para bot (público)
@@ -6,6 +6,8 @@ urlpatterns = [
     path('qr/checklist/<int:checklist_id>/gerar/', qr_manager.gerar_qr_checklist_view, name='gerar_qr_checklist'),
     path('qr/equipamento/<int:equipamento_id>/gerar/', qr_manager.gerar_qr_equipamento_view, name='gerar_qr_equipamento'),
     path('qr/batch/gerar/', qr_manager.gerar_qr_batch_view, name='gerar_qr_batch'),
+    path('qr/batch/arquivo/', qr_manager.gerar_qr_lote_arquivo_view, name='gerar_qr_lote_arquivo'),
+    path('qr/<str:tipo>/<int:objeto_id>/imagem/', qr_manager.imagem_qr_view, name='imagem_qr'),
     
     # Gestão de QR codes
     path('qr/listar/', qr_manager.listar_qr_codes_view, name='listar_qr_codes'),
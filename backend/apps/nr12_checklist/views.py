@@ -7,11 +7,13 @@ from backend.apps.operadores.models import Operador
 from backend.apps.nr12_checklist.models import ChecklistNR12
 from rest_framework.permissions import IsAuthenticated
 from .models import ItemChecklistRealizado
-from .serializers import ItemChecklistRealizadoSerializer
+from .serializers import ItemChecklistRealizadoSerializer, ChecklistNR12Serializer
+from backend.apps.shared.idempotencia import idempotente
 
 class ItemChecklistAtualizarView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotente
     def post(self, request):
         try:
             item = ItemChecklistRealizado.objects.get(id=request.data['id'])
@@ -44,8 +44,7 @@ def checklists_bot(request):
         qs = ChecklistNR12.objects.all().select_related('equipamento', 'responsavel')
 
         # Escopo de equipamentos permitidos
-        equipamentos_permitidos = operador.get_equipamentos_disponiveis()
-        qs = qs.filter(equipamento__in=equipamentos_permitidos)
+        qs = qs.filter(equipamento_id__in=operador.get_equipamentos_ids())
 
         # Filtros opcionais
         equipamento_id = request.GET.get('equipamento_id')
@@ -62,12 +61,9 @@ def checklists_bot(request):
 
         # Incluir checklists da equipe (apenas se for supervisor e include_team=true)
         if include_team and operador.operadores_supervisionados.exists():
-            equipamentos_equipe = []
+            ids_equipe = set()
             for sup in operador.operadores_supervisionados.filter(status='ATIVO', ativo_bot=True):
-                equipamentos_equipe.append(sup.get_equipamentos_disponiveis().values_list('id', flat=True))
-            # Union de IDs
-            from itertools import chain
-            ids_equipe = set(chain.from_iterable(equipamentos_equipe))
+                ids_equipe |= sup.get_equipamentos_ids()
             qs = qs | ChecklistNR12.objects.filter(equipamento_id__in=ids_equipe)
 
         qs = qs.order_by('-id')
@@ -136,7 +132,7 @@ def equipamentos_operador(request, operador_id):
                         'id': sup.id,
                         'nome': sup.nome,
                         'codigo': sup.codigo,
-                        'equipamentos_count': sup.get_equipamentos_disponiveis().count()
+                        'equipamentos_count': len(sup.get_equipamentos_ids())
                     } for sup in supervisionados[:10]
                 ]
             }
@@ -25,30 +25,27 @@ def download_qr_codes_zip(request):
     """Download de todos os QR codes em ZIP"""
     import zipfile
     from django.http import HttpResponse
-    import os
-    
-    qr_manager = QRCodeManager()
+    from django.core.files.storage import default_storage
     
     # Criar ZIP em memória
     response = HttpResponse(content_type='application/zip')
     response['Content-Disposition'] = 'attachment; filename="qr_codes.zip"'
     
     with zipfile.ZipFile(response, 'w') as zip_file:
-        # Adicionar QR codes de checklists
-        checklists_dir = os.path.join(qr_manager.qr_dir, 'checklists')
-        if os.path.exists(checklists_dir):
-            for filename in os.listdir(checklists_dir):
-                if filename.endswith('.png'):
-                    file_path = os.path.join(checklists_dir, filename)
-                    zip_file.write(file_path, f"checklists/{filename}")
-        
-        # Adicionar QR codes de equipamentos
-        equipamentos_dir = os.path.join(qr_manager.qr_dir, 'equipamentos')
-        if os.path.exists(equipamentos_dir):
-            for filename in os.listdir(equipamentos_dir):
-                if filename.endswith('.png'):
-                    file_path = os.path.join(equipamentos_dir, filename)
-                    zip_file.write(file_path, f"equipamentos/{filename}")
+        # Imagens do cache em uso por checklists e equipamentos
+        from .models import ReferenciaQRCode
+        referencias = ReferenciaQRCode.objects.filter(
+            dono__regex=r'^(checklist|equipamento):'
+        ).select_related('qr_code')
+        for referencia in referencias:
+            arquivo = referencia.qr_code.arquivo
+            if not default_storage.exists(arquivo):
+                continue
+            pasta = 'checklists' if referencia.dono.startswith('checklist:') else 'equipamentos'
+            nome = referencia.dono.replace(':', '_')
+            extensao = arquivo.rsplit('.', 1)[-1]
+            with default_storage.open(arquivo, 'rb') as imagem:
+                zip_file.writestr(f"{pasta}/{nome}.{extensao}", imagem.read())
     
     return response
 
@@ -3,6 +3,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
 from django.utils.timezone import now
 from datetime import date
@@ -13,6 +14,8 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
+from backend.apps.shared.idempotencia import idempotente
+
 User = get_user_model()
 
 from .models import (
@@ -22,9 +25,12 @@ from .models import (
 from .serializers import (
     TipoEquipamentoNR12Serializer, ItemChecklistPadraoSerializer,
     ChecklistNR12Serializer, ItemChecklistRealizadoSerializer,
-    AlertaManutencaoSerializer
+    AlertaManutencaoSerializer, RespostasItensLoteSerializer, anotar_contadores_itens
 )
 
+# Campos gravados pelo envio de respostas em lote
+CAMPOS_RESPOSTA_ITEM = ['status', 'observacao', 'verificado_em', 'verificado_por']
+
 
 class TipoEquipamentoNR12ViewSet(viewsets.ModelViewSet):
     queryset = TipoEquipamentoNR12.objects.all()
@@ -56,12 +62,16 @@ class ChecklistNR12ViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = ChecklistNR12.objects.select_related(
             'equipamento', 'equipamento__cliente', 'responsavel'
-        ).prefetch_related('itens')
+        )
+        if self.action in ('list', 'retrieve'):
+            # Contadores de itens vêm de uma única query agregada
+            queryset = anotar_contadores_itens(queryset)
         if hasattr(self.request.user, 'cliente') and self.request.user.cliente:
             queryset = queryset.filter(equipamento__cliente=self.request.user.cliente)
         return queryset
 
     @action(detail=True, methods=['post'])
+    @idempotente
     def iniciar(self, request, pk=None):
         checklist = self.get_object()
 
@@ -119,6 +129,7 @@ class ChecklistNR12ViewSet(viewsets.ModelViewSet):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
+    @idempotente
     def finalizar(self, request, pk=None):
         checklist = self.get_object()
         try:
@@ -134,22 +145,98 @@ class ChecklistNR12ViewSet(viewsets.ModelViewSet):
         serializer = ItemChecklistRealizadoSerializer(itens, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'], url_path='itens/lote', permission_classes=[IsAuthenticated])
+    @idempotente
+    def itens_lote(self, request, pk=None):
+        """
+        Grava várias respostas de itens em uma única transação
+
+        Corpo: {"itens": [{"id", "status", "observacao", "verificado_em"}],
+        "operador_id": opcional, "finalizar": opcional}. Reenvios são seguros:
+        um item só é sobrescrito por resposta com verificado_em igual ou
+        posterior ao já gravado.
+
+        operador_id só é aceito de usuário staff (o bot) ou do próprio
+        operador; sem ele vale o operador do usuário autenticado. O operador
+        precisa ter acesso ao equipamento do checklist.
+        """
+        from backend.apps.operadores.models import Operador  # import local para evitar ciclo
+
+        serializer = RespostasItensLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
+
+        if dados.get('operador_id'):
+            operador = Operador.objects.filter(pk=dados['operador_id']).select_related('user').first()
+            if operador is None:
+                return Response({'error': 'operador_id inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not request.user.is_staff and operador.user_id != request.user.pk:
+                return Response({'error': 'Sem permissão para responder por este operador.'},
+                                status=status.HTTP_403_FORBIDDEN)
+        else:
+            operador = Operador.objects.filter(user=request.user).first()
+            if operador is None and not request.user.is_staff:
+                return Response({'error': 'Usuário não é operador.'}, status=status.HTTP_403_FORBIDDEN)
+        responsavel = (operador.user if operador else None) or request.user
+
+        checklist = self.get_object()
+        if operador is not None and not operador.pode_acessar_equipamento(checklist.equipamento_id):
+            return Response({'error': 'Operador sem acesso ao equipamento do checklist.'},
+                            status=status.HTTP_403_FORBIDDEN)
+        agora = timezone.now()
+        # Vale a última resposta de cada item enviada no lote
+        respostas = {resposta['id']: resposta for resposta in dados['itens']}
+
+        with transaction.atomic():
+            checklist = ChecklistNR12.objects.select_for_update().get(pk=checklist.pk)
+            if checklist.status not in ['PENDENTE', 'EM_ANDAMENTO']:
+                return Response({'error': 'Checklist já foi finalizado'}, status=status.HTTP_400_BAD_REQUEST)
+
+            itens = list(checklist.itens.filter(pk__in=respostas))
+            ausentes = sorted(set(respostas) - {item.pk for item in itens})
+            if ausentes:
+                return Response(
+                    {'error': 'Itens não pertencem ao checklist', 'itens': ausentes},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            alterados = []
+            for item in itens:
+                resposta = respostas[item.pk]
+                # Relógio do celular pode estar adiantado
+                verificado_em = min(resposta.get('verificado_em') or agora, agora)
+                if item.verificado_em and item.verificado_em > verificado_em:
+                    continue
+                item.status = resposta['status']
+                item.observacao = resposta['observacao']
+                item.verificado_em = verificado_em
+                if responsavel:
+                    item.verificado_por = responsavel
+                alterados.append(item)
+            ItemChecklistRealizado.objects.bulk_update(alterados, CAMPOS_RESPOSTA_ITEM)
+
+            if dados['finalizar']:
+                checklist.finalizar_checklist()
+
+        return Response({
+            'success': True,
+            'atualizados': len(alterados),
+            'ignorados': len(itens) - len(alterados),
+            'pendentes': checklist.itens.filter(status='PENDENTE').count(),
+            'status': checklist.status,
+        })
+
     @action(detail=False, methods=['post'])
     def gerar_diarios(self, request):
-        from backend.apps.equipamentos.models import Equipamento
+        from .gerador import gerar_checklists_agendados
         hoje = date.today()
-        equipamentos_ativos = Equipamento.objects.filter(ativo_nr12=True, tipo_nr12__isnull=False)
-        checklists_criados = 0
-        for equipamento in equipamentos_ativos:
-            if not ChecklistNR12.objects.filter(equipamento=equipamento, data_checklist=hoje).exists():
-                if equipamento.frequencia_checklist == 'DIARIO':
-                    ChecklistNR12.objects.create(
-                        equipamento=equipamento,
-                        data_checklist=hoje,
-                        turno='MANHA'
-                    )
-                    checklists_criados += 1
-        return Response({'message': f'{checklists_criados} checklists criados para hoje', 'data': hoje})
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+        resultado = gerar_checklists_agendados(hoje, dry_run=dry_run)
+        checklists_criados = sum(
+            stats.get('checklists_criados', 0) for stats in resultado['frequencias'].values()
+        )
+        mensagem = f'{checklists_criados} checklists {"seriam criados" if dry_run else "criados"} para hoje'
+        return Response({'message': mensagem, 'data': hoje, 'resultado': resultado})
 
     @action(detail=True, methods=['get'])
     def qr_code(self, request, pk=None):
@@ -274,6 +361,7 @@ class ItemChecklistAtualizarView(APIView):
     serializer_class = ItemChecklistRealizadoSerializer
     permission_classes = [IsAuthenticated]
 
+    @idempotente
     def post(self, request):
         try:
             item = ItemChecklistRealizado.objects.get(id=request.data['id'])
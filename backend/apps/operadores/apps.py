@@ -4,3 +4,7 @@ class OperadoresConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.apps.operadores'  # ✅ caminho real do app
     verbose_name = 'Operadores'
+
+    def ready(self):
+        from .escopo import conectar_signals
+        conectar_signals()
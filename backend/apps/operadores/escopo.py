@@ -0,0 +1,180 @@
+# backend/apps/operadores/escopo.py
+# ================================================================
+# ESCOPO DE EQUIPAMENTOS POR OPERADOR (CACHE)
+# ================================================================
+#
+# O conjunto de equipamentos que um operador pode usar é calculado com uma
+# única query e guardado no cache como lista de ids. As checagens de
+# permissão passam a ser uma leitura de cache + teste de pertinência.
+#
+# Regras (as mesmas de Operador.get_equipamentos_disponiveis):
+#   - equipamentos autorizados diretamente
+#   - equipamentos dos clientes autorizados
+#   - o mesmo para os supervisionados ativos no bot
+#   - operador sem nenhuma autorização e sem equipe vê todos
+#   - sempre apenas equipamentos com ativo_nr12=True
+#
+# A invalidação é por versão: alterações no operador (autorizações, status,
+# supervisor) incrementam a versão dele e a do supervisor; alterações em
+# equipamentos (inclusive os importados em lote) incrementam a versão global.
+
+import logging
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from backend.apps.shared.estado_anterior import estado_anterior, registrar_campos
+
+logger = logging.getLogger(__name__)
+
+TEMPO_CACHE = 3600
+
+
+def _chave_versao(operador_id):
+    return f'operador:escopo:versao:{operador_id}'
+
+
+def _incrementar(chave):
+    cache.add(chave, 0, timeout=None)
+    try:
+        cache.incr(chave)
+    except ValueError:
+        cache.set(chave, 1, timeout=None)
+
+
+def _chave_escopo(operador_id):
+    versoes = cache.get_many([_chave_versao('*'), _chave_versao(operador_id)])
+    return (
+        f"operador:escopo:{operador_id}:"
+        f"{versoes.get(_chave_versao('*'), 0)}.{versoes.get(_chave_versao(operador_id), 0)}"
+    )
+
+
+def calcular_equipamentos_ids(operador):
+    """Calcula (sem cache) os ids de equipamentos disponíveis ao operador"""
+    from backend.apps.equipamentos.models import Equipamento
+
+    equipe = Q(
+        operadores_autorizados__supervisor=operador,
+        operadores_autorizados__status='ATIVO',
+        operadores_autorizados__ativo_bot=True,
+    )
+    equipe_por_cliente = Q(
+        cliente__operadores_autorizados__supervisor=operador,
+        cliente__operadores_autorizados__status='ATIVO',
+        cliente__operadores_autorizados__ativo_bot=True,
+    )
+    ids = set(
+        Equipamento.objects.filter(ativo_nr12=True).filter(
+            Q(operadores_autorizados=operador)
+            | Q(cliente__operadores_autorizados=operador)
+            | equipe
+            | equipe_por_cliente
+        ).values_list('id', flat=True).distinct()
+    )
+
+    if not ids and not operador.operadores_supervisionados.exists():
+        ids = set(Equipamento.objects.filter(ativo_nr12=True).values_list('id', flat=True))
+    return ids
+
+
+def equipamentos_ids(operador):
+    """
+    Ids dos equipamentos disponíveis ao operador, servidos do cache
+
+    Returns:
+        frozenset: ids de Equipamento
+    """
+    chave = _chave_escopo(operador.pk)
+    ids = cache.get(chave)
+    if ids is None:
+        ids = sorted(calcular_equipamentos_ids(operador))
+        cache.set(chave, ids, TEMPO_CACHE)
+    return frozenset(ids)
+
+
+def invalidar_operador(*operador_ids):
+    """Invalida o escopo dos operadores indicados"""
+    for operador_id in set(operador_ids):
+        if operador_id is not None:
+            _incrementar(_chave_versao(operador_id))
+
+
+def invalidar_todos():
+    """Invalida o escopo de todos os operadores"""
+    _incrementar(_chave_versao('*'))
+
+
+# ================================================================
+# SIGNALS
+# ================================================================
+
+CAMPOS_ESCOPO_OPERADOR = ('supervisor_id', 'status', 'ativo_bot')
+CAMPOS_ESCOPO_EQUIPAMENTO = ('cliente_id', 'ativo_nr12')
+
+
+def _mudou(instance, campos):
+    anterior = estado_anterior(instance)
+    if anterior is None:
+        return True
+    return any(getattr(anterior, campo) != getattr(instance, campo) for campo in campos)
+
+
+def _operador_salvo(sender, instance, created=False, raw=False, **kwargs):
+    if raw or not _mudou(instance, CAMPOS_ESCOPO_OPERADOR):
+        return
+    anterior = estado_anterior(instance)
+    invalidar_operador(instance.pk, instance.supervisor_id, getattr(anterior, 'supervisor_id', None))
+
+
+def _operador_removido(sender, instance, **kwargs):
+    invalidar_operador(instance.pk, instance.supervisor_id)
+
+
+def _equipamento_salvo(sender, instance, created=False, raw=False, **kwargs):
+    if raw or not _mudou(instance, CAMPOS_ESCOPO_EQUIPAMENTO):
+        return
+    invalidar_todos()
+
+
+def _equipamento_removido(sender, instance, **kwargs):
+    invalidar_todos()
+
+
+def _equipamentos_importados(sender, equipamentos, **kwargs):
+    # bulk_create não passa pelo post_save: lote com NR12 ativo muda escopos
+    if any(equipamento.ativo_nr12 for equipamento in equipamentos):
+        invalidar_todos()
+
+
+def _autorizacoes_alteradas(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # Alteração feita pelo lado do equipamento/cliente: vários operadores
+        invalidar_todos()
+    else:
+        invalidar_operador(instance.pk, instance.supervisor_id)
+
+
+def conectar_signals():
+    from backend.apps.equipamentos.importacao import equipamentos_importados
+    from backend.apps.equipamentos.models import Equipamento
+
+    from .models import Operador
+
+    registrar_campos(Operador, CAMPOS_ESCOPO_OPERADOR)
+    post_save.connect(_operador_salvo, sender=Operador, dispatch_uid='escopo_operador_post')
+    post_delete.connect(_operador_removido, sender=Operador, dispatch_uid='escopo_operador_delete')
+
+    registrar_campos(Equipamento, CAMPOS_ESCOPO_EQUIPAMENTO)
+    post_save.connect(_equipamento_salvo, sender=Equipamento, dispatch_uid='escopo_equipamento_post')
+    post_delete.connect(_equipamento_removido, sender=Equipamento, dispatch_uid='escopo_equipamento_delete')
+    equipamentos_importados.connect(_equipamentos_importados, dispatch_uid='escopo_equipamentos_importados')
+
+    for through in (Operador.equipamentos_autorizados.through, Operador.clientes_autorizados.through):
+        m2m_changed.connect(
+            _autorizacoes_alteradas, sender=through,
+            dispatch_uid=f'escopo_{through._meta.model_name}'
+        )
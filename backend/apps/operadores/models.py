@@ -1,5 +1,5 @@
 # backend/apps/operadores/models.py
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import RegexValidator
 from django.utils import timezone
@@ -93,25 +93,28 @@ class Operador(models.Model):
 
     # -------- Utilidades --------
     def save(self, *args, **kwargs):
-        if not self.codigo:
-            self.codigo = self._gerar_codigo()
-        if not self.qr_code_data:
-            self.qr_code_data = {"tipo":"operador","codigo":self.codigo,"token":f"OP_{self.codigo}_{uuid.uuid4().hex[:8]}"}
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if not self.codigo:
+                self.codigo = self._gerar_codigo()
+            if not self.qr_code_data:
+                self.qr_code_data = {"tipo":"operador","codigo":self.codigo,"token":f"OP_{self.codigo}_{uuid.uuid4().hex[:8]}"}
+            super().save(*args, **kwargs)
         if not self.qr_code:
             self._gerar_qr_code()
 
     def _gerar_codigo(self):
-        ultimo = Operador.objects.filter(codigo__startswith='OP').order_by('codigo').last()
-        n = int(ultimo.codigo[2:]) + 1 if ultimo else 1
-        return f"OP{n:04d}"
+        from backend.apps.shared.sequencias import proximo
+        return f"OP{proximo('operador', inicial=Operador._ultimo_codigo_existente):04d}"
+
+    @staticmethod
+    def _ultimo_codigo_existente():
+        codigos = Operador.objects.filter(codigo__startswith='OP').values_list('codigo', flat=True)
+        return max((int(codigo[2:]) for codigo in codigos if codigo[2:].isdigit()), default=0)
 
     def _gerar_qr_code(self):
         try:
             from backend.apps.shared.qr_manager import UnifiedQRManager
-            info = UnifiedQRManager().gerar_qr_operador(self, 'medium')
-            self.qr_code = info['relative_path']
-            self.save(update_fields=['qr_code'])
+            UnifiedQRManager().vincular_qr_operador(self, 'medium')
         except Exception:
             import qrcode
             from io import BytesIO
@@ -152,7 +155,7 @@ class Operador(models.Model):
     def get_checklists_abertos(self):
         from backend.apps.nr12_checklist.models import ChecklistNR12
         status_abertos = ['PENDENTE', 'EM_ANDAMENTO']
-        eq_ids = self.get_equipamentos_disponiveis().values_list('pk', flat=True)
+        eq_ids = self.get_equipamentos_ids()
 
         cond = Q(responsavel__isnull=True, equipamento_id__in=eq_ids) | Q(responsavel__operador__supervisor=self)
         if self.user_id:
@@ -163,41 +166,34 @@ class Operador(models.Model):
                 .order_by('-data_inicio', '-created_at', '-id')
                 .distinct())
 
+    def get_equipamentos_ids(self):
+        """Ids dos equipamentos disponíveis (frozenset, servido do cache de escopo)"""
+        from backend.apps.operadores.escopo import equipamentos_ids
+        return equipamentos_ids(self)
+
+    def pode_acessar_equipamento(self, equipamento_id:int)->bool:
+        return equipamento_id in self.get_equipamentos_ids()
+
     def get_equipamentos_disponiveis(self):
         from backend.apps.equipamentos.models import Equipamento
-        ids = set()
-        if self.equipamentos_autorizados.exists():
-            ids.update(self.equipamentos_autorizados.filter(ativo_nr12=True).values_list('id', flat=True))
-        if self.clientes_autorizados.exists():  # <- somar fontes
-            ids.update(Equipamento.objects.filter(cliente__in=self.clientes_autorizados.all(), ativo_nr12=True)
-                       .values_list('id', flat=True))
-        if self.operadores_supervisionados.exists():
-            for sup in self.operadores_supervisionados.filter(status='ATIVO', ativo_bot=True):
-                if sup.equipamentos_autorizados.exists():
-                    ids.update(sup.equipamentos_autorizados.filter(ativo_nr12=True).values_list('id', flat=True))
-                if sup.clientes_autorizados.exists():
-                    ids.update(Equipamento.objects.filter(cliente__in=sup.clientes_autorizados.all(), ativo_nr12=True)
-                               .values_list('id', flat=True))
-        if not ids and not self.operadores_supervisionados.exists():
-            ids.update(Equipamento.objects.filter(ativo_nr12=True).values_list('id', flat=True))
-        return Equipamento.objects.filter(id__in=ids, ativo_nr12=True).order_by('nome')
+        return Equipamento.objects.filter(id__in=self.get_equipamentos_ids(), ativo_nr12=True).order_by('nome')
 
     def pode_iniciar_checklist(self, checklist_id:int)->bool:
         from backend.apps.nr12_checklist.models import ChecklistNR12
-        try: c = ChecklistNR12.objects.get(id=checklist_id)
-        except ChecklistNR12.DoesNotExist: return False
+        c = ChecklistNR12.objects.filter(id=checklist_id).only('id', 'status', 'equipamento_id').first()
+        if c is None: return False
         if not (self.pode_fazer_checklist and self.pode_usar_bot()): return False
         if getattr(c,'status',None) != 'PENDENTE': return False
-        return c.equipamento in self.get_equipamentos_disponiveis()
+        return self.pode_acessar_equipamento(c.equipamento_id)
 
     def pode_finalizar_checklist(self, checklist_id:int)->bool:
         from backend.apps.nr12_checklist.models import ChecklistNR12
-        try: c = ChecklistNR12.objects.get(id=checklist_id)
-        except ChecklistNR12.DoesNotExist: return False
+        c = ChecklistNR12.objects.filter(id=checklist_id).select_related('responsavel__operador').first()
+        if c is None: return False
         if not (self.pode_fazer_checklist and self.pode_usar_bot()): return False
         if getattr(c,'status',None) != 'EM_ANDAMENTO': return False
-        if c.equipamento not in self.get_equipamentos_disponiveis(): return False
-        if c.responsavel and c.responsavel != self.user:
+        if not self.pode_acessar_equipamento(c.equipamento_id): return False
+        if c.responsavel_id and c.responsavel_id != self.user_id:
             op_resp = getattr(c.responsavel,'operador',None)
             return bool(op_resp and op_resp.supervisor_id==self.id)
         return True
@@ -209,7 +205,7 @@ class Operador(models.Model):
             for s in self.operadores_supervisionados.filter(status='ATIVO'):
                 supervisionados.append({
                     'id': s.id, 'nome': s.nome, 'codigo': s.codigo,
-                    'equipamentos_count': s.get_equipamentos_disponiveis().count()
+                    'equipamentos_count': len(s.get_equipamentos_ids())
                 })
         return {
             'codigo': self.codigo, 'nome': self.nome, 'funcao': self.funcao, 'setor': self.setor,
@@ -8,4 +8,8 @@ from django.apps import AppConfig
 class SharedConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.apps.shared'
-    verbose_name = 'Funcionalidades Compartilhadas'
\ No newline at end of file
+    verbose_name = 'Funcionalidades Compartilhadas'
+
+    def ready(self):
+        from .cache_resumos import conectar_signals
+        conectar_signals()
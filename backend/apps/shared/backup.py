@@ -0,0 +1,317 @@
+# ================================================================
+# ARQUIVO: backend/apps/shared/backup.py
+# Backup e restauração em streaming (NDJSON comprimido por modelo)
+# ================================================================
+#
+# Cada modelo vira um arquivo <nome>.ndjson.gz (formato 'jsonl' do Django,
+# um objeto por linha). A leitura usa QuerySet.iterator(chunk_size) e o
+# serializador escreve direto no arquivo gzip, então a memória não cresce
+# com o tamanho da tabela. O metadata.json do diretório registra, por
+# modelo, registros, bytes, tempo, registros/s e pico de memória.
+#
+# Backup incremental: parte do início do último backup em `destino` que
+# cobre os mesmos modelos e pelo menos a mesma janela de dias, e inclui só
+# o que mudou desde então, pelo primeiro campo auto_now do modelo
+# (updated_at, atualizado_em), senão auto_now_add. Modelos sem esses
+# campos vão completos. Exclusões não aparecem no incremental.
+#
+# Restauração: lê os arquivos na ordem do metadata (pais antes dos filhos)
+# e grava em lotes com INSERT ... ON CONFLICT pela chave primária, numa
+# única transação. O INSERT é "cru" (raw): sem save(), sinais nem pre_save,
+# então restaurar um Equipamento não gera QR code nem checklists e os campos
+# auto_now/auto_now_add voltam com as datas do backup. As sequências de IDs são
+# ajustadas no final.
+
+import gzip
+import json
+import logging
+import os
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import DateTimeField
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+VERSAO_FORMATO = 2
+TAMANHO_CHUNK = 2000
+TAMANHO_LOTE_RESTAURACAO = 1000
+
+# (nome do arquivo, modelo, campo de data da janela de --dias ou None)
+# Ordem de dependência: a restauração segue esta ordem.
+MODELOS_BACKUP = [
+    ('clientes', 'clientes.Cliente', None),
+    ('empreendimentos', 'empreendimentos.Empreendimento', None),
+    ('categorias_eq', 'equipamentos.CategoriaEquipamento', None),
+    ('tipos_nr12', 'nr12_checklist.TipoEquipamentoNR12', None),
+    ('itens_checklist', 'nr12_checklist.ItemChecklistPadrao', None),
+    ('usuarios', 'auth_cliente.UsuarioCliente', None),
+    ('equipamentos', 'equipamentos.Equipamento', None),
+    ('checklists', 'nr12_checklist.ChecklistNR12', 'data_checklist'),
+    ('itens_realizados', 'nr12_checklist.ItemChecklistRealizado', 'checklist__data_checklist'),
+    ('alertas', 'nr12_checklist.AlertaManutencao', 'data_identificacao'),
+    ('kpis', 'dashboard.KPISnapshot', 'data_snapshot'),
+]
+
+
+def diretorio_padrao():
+    return getattr(settings, 'BACKUP_DIR', os.path.join(settings.BASE_DIR, 'backups'))
+
+
+def campo_incremental(modelo):
+    """Campo de data de alteração usado no backup incremental, ou None"""
+    campos = modelo._meta.concrete_fields
+    for atributo in ('auto_now', 'auto_now_add'):
+        for campo in campos:
+            if getattr(campo, atributo, False):
+                return campo
+    return None
+
+
+def _modelos_do_backup(metadata):
+    return set(metadata.get('modelos_incluidos') or [item['modelo'] for item in metadata['modelos']])
+
+
+def _cobre(metadata, labels, dias):
+    """O backup tem todos os modelos e uma janela igual ou maior que `dias`"""
+    if not labels <= _modelos_do_backup(metadata):
+        return False
+    janela = metadata.get('dias_incluidos')
+    return janela is None or (dias is not None and janela >= dias)
+
+
+def ultimo_backup(destino, modelos=None, dias=None):
+    """
+    Metadados do backup mais recente em `destino` (só do formato atual), ou None
+
+    Com `modelos`, só vale um backup que cubra esses modelos e a janela de
+    `dias`: um incremental encadeado num backup parcial perderia os
+    registros alterados antes dele nos modelos que o parcial não tem.
+    """
+    if not os.path.isdir(destino):
+        return None
+
+    labels = {label for _, label, _ in modelos} if modelos else set()
+    candidatos = []
+    with os.scandir(destino) as entradas:
+        for entrada in entradas:
+            caminho = os.path.join(entrada.path, 'metadata.json')
+            if not entrada.is_dir() or not os.path.exists(caminho):
+                continue
+            with open(caminho, encoding='utf-8') as arquivo:
+                metadata = json.load(arquivo)
+            if metadata.get('versao_formato') == VERSAO_FORMATO and _cobre(metadata, labels, dias):
+                candidatos.append(metadata)
+
+    return max(candidatos, key=lambda metadata: metadata['inicio'], default=None)
+
+
+def _medir(funcao):
+    """Executa `funcao` medindo tempo e pico de memória alocada no Python"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        resultado = funcao()
+    finally:
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    segundos = time.perf_counter() - inicio
+    return resultado, segundos, pico
+
+
+def _estatisticas(registros, segundos, pico, **extras):
+    return {
+        'registros': registros,
+        'segundos': round(segundos, 3),
+        'registros_por_segundo': round(registros / segundos, 1) if segundos else registros,
+        'pico_memoria_kb': pico // 1024,
+        **extras,
+    }
+
+
+def _contador(iteravel, contagem):
+    for objeto in iteravel:
+        contagem[0] += 1
+        yield objeto
+
+
+def executar_backup(modelos=None, destino=None, dias=None, incremental=False,
+                    chunk_size=TAMANHO_CHUNK, progresso=None):
+    """
+    Grava um backup em <destino>/<timestamp>/
+
+    Args:
+        modelos: Lista no formato de MODELOS_BACKUP (padrão: MODELOS_BACKUP)
+        destino: Diretório base (padrão: settings.BACKUP_DIR)
+        dias: Janela para os modelos com campo de data (None = tudo)
+        incremental: Só o que mudou desde o último backup em `destino`
+        chunk_size: Registros lidos do banco por vez
+        progresso: Função chamada com (nome, estatísticas) a cada modelo
+
+    Returns:
+        dict: Metadados do backup (também gravados em metadata.json)
+    """
+    modelos = modelos or MODELOS_BACKUP
+    destino = destino or diretorio_padrao()
+    inicio = timezone.now()
+
+    desde = None
+    if incremental:
+        anterior = ultimo_backup(destino, modelos, dias)
+        if anterior is None:
+            logger.info("💾 Nenhum backup anterior com os mesmos modelos: fazendo backup completo")
+        else:
+            desde = parse_datetime(anterior['inicio'])
+
+    # Microssegundos no nome: dois backups no mesmo segundo não se sobrescrevem
+    diretorio = os.path.join(destino, inicio.strftime('%Y%m%d_%H%M%S_%f'))
+    os.makedirs(diretorio)
+    data_limite = timezone.localdate() - timedelta(days=dias) if dias else None
+
+    metadata = {
+        'versao_formato': VERSAO_FORMATO,
+        'inicio': inicio.isoformat(),
+        'tipo': 'incremental' if desde else 'completo',
+        'desde': desde.isoformat() if desde else None,
+        'dias_incluidos': dias,
+        'modelos_incluidos': [label for _, label, _ in modelos],
+        'modelos': [],
+    }
+
+    for nome, label, campo_janela in modelos:
+        modelo = apps.get_model(label)
+        queryset = modelo._default_manager.order_by('pk')
+        if data_limite and campo_janela:
+            queryset = queryset.filter(**{f"{campo_janela}__gte": data_limite})
+        campo_alteracao = campo_incremental(modelo) if desde else None
+        if campo_alteracao:
+            # DateField (auto_now_add em data) compara só o dia
+            limite = desde if isinstance(campo_alteracao, DateTimeField) else desde.date()
+            queryset = queryset.filter(**{f"{campo_alteracao.name}__gte": limite})
+
+        arquivo = f"{nome}.ndjson.gz"
+        caminho = os.path.join(diretorio, arquivo)
+        contagem = [0]
+
+        def gravar():
+            with gzip.open(caminho, 'wt', encoding='utf-8', compresslevel=6) as saida:
+                serializers.serialize(
+                    'jsonl', _contador(queryset.iterator(chunk_size=chunk_size), contagem), stream=saida
+                )
+
+        _, segundos, pico = _medir(gravar)
+        estatisticas = _estatisticas(
+            contagem[0], segundos, pico,
+            nome=nome,
+            modelo=label,
+            arquivo=arquivo,
+            bytes=os.path.getsize(caminho),
+            filtro=campo_alteracao.name if campo_alteracao else None,
+        )
+        metadata['modelos'].append(estatisticas)
+        if progresso:
+            progresso(nome, estatisticas)
+
+    metadata['concluido_em'] = timezone.now().isoformat()
+    metadata['arquivos_criados'] = len(metadata['modelos'])
+    with open(os.path.join(diretorio, 'metadata.json'), 'w', encoding='utf-8') as arquivo:
+        json.dump(metadata, arquivo, indent=2, ensure_ascii=False)
+
+    metadata['diretorio'] = diretorio
+    logger.info(f"💾 Backup {metadata['tipo']} concluído em {diretorio}")
+    return metadata
+
+
+def _gravar_lote(modelo, lote):
+    """
+    Upsert do lote pela chave primária e relações muitos-para-muitos
+
+    INSERT "cru" (raw=True, como Model.save_base(raw=True) da carga de
+    fixtures): bulk_create chamaria pre_save() e trocaria os campos
+    auto_now/auto_now_add pela hora da restauração, apagando as datas
+    originais e marcando tudo como alterado para o próximo incremental.
+    """
+    opcoes = modelo._meta
+    campos = list(opcoes.local_concrete_fields)
+    atualizaveis = [campo for campo in campos if not campo.primary_key]
+    objetos = [deserializado.object for deserializado in lote]
+    queryset = modelo._base_manager.using(connection.alias)
+    tamanho = max(connection.ops.bulk_batch_size(campos, objetos) or len(objetos), 1)
+
+    for inicio in range(0, len(objetos), tamanho):
+        if atualizaveis:
+            queryset._insert(
+                objetos[inicio:inicio + tamanho], campos, raw=True,
+                on_conflict=OnConflict.UPDATE,
+                update_fields=atualizaveis,
+                unique_fields=[opcoes.pk],
+            )
+        else:
+            queryset._insert(
+                objetos[inicio:inicio + tamanho], campos, raw=True, on_conflict=OnConflict.IGNORE
+            )
+
+    for deserializado in lote:
+        for relacao, valores in (deserializado.m2m_data or {}).items():
+            getattr(deserializado.object, relacao).set(valores)
+
+
+def restaurar_backup(diretorio, tamanho_lote=TAMANHO_LOTE_RESTAURACAO, progresso=None):
+    """
+    Restaura um backup gravado por executar_backup()
+
+    Registros existentes com a mesma chave primária são sobrescritos, então
+    um backup incremental pode ser aplicado sobre o completo.
+
+    Returns:
+        list: Estatísticas por modelo
+    """
+    with open(os.path.join(diretorio, 'metadata.json'), encoding='utf-8') as arquivo:
+        metadata = json.load(arquivo)
+    if metadata.get('versao_formato') != VERSAO_FORMATO:
+        raise ValueError(f"Formato de backup não suportado em {diretorio}")
+
+    resultados = []
+    restaurados = []
+    with transaction.atomic():
+        for item in metadata['modelos']:
+            modelo = apps.get_model(item['modelo'])
+            caminho = os.path.join(diretorio, item['arquivo'])
+            contagem = [0]
+
+            def restaurar():
+                lote = []
+                with gzip.open(caminho, 'rt', encoding='utf-8') as entrada:
+                    for deserializado in serializers.deserialize('jsonl', entrada, ignorenonexistent=True):
+                        lote.append(deserializado)
+                        if len(lote) >= tamanho_lote:
+                            _gravar_lote(modelo, lote)
+                            contagem[0] += len(lote)
+                            lote = []
+                if lote:
+                    _gravar_lote(modelo, lote)
+                    contagem[0] += len(lote)
+
+            _, segundos, pico = _medir(restaurar)
+            estatisticas = _estatisticas(contagem[0], segundos, pico, nome=item['nome'], modelo=item['modelo'])
+            resultados.append(estatisticas)
+            restaurados.append(modelo)
+            if progresso:
+                progresso(item['nome'], estatisticas)
+
+        # IDs gravados explicitamente: a sequência precisa continuar depois do maior
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), restaurados):
+                cursor.execute(sql)
+
+    logger.info(f"♻️ Backup restaurado de {diretorio}: {sum(r['registros'] for r in resultados)} registros")
+    return resultados
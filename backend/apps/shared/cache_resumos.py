@@ -0,0 +1,246 @@
+# ================================================================
+# ARQUIVO: backend/apps/shared/cache_resumos.py
+# Cache compartilhado dos endpoints de resumo (dashboard e portal)
+# ================================================================
+#
+# Os resumos são guardados no cache do Django (Redis em produção, logo
+# compartilhado entre processos) com chave por resumo, escopo e dia:
+#
+#     resumo:<nome>:<escopo>:<dia>:<versão global>.<versão do escopo>
+#
+# O escopo é o id do cliente ou 'todos' para os resumos globais. Para
+# invalidar não é preciso apagar chaves: os signals incrementam a versão
+# do escopo afetado (ou a global, quando não dá para saber o cliente) e as
+# chaves antigas simplesmente expiram. O incremento espera o commit da
+# transação que alterou os dados: antes dele, um leitor concorrente ainda
+# veria os dados antigos e guardaria o resumo velho sob a versão nova.
+
+import json
+import logging
+import time
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .estado_anterior import estado_anterior, registrar_campos
+
+logger = logging.getLogger(__name__)
+
+ESCOPO_GLOBAL = 'todos'
+
+TEMPO_CACHE = 300           # segundos de vida de um resumo
+TEMPO_LOCK = 30             # tempo máximo de um recálculo
+ESPERA_LOCK = 5             # quanto outro processo aguarda o recálculo
+INTERVALO_ESPERA = 0.05
+
+RESUMOS = [
+    'dashboard_equipamentos',
+    'dashboard_checklists',
+    'dashboard_financeiro',
+    'portal_resumo',
+]
+
+
+def _escopo(cliente_id):
+    return ESCOPO_GLOBAL if cliente_id is None else str(cliente_id)
+
+
+def _chave_versao(nome, escopo):
+    return f'resumo:versao:{nome}:{escopo}'
+
+
+def _chave_contador(nome, tipo):
+    return f'resumo:contador:{nome}:{tipo}'
+
+
+def _incrementar(chave):
+    # add + incr é atômico no Redis; no LocMem basta para monitoramento
+    cache.add(chave, 0, timeout=None)
+    try:
+        return cache.incr(chave)
+    except ValueError:
+        cache.set(chave, 1, timeout=None)
+        return 1
+
+
+def _chave_resumo(nome, escopo, dia):
+    versoes = cache.get_many([_chave_versao(nome, '*'), _chave_versao(nome, escopo)])
+    global_ = versoes.get(_chave_versao(nome, '*'), 0)
+    do_escopo = versoes.get(_chave_versao(nome, escopo), 0)
+    return f'resumo:{nome}:{escopo}:{dia.isoformat()}:{global_}.{do_escopo}'
+
+
+def obter_resumo(nome, calcular, cliente_id=None):
+    """
+    Retorna o resumo do cache ou calcula uma única vez entre processos
+
+    Quando o valor não está no cache, apenas o processo que obtiver o lock
+    recalcula; os demais aguardam até ESPERA_LOCK segundos pelo resultado
+    antes de calcularem por conta própria.
+
+    Args:
+        nome (str): Nome do resumo (ver RESUMOS)
+        calcular (callable): Função sem argumentos que monta o resumo
+        cliente_id (int): Cliente dono dos dados (None = global)
+
+    Returns:
+        dict: Resumo já serializável em JSON
+    """
+    escopo = _escopo(cliente_id)
+    chave = _chave_resumo(nome, escopo, date.today())
+
+    valor = cache.get(chave)
+    if valor is not None:
+        _incrementar(_chave_contador(nome, 'hit'))
+        return valor
+
+    _incrementar(_chave_contador(nome, 'miss'))
+    chave_lock = f'{chave}:lock'
+
+    if not cache.add(chave_lock, 1, timeout=TEMPO_LOCK):
+        limite = time.monotonic() + ESPERA_LOCK
+        while time.monotonic() < limite:
+            time.sleep(INTERVALO_ESPERA)
+            valor = cache.get(chave)
+            if valor is not None:
+                _incrementar(_chave_contador(nome, 'espera'))
+                return valor
+        logger.warning(f"⚠️ Recálculo de '{nome}' ({escopo}) demorou; calculando sem lock")
+        return _calcular_e_guardar(nome, chave, calcular)
+
+    try:
+        return _calcular_e_guardar(nome, chave, calcular)
+    finally:
+        cache.delete(chave_lock)
+
+
+def _calcular_e_guardar(nome, chave, calcular):
+    inicio = time.perf_counter()
+    # Normaliza para JSON: o Redis de produção usa o JSONSerializer
+    valor = json.loads(json.dumps(calcular(), cls=DjangoJSONEncoder))
+    cache.set(chave, valor, TEMPO_CACHE)
+    _incrementar(_chave_contador(nome, 'recalculo'))
+    logger.debug(f"Resumo '{nome}' recalculado em {time.perf_counter() - inicio:.3f}s")
+    return valor
+
+
+def invalidar_resumos(nomes, cliente_id=None):
+    """
+    Invalida resumos após alteração de dados (no commit da transação atual)
+
+    O escopo global sempre é invalidado, pois agrega todos os clientes.
+    Sem cliente_id, todos os escopos dos resumos indicados são invalidados.
+    """
+    escopos = [ESCOPO_GLOBAL, _escopo(cliente_id)] if cliente_id is not None else ['*']
+    chaves = [_chave_versao(nome, escopo) for nome in nomes for escopo in escopos]
+
+    def incrementar_versoes():
+        for chave in chaves:
+            _incrementar(chave)
+
+    transaction.on_commit(incrementar_versoes)
+
+
+def estatisticas_cache():
+    """Contadores de hit/miss por resumo para monitoramento"""
+    tipos = ['hit', 'miss', 'espera', 'recalculo']
+    valores = cache.get_many([_chave_contador(nome, tipo) for nome in RESUMOS for tipo in tipos])
+
+    estatisticas = {}
+    for nome in RESUMOS:
+        contadores = {tipo: valores.get(_chave_contador(nome, tipo), 0) for tipo in tipos}
+        total = contadores['hit'] + contadores['miss']
+        contadores['taxa_acerto'] = round(contadores['hit'] / total * 100, 1) if total else 0
+        estatisticas[nome] = contadores
+    return estatisticas
+
+
+# ================================================================
+# INVALIDAÇÃO POR SIGNALS
+# ================================================================
+
+def _cliente_do_equipamento(equipamento_id):
+    from backend.apps.equipamentos.models import Equipamento
+
+    return Equipamento.objects.filter(pk=equipamento_id).values_list('cliente_id', flat=True).first()
+
+
+# label do model -> (resumos afetados, função instância -> cliente_id)
+DEPENDENCIAS = {
+    'equipamentos.Equipamento': (
+        ['dashboard_equipamentos', 'dashboard_checklists', 'portal_resumo'],
+        lambda eq: eq.cliente_id,
+    ),
+    'nr12_checklist.ChecklistNR12': (
+        ['dashboard_checklists', 'portal_resumo'],
+        lambda checklist: _cliente_do_equipamento(checklist.equipamento_id),
+    ),
+    'nr12_checklist.AlertaManutencao': (
+        ['portal_resumo'],
+        lambda alerta: _cliente_do_equipamento(alerta.equipamento_id),
+    ),
+    'manutencao.HistoricoManutencao': (
+        ['portal_resumo'],
+        lambda historico: _cliente_do_equipamento(historico.equipamento_id),
+    ),
+    'financeiro.ContaFinanceira': (
+        ['dashboard_financeiro'],
+        lambda conta: conta.cliente_id,
+    ),
+}
+
+
+def _invalidar_por_instancia(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        nomes, cliente_de = DEPENDENCIAS[sender._meta.label]
+        cliente_id = cliente_de(instance)
+        invalidar_resumos(nomes, cliente_id)
+
+        # Equipamento trocado de cliente: o cliente antigo também perde os resumos
+        anterior = getattr(estado_anterior(instance), 'cliente_id', None)
+        if anterior is not None and anterior != cliente_id:
+            invalidar_resumos(nomes, anterior)
+    except Exception as e:
+        logger.error(f"❌ Erro ao invalidar cache de resumos ({sender.__name__}): {e}")
+
+
+def _invalidar_checklists_gerados(sender, **kwargs):
+    # Geração em lote atinge vários clientes de uma vez
+    invalidar_resumos(['dashboard_checklists', 'portal_resumo'])
+
+
+def _invalidar_equipamentos_importados(sender, equipamentos, **kwargs):
+    nomes, cliente_de = DEPENDENCIAS['equipamentos.Equipamento']
+    try:
+        for cliente_id in {cliente_de(equipamento) for equipamento in equipamentos}:
+            invalidar_resumos(nomes, cliente_id)
+    except Exception as e:
+        logger.error(f"❌ Erro ao invalidar cache de resumos (importação): {e}")
+
+
+def conectar_signals():
+    """Conecta a invalidação aos models dos quais os resumos dependem"""
+    from django.apps import apps
+    from django.db.models.signals import post_delete, post_save
+
+    from backend.apps.equipamentos.importacao import equipamentos_importados
+    from backend.apps.nr12_checklist.gerador import checklists_gerados
+
+    for label in DEPENDENCIAS:
+        model = apps.get_model(label)
+        uid = f'cache_resumos_{label}'
+        post_save.connect(_invalidar_por_instancia, sender=model, dispatch_uid=uid)
+        post_delete.connect(_invalidar_por_instancia, sender=model, dispatch_uid=uid)
+
+    registrar_campos(apps.get_model('equipamentos.Equipamento'), ['cliente_id'])
+
+    checklists_gerados.connect(
+        _invalidar_checklists_gerados, dispatch_uid='cache_resumos_checklists_gerados'
+    )
+    equipamentos_importados.connect(
+        _invalidar_equipamentos_importados, dispatch_uid='cache_resumos_equipamentos_importados'
+    )
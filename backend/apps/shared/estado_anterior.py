@@ -0,0 +1,48 @@
+# ================================================================
+# ARQUIVO: backend/apps/shared/estado_anterior.py
+# Estado do registro no banco antes de um save (uma leitura por save)
+# ================================================================
+#
+# Vários receivers de post_save precisam comparar o registro salvo com o
+# que estava no banco (KPIs do dashboard, cache de resumos, escopo dos
+# operadores). Em vez de cada um fazer sua leitura no pre_save, cada app
+# registra os campos de que precisa e um único pre_save por model lê a
+# união deles com .only(). Os receivers consultam estado_anterior(instance).
+
+import logging
+
+from django.db.models.signals import pre_save
+
+logger = logging.getLogger(__name__)
+
+# label do model -> campos lidos antes do save
+_campos = {}
+
+
+def registrar_campos(model, campos):
+    """Inclui `campos` no estado anterior guardado antes de cada save de `model`"""
+    label = model._meta.label
+    _campos.setdefault(label, set()).update(campos)
+    pre_save.connect(_guardar_estado_anterior, sender=model, dispatch_uid=f'estado_anterior_{label}')
+
+
+def _guardar_estado_anterior(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = None
+    if instance.pk and not instance._state.adding:
+        anterior = sender._default_manager.filter(pk=instance.pk).only(
+            *_campos[sender._meta.label]
+        ).first()
+    instance._estado_anterior = anterior
+
+
+def estado_anterior(instance):
+    """
+    Registro como estava no banco antes do save em andamento
+
+    Returns:
+        Instância com apenas os campos registrados carregados, ou None para
+        registros novos
+    """
+    return getattr(instance, '_estado_anterior', None)
@@ -0,0 +1,105 @@
+# ================================================================
+# ARQUIVO: backend/apps/shared/idempotencia.py
+# Suporte ao cabeçalho Idempotency-Key nos endpoints de escrita
+# ================================================================
+#
+# O bot reenvia requisições (fila local, retentativas, toque duplo em
+# botões) sempre com a mesma chave. A primeira execução guarda a resposta
+# no cache do Django (Redis em produção) por TEMPO_RESPOSTA; as repetições
+# recebem a resposta guardada sem executar a escrita de novo.
+#
+#     idem:<método>:<caminho>:<usuário>:<chave>  ->  {'s': status, 'd': dados, 'h': impressão}
+#
+# Regras:
+#   - Sem o cabeçalho, o endpoint funciona como antes.
+#   - Mesma chave com outro corpo: 422 (a chave foi reaproveitada por engano).
+#   - Mesma chave enquanto a primeira ainda executa: 409 (o cliente repete depois).
+#   - Respostas 5xx não são guardadas: a repetição executa de novo.
+
+import hashlib
+import json
+import logging
+from functools import wraps
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+CABECALHO = 'Idempotency-Key'
+CABECALHO_REPETICAO = 'Idempotent-Replayed'
+
+TEMPO_RESPOSTA = 24 * 3600    # segundos que uma resposta fica disponível
+TEMPO_EXECUCAO = 60           # lock enquanto a primeira requisição executa
+TAMANHO_MAXIMO_CHAVE = 255
+
+
+def _chave(request, chave_cliente):
+    usuario = request.user.pk if request.user and request.user.is_authenticated else 'anon'
+    return f'idem:{request.method}:{request.path}:{usuario}:{chave_cliente}'
+
+
+def _impressao(request):
+    # Corpo já interpretado pelo DRF; o corpo bruto pode não estar mais disponível
+    corpo = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(corpo.encode()).hexdigest()[:16]
+
+
+def idempotente(metodo_view):
+    """
+    Decorador para métodos de view (post, create, actions) que aceitam Idempotency-Key
+
+    Exemplo:
+        @idempotente
+        def post(self, request): ...
+    """
+    @wraps(metodo_view)
+    def wrapper(self, request, *args, **kwargs):
+        chave_cliente = request.headers.get(CABECALHO)
+        if not chave_cliente:
+            return metodo_view(self, request, *args, **kwargs)
+
+        if len(chave_cliente) > TAMANHO_MAXIMO_CHAVE:
+            return Response(
+                {'error': f'{CABECALHO} deve ter até {TAMANHO_MAXIMO_CHAVE} caracteres'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        chave = _chave(request, chave_cliente)
+        impressao = _impressao(request)
+
+        guardada = cache.get(chave)
+        if guardada is not None:
+            return _repetir(guardada, impressao, chave_cliente)
+
+        chave_lock = f'{chave}:lock'
+        if not cache.add(chave_lock, 1, timeout=TEMPO_EXECUCAO):
+            return Response(
+                {'error': 'Requisição com esta chave ainda em processamento'},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Retry-After': '1'}
+            )
+
+        try:
+            response = metodo_view(self, request, *args, **kwargs)
+            if response.status_code < 500 and isinstance(response, Response):
+                # Normaliza para JSON: o Redis de produção usa o JSONSerializer
+                dados = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+                cache.set(chave, {'s': response.status_code, 'd': dados, 'h': impressao}, TEMPO_RESPOSTA)
+            return response
+        finally:
+            cache.delete(chave_lock)
+
+    return wrapper
+
+
+def _repetir(guardada, impressao, chave_cliente):
+    if guardada['h'] != impressao:
+        return Response(
+            {'error': f'{CABECALHO} já usada com outro conteúdo'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    logger.debug(f"Resposta repetida para {CABECALHO} {chave_cliente}")
+    return Response(guardada['d'], status=guardada['s'], headers={CABECALHO_REPETICAO: 'true'})
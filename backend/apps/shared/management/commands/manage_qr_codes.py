@@ -88,13 +88,11 @@ class Command(BaseCommand):
                     self.stdout.write(f'⏭️  {i:2d}/{total} - {operador.codigo} (já existe)')
                     continue
                 
-                # Gerar QR code
-                qr_info = self.qr_manager.gerar_qr_operador(operador, tamanho)
-                
-                # Atualizar campo no modelo com caminho padronizado
+                # Gerar QR code e apontar o campo do modelo para ele
                 if hasattr(operador, 'qr_code'):
-                    operador.qr_code = qr_info['relative_path']
-                    operador.save(update_fields=['qr_code'])
+                    self.qr_manager.vincular_qr_operador(operador, tamanho)
+                else:
+                    self.qr_manager.gerar_qr_operador(operador, tamanho)
                 
                 gerados += 1
                 self.stdout.write(f'✅ {i:2d}/{total} - {operador.codigo} ({operador.nome[:20]})')
@@ -126,13 +124,11 @@ class Command(BaseCommand):
                     self.stdout.write(f'⏭️  {i:2d}/{total} - EQ{equipamento.id:03d} (já existe)')
                     continue
                 
-                # Gerar QR code
-                qr_info = self.qr_manager.gerar_qr_equipamento(equipamento, tamanho)
-                
-                # Atualizar campo no modelo com caminho padronizado
+                # Gerar QR code e apontar o campo do modelo para ele
                 if hasattr(equipamento, 'qr_code'):
-                    equipamento.qr_code = qr_info['relative_path']
-                    equipamento.save(update_fields=['qr_code'])
+                    self.qr_manager.vincular_qr_equipamento(equipamento, tamanho)
+                else:
+                    self.qr_manager.gerar_qr_equipamento(equipamento, tamanho)
                 
                 gerados += 1
                 self.stdout.write(f'✅ {i:2d}/{total} - EQ{equipamento.id:03d} ({equipamento.nome[:20]})')
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenciaDocumento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefixo', models.CharField(max_length=50, unique=True, verbose_name='Prefixo')),
+                ('ultimo', models.BigIntegerField(default=0, verbose_name='Último Número')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Sequência de Documento',
+                'verbose_name_plural': 'Sequências de Documentos',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# ================================================================
+# ARQUIVO: backend/apps/shared/models.py
+# Modelos compartilhados entre os apps
+# ================================================================
+
+from django.db import models
+
+
+class SequenciaDocumento(models.Model):
+    """Último número emitido para um prefixo de documento (sequencias.py)"""
+
+    prefixo = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name="Prefixo"
+    )
+    ultimo = models.BigIntegerField(
+        default=0,
+        verbose_name="Último Número"
+    )
+    atualizado_em = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Atualizado em"
+    )
+
+    class Meta:
+        verbose_name = 'Sequência de Documento'
+        verbose_name_plural = 'Sequências de Documentos'
+
+    def __str__(self):
+        return f"{self.prefixo}: {self.ultimo}"
@@ -0,0 +1,705 @@
+# ================================================================
+# ARQUIVO: backend/apps/shared/qr_render.py
+# Núcleo único de renderização de QR codes (PNG e SVG)
+# ================================================================
+#
+# Todos os geradores de QR do sistema usam este módulo:
+#   - nr12_checklist/qr_manager.py   QRCodeManager (checklists, equipamentos)
+#   - nr12_checklist/qr_lote.py      lotes com pool de processos, ZIP/PDF
+#   - nr12_checklist/qr_generator.py link do bot e base64 para a API
+#   - shared/qr_manager.py           UnifiedQRManager (operadores e demais)
+#   - abastecimento/qr_manager.py e qr_mixins.py (campo qr_code do Equipamento)
+#   - equipamentos/qr_utils.py       QR com JSON para validação
+#
+# O que muda de um tipo de objeto para outro fica no payload
+# (PayloadChecklist, PayloadEquipamento, PayloadOperador): dados
+# codificados, linhas impressas, correção de erro e referência no cache.
+# Tabela de tamanhos, fontes, logo, arquivos e limpeza são comuns:
+#
+#     qr_codes/cache/<h[:2]>/<h>.<png|svg>    h = sha256(dados + tamanho + estilo)
+#
+# gravados pelo storage padrão do Django (disco ou S3). O mesmo conteúdo é
+# renderizado uma única vez; cada objeto que usa uma imagem tem uma
+# ReferenciaQRCode ('checklist:12:medium', 'operador:3:medium:svg'), e a
+# limpeza remove as referências vencidas e depois as imagens sem
+# referência, sem listar diretórios.
+#
+# O SVG é montado direto da matriz do QR, sem PIL: arquivo pequeno, vetorial
+# e barato de gerar para etiquetas e páginas web.
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Incrementar ao mudar o desenho (posições, cores, fontes): invalida o cache
+VERSAO_ESTILO = 2
+
+FORMATOS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+TAMANHOS = {
+    'small': {
+        'box_size': 8,
+        'font_size': 16,
+        'add_text': True,
+        'add_logo': False,
+        'text_height': 60,
+        'logo_size': (40, 40)
+    },
+    'medium': {
+        'box_size': 10,
+        'font_size': 20,
+        'add_text': True,
+        'add_logo': True,
+        'text_height': 80,
+        'logo_size': (60, 60)
+    },
+    'large': {
+        'box_size': 15,
+        'font_size': 28,
+        'add_text': True,
+        'add_logo': True,
+        'text_height': 120,
+        'logo_size': (80, 80)
+    }
+}
+
+# Deslocamento vertical de cada linha de texto abaixo do código
+DESLOCAMENTO_LINHAS = (0, 25, 45)
+
+# Imagens sem referência ficam esse tempo antes de serem removidas, para
+# não apagar uma imagem cuja referência está sendo gravada
+CARENCIA_ORFAOS = timedelta(hours=1)
+
+
+def configuracao_tamanho(tamanho):
+    """Configuração de desenho do tamanho ('small', 'medium', 'large')"""
+    return dict(TAMANHOS.get(tamanho, TAMANHOS['medium']))
+
+
+# ================================================================
+# PAYLOADS
+# ================================================================
+
+class PayloadQR:
+    """
+    Conteúdo do QR code de um objeto
+
+    Subclasses definem tipo, dados_padrao() e linhas(). `dados` permite
+    manter o conteúdo de etiquetas já impressas em outro formato.
+    """
+
+    tipo = ''
+    correcao = qrcode.constants.ERROR_CORRECT_M
+
+    def __init__(self, objeto, dados=None):
+        self.objeto = objeto
+        self._dados = dados
+
+    @property
+    def dados(self):
+        return self._dados or self.dados_padrao()
+
+    def dados_padrao(self):
+        raise NotImplementedError
+
+    def linhas(self):
+        """Textos impressos abaixo do código: [(texto, cor, fonte_pequena)]"""
+        return []
+
+    def data_referencia(self):
+        """Data usada na limpeza do cache; None mantém a imagem enquanto o objeto existir"""
+        return None
+
+    def dono(self, tamanho='medium', formato='png'):
+        sufixo = '' if formato == 'png' else f':{formato}'
+        return f"{self.tipo}:{self.objeto.pk}:{tamanho}{sufixo}"
+
+    def dono_campo(self):
+        """Referência da imagem gravada no campo qr_code do objeto"""
+        return f"{self.tipo}:{self.objeto.pk}:campo"
+
+
+class PayloadChecklist(PayloadQR):
+    tipo = 'checklist'
+
+    def dados_padrao(self):
+        base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
+        return f"{base_url}/qr/{self.objeto.uuid}/"
+
+    def linhas(self):
+        checklist = self.objeto
+        nome = checklist.equipamento.nome
+        equipamento = nome[:25] + "..." if len(nome) > 25 else nome
+        data_texto = checklist.data_checklist.strftime('%d/%m/%Y')
+
+        return [
+            (equipamento, 'black', False),
+            (f"{data_texto} - {checklist.turno}", 'black', True),
+            (f"ID: {checklist.uuid}", 'gray', True),
+        ]
+
+    def data_referencia(self):
+        return self.objeto.data_checklist
+
+
+class PayloadEquipamento(PayloadQR):
+    tipo = 'equipamento'
+    # Alta correção: etiqueta fica exposta no equipamento
+    correcao = qrcode.constants.ERROR_CORRECT_H
+
+    def dados_padrao(self):
+        # Formato reconhecido pelo /start do bot (bot_qrcode/handlers.py)
+        bot = getattr(settings, 'TELEGRAM_BOT_USERNAME', 'Mandacarusmbot')
+        return f"https://t.me/{bot}?start=eq_{self.objeto.uuid}"
+
+    def linhas(self):
+        equipamento = self.objeto
+        nome = equipamento.nome[:20] + "..." if len(equipamento.nome) > 20 else equipamento.nome
+        codigo = getattr(equipamento, 'codigo', f"EQ{equipamento.id}")
+
+        return [
+            (nome, 'black', False),
+            (f"Código: {codigo}", 'black', True),
+            (equipamento.cliente.razao_social[:25], 'gray', True),
+        ]
+
+
+class PayloadOperador(PayloadQR):
+    tipo = 'operador'
+
+    def dados_padrao(self):
+        operador = self.objeto
+        return json.dumps({
+            'tipo': 'operador',
+            'codigo': operador.codigo,
+            'nome': operador.nome,
+            'data': operador.qr_code_data,
+        }, default=str)
+
+    def linhas(self):
+        operador = self.objeto
+        return [
+            (operador.nome[:25], 'black', False),
+            (f"Código: {operador.codigo}", 'black', True),
+            (f"{operador.funcao} - {operador.setor}", 'gray', True),
+        ]
+
+
+PAYLOADS = {
+    'checklist': PayloadChecklist,
+    'equipamento': PayloadEquipamento,
+    'operador': PayloadOperador,
+}
+
+# model_name -> tipo do payload
+_TIPOS_POR_MODELO = {
+    'checklistnr12': 'checklist',
+    'equipamento': 'equipamento',
+    'operador': 'operador',
+}
+
+
+def payload_para(objeto):
+    """Payload padrão de uma instância (ChecklistNR12, Equipamento, Operador)"""
+    tipo = _TIPOS_POR_MODELO.get(objeto._meta.model_name)
+    if tipo is None:
+        raise ValueError(f"Sem payload de QR code para {objeto._meta.label}")
+    return PAYLOADS[tipo](objeto)
+
+
+# ================================================================
+# RENDERIZAÇÃO
+# ================================================================
+
+@lru_cache(maxsize=16)
+def _fonte(tamanho):
+    """Fonte carregada uma vez por processo e tamanho"""
+    try:
+        return ImageFont.truetype("arial.ttf", tamanho)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _assinatura_logo():
+    """(caminho, mtime) do logo configurado, ou None se não houver logo"""
+    logo_path = getattr(settings, 'QR_LOGO_PATH', None)
+    if not logo_path:
+        return None
+    try:
+        return logo_path, os.path.getmtime(logo_path)
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=8)
+def _logo_preparado(caminho, mtime, logo_size):
+    """
+    Logo decodificado, redimensionado e com fundo/máscara circulares
+
+    O mtime faz parte da chave: trocar o arquivo do logo recarrega a imagem.
+    As imagens retornadas são compartilhadas e não devem ser alteradas.
+    """
+    logo = Image.open(caminho).convert('RGBA')
+
+    mask = Image.new('L', logo_size, 0)
+    ImageDraw.Draw(mask).ellipse([0, 0, logo_size[0], logo_size[1]], fill=255)
+    white_bg = Image.new('RGBA', logo_size, (255, 255, 255, 255))
+    logo_resized = logo.resize((logo_size[0] - 4, logo_size[1] - 4), Image.Resampling.LANCZOS)
+
+    return white_bg, mask, logo_resized
+
+
+def _matriz(dados, correcao, border=4):
+    qr = qrcode.QRCode(version=1, error_correction=correcao, box_size=1, border=border)
+    qr.add_data(dados)
+    qr.make(fit=True)
+    return qr
+
+
+def renderizar_png(dados, config, linhas=(), logo=None, correcao=qrcode.constants.ERROR_CORRECT_M):
+    """
+    Renderiza o QR code em uma imagem PIL
+
+    Args:
+        dados: Conteúdo codificado
+        config: configuracao_tamanho()
+        linhas: Textos abaixo do código [(texto, cor, fonte_pequena)]
+        logo: Assinatura do logo (_assinatura_logo()) ou None
+        correcao: Nível de correção de erro
+    """
+    qr = _matriz(dados, correcao)
+    qr.box_size = config['box_size']
+    qr_img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
+
+    if linhas:
+        qr_img = _desenhar_textos(qr_img, linhas, config)
+
+    if logo:
+        qr_img = _desenhar_logo(qr_img, config, logo)
+
+    return qr_img
+
+
+def _desenhar_textos(qr_img, linhas, config):
+    """Adiciona texto informativo abaixo do QR code"""
+    try:
+        new_img = Image.new('RGB', (qr_img.width, qr_img.height + config['text_height']), 'white')
+        new_img.paste(qr_img, (0, 0))
+
+        draw = ImageDraw.Draw(new_img)
+        font = _fonte(config['font_size'])
+        font_small = _fonte(config['font_size'] - 4)
+
+        y_start = qr_img.height + 10
+        center_x = qr_img.width // 2
+
+        for deslocamento, (texto, cor, pequena) in zip(DESLOCAMENTO_LINHAS, linhas):
+            draw.text(
+                (center_x, y_start + deslocamento), texto,
+                fill=cor, font=font_small if pequena else font, anchor='mt'
+            )
+
+        return new_img
+
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao adicionar texto: {e}")
+        return qr_img
+
+
+def _desenhar_logo(qr_img, config, assinatura):
+    """Adiciona logo da empresa ao centro do QR code"""
+    try:
+        logo_size = tuple(config['logo_size'])
+        white_bg, mask, logo_resized = _logo_preparado(*assinatura, logo_size)
+
+        pos_x = (qr_img.width - logo_size[0]) // 2
+        pos_y = (qr_img.height - logo_size[1]) // 2
+
+        qr_img.paste(white_bg, (pos_x, pos_y), mask)
+        qr_img.paste(logo_resized, (pos_x + 2, pos_y + 2), logo_resized)
+
+        return qr_img
+
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao adicionar logo: {e}")
+        return qr_img
+
+
+def modulos_qr(dados, correcao=qrcode.constants.ERROR_CORRECT_M, border=4):
+    """
+    Módulos escuros do QR code agrupados em sequências horizontais
+
+    Base dos formatos vetoriais (SVG e etiquetas PDF): uma sequência vira um
+    único retângulo, o que reduz o arquivo em várias vezes em relação a um
+    retângulo por módulo.
+
+    Returns:
+        tuple: ([(x, y, comprimento)], lado em módulos)
+    """
+    matriz = _matriz(dados, correcao, border).get_matrix()
+    sequencias = []
+    for y, linha in enumerate(matriz):
+        x = 0
+        while x < len(linha):
+            if not linha[x]:
+                x += 1
+                continue
+            inicio = x
+            while x < len(linha) and linha[x]:
+                x += 1
+            sequencias.append((inicio, y, x - inicio))
+    return sequencias, len(matriz)
+
+
+def caminho_svg(dados, correcao=qrcode.constants.ERROR_CORRECT_M, border=4):
+    """
+    Módulos escuros do QR code como dados de um <path> SVG (1 unidade = 1 módulo)
+
+    Returns:
+        tuple: (d do path, lado em módulos)
+    """
+    sequencias, lado = modulos_qr(dados, correcao, border)
+    caminho = ''.join(f"M{x} {y}h{n}v1h-{n}z" for x, y, n in sequencias)
+    return caminho, lado
+
+
+def renderizar_svg(dados, config, linhas=(), correcao=qrcode.constants.ERROR_CORRECT_M):
+    """
+    Renderiza o QR code em SVG (texto), com as mesmas dimensões do PNG
+
+    O logo não é aplicado: sem ele o código é lido mesmo com correção M.
+    """
+    caminho, modulos = caminho_svg(dados, correcao)
+    box = config['box_size']
+    largura = modulos * box
+    altura = largura + (config['text_height'] if linhas else 0)
+
+    partes = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{largura}" height="{altura}" '
+        f'viewBox="0 0 {largura} {altura}">',
+        f'<rect width="{largura}" height="{altura}" fill="#fff"/>',
+        f'<path transform="scale({box})" fill="#000" shape-rendering="crispEdges" d="{caminho}"/>',
+    ]
+    for deslocamento, (texto, cor, pequena) in zip(DESLOCAMENTO_LINHAS, linhas):
+        tamanho_fonte = config['font_size'] - 4 if pequena else config['font_size']
+        partes.append(
+            f'<text x="{largura // 2}" y="{largura + 10 + deslocamento}" fill="{cor}" '
+            f'font-family="Arial, Helvetica, sans-serif" font-size="{tamanho_fonte}" '
+            f'text-anchor="middle" dominant-baseline="hanging">{escape(texto)}</text>'
+        )
+    partes.append('</svg>')
+
+    return ''.join(partes), largura, altura
+
+
+def renderizar_simples(dados, formato='png', tamanho='medium', correcao=qrcode.constants.ERROR_CORRECT_M):
+    """Bytes de um QR code sem textos, logo ou cache (conteúdos que mudam a cada geração)"""
+    pedido = preparar_pedido(dados, tamanho, incluir_logo=False, correcao=correcao, formato=formato)
+    return renderizar_pedido(pedido)['conteudo']
+
+
+# ================================================================
+# PEDIDOS E POOL DE PROCESSOS
+# ================================================================
+
+def preparar_pedido(dados, tamanho='medium', linhas=(), incluir_logo=True,
+                    correcao=qrcode.constants.ERROR_CORRECT_M, formato='png'):
+    """
+    Monta o pedido de renderização de um conteúdo
+
+    O pedido só tem tipos simples (pode ser enviado a outro processo) e traz
+    o hash do conteúdo e o nome do arquivo no storage.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de QR code inválido: {formato}")
+
+    config = configuracao_tamanho(tamanho)
+    logo = _assinatura_logo() if formato == 'png' and incluir_logo and config['add_logo'] else None
+    linhas = [tuple(linha) for linha in linhas] if config['add_text'] else []
+    estilo = {
+        'linhas': linhas,
+        'logo': logo,
+        'correcao': correcao,
+        'formato': formato,
+        'versao': VERSAO_ESTILO,
+    }
+    conteudo = json.dumps(
+        {'dados': dados, 'tamanho': tamanho, 'estilo': estilo},
+        sort_keys=True, default=str
+    )
+    hash_conteudo = hashlib.sha256(conteudo.encode()).hexdigest()
+
+    return {
+        'hash': hash_conteudo,
+        'arquivo': f"qr_codes/cache/{hash_conteudo[:2]}/{hash_conteudo}.{formato}",
+        'formato': formato,
+        'dados': dados,
+        'config': config,
+        'linhas': linhas,
+        'logo': logo,
+        'correcao': correcao,
+    }
+
+
+def renderizar_pedido(pedido):
+    """
+    Renderiza um pedido (preparar_pedido) em memória
+
+    Usa só PIL e qrcode, sem banco, storage nem settings: roda também nos
+    processos do pool.
+
+    Returns:
+        dict: conteudo (bytes), largura, altura e tamanho_bytes
+    """
+    if pedido['formato'] == 'svg':
+        svg, largura, altura = renderizar_svg(
+            pedido['dados'], pedido['config'], pedido['linhas'], pedido['correcao']
+        )
+        conteudo = svg.encode()
+    else:
+        qr_img = renderizar_png(
+            pedido['dados'], pedido['config'], pedido['linhas'], pedido['logo'], pedido['correcao']
+        )
+        buffer = BytesIO()
+        qr_img.save(buffer, 'PNG')
+        conteudo = buffer.getvalue()
+        largura, altura = qr_img.width, qr_img.height
+
+    return {
+        'conteudo': conteudo,
+        'largura': largura,
+        'altura': altura,
+        'tamanho_bytes': len(conteudo),
+    }
+
+
+def numero_processos(processos=None):
+    """Processos do pool: argumento, settings.QR_PROCESSOS ou número de CPUs"""
+    processos = processos or getattr(settings, 'QR_PROCESSOS', None) or os.cpu_count() or 1
+    if multiprocessing.current_process().daemon:
+        # Worker Celery prefork: processos daemon não podem criar filhos
+        return 1
+    return max(1, int(processos))
+
+
+def renderizar_pedidos(pedidos, processos):
+    """Renderiza os pedidos produzindo (pedido, resultado, erro) na ordem em que terminam"""
+    if processos <= 1 or len(pedidos) <= 1:
+        for pedido in pedidos:
+            try:
+                yield pedido, renderizar_pedido(pedido), None
+            except Exception as e:
+                yield pedido, None, e
+        return
+
+    # fork: os workers herdam os módulos já importados (sem reconfigurar o Django)
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context('fork' if 'fork' in metodos else None)
+    pool = ProcessPoolExecutor(max_workers=min(processos, len(pedidos)), mp_context=contexto)
+    try:
+        futuros = {pool.submit(renderizar_pedido, pedido): pedido for pedido in pedidos}
+        for futuro in as_completed(futuros):
+            pedido = futuros[futuro]
+            try:
+                yield pedido, futuro.result(), None
+            except Exception as e:
+                yield pedido, None, e
+    finally:
+        # Consumidor que para no meio não deixa o pool renderizando à toa
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ================================================================
+# CACHE (STORAGE + REFERÊNCIAS)
+# ================================================================
+
+def url_arquivo(arquivo):
+    return default_storage.url(arquivo)
+
+
+def caminho_local(arquivo):
+    """Caminho no disco, ou None quando o storage é remoto (S3)"""
+    try:
+        return default_storage.path(arquivo)
+    except NotImplementedError:
+        return None
+
+
+def registrar_renderizado(pedido, resultado):
+    """Grava a imagem no storage (se ainda não existe) e o registro do cache"""
+    from backend.apps.nr12_checklist.models import QRCodeRenderizado
+
+    arquivo = pedido['arquivo']
+    if not default_storage.exists(arquivo):
+        arquivo = default_storage.save(arquivo, ContentFile(resultado['conteudo']))
+
+    registro, _ = QRCodeRenderizado.objects.update_or_create(
+        hash=pedido['hash'],
+        defaults={
+            'arquivo': arquivo,
+            'largura': resultado['largura'],
+            'altura': resultado['altura'],
+            'tamanho_bytes': resultado['tamanho_bytes'],
+            'usado_em': timezone.now(),
+        }
+    )
+    return registro
+
+
+def referenciar(itens, tamanho='medium', formato='png', campo=False):
+    """
+    Grava as referências [(payload, QRCodeRenderizado)] com uma query
+
+    Com campo=True grava a referência própria do campo qr_code do objeto
+    (dono_campo). Ela só muda quando o campo passa a apontar para outra
+    imagem, então renderizações do mesmo objeto com outro conteúdo (nome
+    alterado, outro bot, sem logo) não deixam o arquivo do campo sem
+    referência para a limpeza.
+    """
+    from backend.apps.nr12_checklist.models import ReferenciaQRCode
+
+    agora = timezone.now()
+    ReferenciaQRCode.objects.bulk_create(
+        [
+            ReferenciaQRCode(
+                dono=payload.dono_campo() if campo else payload.dono(tamanho, formato),
+                qr_code=registro,
+                data_referencia=payload.data_referencia(),
+                atualizado_em=agora,
+            )
+            for payload, registro in itens
+        ],
+        update_conflicts=True,
+        unique_fields=['dono'],
+        update_fields=['qr_code', 'data_referencia', 'atualizado_em'],
+    )
+
+
+def obter_qr(payload, tamanho='medium', formato='png', incluir_logo=True):
+    """
+    Imagem do cache para o payload, renderizando só se ainda não existe
+
+    Returns:
+        tuple: (QRCodeRenderizado, bool renderizado agora)
+    """
+    from backend.apps.nr12_checklist.models import QRCodeRenderizado
+
+    pedido = preparar_pedido(
+        payload.dados, tamanho, payload.linhas(), incluir_logo, payload.correcao, formato
+    )
+
+    registro = QRCodeRenderizado.objects.filter(hash=pedido['hash']).first()
+    renderizado = registro is None or not default_storage.exists(registro.arquivo)
+    if renderizado:
+        registro = registrar_renderizado(pedido, renderizar_pedido(pedido))
+    else:
+        QRCodeRenderizado.objects.filter(pk=registro.pk).update(usado_em=timezone.now())
+
+    referenciar([(payload, registro)], tamanho, formato)
+    return registro, renderizado
+
+
+def obter_lote(payloads, tamanho='medium', formato='png', incluir_logo=True, processos=None):
+    """
+    Imagens de vários payloads, entregues assim que ficam prontas
+
+    O cache é consultado com uma query para o lote inteiro; só o que falta
+    vai para o pool de processos, e cada conteúdo é renderizado uma vez
+    mesmo que vários payloads o compartilhem. Os encontrados no cache saem
+    primeiro.
+
+    Yields:
+        tuple: (payload, QRCodeRenderizado ou None, renderizado agora, erro ou None)
+    """
+    from backend.apps.nr12_checklist.models import QRCodeRenderizado
+
+    por_hash = {}
+    pedidos = {}
+    for payload in payloads:
+        pedido = preparar_pedido(
+            payload.dados, tamanho, payload.linhas(), incluir_logo, payload.correcao, formato
+        )
+        pedidos.setdefault(pedido['hash'], pedido)
+        por_hash.setdefault(pedido['hash'], []).append(payload)
+
+    existentes = {
+        registro.hash: registro
+        for registro in QRCodeRenderizado.objects.filter(hash__in=list(pedidos))
+    }
+    QRCodeRenderizado.objects.filter(hash__in=list(existentes)).update(usado_em=timezone.now())
+    for hash_conteudo, registro in existentes.items():
+        itens = [(payload, registro) for payload in por_hash[hash_conteudo]]
+        referenciar(itens, tamanho, formato)
+        for payload, _ in itens:
+            yield payload, registro, False, None
+
+    faltando = [pedido for hash_conteudo, pedido in pedidos.items() if hash_conteudo not in existentes]
+    processos = numero_processos(processos)
+    if faltando:
+        logger.info(f"🖨️ Renderizando {len(faltando)} QR codes com {processos} processos")
+
+    for pedido, resultado, erro in renderizar_pedidos(faltando, processos):
+        if erro is not None:
+            logger.error(f"❌ Erro ao renderizar QR {pedido['hash'][:12]}: {erro}")
+            for payload in por_hash[pedido['hash']]:
+                yield payload, None, False, erro
+            continue
+        registro = registrar_renderizado(pedido, resultado)
+        itens = [(payload, registro) for payload in por_hash[pedido['hash']]]
+        referenciar(itens, tamanho, formato)
+        for payload, _ in itens:
+            yield payload, registro, True, None
+
+
+def limpar_cache(dias=7):
+    """
+    Remove referências vencidas e as imagens que ficaram sem referência
+
+    Referências com data (checklists) vencem após `dias` dias; as sem data
+    (equipamentos, operadores) ficam enquanto o objeto for regenerado.
+
+    Returns:
+        tuple: (arquivos removidos, referências removidas)
+    """
+    from backend.apps.nr12_checklist.models import QRCodeRenderizado, ReferenciaQRCode
+
+    limite = timezone.localdate() - timedelta(days=dias)
+    referencias, _ = ReferenciaQRCode.objects.filter(data_referencia__lt=limite).delete()
+
+    removidos = 0
+    orfaos = QRCodeRenderizado.objects.filter(
+        referencias__isnull=True,
+        usado_em__lt=timezone.now() - CARENCIA_ORFAOS
+    ).values_list('pk', 'arquivo')
+
+    for pk, arquivo in list(orfaos):
+        # Só remove o arquivo se ninguém referenciou a imagem nesse meio tempo
+        apagados, _ = QRCodeRenderizado.objects.filter(pk=pk, referencias__isnull=True).delete()
+        if not apagados:
+            continue
+        try:
+            default_storage.delete(arquivo)
+            removidos += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao remover {arquivo}: {e}")
+
+    return removidos, referencias
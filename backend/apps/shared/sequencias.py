@@ -0,0 +1,78 @@
+# ================================================================
+# ARQUIVO: backend/apps/shared/sequencias.py
+# Numeração sequencial de documentos sem corrida
+# ================================================================
+#
+# Cada prefixo (ex.: "abastecimento:AB202501", "operador") tem uma linha
+# em SequenciaDocumento com o último número emitido. Reservar números é um
+# UPDATE ... SET ultimo = ultimo + n na linha: uma query pelo índice único,
+# sem varrer a tabela do documento, e o lock da linha faz requisições
+# simultâneas (abastecimentos enviados pelo bot ao mesmo tempo) receberem
+# números diferentes.
+#
+# O lock fica até o fim da transação de quem chamou, então a reserva e o
+# INSERT do documento devem estar juntos num transaction.atomic() curto.
+# Se a transação for desfeita, o incremento também é e o número volta a
+# ficar livre (numeração sem buracos).
+#
+# Prefixos que já têm documentos gravados antes da sequência existir:
+# `inicial` é chamado uma vez, na criação da linha, e devolve o maior
+# número já usado.
+#
+#     numero = proximo('operador', inicial=ultimo_codigo_existente)
+#     for n, objeto in zip(bloco('abastecimento:AB202501', len(objetos)), objetos): ...
+
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Now
+
+from .models import SequenciaDocumento
+
+logger = logging.getLogger(__name__)
+
+
+def reservar(prefixo, quantidade=1, inicial=None):
+    """
+    Reserva `quantidade` números consecutivos do prefixo
+
+    Args:
+        prefixo (str): Chave da sequência
+        quantidade (int): Números reservados de uma vez
+        inicial: Função sem argumentos que devolve o maior número já usado
+            pelo prefixo (consultada só na primeira reserva)
+
+    Returns:
+        int: Último número reservado (o bloco termina nele)
+    """
+    if quantidade < 1:
+        raise ValueError("A quantidade reservada deve ser positiva")
+
+    sequencias = SequenciaDocumento.objects.filter(prefixo=prefixo)
+    with transaction.atomic():
+        while True:
+            if sequencias.update(ultimo=F('ultimo') + quantidade, atualizado_em=Now()):
+                # A linha está travada por esta transação: o valor lido é o nosso
+                return sequencias.values_list('ultimo', flat=True).get()
+
+            base = inicial() if inicial else 0
+            try:
+                with transaction.atomic():
+                    SequenciaDocumento.objects.create(prefixo=prefixo, ultimo=base + quantidade)
+                logger.info(f"🔢 Sequência {prefixo} criada a partir de {base}")
+                return base + quantidade
+            except IntegrityError:
+                # Outra transação criou a linha primeiro: volta para o UPDATE
+                continue
+
+
+def proximo(prefixo, inicial=None):
+    """Próximo número do prefixo"""
+    return reservar(prefixo, 1, inicial)
+
+
+def bloco(prefixo, quantidade, inicial=None):
+    """Bloco de números consecutivos do prefixo para importações em lote (range)"""
+    ultimo = reservar(prefixo, quantidade, inicial)
+    return range(ultimo - quantidade + 1, ultimo + 1)
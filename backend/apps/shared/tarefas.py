@@ -0,0 +1,39 @@
+# ================================================================
+# ARQUIVO: backend/apps/shared/tarefas.py
+# Disparo de tarefas Celery depois do commit
+# ================================================================
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def disparar_apos_commit(tarefa, *args, using=None):
+    """
+    Enfileira `tarefa` quando a transação atual for confirmada
+
+    Se a transação for desfeita, nada é enfileirado; fora de transação o
+    disparo é imediato (comportamento do on_commit). Com
+    CELERY_TASK_ALWAYS_EAGER (testes) a tarefa roda no próprio processo, e
+    se o broker estiver fora do ar também: o efeito atrasa a resposta, mas
+    não se perde.
+
+    Args:
+        tarefa: Tarefa Celery (@shared_task)
+        *args: Argumentos serializáveis em JSON
+        using: Alias do banco da transação
+    """
+    def disparar():
+        if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+            tarefa.apply(args=args)
+            return
+        try:
+            tarefa.apply_async(args=args, retry=False)
+        except Exception as e:
+            logger.warning(f"⚠️ Broker indisponível para {tarefa.name} ({e}); executando no processo")
+            tarefa.apply(args=args)
+
+    transaction.on_commit(disparar, using=using)
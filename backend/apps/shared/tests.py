@@ -0,0 +1,134 @@
+import tempfile
+import threading
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from .backup import MODELOS_BACKUP, executar_backup, restaurar_backup
+from .cache_resumos import _chave_versao, invalidar_resumos
+from .models import SequenciaDocumento
+from .sequencias import bloco, proximo
+
+
+class SequenciaConcorrenteTest(TransactionTestCase):
+    """Reservas simultâneas em conexões diferentes nunca repetem número"""
+
+    def _em_paralelo(self, tarefa, threads):
+        barreira = threading.Barrier(threads)
+        resultados, erros = [], []
+
+        def executar():
+            try:
+                barreira.wait()
+                resultados.extend(tarefa())
+            except Exception as e:
+                erros.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=executar) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(erros, [])
+        return resultados
+
+    def test_numeros_unicos_e_sem_buracos(self):
+        def reservar():
+            numeros = []
+            for _ in range(10):
+                with transaction.atomic():
+                    numeros.append(proximo('teste:paralelo', inicial=lambda: 100))
+            return numeros
+
+        numeros = self._em_paralelo(reservar, threads=8)
+
+        self.assertEqual(sorted(numeros), list(range(101, 181)))
+        self.assertEqual(SequenciaDocumento.objects.get(prefixo='teste:paralelo').ultimo, 180)
+
+    def test_blocos_nao_se_sobrepoem(self):
+        numeros = self._em_paralelo(lambda: list(bloco('teste:bloco', 25)), threads=6)
+
+        self.assertEqual(sorted(numeros), list(range(1, 151)))
+
+
+class SequenciaTest(TestCase):
+
+    def test_transacao_desfeita_devolve_o_numero(self):
+        self.assertEqual(proximo('teste:rollback'), 1)
+        try:
+            with transaction.atomic():
+                self.assertEqual(proximo('teste:rollback'), 2)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertEqual(proximo('teste:rollback'), 2)
+
+    def test_inicial_consultado_apenas_na_criacao(self):
+        chamadas = []
+
+        def inicial():
+            chamadas.append(1)
+            return 41
+
+        self.assertEqual(proximo('teste:legado', inicial=inicial), 42)
+        self.assertEqual(proximo('teste:legado', inicial=inicial), 43)
+        self.assertEqual(list(bloco('teste:legado', 3, inicial=inicial)), [44, 45, 46])
+        self.assertEqual(len(chamadas), 1)
+
+
+class InvalidacaoResumosTest(TestCase):
+
+    def test_versao_muda_apenas_no_commit(self):
+        chave = _chave_versao('portal_resumo', '7')
+        antes = cache.get(chave, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidar_resumos(['portal_resumo'], cliente_id=7)
+            # Leitores ainda veem os dados antigos: a versão não pode avançar
+            self.assertEqual(cache.get(chave, 0), antes)
+        self.assertEqual(cache.get(chave), antes + 1)
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            invalidar_resumos(['portal_resumo'], cliente_id=7)
+            raise RuntimeError
+        # Transação desfeita: nada mudou, nada a invalidar
+        self.assertEqual(cache.get(chave), antes + 1)
+
+
+class BackupIncrementalTest(TestCase):
+
+    def test_incremental_so_encadeia_em_backup_com_os_mesmos_modelos(self):
+        destino = tempfile.mkdtemp()
+        completo = executar_backup(destino=destino)
+        parcial = executar_backup(modelos=MODELOS_BACKUP[:2], destino=destino, dias=30)
+        self.assertEqual(parcial['modelos_incluidos'], ['clientes.Cliente', 'empreendimentos.Empreendimento'])
+
+        # O parcial é mais novo, mas não cobre todos os modelos nem a janela toda
+        incremental = executar_backup(destino=destino, incremental=True)
+        self.assertEqual((incremental['tipo'], incremental['desde']), ('incremental', completo['inicio']))
+
+        janela = executar_backup(modelos=MODELOS_BACKUP[:2], destino=destino, dias=7, incremental=True)
+        self.assertEqual(janela['desde'], incremental['inicio'])
+
+    def test_restauracao_preserva_datas_automaticas(self):
+        Usuario = get_user_model()
+        antigo = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+        usuario = Usuario.objects.create(username='auditoria')
+        Usuario.objects.filter(pk=usuario.pk).update(created_at=antigo, updated_at=antigo)
+
+        backup = executar_backup(modelos=[('usuarios', 'auth_cliente.UsuarioCliente', None)], destino=tempfile.mkdtemp())
+        usuario.refresh_from_db()
+        usuario.cargo = 'Alterado depois do backup'
+        usuario.save()
+
+        restaurar_backup(backup['diretorio'])
+        usuario.refresh_from_db()
+        # Upsert sobre o registro existente: volta o conteúdo e as datas do backup
+        self.assertEqual((usuario.created_at, usuario.updated_at, usuario.cargo), (antigo, antigo, ''))
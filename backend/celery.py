@@ -80,6 +80,18 @@ app.conf.beat_schedule = {
         'task': 'backend.apps.nr12_checklist.tasks.gerar_checklists_mensais',
         'schedule': crontab(hour=6, minute=0, day_of_month=1),
     },
+    'avaliar-alertas-dashboard': {
+        'task': 'backend.apps.dashboard.tasks.verificar_alertas_manutencao',
+        'schedule': crontab(minute='*/15'),
+    },
+    'fechar-saldos-estoque': {
+        'task': 'backend.apps.almoxarifado.tasks.consolidar_movimentacoes_diarias',
+        'schedule': crontab(hour=0, minute=15),
+    },
+    'reconciliar-kpis-dashboard': {
+        'task': 'backend.apps.dashboard.tasks.reconciliar_kpis_diarios',
+        'schedule': crontab(hour=23, minute=50),
+    },
 }
 
 app.conf.task_default_queue = 'default'
@@ -5,6 +5,7 @@
 from pathlib import Path
 from decouple import config
 import os
+import sys
 import dj_database_url
 from celery.schedules import crontab
 
@@ -140,6 +141,9 @@ CORS_ALLOWED_ORIGINS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Backups (sistema_mandacaru backup/restaurar e task backup_dados_importantes)
+BACKUP_DIR = config('BACKUP_DIR', default=os.path.join(BASE_DIR, 'backups'))
+
 # ✅ Configurações do Telegram Bot
 TELEGRAM_BOT_USERNAME = config('TELEGRAM_BOT_USERNAME', default='Mandacarusmbot')
 TELEGRAM_BOT_TOKEN = config('TELEGRAM_BOT_TOKEN', default='')
@@ -164,6 +168,8 @@ QR_CODES_DIR = os.path.join(MEDIA_ROOT, 'qr_codes')
 QR_LOGO_PATH = os.path.join(BASE_DIR, 'static', 'img', 'logo.png')  # se tiver logo
 QR_DEFAULT_SIZE = 'medium'
 QR_INCLUDE_LOGO = True
+QR_PROCESSOS = config('QR_PROCESSOS', default=0, cast=int)  # lote de QR codes; 0 = número de CPUs
+QR_LOTE_MAXIMO = config('QR_LOTE_MAXIMO', default=500, cast=int)  # checklists por requisição de lote
 BASE_URL = 'http://localhost:8000'  # ou sua URL de produção
 
 # ✅ ADICIONE ESTAS LINHAS NO FINAL DO ARQUIVO
@@ -212,4 +218,9 @@ CELERY_WORKER_POOL = 'threads'
 CELERY_WORKER_CONCURRENCY = 1
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 CELERY_TASK_TRACK_STARTED = True
-CELERY_TASK_ACKS_LATE = True
\ No newline at end of file
+CELERY_TASK_ACKS_LATE = True
+
+# Tarefas rodando no próprio processo (testes, desenvolvimento sem Redis)
+CELERY_TASK_ALWAYS_EAGER = config(
+    'CELERY_TASK_ALWAYS_EAGER', default=len(sys.argv) > 1 and sys.argv[1] == 'test', cast=bool
+)
\ No newline at end of file
@@ -21,6 +21,7 @@ def api_root(request):
             'nr12': '/api/nr12/',
             'equipamentos': '/api/equipamentos/',
             'operadores': '/api/operadores/',
+            'almoxarifado': '/api/almoxarifado/',
         }
     })
 
@@ -54,6 +55,7 @@ apps_to_try = [
     ('api/nr12/', 'backend.apps.nr12_checklist.urls'),
     ('api/equipamentos/', 'backend.apps.equipamentos.urls'), 
     ('api/operadores/', 'backend.apps.operadores.api_urls'),
+    ('api/almoxarifado/', 'backend.apps.almoxarifado.urls'),
     ('operadores/', 'backend.apps.operadores.urls'),  # views HTML se existir
 ]
 
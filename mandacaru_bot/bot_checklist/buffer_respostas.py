@@ -0,0 +1,256 @@
+# ===============================================
+# ARQUIVO: mandacaru_bot/bot_checklist/buffer_respostas.py
+# Envio das respostas de checklist em lote (write-behind)
+# ===============================================
+#
+# Cada resposta do operador é guardada nos dados temporários da sessão
+# (sobrevive a reinícios quando SESSION_BACKEND=redis), em um lote por
+# checklist, e enviada para nr12/checklists/{id}/itens/lote/ quando:
+#   - o lote chega a CHECKLIST_LOTE_RESPOSTAS respostas
+#   - a resposta mais antiga passa de CHECKLIST_LOTE_SEGUNDOS (tarefa periódica)
+#   - o checklist é pausado ou finalizado
+#
+# Com a API fora do ar o lote passa para a fila local (core/outbox.py), que
+# o reenvia em ordem; só se nem a fila local aceitar o lote ele continua
+# aqui para o próximo gatilho. O servidor ignora respostas mais antigas que
+# a gravada, então reenvios são seguros. Lotes recusados pela API (4xx) são
+# descartados e o envio levanta LoteRecusado para o handler avisar o
+# operador de que aquelas respostas (ou a finalização) não foram gravadas.
+#
+# Os chats com lotes pendentes ficam num conjunto do backend de sessões, e
+# não só na memória do processo: com vários processos (ou depois de um
+# reinício) a tarefa periódica de qualquer um deles envia os lotes antigos.
+# Como ali não há handler para avisar o operador, a recusa fica guardada na
+# sessão e AvisoRecusas a mostra na próxima mensagem ou botão do chat.
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from core.config import CHECKLIST_LOTE_RESPOSTAS, CHECKLIST_LOTE_SEGUNDOS
+from core.db import responder_itens_checklist_lote
+from core.session import (
+    definir_dados_temporarios, obter_dados_temporarios, limpar_dados_temporarios,
+    adicionar_ao_conjunto, remover_do_conjunto, membros_do_conjunto
+)
+
+logger = logging.getLogger(__name__)
+
+# Dados temporários: {checklist_id: {'operador_id', 'itens', 'desde', 'finalizar'}}
+CHAVE_BUFFER = 'respostas_pendentes'
+
+# Dados temporários: {checklist_id: erro da API} das recusas da tarefa periódica
+CHAVE_RECUSAS = 'respostas_recusadas'
+
+# Conjunto do backend com os chats que têm lotes pendentes (percorrido pela tarefa periódica)
+CONJUNTO_PENDENTES = 'chats_respostas_pendentes'
+
+_travas: Dict[str, asyncio.Lock] = {}
+
+
+class LoteRecusado(Exception):
+    """A API recusou lotes de respostas: nada deles foi gravado"""
+
+    def __init__(self, recusados: Dict[str, Any]):
+        # {checklist_id: corpo do erro devolvido pela API}
+        self.recusados = recusados
+        super().__init__(f"Lotes recusados pela API (checklists {', '.join(recusados)})")
+
+    def motivo(self) -> str:
+        """Mensagem de erro da API para mostrar ao operador"""
+        motivos = []
+        for erro in self.recusados.values():
+            if isinstance(erro, dict):
+                erro = erro.get('error') or erro.get('detail') or erro
+            motivos.append(str(erro))
+        return '; '.join(motivos)
+
+
+def _trava(chat_id: str) -> asyncio.Lock:
+    # Handler e tarefa periódica não podem enviar o mesmo lote ao mesmo tempo
+    return _travas.setdefault(chat_id, asyncio.Lock())
+
+
+async def _lotes(chat_id: str) -> Dict[str, Dict[str, Any]]:
+    return await obter_dados_temporarios(chat_id, CHAVE_BUFFER) or {}
+
+
+async def _salvar_lotes(chat_id: str, lotes: Dict[str, Dict[str, Any]]) -> None:
+    if lotes:
+        await definir_dados_temporarios(chat_id, CHAVE_BUFFER, lotes)
+        await adicionar_ao_conjunto(CONJUNTO_PENDENTES, chat_id)
+    else:
+        await limpar_dados_temporarios(chat_id, CHAVE_BUFFER)
+        await remover_do_conjunto(CONJUNTO_PENDENTES, chat_id)
+
+
+async def respostas_pendentes(chat_id: str) -> int:
+    """Quantidade de respostas ainda não enviadas para a API"""
+    return sum(len(lote['itens']) for lote in (await _lotes(str(chat_id))).values())
+
+
+async def registrar_resposta(
+    chat_id: str,
+    checklist_id: int,
+    item_id: int,
+    status: str,
+    observacao: str = "",
+    operador_id: Optional[int] = None
+) -> None:
+    """Guarda a resposta de um item e envia o lote se atingiu o limite"""
+    chat_id = str(chat_id)
+    async with _trava(chat_id):
+        lotes = await _lotes(chat_id)
+        lote = lotes.setdefault(str(checklist_id), {
+            'operador_id': operador_id,
+            'itens': [],
+            'desde': time.time(),
+            'finalizar': False,
+        })
+        # Uma resposta por item: a nova substitui a anterior
+        lote['itens'] = [item for item in lote['itens'] if item['id'] != item_id]
+        lote['itens'].append({
+            'id': item_id,
+            'status': status,
+            'observacao': observacao,
+            'verificado_em': datetime.now().astimezone().isoformat(),
+        })
+        await _salvar_lotes(chat_id, lotes)
+
+        if len(lote['itens']) >= CHECKLIST_LOTE_RESPOSTAS:
+            await _enviar(chat_id, lotes)
+
+
+async def enviar_respostas(chat_id: str, checklist_id: Optional[int] = None, finalizar: bool = False) -> bool:
+    """
+    Envia todos os lotes pendentes do chat
+
+    Args:
+        chat_id: Chat do operador
+        checklist_id: Checklist a finalizar (obrigatório com finalizar=True)
+        finalizar: Finaliza o checklist na mesma requisição das respostas
+
+    Returns:
+        bool: True se nada ficou pendente
+
+    Raises:
+        LoteRecusado: A API recusou algum lote (respostas descartadas)
+    """
+    chat_id = str(chat_id)
+    async with _trava(chat_id):
+        lotes = await _lotes(chat_id)
+        if finalizar and checklist_id:
+            lote = lotes.setdefault(str(checklist_id), {
+                'operador_id': None, 'itens': [], 'desde': time.time(), 'finalizar': False
+            })
+            lote['finalizar'] = True
+        if not lotes:
+            return True
+        return await _enviar(chat_id, lotes)
+
+
+async def _enviar(chat_id: str, lotes: Dict[str, Dict[str, Any]]) -> bool:
+    recusados = {}
+    for checklist_id, lote in list(lotes.items()):
+        resultado = await responder_itens_checklist_lote(
+            int(checklist_id),
+            lote['itens'],
+            operador_id=lote.get('operador_id'),
+            finalizar=lote.get('finalizar', False),
+        )
+        if resultado is None:
+            # Fica guardado (com o pedido de finalização, se houver) para nova tentativa
+            logger.warning(
+                f"⚠️ {len(lote['itens'])} respostas do checklist {checklist_id} "
+                f"mantidas para reenvio (chat {chat_id})"
+            )
+            continue
+        del lotes[checklist_id]
+        if resultado.get('recusado'):
+            recusados[checklist_id] = resultado.get('error')
+            logger.error(f"❌ Lote do checklist {checklist_id} descartado (chat {chat_id})")
+        elif resultado.get('enfileirado'):
+            logger.info(f"📥 Respostas do checklist {checklist_id} na fila local para reenvio")
+        else:
+            logger.info(f"✅ {resultado.get('atualizados', 0)} respostas gravadas (checklist {checklist_id})")
+
+    await _salvar_lotes(chat_id, lotes)
+    if recusados:
+        raise LoteRecusado(recusados)
+    return not lotes
+
+
+async def enviar_respostas_antigas(idade: float = CHECKLIST_LOTE_SEGUNDOS) -> int:
+    """Envia os chats cujo lote mais antigo passou de `idade` segundos (0 = todos)"""
+    limite = time.time() - idade
+    enviados = 0
+    for chat_id in await membros_do_conjunto(CONJUNTO_PENDENTES):
+        lotes = await _lotes(chat_id)
+        if not lotes:
+            # Sessão expirada ou lote já enviado por outro processo
+            await remover_do_conjunto(CONJUNTO_PENDENTES, chat_id)
+            continue
+        if min(lote['desde'] for lote in lotes.values()) > limite:
+            continue
+        try:
+            if await enviar_respostas(chat_id):
+                enviados += 1
+        except LoteRecusado as e:
+            # Sem handler aqui: o operador é avisado na próxima interação
+            await _guardar_recusa(chat_id, e.recusados)
+            logger.warning(f"⚠️ Chat {chat_id}: {e.motivo()}")
+    return enviados
+
+
+async def _guardar_recusa(chat_id: str, recusados: Dict[str, Any]) -> None:
+    anteriores = await obter_dados_temporarios(chat_id, CHAVE_RECUSAS) or {}
+    await definir_dados_temporarios(chat_id, CHAVE_RECUSAS, {**anteriores, **recusados})
+
+
+async def recusa_pendente(chat_id: str) -> Optional[LoteRecusado]:
+    """Recusa da tarefa periódica ainda não mostrada ao operador (e a remove)"""
+    chat_id = str(chat_id)
+    recusados = await obter_dados_temporarios(chat_id, CHAVE_RECUSAS)
+    if not recusados:
+        return None
+    await limpar_dados_temporarios(chat_id, CHAVE_RECUSAS)
+    return LoteRecusado(recusados)
+
+
+class AvisoRecusas(BaseMiddleware):
+    """Avisa o operador, antes do handler, das respostas recusadas em segundo plano"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        mensagem = event.message if isinstance(event, CallbackQuery) else event
+        if isinstance(mensagem, Message):
+            recusa = await recusa_pendente(mensagem.chat.id)
+            if recusa:
+                await mensagem.answer(
+                    "❌ Parte das respostas de checklist foi recusada pelo servidor e não foi salva:\n"
+                    f"{recusa.motivo()}\n\nUse /checklist para conferir e responder de novo."
+                )
+        return await handler(event, data)
+
+
+async def tarefa_envio_respostas(intervalo: float = 10):
+    """Tarefa de fundo do bot (iniciada em bot_main/main.py)"""
+    while True:
+        try:
+            await asyncio.sleep(intervalo)
+            enviados = await enviar_respostas_antigas()
+            if enviados:
+                logger.info(f"📦 Respostas pendentes de {enviados} chats enviadas pela tarefa periódica")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Erro no envio periódico de respostas: {e}")
@@ -13,13 +13,11 @@ from aiogram.types import (
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from mandacaru_bot.core.session import obter_operador_sessao
-from mandacaru_bot.core.db import fazer_requisicao_api
 # Imports do core
 from core.db import (
     buscar_equipamentos_com_nr12, buscar_checklists_nr12,
     criar_checklist_nr12, buscar_itens_checklist_nr12,
-    atualizar_item_checklist_nr12, finalizar_checklist_nr12
+    fazer_requisicao_api
 )
 from core.session import (
     obter_operador_sessao, verificar_autenticacao,
@@ -27,6 +25,7 @@ from core.session import (
     limpar_dados_temporarios
 )
 from core.templates import MessageTemplates
+from .buffer_respostas import AvisoRecusas, LoteRecusado, registrar_resposta, enviar_respostas
 from core.middleware import require_auth
 
 logger = logging.getLogger(__name__)
@@ -355,7 +354,15 @@ async def handle_checklist_callback(callback: CallbackQuery, state: FSMContext):
             
         elif data == "pausar_checklist":
             await callback.answer("⏸️ Checklist pausado")
-            await callback.message.answer("⏸️ Checklist pausado. Use /checklist para continuar.")
+            # Respostas já dadas não esperam a retomada para chegar à API
+            try:
+                await enviar_respostas(chat_id)
+                await callback.message.answer("⏸️ Checklist pausado. Use /checklist para continuar.")
+            except LoteRecusado as e:
+                await callback.message.answer(
+                    "⏸️ Checklist pausado, mas parte das respostas foi recusada e não foi salva:\n"
+                    f"{e.motivo()}\n\nUse /checklist para conferir e responder de novo."
+                )
             await state.clear()
             
         else:
@@ -501,7 +508,7 @@ async def processar_resposta_item(callback: CallbackQuery, operador: dict, state
     """Processa resposta de um item do checklist"""
     try:
         chat_id = str(callback.from_user.id)
-        resposta = callback.data.split("_")[-1]  # conforme, nao_conforme, na
+        resposta = callback.data[len("resposta_"):]  # conforme, nao_conforme, na
         
         # Obter dados atuais
         itens = await obter_dados_temporarios(chat_id, 'itens', [])
@@ -521,8 +528,14 @@ async def processar_resposta_item(callback: CallbackQuery, operador: dict, state
             'operador_id': operador.get('id')
         }
         
-        # Atualizar na API
-        await atualizar_item_checklist_nr12(item['id'], respostas[str(item['id'])])
+        # Envio para a API em lote (buffer_respostas)
+        await registrar_resposta(
+            chat_id,
+            await obter_dados_temporarios(chat_id, 'checklist_id'),
+            item['id'],
+            STATUS_RESPOSTA.get(resposta, 'NA'),
+            operador_id=operador.get('id')
+        )
         
         # Salvar dados atualizados
         await definir_dados_temporarios(chat_id, 'respostas', respostas)
@@ -541,21 +554,33 @@ async def finalizar_checklist_automatico(message: Message, chat_id: str):
         checklist_id = await obter_dados_temporarios(chat_id, 'checklist_id')
         
         if checklist_id:
-            resultado = await finalizar_checklist_nr12(checklist_id)
-            
-            if resultado:
+            # Respostas pendentes e finalização seguem na mesma requisição
+            try:
+                enviado = await enviar_respostas(chat_id, checklist_id, finalizar=True)
+            except LoteRecusado as e:
                 await message.answer(
-                    "✅ **Checklist Concluído!**\n\n"
-                    "Todos os itens foram verificados com sucesso.\n\n"
-                    "📊 Status: Finalizado\n"
-                    "📅 Data: " + datetime.now().strftime('%d/%m/%Y %H:%M'),
-                    parse_mode='Markdown'
+                    "❌ Checklist não finalizado.\n\n"
+                    f"O servidor recusou as respostas: {e.motivo()}\n\n"
+                    "Use /checklist para conferir os itens e tentar de novo."
                 )
             else:
-                await message.answer("⚠️ Checklist completado mas houve erro na finalização.")
-        
-        # Limpar dados temporários
-        await limpar_dados_temporarios(chat_id)
+                if enviado:
+                    await message.answer(
+                        "✅ **Checklist Concluído!**\n\n"
+                        "Todos os itens foram verificados com sucesso.\n\n"
+                        "📊 Status: Finalizado\n"
+                        "📅 Data: " + datetime.now().strftime('%d/%m/%Y %H:%M'),
+                        parse_mode='Markdown'
+                    )
+                else:
+                    await message.answer(
+                        "⚠️ Checklist completado, mas a conexão falhou.\n\n"
+                        "Suas respostas estão guardadas e serão enviadas automaticamente."
+                    )
+        
+        # Limpar dados temporários do fluxo (o lote pendente, se houver, é mantido)
+        for chave in ('checklist_id', 'itens', 'item_atual', 'respostas'):
+            await limpar_dados_temporarios(chat_id, chave)
         
     except Exception as e:
         logger.error(f"Erro ao finalizar checklist: {e}")
@@ -576,6 +601,13 @@ async def finalizar_checklist_atual(callback: CallbackQuery, operador: dict, sta
 # FUNÇÕES AUXILIARES
 # ===============================================
 
+# Botões de resposta -> status do ItemChecklistRealizado
+STATUS_RESPOSTA = {
+    'conforme': 'OK',
+    'nao_conforme': 'NOK',
+    'na': 'NA',
+}
+
 def calcular_turno_atual() -> str:
     """Calcula o turno atual baseado na hora"""
     hora_atual = datetime.now().hour
@@ -593,6 +625,10 @@ def calcular_turno_atual() -> str:
 
 def register_checklist_handlers(dp: Dispatcher):
     """Registra todos os handlers do módulo checklist"""
+    # Recusas do envio em segundo plano aparecem na próxima interação, em qualquer módulo
+    dp.message.outer_middleware(AvisoRecusas())
+    dp.callback_query.outer_middleware(AvisoRecusas())
+
     dp.message.register(menu_meus_checklists, F.text == "📋 Meus Checklists")
     dp.callback_query.register(cb_listar_meus_checklists, F.data.startswith(CALLBACK_MEUS_PREFIX))
     
@@ -116,12 +116,12 @@ def require_auth(handler):
             return
         
         # Verificar autenticação
-        if not verificar_autenticacao(chat_id):
+        if not await verificar_autenticacao(chat_id):
             await obj.answer("❌ Você precisa estar logado para usar esta funcionalidade.\n\nDigite /start para fazer login.")
             return
         
         # Adicionar operador aos argumentos
-        operador = obter_operador_sessao(chat_id)
+        operador = await obter_operador_sessao(chat_id)
         kwargs['operador'] = operador
         
         return await handler(obj, *args, **kwargs)
@@ -143,8 +143,8 @@ async def start_handler(message: Message, state: FSMContext):
         chat_id = str(message.chat.id)
         
         # Verificar se usuário já está autenticado
-        if verificar_autenticacao(chat_id):
-            operador = obter_operador_sessao(chat_id)
+        if await verificar_autenticacao(chat_id):
+            operador = await obter_operador_sessao(chat_id)
             nome = operador.get('nome', 'Operador') if operador else 'Usuário'
             
             # CORRIGIDO: Mensagem direta ao invés de método inexistente
@@ -158,7 +158,7 @@ async def start_handler(message: Message, state: FSMContext):
             
             if operador:
                 # Autenticar automaticamente - CORRIGIDO: removido terceiro argumento
-                autenticar_operador(chat_id, operador)
+                await autenticar_operador(chat_id, operador)
                 await message.answer(
                     f"🎉 **Bem-vindo de volta, {operador['nome']}!**\n\nLogin automático realizado.\nSelecione uma opção:",
                     reply_markup=criar_menu_principal()
@@ -219,7 +219,7 @@ async def processar_data_nascimento(message: Message, state: FSMContext):
             chat_id = str(message.chat.id)
             
             # Autenticar operador - CORRIGIDO: removido terceiro argumento
-            autenticar_operador(chat_id, operador)
+            await autenticar_operador(chat_id, operador)
             
             # Atualizar chat_id no backend
             await atualizar_chat_id_operador(operador['id'], chat_id)
@@ -335,7 +335,7 @@ async def admin_handler(message: Message):
             await message.answer("❌ Acesso negado. Você não é um administrador.")
             return
         
-        stats = obter_estatisticas_sessoes()
+        stats = await obter_estatisticas_sessoes()
         status_api = await verificar_status_api()
         
         texto = f"""
@@ -378,7 +378,7 @@ async def admin_callback_handler(callback: CallbackQuery, **kwargs):
         
         if data == "admin_clear_sessions":
             from core.session import limpar_sessoes_expiradas
-            removidas = limpar_sessoes_expiradas()
+            removidas = await limpar_sessoes_expiradas()
             await callback.message.edit_text(f"🧹 **Sessões Limpas**\n\n{removidas} sessões foram removidas.")
             
         elif data == "admin_api_status":
@@ -9,8 +9,11 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
-from core.config import TELEGRAM_TOKEN, DEBUG
-from core.session import limpar_sessoes_expiradas
+from core.config import TELEGRAM_TOKEN, DEBUG, BOT_MODO
+from core.session import limpar_sessoes_expiradas, criar_storage_fsm
+from core.http import iniciar_cliente_api, fechar_cliente_api, metricas_api
+from core.outbox import tarefa_outbox, metricas_outbox
+from core.qr_foto import leitor_qr_foto, metricas_qr_foto
 
 # Núcleo
 from bot_main.handlers import register_handlers as register_main_handlers
@@ -24,6 +27,7 @@ except Exception:
 
 # Módulos
 from bot_checklist.handlers import register_handlers as register_checklist_handlers
+from bot_checklist.buffer_respostas import tarefa_envio_respostas, enviar_respostas_antigas
 from bot_abastecimento.handlers import register_handlers as register_abastecimento_handlers
 from bot_os.handlers import register_handlers as register_os_handlers
 from bot_financeiro.handlers import register_handlers as register_financeiro_handlers
@@ -35,13 +39,14 @@ logger = logging.getLogger(__name__)
 # CONFIGURAÇÃO DO BOT
 # ===============================================
 
-async def create_bot() -> tuple[Bot, Dispatcher]:
-    """Cria instâncias do bot e dispatcher"""
+async def create_bot(session=None) -> tuple[Bot, Dispatcher]:
+    """Cria instâncias do bot e dispatcher (session: sessão HTTP do aiogram, p.ex. para testes de carga)"""
     bot = Bot(
         token=TELEGRAM_TOKEN,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN)
     )
-    dp = Dispatcher()
+    dp = Dispatcher(storage=criar_storage_fsm())
 
     # Registro único e ordenado dos handlers
     register_qrcode_handlers(dp)
@@ -64,7 +69,7 @@ async def cleanup_task():
     while True:
         try:
             await asyncio.sleep(1800)  # 30 min
-            removidas = limpar_sessoes_expiradas()
+            removidas = await limpar_sessoes_expiradas()
             if removidas > 0:
                 logger.info(f"🧹 Limpeza automática: {removidas} sessões removidas")
         except Exception as e:
@@ -76,10 +81,18 @@ async def cleanup_task():
 # ===============================================
 
 async def on_startup(bot: Bot):
+    await iniciar_cliente_api()
     logger.info("🚀 Bot iniciado com sucesso! DEBUG=%s", DEBUG)
 
 async def on_shutdown(bot: Bot):
     logger.info("🛑 Bot sendo encerrado...")
+    # Últimas respostas de checklist em buffer
+    await enviar_respostas_antigas(idade=0)
+    logger.info(f"📊 Latência da API: {metricas_api()}")
+    logger.info(f"📊 Fila local: {await metricas_outbox()}")
+    logger.info(f"📊 QR de fotos: {metricas_qr_foto()}")
+    leitor_qr_foto.fechar()
+    await fechar_cliente_api()
 
 # ===============================================
 # FUNÇÃO PRINCIPAL DO BOT
@@ -88,6 +101,8 @@ async def on_shutdown(bot: Bot):
 async def run_bot():
     """Função principal para execução do bot"""
     cleanup_task_handle = None
+    respostas_task_handle = None
+    outbox_task_handle = None
     bot = None
     try:
         bot, dp = await create_bot()
@@ -95,9 +110,18 @@ async def run_bot():
         dp.shutdown.register(on_shutdown)
 
         cleanup_task_handle = asyncio.create_task(cleanup_task())
-
-        logger.info("🔄 Iniciando polling do bot...")
-        await dp.start_polling(bot, skip_updates=True)
+        respostas_task_handle = asyncio.create_task(tarefa_envio_respostas())
+        # Reenvia o que ficou na fila local (inclusive de uma execução anterior)
+        outbox_task_handle = asyncio.create_task(tarefa_outbox())
+
+        if BOT_MODO == "webhook":
+            from bot_main.webhook import executar_webhook
+            await executar_webhook(bot, dp)
+        else:
+            # getUpdates não funciona com webhook registrado; remove e descarta pendentes
+            await bot.delete_webhook(drop_pending_updates=True)
+            logger.info("🔄 Iniciando polling do bot...")
+            await dp.start_polling(bot)
 
     except Exception as e:
         logger.error(f"❌ Erro crítico no bot: {e}")
@@ -105,6 +129,11 @@ async def run_bot():
     finally:
         if cleanup_task_handle:
             cleanup_task_handle.cancel()
+        if respostas_task_handle:
+            respostas_task_handle.cancel()
+        if outbox_task_handle:
+            outbox_task_handle.cancel()
+        await fechar_cliente_api()
         if bot:
             await bot.session.close()
             logger.info("🔒 Sessão do bot fechada")
@@ -0,0 +1,284 @@
+# ===============================================
+# ARQUIVO: mandacaru_bot/bot_main/webhook.py
+# Modo webhook com pool de workers
+# ===============================================
+#
+# O Telegram entrega as atualizações por POST em WEBHOOK_PATH. A requisição
+# só coloca a atualização na fila e responde 200; um pool de WEBHOOK_WORKERS
+# tarefas chama o dispatcher.
+#
+# Garantias:
+#   - Ordem por chat: atualizações do mesmo chat são processadas uma de cada
+#     vez, na ordem de chegada (sessão e FSM não sofrem corrida). Chats
+#     diferentes são processados em paralelo.
+#   - Back-pressure: a fila tem no máximo WEBHOOK_FILA_MAX atualizações.
+#     Quando a API do Django fica lenta os workers demoram a liberar vagas;
+#     com a fila cheia o webhook espera até WEBHOOK_ESPERA_FILA segundos e
+#     então responde 503, e o Telegram reenvia a atualização mais tarde.
+#
+# O TLS fica a cargo do proxy reverso (nginx) na frente do WEBHOOK_PORT.
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import setup_application
+
+from core.config import (
+    WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET,
+    WEBHOOK_WORKERS, WEBHOOK_FILA_MAX, WEBHOOK_ESPERA_FILA, WEBHOOK_MAX_CONEXOES,
+    WEBHOOK_GRAVAR
+)
+from core.http import HistogramaLatencia, metricas_api
+from core.outbox import metricas_outbox
+from core.qr_foto import metricas_qr_foto
+
+logger = logging.getLogger(__name__)
+
+CABECALHO_SEGREDO = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+def chave_ordenacao(update: Dict[str, Any]) -> Any:
+    """
+    Chave que define a ordem de processamento de uma atualização
+
+    Usa o chat da mensagem (ou da mensagem do callback); sem chat, o
+    usuário que originou o evento; em último caso a própria atualização.
+    """
+    for evento in update.values():
+        if not isinstance(evento, dict):
+            continue
+        chat = evento.get('chat') or (evento.get('message') or {}).get('chat')
+        if chat:
+            return chat.get('id')
+        usuario = evento.get('from') or evento.get('user')
+        if usuario:
+            return usuario.get('id')
+    return ('update', update.get('update_id'))
+
+
+# ===============================================
+# POOL DE WORKERS
+# ===============================================
+
+class PoolAtualizacoes:
+    """
+    Fila limitada + workers com ordem garantida por chat
+
+    Cada chat tem sua própria deque de pendentes. Um chat entra na fila de
+    prontos quando recebe a primeira pendência e volta para o fim dela após
+    cada atualização processada, então um chat muito ativo não bloqueia os
+    demais.
+    """
+
+    def __init__(
+        self,
+        processar: Callable[[Dict[str, Any]], Awaitable[Any]],
+        workers: int = WEBHOOK_WORKERS,
+        capacidade: int = WEBHOOK_FILA_MAX,
+    ):
+        self._processar = processar
+        self.workers = workers
+        self.capacidade = capacidade
+        self._vagas = asyncio.Semaphore(capacidade)
+        self._pendentes: Dict[Any, Deque[Tuple[float, Dict[str, Any]]]] = {}
+        self._prontos: asyncio.Queue = asyncio.Queue()
+        self._ociosa = asyncio.Event()
+        self._ociosa.set()
+        self._tarefas = []
+
+        self.em_fila = 0
+        self.recebidas = 0
+        self.processadas = 0
+        self.rejeitadas = 0
+        self.erros = 0
+        # Tempo entre a chegada no webhook e o fim do processamento
+        self.latencia = HistogramaLatencia()
+
+    async def iniciar(self):
+        if self._tarefas:
+            return
+        self._tarefas = [
+            asyncio.create_task(self._worker(), name=f'webhook-worker-{indice}')
+            for indice in range(self.workers)
+        ]
+        logger.info(f"👷 Pool do webhook iniciado ({self.workers} workers, fila de {self.capacidade})")
+
+    async def parar(self, drenar_segundos: float = 10):
+        """Aguarda a fila esvaziar (até drenar_segundos) e encerra os workers"""
+        try:
+            await asyncio.wait_for(self.aguardar_ociosa(), drenar_segundos)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Pool encerrado com {self.em_fila} atualizações pendentes")
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._tarefas = []
+
+    async def aguardar_ociosa(self):
+        await self._ociosa.wait()
+
+    async def enfileirar(self, update: Dict[str, Any], espera: float = WEBHOOK_ESPERA_FILA) -> bool:
+        """
+        Coloca a atualização na fila
+
+        Returns:
+            bool: False se não houve vaga dentro de `espera` segundos
+        """
+        self.recebidas += 1
+        try:
+            await asyncio.wait_for(self._vagas.acquire(), espera)
+        except asyncio.TimeoutError:
+            self.rejeitadas += 1
+            return False
+
+        self.em_fila += 1
+        self._ociosa.clear()
+        chave = chave_ordenacao(update)
+        fila = self._pendentes.get(chave)
+        if fila is None:
+            self._pendentes[chave] = deque([(time.perf_counter(), update)])
+            self._prontos.put_nowait(chave)
+        else:
+            # Chat já na fila ou em processamento: o worker dele pega a seguir
+            fila.append((time.perf_counter(), update))
+        return True
+
+    async def _worker(self):
+        while True:
+            chave = await self._prontos.get()
+            fila = self._pendentes[chave]
+            recebida_em, update = fila.popleft()
+            erro = False
+            try:
+                await self._processar(update)
+            except Exception as e:
+                erro = True
+                self.erros += 1
+                logger.error(f"❌ Erro ao processar atualização {update.get('update_id')}: {e}")
+            finally:
+                self.latencia.registrar(time.perf_counter() - recebida_em, erro=erro)
+                if not erro:
+                    self.processadas += 1
+                self.em_fila -= 1
+                self._vagas.release()
+                if fila:
+                    self._prontos.put_nowait(chave)
+                else:
+                    del self._pendentes[chave]
+                if not self.em_fila:
+                    self._ociosa.set()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'capacidade': self.capacidade,
+            'em_fila': self.em_fila,
+            'chats_pendentes': len(self._pendentes),
+            'recebidas': self.recebidas,
+            'processadas': self.processadas,
+            'rejeitadas': self.rejeitadas,
+            'erros': self.erros,
+            'latencia': self.latencia.resumo(),
+        }
+
+
+# ===============================================
+# APLICAÇÃO AIOHTTP
+# ===============================================
+
+def _gravar(update: Dict[str, Any]):
+    # Registro opcional do tráfego real para o teste de carga (carga_webhook.py)
+    with open(WEBHOOK_GRAVAR, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(json.dumps(update, ensure_ascii=False) + '\n')
+
+
+def criar_app_webhook(bot: Bot, dp: Dispatcher, pool: Optional[PoolAtualizacoes] = None) -> web.Application:
+    """
+    Monta a aplicação do webhook
+
+    Args:
+        bot: Instância do bot
+        dp: Dispatcher com os handlers registrados
+        pool: Pool a usar (padrão: um novo, chamando dp.feed_raw_update)
+    """
+    if pool is None:
+        pool = PoolAtualizacoes(lambda update: dp.feed_raw_update(bot, update))
+
+    async def receber(request: web.Request) -> web.Response:
+        if WEBHOOK_SECRET and request.headers.get(CABECALHO_SEGREDO) != WEBHOOK_SECRET:
+            return web.Response(status=401)
+        try:
+            update = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+
+        if WEBHOOK_GRAVAR:
+            _gravar(update)
+
+        if not await pool.enfileirar(update):
+            logger.warning(f"⏳ Fila do webhook cheia; atualização {update.get('update_id')} recusada")
+            return web.Response(status=503, headers={'Retry-After': '1'})
+        return web.json_response({})
+
+    async def saude(request: web.Request) -> web.Response:
+        return web.json_response({
+            'pool': pool.status(), 'api': metricas_api(), 'fila_local': await metricas_outbox(),
+            'qr_fotos': metricas_qr_foto(),
+        })
+
+    async def iniciar_pool(app):
+        await pool.iniciar()
+
+    async def parar_pool(app):
+        await pool.parar()
+
+    app = web.Application()
+    app['pool'] = pool
+    app.router.add_post(WEBHOOK_PATH, receber)
+    app.router.add_get('/saude', saude)
+
+    # O pool drena antes do shutdown do dispatcher, que fecha o cliente da API
+    app.on_startup.append(iniciar_pool)
+    app.on_shutdown.append(parar_pool)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def registrar_webhook(bot: Bot):
+    """Informa ao Telegram a URL pública do webhook"""
+    url = WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH
+    await bot.set_webhook(
+        url,
+        secret_token=WEBHOOK_SECRET or None,
+        max_connections=WEBHOOK_MAX_CONEXOES,
+        drop_pending_updates=True,
+    )
+    logger.info(f"🔗 Webhook registrado em {url}")
+
+
+async def executar_webhook(bot: Bot, dp: Dispatcher):
+    """Sobe o servidor do webhook e bloqueia até o cancelamento"""
+    app = criar_app_webhook(bot, dp)
+    if WEBHOOK_URL:
+        async def _registrar(app):
+            await registrar_webhook(bot)
+        app.on_startup.append(_registrar)
+    else:
+        logger.warning("⚠️ WEBHOOK_URL não configurada; o webhook não será registrado no Telegram")
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+    await site.start()
+    logger.info(f"🌐 Webhook ouvindo em {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -11,13 +11,14 @@ from aiogram import Dispatcher, F
 from aiogram.types import (
     Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 )
-from aiogram.filters import Command
+from aiogram.filters import Command, StateFilter
 
 from core.session import (
     obter_operador_sessao, verificar_autenticacao,
     definir_equipamento_atual, definir_dados_temporarios
 )
 from core.db import buscar_equipamento_por_uuid, listar_equipamentos
+from core.qr_foto import extrair_uuid_equipamento, leitor_qr_foto, leitura_disponivel
 from core.templates import MessageTemplates
 
 logger = logging.getLogger(__name__)
@@ -71,7 +72,7 @@ async def processar_qr_equipamento(message: Message, uuid_str: str):
         logger.info(f"🔍 Buscando equipamento por UUID: {uuid_str}")
         
         # Verificar se usuário está autenticado
-        if not verificar_autenticacao(chat_id):
+        if not await verificar_autenticacao(chat_id):
             await message.answer(
                 "🔐 **Equipamento Detectado!**\n\n"
                 f"UUID: `{uuid_str[:8]}...`\n\n"
@@ -79,7 +80,7 @@ async def processar_qr_equipamento(message: Message, uuid_str: str):
                 "Digite seu nome completo para continuar:"
             )
             # Salvar UUID para depois da autenticação
-            definir_dados_temporarios(chat_id, 'equipamento_uuid_pendente', uuid_str)
+            await definir_dados_temporarios(chat_id, 'equipamento_uuid_pendente', uuid_str)
             return
         
         # Buscar equipamento
@@ -101,7 +102,7 @@ async def processar_qr_equipamento(message: Message, uuid_str: str):
             return
         
         # Verificar se operador tem acesso a este equipamento
-        operador = obter_operador_sessao(chat_id)
+        operador = await obter_operador_sessao(chat_id)
         if not operador:
             logger.error("❌ Operador não encontrado na sessão")
             await message.answer(MessageTemplates.error_generic())
@@ -122,7 +123,7 @@ async def processar_qr_equipamento(message: Message, uuid_str: str):
 
         
         # Salvar equipamento na sessão
-        definir_equipamento_atual(chat_id, equipamento)
+        await definir_equipamento_atual(chat_id, equipamento)
         
         # Mostrar informações do equipamento
         await mostrar_menu_equipamento_qr(message, equipamento)
@@ -131,6 +132,52 @@ async def processar_qr_equipamento(message: Message, uuid_str: str):
         logger.error(f"❌ Erro ao processar equipamento: {e}")
         await message.answer(MessageTemplates.error_generic())
 
+async def foto_qr_handler(message: Message):
+    """Lê o QR code de uma foto da etiqueta enviada pelo operador"""
+    voltar = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="📱 Como Escanear", callback_data="scan_new_qr")],
+        [InlineKeyboardButton(text="🏠 Menu Principal", callback_data="menu_refresh")]
+    ])
+
+    # Download e decodificação só para operador autenticado
+    if not await verificar_autenticacao(str(message.chat.id)):
+        await message.answer(
+            "🔐 **Login necessário**\n\n"
+            "Para ler o QR Code de um equipamento, você precisa fazer login primeiro.\n\n"
+            "Digite seu nome completo para continuar:"
+        )
+        return
+
+    if not leitura_disponivel():
+        await message.answer(
+            "📷 A leitura de QR Code por foto não está disponível no momento.\n\n"
+            "Abra a câmera do celular, aponte para o QR Code e toque no link.",
+            reply_markup=voltar
+        )
+        return
+
+    aguarde = await message.answer("🔍 Lendo QR Code da foto...")
+    try:
+        # Último tamanho da lista é o de maior resolução
+        texto = await leitor_qr_foto.ler(message.bot, message.photo[-1])
+    except Exception as e:
+        logger.error(f"❌ Erro ao ler QR da foto: {e}")
+        await aguarde.edit_text(MessageTemplates.error_generic())
+        return
+
+    uuid_str = extrair_uuid_equipamento(texto)
+    if not uuid_str:
+        motivo = "não é de um equipamento" if texto else "não foi encontrado na foto"
+        await aguarde.edit_text(
+            f"❌ **QR Code {motivo}**\n\n"
+            "📸 Tente de novo com a etiqueta inteira enquadrada, bem iluminada e sem reflexo.",
+            reply_markup=voltar
+        )
+        return
+
+    await aguarde.delete()
+    await processar_qr_equipamento(message, uuid_str)
+
 async def mostrar_menu_equipamento_qr(message: Message, equipamento: Dict[str, Any]):
     """Mostra menu específico para equipamento acessado via QR"""
     
@@ -214,12 +261,12 @@ def require_auth(handler):
             return
         
         # Verificar autenticação
-        if not verificar_autenticacao(chat_id):
+        if not await verificar_autenticacao(chat_id):
             await obj.answer(MessageTemplates.unauthorized_access())
             return
         
         # Adicionar operador aos argumentos
-        operador = obter_operador_sessao(chat_id)
+        operador = await obter_operador_sessao(chat_id)
         kwargs['operador'] = operador
         
         return await handler(obj, *args, **kwargs)
@@ -376,5 +423,8 @@ def register_handlers(dp: Dispatcher):
     dp.callback_query.register(qr_create_checklist_handler, F.data.startswith("qr_create_checklist_"))
     dp.callback_query.register(qr_details_handler, F.data.startswith("qr_details_"))
     dp.callback_query.register(scan_new_qr_handler, F.data == "scan_new_qr")
+
+    # Fotos fora de fluxos com estado (checklist, abastecimento...)
+    dp.message.register(foto_qr_handler, F.photo, StateFilter(None))
     
     logger.info("✅ Handlers de QR Code registrados")
\ No newline at end of file
@@ -75,11 +75,11 @@ def require_auth(handler):
             logger.error("❌ Não foi possível determinar chat_id")
             return
         
-        if not verificar_autenticacao(chat_id):
+        if not await verificar_autenticacao(chat_id):
             await obj.answer(MessageTemplates.unauthorized_access())
             return
         
-        operador = obter_operador_sessao(chat_id)
+        operador = await obter_operador_sessao(chat_id)
         kwargs['operador'] = operador
         
         return await handler(obj, *args, **kwargs)
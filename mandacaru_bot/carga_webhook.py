@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# ===============================================
+# ARQUIVO: mandacaru_bot/carga_webhook.py
+# Teste de carga do modo webhook
+# ===============================================
+#
+# Sobe, no mesmo processo:
+#   - um stub da API do Telegram (responde a qualquer método com "ok")
+#   - um stub da API do Django (listas vazias, com atraso configurável)
+#   - o webhook real do bot (handlers, sessões, pool de workers)
+# e reenvia atualizações para o webhook, medindo atualizações/segundo.
+#
+# As atualizações vêm de um arquivo JSONL gravado em produção com
+# WEBHOOK_GRAVAR=arquivo.jsonl ou são geradas (operadores enviando /start,
+# código e menu, como na troca de turno).
+#
+# Exemplos:
+#   python carga_webhook.py --updates 5000 --chats 300
+#   python carga_webhook.py --arquivo logs/updates.jsonl --atraso-api 200
+#   python carga_webhook.py --atraso-api 500 --fila 200   # força back-pressure
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from aiohttp import ClientSession, web
+
+TOKEN_CARGA = '123456:CARGA-webhook-mandacaru'
+TEXTOS = ['/start', 'OP0001', '📋 Checklist', '⛽ Abastecimento', '/menu', 'ajuda']
+
+
+# ===============================================
+# STUBS
+# ===============================================
+
+class StubTelegram:
+    """Responde aos métodos do Bot API e conta as chamadas"""
+
+    def __init__(self, atraso: float):
+        self.atraso = atraso
+        self.chamadas = defaultdict(int)
+
+    async def metodo(self, request: web.Request) -> web.Response:
+        metodo = request.match_info['metodo']
+        self.chamadas[metodo] += 1
+        if self.atraso:
+            await asyncio.sleep(self.atraso)
+
+        dados = await request.post() if request.can_read_body else {}
+        if metodo.startswith(('send', 'edit', 'forward', 'copy')):
+            resultado = {
+                'message_id': self.chamadas[metodo],
+                'date': int(time.time()),
+                'chat': {'id': int(dados.get('chat_id') or 0), 'type': 'private'},
+                'text': dados.get('text', ''),
+            }
+        elif metodo == 'getMe':
+            resultado = {'id': 123456, 'is_bot': True, 'first_name': 'Carga', 'username': 'carga_bot'}
+        else:
+            resultado = True
+        return web.json_response({'ok': True, 'result': resultado})
+
+
+class StubDjango:
+    """Responde a qualquer endpoint da API com uma lista vazia"""
+
+    def __init__(self, atraso: float):
+        self.atraso = atraso
+        self.requisicoes = 0
+
+    async def endpoint(self, request: web.Request) -> web.Response:
+        self.requisicoes += 1
+        if self.atraso:
+            await asyncio.sleep(self.atraso)
+        return web.json_response({'count': 0, 'results': []})
+
+
+async def subir(app: web.Application, porta: int = 0):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', porta)
+    await site.start()
+    porta = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{porta}'
+
+
+# ===============================================
+# ATUALIZAÇÕES
+# ===============================================
+
+def gerar_updates(total: int, chats: int):
+    agora = int(time.time())
+    for update_id in range(1, total + 1):
+        chat_id = 700000 + random.randrange(chats)
+        yield {
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': agora,
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Operador'},
+                'text': random.choice(TEXTOS),
+            },
+        }
+
+
+def ler_updates(arquivo: str):
+    with open(arquivo, encoding='utf-8') as entrada:
+        for linha in entrada:
+            if linha.strip():
+                yield json.loads(linha)
+
+
+# ===============================================
+# EXECUÇÃO
+# ===============================================
+
+async def executar(args):
+    stub_telegram = StubTelegram(args.atraso_telegram / 1000)
+    stub_django = StubDjango(args.atraso_api / 1000)
+
+    app_stubs = web.Application()
+    app_stubs.router.add_route('*', '/bot{token}/{metodo}', stub_telegram.metodo)
+    app_stubs.router.add_route('*', '/api/{resto:.*}', stub_django.endpoint)
+    runner_stubs, url_stubs = await subir(app_stubs)
+
+    # A configuração é lida no import: ajustar o ambiente antes
+    os.environ['API_BASE_URL'] = f'{url_stubs}/api'
+    os.environ['TELEGRAM_BOT_TOKEN'] = TOKEN_CARGA
+    os.environ['SESSION_BACKEND'] = 'memoria'
+    os.environ['WEBHOOK_SECRET'] = ''
+    os.environ['WEBHOOK_GRAVAR'] = ''
+
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from bot_main.main import create_bot
+    from bot_main.webhook import PoolAtualizacoes, chave_ordenacao, criar_app_webhook
+    from core.config import WEBHOOK_PATH
+
+    sessao = AiohttpSession(api=TelegramAPIServer.from_base(url_stubs))
+    bot, dp = await create_bot(session=sessao)
+
+    # Registra a ordem de processamento por chat para conferir a garantia
+    ordem = defaultdict(list)
+
+    async def processar(update):
+        ordem[chave_ordenacao(update)].append(update['update_id'])
+        await dp.feed_raw_update(bot, update)
+
+    pool = PoolAtualizacoes(processar, workers=args.workers, capacidade=args.fila)
+    runner_webhook, url_webhook = await subir(criar_app_webhook(bot, dp, pool))
+
+    if args.arquivo:
+        updates = list(ler_updates(args.arquivo))
+    else:
+        updates = list(gerar_updates(args.updates, args.chats))
+
+    status = defaultdict(int)
+    limite = asyncio.Semaphore(args.concorrencia)
+
+    # O Telegram entrega as atualizações de um chat em sequência (a próxima
+    # só depois da resposta à anterior) e chats diferentes em paralelo
+    por_chat = defaultdict(list)
+    for update in updates:
+        por_chat[chave_ordenacao(update)].append(update)
+
+    async with ClientSession() as cliente:
+        async def enviar_chat(updates_do_chat):
+            for update in updates_do_chat:
+                async with limite:
+                    async with cliente.post(f'{url_webhook}{WEBHOOK_PATH}', json=update) as resposta:
+                        status[resposta.status] += 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(enviar_chat(lista) for lista in por_chat.values()))
+        aceitas_em = time.perf_counter() - inicio
+        await pool.aguardar_ociosa()
+        duracao = time.perf_counter() - inicio
+
+    fora_de_ordem = sum(1 for ids in ordem.values() if ids != sorted(ids))
+    resultado = {
+        'updates': len(updates),
+        'chats': len(ordem),
+        'respostas_webhook': dict(status),
+        'segundos_recebimento': round(aceitas_em, 2),
+        'segundos_total': round(duracao, 2),
+        'updates_por_segundo': round(pool.processadas / duracao, 1) if duracao else None,
+        'chats_fora_de_ordem': fora_de_ordem,
+        'chamadas_telegram': sum(stub_telegram.chamadas.values()),
+        'requisicoes_api': stub_django.requisicoes,
+        'pool': pool.status(),
+    }
+
+    await runner_webhook.cleanup()
+    await bot.session.close()
+    await runner_stubs.cleanup()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga do webhook do bot')
+    parser.add_argument('--arquivo', help='JSONL com atualizações gravadas (WEBHOOK_GRAVAR)')
+    parser.add_argument('--updates', type=int, default=2000, help='Atualizações geradas (sem --arquivo)')
+    parser.add_argument('--chats', type=int, default=200, help='Chats distintos nas atualizações geradas')
+    parser.add_argument('--concorrencia', type=int, default=40, help='POSTs simultâneos (max_connections do Telegram)')
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--fila', type=int, default=2000)
+    parser.add_argument('--atraso-telegram', type=float, default=20, help='Latência do Bot API em ms')
+    parser.add_argument('--atraso-api', type=float, default=50, help='Latência da API do Django em ms')
+    parser.add_argument('--verbose', action='store_true', help='Mostra os logs do bot')
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    sys.path.insert(0, str(Path(__file__).parent))
+    resultado = asyncio.run(executar(args))
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
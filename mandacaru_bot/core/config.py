@@ -24,7 +24,27 @@ TELEGRAM_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:8000")
 API_BASE_URL = os.getenv("API_BASE_URL", f"{BASE_URL}/api")
 API_TIMEOUT = int(os.getenv("API_TIMEOUT", "30"))
+# Token DRF do usuário de serviço do bot (staff); endpoints de escrita exigem autenticação
+API_TOKEN = os.getenv("API_TOKEN", "")
+# Cliente HTTP da API (conexões reaproveitadas durante toda a vida do bot)
+API_MAX_CONEXOES = int(os.getenv("API_MAX_CONEXOES", "50"))
+API_MAX_KEEPALIVE = int(os.getenv("API_MAX_KEEPALIVE", "20"))
+API_KEEPALIVE_SEGUNDOS = float(os.getenv("API_KEEPALIVE_SEGUNDOS", "60"))
+API_HTTP2 = os.getenv("API_HTTP2", "True").lower() in ("true", "1", "yes")
+API_TENTATIVAS = int(os.getenv("API_TENTATIVAS", "3"))
+API_BACKOFF_SEGUNDOS = float(os.getenv("API_BACKOFF_SEGUNDOS", "0.3"))
+# Timeouts por endpoint: "prefixo=segundos,prefixo=segundos"
+# Ex.: API_TIMEOUTS="nr12/checklists/=10,operadores/=5"
+API_TIMEOUTS = {
+    prefixo.strip().strip('/'): float(segundos)
+    for prefixo, _, segundos in (
+        item.partition('=') for item in os.getenv("API_TIMEOUTS", "").split(',') if '=' in item
+    )
+}
 SESSION_TIMEOUT_HOURS = int(os.getenv("SESSION_TIMEOUT_HOURS", "24"))
+# Armazenamento das sessões e do FSM: "memoria" ou "redis"
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memoria").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/2")
 CLEANUP_INTERVAL_MINUTES = int(os.getenv("CLEANUP_INTERVAL_MINUTES", "60"))
 ITEMS_PER_PAGE = int(os.getenv("ITEMS_PER_PAGE", "10"))
 MAX_ITEMS_PER_PAGE = int(os.getenv("MAX_ITEMS_PER_PAGE", "50"))
@@ -51,9 +71,43 @@ CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
 RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "20"))
 WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
 WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+
+# Respostas de checklist acumuladas antes do envio em lote para a API
+CHECKLIST_LOTE_RESPOSTAS = int(os.getenv("CHECKLIST_LOTE_RESPOSTAS", "10"))
+# Idade máxima (segundos) de uma resposta no buffer antes de ser enviada
+CHECKLIST_LOTE_SEGUNDOS = int(os.getenv("CHECKLIST_LOTE_SEGUNDOS", "30"))
+
+# Modo de recebimento das atualizações: "polling" ou "webhook"
+BOT_MODO = os.getenv("BOT_MODO", "polling").lower()
+# URL pública que o Telegram chama (ex.: https://bot.mandacaru.com.br)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+# Pool de processamento: workers simultâneos e atualizações aguardando na fila
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "32"))
+WEBHOOK_FILA_MAX = int(os.getenv("WEBHOOK_FILA_MAX", "2000"))
+# Quanto o webhook espera por vaga na fila antes de responder 503
+# (o Telegram reenvia a atualização depois)
+WEBHOOK_ESPERA_FILA = float(os.getenv("WEBHOOK_ESPERA_FILA", "2"))
+# Conexões simultâneas que o Telegram abre contra o webhook (1-100)
+WEBHOOK_MAX_CONEXOES = int(os.getenv("WEBHOOK_MAX_CONEXOES", "40"))
+# Arquivo JSONL onde gravar as atualizações recebidas (vazio = não grava)
+WEBHOOK_GRAVAR = os.getenv("WEBHOOK_GRAVAR", "")
+# Leitura de QR codes em fotos (core/qr_foto.py)
+# Processos decodificando em paralelo (0 = threads do event loop)
+QR_FOTO_PROCESSOS = int(os.getenv("QR_FOTO_PROCESSOS", "2"))
+# Validade do resultado em cache por foto (file_unique_id do Telegram)
+QR_FOTO_CACHE_HORAS = int(os.getenv("QR_FOTO_CACHE_HORAS", "168"))
+# Lado máximo (px) da imagem entregue ao decodificador
+QR_FOTO_LADO_MAXIMO = int(os.getenv("QR_FOTO_LADO_MAXIMO", "1600"))
 LOG_FILE = os.getenv("LOG_FILE", "logs/bot.log")
 DB_FILE = os.getenv("DB_FILE", "data/bot.db")
 
+# Fila local (DB_FILE) das requisições que alteram dados na API
+OUTBOX_INTERVALO = float(os.getenv("OUTBOX_INTERVALO", "5"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "300"))
+OUTBOX_RETENCAO_DIAS = int(os.getenv("OUTBOX_RETENCAO_DIAS", "7"))
+
 def validar_configuracoes():
     erros = []
     if not TELEGRAM_TOKEN or TELEGRAM_TOKEN == "SEU_TOKEN_AQUI":
@@ -72,13 +126,21 @@ class Config:
 config = Config()
 
 __all__ = [
-    "TELEGRAM_TOKEN", "API_BASE_URL", "API_TIMEOUT",
-    "SESSION_TIMEOUT_HOURS", "CLEANUP_INTERVAL_MINUTES",
+    "TELEGRAM_TOKEN", "API_BASE_URL", "API_TIMEOUT", "API_TOKEN",
+    "API_MAX_CONEXOES", "API_MAX_KEEPALIVE", "API_KEEPALIVE_SEGUNDOS", "API_HTTP2",
+    "API_TENTATIVAS", "API_BACKOFF_SEGUNDOS", "API_TIMEOUTS",
+    "SESSION_TIMEOUT_HOURS", "SESSION_BACKEND", "REDIS_URL", "CLEANUP_INTERVAL_MINUTES",
     "ITEMS_PER_PAGE", "MAX_ITEMS_PER_PAGE",
     "MAX_LOGIN_ATTEMPTS", "LOGIN_TIMEOUT_MINUTES",
     "ADMIN_IDS", "DEBUG", "LOG_LEVEL",
     "EMPRESA_NOME", "EMPRESA_TELEFONE",
     "NR12_TEMPO_LIMITE_CHECKLIST", "NR12_FREQUENCIA_PADRAO", "NR12_NOTIFICAR_ATRASOS",
     "config", "validar_configuracoes",
-    "MAX_MESSAGE_LENGTH", "MESSAGE_CHUNK_SIZE", "LOG_FILE", "DB_FILE"
+    "MAX_MESSAGE_LENGTH", "MESSAGE_CHUNK_SIZE", "LOG_FILE", "DB_FILE",
+    "WEBHOOK_HOST", "WEBHOOK_PORT", "BOT_MODO", "WEBHOOK_URL", "WEBHOOK_PATH",
+    "WEBHOOK_SECRET", "WEBHOOK_WORKERS", "WEBHOOK_FILA_MAX", "WEBHOOK_ESPERA_FILA",
+    "WEBHOOK_MAX_CONEXOES", "WEBHOOK_GRAVAR",
+    "CHECKLIST_LOTE_RESPOSTAS", "CHECKLIST_LOTE_SEGUNDOS",
+    "OUTBOX_INTERVALO", "OUTBOX_BACKOFF_MAX", "OUTBOX_RETENCAO_DIAS",
+    "MAX_FILE_SIZE_MB", "QR_FOTO_PROCESSOS", "QR_FOTO_CACHE_HORAS", "QR_FOTO_LADO_MAXIMO"
 ]
@@ -3,10 +3,10 @@
 # Interface com a API do Django
 # ===============================================
 
-import httpx
 import logging
 from typing import List, Dict, Any, Optional
-from .config import API_BASE_URL, API_TIMEOUT
+from .http import cliente_api
+from .outbox import outbox, METODOS_MUTAVEIS
 
 logger = logging.getLogger(__name__)
 
@@ -18,37 +18,50 @@ async def fazer_requisicao_api(
     method: str,
     endpoint: str,
     data: Dict[str, Any] = None,
-    params: Dict[str, Any] = None
+    params: Dict[str, Any] = None,
+    enfileirar: bool = False
 ) -> Optional[Dict[str, Any]]:
-    """Função genérica para fazer requisições à API"""
+    """
+    Função genérica para fazer requisições à API (cliente com pool de conexões)
+
+    Requisições que alteram dados passam pela fila local (core/outbox.py) com
+    chave de idempotência. Com enfileirar=True, uma falha temporária da API
+    deixa a requisição na fila para reenvio e retorna
+    {'success': True, 'enfileirado': True} para o bot seguir respondendo.
+    """
     
-    url = f"{API_BASE_URL.rstrip('/')}/{endpoint.lstrip('/')}"
+    if method.upper() not in ('GET', 'POST', 'PATCH', 'PUT', 'DELETE'):
+        logger.error(f"❌ Método HTTP inválido: {method}")
+        return None
+
+    if method.upper() in METODOS_MUTAVEIS:
+        try:
+            resultado = await outbox.enviar(method.upper(), endpoint, data, params, enfileirar=enfileirar)
+        except Exception as e:
+            logger.error(f"❌ Erro na requisição {method.upper()} {endpoint}: {type(e).__name__} {e}")
+            return None
+        if resultado.enfileirado:
+            return {'success': True, 'enfileirado': True, 'chave_idempotencia': resultado.chave}
+        if resultado.status_code in [200, 201]:
+            return resultado.corpo
+        logger.error(f"❌ Erro na API: {resultado.status_code} - {resultado.corpo}")
+        return None
     
     try:
-        async with httpx.AsyncClient(timeout=API_TIMEOUT) as client:
-            
-            if method.upper() == 'GET':
-                response = await client.get(url, params=params)
-            elif method.upper() == 'POST':
-                response = await client.post(url, json=data, params=params)
-            elif method.upper() == 'PATCH':
-                response = await client.patch(url, json=data, params=params)
-            elif method.upper() == 'PUT':
-                response = await client.put(url, json=data, params=params)
-            elif method.upper() == 'DELETE':
-                response = await client.delete(url, params=params)
-            else:
-                logger.error(f"❌ Método HTTP inválido: {method}")
-                return None
-            
-            if response.status_code in [200, 201]:
-                return response.json()
-            else:
-                logger.error(f"❌ Erro na API: {response.status_code} - {response.text}")
-                return None
+        response = await cliente_api.requisitar(
+            method, endpoint,
+            json=data if method.upper() != 'GET' else None,
+            params=params
+        )
+        
+        if response.status_code in [200, 201]:
+            return response.json()
+        else:
+            logger.error(f"❌ Erro na API: {response.status_code} - {response.text}")
+            return None
                 
     except Exception as e:
-        logger.error(f"❌ Erro na requisição: {e}")
+        logger.error(f"❌ Erro na requisição {method.upper()} {endpoint}: {type(e).__name__} {e}")
         return None
 
 async def verificar_status_api() -> bool:
@@ -343,7 +356,7 @@ async def atualizar_item_checklist_nr12(
         'operador_codigo': operador_codigo
     }
     
-    result = await fazer_requisicao_api('POST', 'nr12/bot/item-checklist/atualizar/', data=data)
+    result = await fazer_requisicao_api('POST', 'nr12/bot/item-checklist/atualizar/', data=data, enfileirar=True)
     
     if result and result.get('success'):
         logger.info(f"✅ Item {item_id} atualizado com sucesso")
@@ -352,6 +365,46 @@ async def atualizar_item_checklist_nr12(
         logger.error(f"❌ Erro ao atualizar item {item_id}: {result.get('error', 'Erro desconhecido') if result else 'Sem resposta'}")
         return False
 
+async def responder_itens_checklist_lote(
+    checklist_id: int,
+    itens: List[Dict[str, Any]],
+    operador_id: Optional[int] = None,
+    finalizar: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Envia várias respostas de itens (e opcionalmente finaliza) em uma requisição
+
+    Args:
+        itens: [{'id', 'status', 'observacao', 'verificado_em'}]
+
+    Returns:
+        Resposta da API ({'atualizados', 'pendentes', 'status', ...}),
+        {'enfileirado': True, ...} se ficou na fila local para reenvio,
+        {'recusado': True, ...} se a API rejeitou o lote, ou None se nem a fila local funcionou
+    """
+    logger.info(f"📦 Enviando {len(itens)} respostas do checklist {checklist_id}")
+
+    data = {'itens': itens, 'finalizar': finalizar}
+    if operador_id:
+        data['operador_id'] = operador_id
+
+    try:
+        # Em falha temporária o lote fica na fila local e é reenviado depois
+        resultado = await outbox.enviar(
+            'POST', f'nr12/checklists/{checklist_id}/itens/lote/', data, enfileirar=True
+        )
+    except Exception as e:
+        logger.error(f"❌ Erro ao enviar respostas do checklist {checklist_id}: {type(e).__name__} {e}")
+        return None
+
+    if resultado.enfileirado:
+        return {'success': True, 'enfileirado': True, 'atualizados': 0}
+    if resultado.sucesso:
+        return resultado.corpo
+    # Recusa definitiva (checklist finalizado, item inválido): reenviar não adianta
+    logger.error(f"❌ Respostas do checklist {checklist_id} recusadas: {resultado.corpo}")
+    return {'success': False, 'recusado': True, 'error': resultado.corpo}
+
 async def finalizar_checklist_nr12(equipamento_id: int, operador_codigo: str) -> bool:
     """Finaliza checklist NR12 para um equipamento"""
     logger.info(f"🏁 Finalizando checklist do equipamento {equipamento_id}")
@@ -0,0 +1,204 @@
+# ===============================================
+# ARQUIVO: mandacaru_bot/core/http.py
+# Cliente HTTP compartilhado para a API do Django
+# ===============================================
+
+import asyncio
+import importlib.util
+import logging
+import random
+import re
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .config import (
+    API_BASE_URL, API_TIMEOUT, API_TOKEN, API_MAX_CONEXOES, API_MAX_KEEPALIVE,
+    API_KEEPALIVE_SEGUNDOS, API_HTTP2, API_TENTATIVAS, API_BACKOFF_SEGUNDOS,
+    API_TIMEOUTS
+)
+
+logger = logging.getLogger(__name__)
+
+# Métodos que podem ser repetidos sem efeito colateral
+METODOS_IDEMPOTENTES = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+# Respostas que indicam falha temporária do servidor
+STATUS_REPETIVEIS = {502, 503, 504}
+
+# Limites (segundos) das faixas do histograma de latência
+FAIXAS_LATENCIA = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+_RE_ID = re.compile(r'/(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})(?=/|$)', re.I)
+
+
+def normalizar_endpoint(endpoint: str) -> str:
+    """Troca ids e uuids por {id} para agrupar métricas do mesmo endpoint"""
+    return _RE_ID.sub('/{id}', '/' + endpoint.strip('/')).lstrip('/') + '/'
+
+
+# ===============================================
+# MÉTRICAS
+# ===============================================
+
+class HistogramaLatencia:
+    """Histograma cumulativo simples (compatível com o formato Prometheus)"""
+
+    def __init__(self):
+        self.contagens = [0] * (len(FAIXAS_LATENCIA) + 1)
+        self.total = 0
+        self.soma = 0.0
+        self.erros = 0
+
+    def registrar(self, segundos: float, erro: bool = False):
+        self.contagens[bisect_left(FAIXAS_LATENCIA, segundos)] += 1
+        self.total += 1
+        self.soma += segundos
+        if erro:
+            self.erros += 1
+
+    def percentil(self, p: float) -> Optional[float]:
+        """Limite superior da faixa que contém o percentil p (0-100)"""
+        if not self.total:
+            return None
+        alvo = self.total * p / 100
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return FAIXAS_LATENCIA[indice] if indice < len(FAIXAS_LATENCIA) else float('inf')
+        return float('inf')
+
+    def resumo(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'erros': self.erros,
+            'media_ms': round(self.soma / self.total * 1000, 1) if self.total else None,
+            'p50_s': self.percentil(50),
+            'p95_s': self.percentil(95),
+            'faixas': dict(zip([*map(str, FAIXAS_LATENCIA), '+inf'], self.contagens)),
+        }
+
+
+# ===============================================
+# CLIENTE
+# ===============================================
+
+class ClienteAPI:
+    """
+    Cliente httpx de longa duração com pool de conexões
+
+    Criado no startup do bot e fechado no shutdown (bot_main/main.py).
+    Se usado fora do ciclo de vida do bot (scripts, testes), é criado sob
+    demanda na primeira requisição.
+    """
+
+    def __init__(self, base_url: str = API_BASE_URL):
+        self.base_url = base_url.rstrip('/') + '/'
+        self._client: Optional[httpx.AsyncClient] = None
+        self.metricas: Dict[str, HistogramaLatencia] = {}
+        self.tentativas_extras = 0
+
+    @property
+    def http2(self) -> bool:
+        return API_HTTP2 and importlib.util.find_spec('h2') is not None
+
+    async def iniciar(self):
+        if self._client is not None and not self._client.is_closed:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=API_TIMEOUT,
+            headers={'Authorization': f'Token {API_TOKEN}'} if API_TOKEN else None,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=API_MAX_CONEXOES,
+                max_keepalive_connections=API_MAX_KEEPALIVE,
+                keepalive_expiry=API_KEEPALIVE_SEGUNDOS,
+            ),
+        )
+        logger.info(
+            f"🔌 Cliente da API iniciado ({'HTTP/2' if self.http2 else 'HTTP/1.1'}, "
+            f"até {API_MAX_CONEXOES} conexões)"
+        )
+
+    async def fechar(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("🔒 Cliente da API fechado")
+
+    def timeout_para(self, endpoint: str) -> float:
+        """Timeout do prefixo mais específico configurado em API_TIMEOUTS"""
+        endpoint = endpoint.strip('/')
+        prefixos = [p for p in API_TIMEOUTS if endpoint.startswith(p)]
+        return API_TIMEOUTS[max(prefixos, key=len)] if prefixos else API_TIMEOUT
+
+    async def requisitar(
+        self,
+        method: str,
+        endpoint: str,
+        json: Dict[str, Any] = None,
+        params: Dict[str, Any] = None,
+        headers: Dict[str, str] = None,
+    ) -> httpx.Response:
+        """
+        Faz a requisição reaproveitando conexões
+
+        Métodos idempotentes são repetidos em erros de transporte e em
+        502/503/504, com backoff exponencial e jitter. Erros persistentes
+        são propagados para quem chamou.
+        """
+        await self.iniciar()
+        method = method.upper()
+        tentativas = API_TENTATIVAS if method in METODOS_IDEMPOTENTES else 1
+        metrica = self.metricas.setdefault(normalizar_endpoint(endpoint), HistogramaLatencia())
+
+        for tentativa in range(1, tentativas + 1):
+            inicio = time.perf_counter()
+            try:
+                response = await self._client.request(
+                    method, endpoint.lstrip('/'), json=json, params=params,
+                    headers=headers, timeout=self.timeout_para(endpoint),
+                )
+            except httpx.TransportError:
+                metrica.registrar(time.perf_counter() - inicio, erro=True)
+                if tentativa == tentativas:
+                    raise
+            else:
+                repetir = response.status_code in STATUS_REPETIVEIS and tentativa < tentativas
+                metrica.registrar(time.perf_counter() - inicio, erro=response.status_code >= 500)
+                if not repetir:
+                    return response
+
+            self.tentativas_extras += 1
+            # Backoff exponencial com jitter completo
+            await asyncio.sleep(random.uniform(0, API_BACKOFF_SEGUNDOS * 2 ** (tentativa - 1)))
+
+    def resumo_metricas(self) -> Dict[str, Any]:
+        return {
+            'tentativas_extras': self.tentativas_extras,
+            'endpoints': {
+                endpoint: histograma.resumo()
+                for endpoint, histograma in sorted(self.metricas.items())
+            },
+        }
+
+
+# Instância única usada por core/db.py
+cliente_api = ClienteAPI()
+
+
+async def iniciar_cliente_api():
+    await cliente_api.iniciar()
+
+
+async def fechar_cliente_api():
+    await cliente_api.fechar()
+
+
+def metricas_api() -> Dict[str, Any]:
+    """Latência por endpoint e retentativas desde o início do bot"""
+    return cliente_api.resumo_metricas()
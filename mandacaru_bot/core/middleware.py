@@ -32,7 +32,7 @@ def require_auth(handler):
             return
         
         # Verificar autenticação
-        if not verificar_autenticacao(chat_id):
+        if not await verificar_autenticacao(chat_id):
             if hasattr(obj, 'answer'):
                 await obj.answer(MessageTemplates.unauthorized_access())
             elif hasattr(obj, 'message'):
@@ -40,7 +40,7 @@ def require_auth(handler):
             return
         
         # Adicionar operador aos argumentos
-        operador = obter_operador_sessao(chat_id)
+        operador = await obter_operador_sessao(chat_id)
         kwargs['operador'] = operador
         
         return await handler(obj, *args, **kwargs)
@@ -69,7 +69,7 @@ def require_admin(handler):
             return
         
         # Verificar autenticação
-        if not verificar_autenticacao(chat_id):
+        if not await verificar_autenticacao(chat_id):
             if hasattr(obj, 'answer'):
                 await obj.answer(MessageTemplates.unauthorized_access())
             elif hasattr(obj, 'message'):
@@ -77,7 +77,7 @@ def require_admin(handler):
             return
         
         # Verificar se é admin
-        operador = obter_operador_sessao(chat_id)
+        operador = await obter_operador_sessao(chat_id)
         
         # Verificar se tem permissões de admin (ajuste conforme sua lógica)
         is_admin = (
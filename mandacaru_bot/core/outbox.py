@@ -0,0 +1,297 @@
+# ===============================================
+# ARQUIVO: mandacaru_bot/core/outbox.py
+# Fila local (SQLite) das requisições que alteram dados na API
+# ===============================================
+#
+# Toda requisição POST/PUT/PATCH/DELETE do bot é gravada em DB_FILE antes de
+# sair, com uma chave de idempotência enviada no cabeçalho Idempotency-Key,
+# e removida quando a API responde. Assim:
+#   - Quem chama com enfileirar=True (respostas de checklist) não perde o
+#     envio quando a API falha: a requisição fica na fila e é reenviada em
+#     ordem, com a mesma chave, pela tarefa periódica.
+#   - Se o processo cair no meio de um envio, a requisição é reenviada no
+#     próximo início; a chave evita que a API grave duas vezes.
+#
+# Enquanto houver fila ou um envio em andamento, novas requisições com
+# enfileirar=True entram direto nela (sem esperar o timeout da API degradada)
+# para manter a ordem. As operações no SQLite rodam em asyncio.to_thread:
+# cada gravação faz fsync e não pode parar o event loop dos outros chats.
+
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+from .config import DB_FILE, OUTBOX_INTERVALO, OUTBOX_BACKOFF_MAX, OUTBOX_RETENCAO_DIAS
+from .http import cliente_api
+
+logger = logging.getLogger(__name__)
+
+METODOS_MUTAVEIS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+# Respostas 4xx que indicam falha temporária (e não recusa do conteúdo)
+STATUS_TEMPORARIOS = {408, 409, 425, 429}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chave TEXT NOT NULL UNIQUE,
+    metodo TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    dados TEXT,
+    params TEXT,
+    criado_em REAL NOT NULL,
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa REAL NOT NULL DEFAULT 0,
+    ultimo_erro TEXT,
+    descartado_em REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_fila ON outbox (descartado_em, id);
+"""
+
+
+class ResultadoEnvio(NamedTuple):
+    status_code: Optional[int]   # None: falha de transporte ou apenas enfileirado
+    corpo: Any
+    enfileirado: bool = False
+    chave: Optional[str] = None
+
+    @property
+    def sucesso(self) -> bool:
+        return self.status_code is not None and 200 <= self.status_code < 300
+
+    @property
+    def recusado(self) -> bool:
+        return (
+            self.status_code is not None and 400 <= self.status_code < 500
+            and self.status_code not in STATUS_TEMPORARIOS
+        )
+
+
+class Outbox:
+    """Fila persistente de requisições com reenvio em ordem"""
+
+    def __init__(self, caminho: str = DB_FILE):
+        self.caminho = caminho
+        self._conexao: Optional[sqlite3.Connection] = None
+        # A conexão é usada a partir das threads de asyncio.to_thread
+        self._trava_conexao = threading.Lock()
+        self._trava = asyncio.Lock()
+        self._tarefa_reenvio = None
+        # Registros sendo enviados agora pelo próprio chamador (fora do reenvio)
+        self._em_envio = set()
+        self.enfileiradas = 0
+        self.reenviadas = 0
+        self.descartadas = 0
+
+    @property
+    def conexao(self) -> sqlite3.Connection:
+        if self._conexao is None:
+            Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+            conexao = sqlite3.connect(self.caminho, isolation_level=None, check_same_thread=False)
+            conexao.row_factory = sqlite3.Row
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            conexao.executescript(ESQUEMA)
+            conexao.execute(
+                'DELETE FROM outbox WHERE descartado_em < ?',
+                (time.time() - OUTBOX_RETENCAO_DIAS * 86400,)
+            )
+            self._conexao = conexao
+        return self._conexao
+
+    def fechar(self):
+        with self._trava_conexao:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+    async def _no_banco(self, funcao, *args):
+        """Executa `funcao(conexao, *args)` fora do event loop (o fsync do SQLite bloqueia)"""
+        def executar():
+            with self._trava_conexao:
+                return funcao(self.conexao, *args)
+        return await asyncio.to_thread(executar)
+
+    # ---------------------------------------------
+    # Registro
+    # ---------------------------------------------
+
+    async def registrar(self, metodo: str, endpoint: str, dados=None, params=None) -> sqlite3.Row:
+        def inserir(conexao):
+            cursor = conexao.execute(
+                'INSERT INTO outbox (chave, metodo, endpoint, dados, params, criado_em) VALUES (?, ?, ?, ?, ?, ?)',
+                (str(uuid.uuid4()), metodo, endpoint, json.dumps(dados, default=str), json.dumps(params), time.time())
+            )
+            return conexao.execute('SELECT * FROM outbox WHERE id = ?', (cursor.lastrowid,)).fetchone()
+        return await self._no_banco(inserir)
+
+    async def remover(self, registro_id: int):
+        await self._no_banco(lambda conexao: conexao.execute('DELETE FROM outbox WHERE id = ?', (registro_id,)))
+
+    async def adiar(self, registro: sqlite3.Row, erro: str):
+        tentativas = registro['tentativas'] + 1
+        espera = random.uniform(0, min(OUTBOX_BACKOFF_MAX, 2 ** tentativas))
+        await self._no_banco(lambda conexao: conexao.execute(
+            'UPDATE outbox SET tentativas = ?, proxima_tentativa = ?, ultimo_erro = ? WHERE id = ?',
+            (tentativas, time.time() + espera, erro[:500], registro['id'])
+        ))
+
+    async def descartar(self, registro: sqlite3.Row, erro: str):
+        # Mantido por OUTBOX_RETENCAO_DIAS para conferência
+        await self._no_banco(lambda conexao: conexao.execute(
+            'UPDATE outbox SET descartado_em = ?, ultimo_erro = ? WHERE id = ?',
+            (time.time(), erro[:500], registro['id'])
+        ))
+        self.descartadas += 1
+        logger.error(
+            f"❌ Requisição {registro['metodo']} {registro['endpoint']} descartada "
+            f"após {registro['tentativas'] + 1} tentativas: {erro[:200]}"
+        )
+
+    async def pendentes(self) -> int:
+        """Requisições não entregues, inclusive as que estão em envio agora"""
+        return await self._no_banco(lambda conexao: conexao.execute(
+            'SELECT COUNT(*) FROM outbox WHERE descartado_em IS NULL'
+        ).fetchone()[0])
+
+    # ---------------------------------------------
+    # Envio
+    # ---------------------------------------------
+
+    async def _transmitir(self, registro: sqlite3.Row) -> ResultadoEnvio:
+        try:
+            response = await cliente_api.requisitar(
+                registro['metodo'], registro['endpoint'],
+                json=json.loads(registro['dados']),
+                params=json.loads(registro['params']),
+                headers={'Idempotency-Key': registro['chave']},
+            )
+        except Exception as e:
+            return ResultadoEnvio(None, f'{type(e).__name__} {e}', chave=registro['chave'])
+
+        try:
+            corpo = response.json()
+        except ValueError:
+            corpo = response.text
+        return ResultadoEnvio(response.status_code, corpo, chave=registro['chave'])
+
+    async def enviar(self, metodo: str, endpoint: str, dados=None, params=None, enfileirar: bool = False) -> ResultadoEnvio:
+        """
+        Envia uma requisição que altera dados, registrando-a antes na fila
+
+        Args:
+            enfileirar: Em falha temporária, manter na fila para reenvio e
+                retornar enfileirado=True em vez da falha
+
+        Returns:
+            ResultadoEnvio
+        """
+        if enfileirar and (self._em_envio or await self.pendentes()):
+            # Algo em envio ou na fila: enviar agora poderia ultrapassá-lo
+            registro = await self.registrar(metodo, endpoint, dados, params)
+            self.enfileiradas += 1
+            return ResultadoEnvio(None, None, enfileirado=True, chave=registro['chave'])
+
+        registro = await self.registrar(metodo, endpoint, dados, params)
+        self._em_envio.add(registro['id'])
+        try:
+            resultado = await self._transmitir(registro)
+        finally:
+            self._em_envio.discard(registro['id'])
+
+        if resultado.sucesso or resultado.recusado or not enfileirar:
+            await self.remover(registro['id'])
+            if resultado.sucesso and not self._trava.locked() and await self.pendentes():
+                # A API respondeu: bom momento para esvaziar a fila
+                self._tarefa_reenvio = asyncio.create_task(self.reenviar())
+            return resultado
+
+        await self.adiar(registro, str(resultado.corpo))
+        self.enfileiradas += 1
+        logger.warning(f"📥 {metodo} {endpoint} guardada para reenvio ({await self.pendentes()} na fila)")
+        return resultado._replace(enfileirado=True)
+
+    async def reenviar(self, limite: int = 100) -> int:
+        """
+        Reenvia a fila em ordem, parando na primeira falha temporária
+
+        Returns:
+            int: Requisições entregues
+        """
+        if self._trava.locked():
+            return 0
+        async with self._trava:
+            entregues = 0
+            registros = await self._no_banco(lambda conexao: conexao.execute(
+                'SELECT * FROM outbox WHERE descartado_em IS NULL ORDER BY id LIMIT ?', (limite,)
+            ).fetchall())
+            for registro in registros:
+                if registro['id'] in self._em_envio:
+                    # Os seguintes esperam o resultado do envio direto
+                    break
+                if registro['proxima_tentativa'] > time.time():
+                    break
+                resultado = await self._transmitir(registro)
+                if resultado.sucesso:
+                    await self.remover(registro['id'])
+                    entregues += 1
+                elif resultado.recusado:
+                    await self.descartar(registro, str(resultado.corpo))
+                else:
+                    await self.adiar(registro, str(resultado.corpo))
+                    break
+
+            self.reenviadas += entregues
+            if entregues:
+                logger.info(f"📤 {entregues} requisições da fila entregues ({await self.pendentes()} restantes)")
+            return entregues
+
+    async def metricas(self) -> Dict[str, Any]:
+        def consultar(conexao):
+            linha = conexao.execute(
+                'SELECT COUNT(*), MIN(criado_em), MAX(tentativas) FROM outbox WHERE descartado_em IS NULL'
+            ).fetchone()
+            descartadas_retidas = conexao.execute(
+                'SELECT COUNT(*) FROM outbox WHERE descartado_em IS NOT NULL'
+            ).fetchone()[0]
+            return linha, descartadas_retidas
+        linha, descartadas_retidas = await self._no_banco(consultar)
+        return {
+            'pendentes': linha[0],
+            'idade_mais_antiga_s': round(time.time() - linha[1], 1) if linha[1] else 0,
+            'tentativas_max': linha[2] or 0,
+            'enfileiradas': self.enfileiradas,
+            'reenviadas': self.reenviadas,
+            'descartadas': self.descartadas,
+            'descartadas_retidas': descartadas_retidas,
+        }
+
+
+# Instância única usada por core/db.py
+outbox = Outbox()
+
+
+async def tarefa_outbox(intervalo: float = OUTBOX_INTERVALO):
+    """Tarefa de fundo do bot: reenvia a fila periodicamente (bot_main/main.py)"""
+    while True:
+        try:
+            if await outbox.pendentes():
+                await outbox.reenviar()
+            await asyncio.sleep(intervalo)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Erro no reenvio da fila: {e}")
+            await asyncio.sleep(intervalo)
+
+
+async def metricas_outbox() -> Dict[str, Any]:
+    """Profundidade e idade da fila local"""
+    return await outbox.metricas()
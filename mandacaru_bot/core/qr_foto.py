@@ -0,0 +1,153 @@
+# ===============================================
+# ARQUIVO: mandacaru_bot/core/qr_foto.py
+# Leitura de QR codes em fotos enviadas ao bot
+# ===============================================
+#
+# O operador envia a foto da etiqueta; o bot baixa o maior tamanho da foto
+# e decodifica a imagem num pool de processos (QR_FOTO_PROCESSOS; 0 usa o
+# executor de threads padrão do loop), sem travar o event loop.
+#
+# Decodificador: zxing-cpp (wheel sem dependências de sistema, sem OpenCV)
+# com Pillow para abrir o JPEG. Sem essas bibliotecas o bot continua
+# funcionando e orienta o operador a usar o link do QR code.
+#
+# Resultados ficam no backend das sessões (core/session.py) por
+# file_unique_id: a mesma foto reenviada ou encaminhada não é baixada nem
+# decodificada de novo, mesmo em outro processo com SESSION_BACKEND=redis.
+
+import asyncio
+import importlib.util
+import io
+import logging
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from .config import MAX_FILE_SIZE_MB, QR_FOTO_PROCESSOS, QR_FOTO_CACHE_HORAS, QR_FOTO_LADO_MAXIMO
+from .http import HistogramaLatencia
+from .session import definir_cache, obter_cache
+
+logger = logging.getLogger(__name__)
+
+_RE_UUID = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+# Link do bot (start=eq_<uuid>, shared/qr_render.PayloadEquipamento) ou só o UUID;
+# outros QR codes com UUID (checklist, operador) não são de equipamento
+_RE_EQUIPAMENTO = re.compile(rf'eq_({_RE_UUID})\b|^\s*({_RE_UUID})\s*$', re.I)
+
+
+def leitura_disponivel() -> bool:
+    """True se as bibliotecas de decodificação estão instaladas"""
+    return all(importlib.util.find_spec(modulo) is not None for modulo in ('zxingcpp', 'PIL'))
+
+
+def extrair_uuid_equipamento(texto: Optional[str]) -> Optional[str]:
+    """UUID do equipamento no conteúdo lido do QR code, ou None"""
+    if not texto:
+        return None
+    encontrado = _RE_EQUIPAMENTO.search(texto)
+    return (encontrado.group(1) or encontrado.group(2)).lower() if encontrado else None
+
+
+def decodificar_imagem(conteudo: bytes) -> Optional[str]:
+    """
+    Texto do primeiro QR code encontrado na imagem, ou None
+
+    Roda nos processos do pool: recebe e devolve só tipos simples.
+    """
+    import zxingcpp
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(conteudo)) as imagem:
+        # Foto do celular pode vir girada só pelo EXIF; tons de cinza bastam
+        imagem = ImageOps.exif_transpose(imagem).convert('L')
+        imagem.thumbnail((QR_FOTO_LADO_MAXIMO, QR_FOTO_LADO_MAXIMO))
+        codigos = zxingcpp.read_barcodes(imagem, formats=zxingcpp.BarcodeFormat.QRCode)
+
+    return codigos[0].text if codigos else None
+
+
+class LeitorQRFoto:
+    """Download, decodificação fora do event loop, cache e métricas"""
+
+    def __init__(self, processos: int = QR_FOTO_PROCESSOS, ttl: int = QR_FOTO_CACHE_HORAS * 3600):
+        self.processos = processos
+        self.ttl = ttl
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.download = HistogramaLatencia()
+        self.decodificacao = HistogramaLatencia()
+        self.cache_acertos = 0
+        self.cache_faltas = 0
+        self.sem_qr = 0
+
+    def _executor(self):
+        if self.processos <= 0:
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processos)
+        return self._pool
+
+    async def ler(self, bot, foto) -> Optional[str]:
+        """
+        Conteúdo do QR code da foto (PhotoSize do aiogram), ou None
+
+        Raises:
+            ValueError: Foto maior que MAX_FILE_SIZE_MB
+        """
+        chave = f'qr_foto:{foto.file_unique_id}'
+        em_cache = await obter_cache(chave)
+        if em_cache is not None:
+            self.cache_acertos += 1
+            return em_cache.get('texto')
+        self.cache_faltas += 1
+
+        if foto.file_size and foto.file_size > MAX_FILE_SIZE_MB * 1024 * 1024:
+            raise ValueError(f"Foto de {foto.file_size} bytes excede {MAX_FILE_SIZE_MB} MB")
+
+        inicio = time.perf_counter()
+        arquivo = await bot.download(foto)
+        conteudo = arquivo.getvalue()
+        self.download.registrar(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            texto = await loop.run_in_executor(self._executor(), decodificar_imagem, conteudo)
+        except Exception:
+            self.decodificacao.registrar(time.perf_counter() - inicio, erro=True)
+            raise
+        duracao = time.perf_counter() - inicio
+        self.decodificacao.registrar(duracao)
+
+        if texto is None:
+            self.sem_qr += 1
+        # "Sem QR" também vai para o cache: a mesma foto dá sempre o mesmo resultado
+        await definir_cache(chave, {'texto': texto}, ttl=self.ttl)
+        logger.info(
+            f"📷 QR da foto {foto.width}x{foto.height} ({len(conteudo)} bytes) "
+            f"{'lido' if texto else 'não encontrado'} em {duracao * 1000:.0f} ms"
+        )
+        return texto
+
+    def fechar(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def metricas(self) -> Dict[str, Any]:
+        return {
+            'cache_acertos': self.cache_acertos,
+            'cache_faltas': self.cache_faltas,
+            'sem_qr': self.sem_qr,
+            'download': self.download.resumo(),
+            'decodificacao': self.decodificacao.resumo(),
+        }
+
+
+# Instância única usada por bot_qrcode/handlers.py
+leitor_qr_foto = LeitorQRFoto()
+
+
+def metricas_qr_foto() -> Dict[str, Any]:
+    """Acertos do cache e latência de download e decodificação"""
+    return leitor_qr_foto.metricas()
@@ -5,27 +5,64 @@
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-from .config import SESSION_TIMEOUT_HOURS
+from typing import Dict, Any, Optional, Set
+from .config import SESSION_TIMEOUT_HOURS, SESSION_BACKEND, REDIS_URL
+from .session_backends import (
+    PREFIXO, StorageSessao, chave_cache, chave_conjunto, chave_sessao, chave_temp, criar_backend
+)
 
 logger = logging.getLogger(__name__)
 
 # ===============================================
-# ARMAZENAMENTO EM MEMÓRIA
+# ARMAZENAMENTO
 # ===============================================
 
-# Armazenamento das sessões (em produção use Redis)
-_sessions: Dict[str, Dict[str, Any]] = {}
-_temp_data: Dict[str, Dict[str, Any]] = {}
+# Backend configurado por SESSION_BACKEND: "memoria" (um processo) ou
+# "redis" (vários processos, sessões sobrevivem a reinícios)
+_backend = criar_backend(SESSION_BACKEND, REDIS_URL)
+
+TTL_SESSAO = SESSION_TIMEOUT_HOURS * 3600
+
+CAMPOS_DATA = ('criada_em', 'ultimo_acesso')
+
+
+def configurar_backend(backend) -> None:
+    """Troca o backend das sessões (usado em testes e scripts)"""
+    global _backend
+    _backend = backend
+
+
+def criar_storage_fsm() -> StorageSessao:
+    """Storage do FSM do aiogram no mesmo backend das sessões"""
+    return StorageSessao(_backend, ttl=TTL_SESSAO)
+
+
+async def _salvar(chat_id: str, sessao: Dict[str, Any]) -> None:
+    dados = dict(sessao)
+    for campo in CAMPOS_DATA:
+        if isinstance(dados.get(campo), datetime):
+            dados[campo] = dados[campo].isoformat()
+    await _backend.definir(chave_sessao(chat_id), dados, TTL_SESSAO)
+
+
+async def _carregar(chat_id: str) -> Optional[Dict[str, Any]]:
+    sessao = await _backend.obter(chave_sessao(chat_id))
+    if sessao is None:
+        return None
+    sessao = dict(sessao)
+    for campo in CAMPOS_DATA:
+        if isinstance(sessao.get(campo), str):
+            sessao[campo] = datetime.fromisoformat(sessao[campo])
+    return sessao
 
 # ===============================================
 # GERENCIAMENTO DE SESSÕES
 # ===============================================
 
-def iniciar_sessao(chat_id: str) -> Dict[str, Any]:
+async def iniciar_sessao(chat_id: str) -> Dict[str, Any]:
     """Inicia nova sessão para um chat_id"""
     chat_id = str(chat_id)
-    
+
     sessao = {
         'chat_id': chat_id,
         'criada_em': datetime.now(),
@@ -37,49 +74,48 @@ def iniciar_sessao(chat_id: str) -> Dict[str, Any]:
         'equipamento_atual': None,
         'estado': 'inicio'
     }
-    
-    _sessions[chat_id] = sessao
+
+    await _salvar(chat_id, sessao)
     logger.info(f"✅ Sessão iniciada para chat_id: {chat_id}")
     return sessao
 
-def obter_sessao(chat_id: str) -> Optional[Dict[str, Any]]:
+async def obter_sessao(chat_id: str) -> Optional[Dict[str, Any]]:
     """Obtém sessão existente"""
     chat_id = str(chat_id)
-    sessao = _sessions.get(chat_id)
-    
+    sessao = await _carregar(chat_id)
+
     if sessao:
         # Verificar se não expirou
         if _sessao_expirou(sessao):
-            limpar_sessao(chat_id)
+            await limpar_sessao(chat_id)
             return None
-        
-        # Atualizar último acesso
+
+        # Atualizar último acesso (renova o TTL)
         sessao['ultimo_acesso'] = datetime.now()
-    
+        await _salvar(chat_id, sessao)
+        await _backend.renovar(chave_temp(chat_id), TTL_SESSAO)
+
     return sessao
 
-def atualizar_sessao(chat_id: str, dados: Dict[str, Any]) -> None:
+async def atualizar_sessao(chat_id: str, dados: Dict[str, Any]) -> None:
     """Atualiza dados da sessão"""
     chat_id = str(chat_id)
-    sessao = obter_sessao(chat_id)
-    
+    sessao = await obter_sessao(chat_id)
+
     if not sessao:
-        sessao = iniciar_sessao(chat_id)
-    
+        sessao = await iniciar_sessao(chat_id)
+
     sessao.update(dados)
     sessao['ultimo_acesso'] = datetime.now()
+    await _salvar(chat_id, sessao)
     logger.debug(f"🔄 Sessão atualizada para {chat_id}: {list(dados.keys())}")
 
-def limpar_sessao(chat_id: str) -> None:
+async def limpar_sessao(chat_id: str) -> None:
     """Remove sessão e dados temporários"""
     chat_id = str(chat_id)
-    
-    if chat_id in _sessions:
-        del _sessions[chat_id]
-    
-    if chat_id in _temp_data:
-        del _temp_data[chat_id]
-    
+
+    await _backend.remover(chave_sessao(chat_id), chave_temp(chat_id))
+
     logger.info(f"🧹 Sessão limpa para chat_id: {chat_id}")
 
 def _sessao_expirou(sessao: Dict[str, Any]) -> bool:
@@ -91,9 +127,9 @@ def _sessao_expirou(sessao: Dict[str, Any]) -> bool:
 # AUTENTICAÇÃO
 # ===============================================
 
-def autenticar_operador(chat_id: str, operador_data: Dict[str, Any]) -> None:
+async def autenticar_operador(chat_id: str, operador_data: Dict[str, Any]) -> None:
     """Autentica operador na sessão"""
-    atualizar_sessao(chat_id, {
+    await atualizar_sessao(chat_id, {
         'operador_id': operador_data['id'],
         'operador_nome': operador_data['nome'],
         'operador_codigo': operador_data['codigo'],
@@ -102,18 +138,18 @@ def autenticar_operador(chat_id: str, operador_data: Dict[str, Any]) -> None:
     })
     logger.info(f"🔐 Operador {operador_data['codigo']} autenticado no chat {chat_id}")
 
-def verificar_autenticacao(chat_id: str) -> bool:
+async def verificar_autenticacao(chat_id: str) -> bool:
     """Verifica se o usuário está autenticado"""
-    sessao = obter_sessao(chat_id)
+    sessao = await obter_sessao(chat_id)
     return sessao is not None and sessao.get('autenticado', False)
 
-def obter_operador_sessao(chat_id: str) -> Optional[Dict[str, Any]]:
+async def obter_operador_sessao(chat_id: str) -> Optional[Dict[str, Any]]:
     """Obtém dados do operador autenticado"""
-    sessao = obter_sessao(chat_id)
-    
+    sessao = await obter_sessao(chat_id)
+
     if not sessao or not sessao.get('autenticado'):
         return None
-    
+
     return {
         'id': sessao['operador_id'],
         'nome': sessao['operador_nome'],
@@ -124,79 +160,103 @@ def obter_operador_sessao(chat_id: str) -> Optional[Dict[str, Any]]:
 # EQUIPAMENTO ATUAL
 # ===============================================
 
-def definir_equipamento_atual(chat_id: str, equipamento_data: Dict[str, Any]) -> None:
+async def definir_equipamento_atual(chat_id: str, equipamento_data: Dict[str, Any]) -> None:
     """Define equipamento atual na sessão"""
-    atualizar_sessao(chat_id, {
+    await atualizar_sessao(chat_id, {
         'equipamento_atual': equipamento_data,
         'estado': 'menu_equipamento'
     })
     logger.info(f"🚜 Equipamento {equipamento_data.get('nome')} selecionado para {chat_id}")
 
-def obter_equipamento_atual(chat_id: str) -> Optional[Dict[str, Any]]:
+async def obter_equipamento_atual(chat_id: str) -> Optional[Dict[str, Any]]:
     """Obtém equipamento atual da sessão"""
-    sessao = obter_sessao(chat_id)
+    sessao = await obter_sessao(chat_id)
     return sessao.get('equipamento_atual') if sessao else None
 
 # ===============================================
 # DADOS TEMPORÁRIOS
 # ===============================================
 
-def definir_dados_temporarios(chat_id: str, chave: str, valor: Any) -> None:
-    """Armazena dados temporários"""
+async def definir_dados_temporarios(chat_id: str, chave: str, valor: Any) -> None:
+    """Armazena dados temporários (um campo do hash do chat)"""
     chat_id = str(chat_id)
-    
-    if chat_id not in _temp_data:
-        _temp_data[chat_id] = {}
-    
-    _temp_data[chat_id][chave] = valor
+
+    await _backend.definir_campo(chave_temp(chat_id), chave, valor, TTL_SESSAO)
     logger.debug(f"💾 Dados temporários salvos: {chat_id}.{chave}")
 
-def obter_dados_temporarios(chat_id: str, chave: str, padrao: Any = None) -> Any:
+async def obter_dados_temporarios(chat_id: str, chave: str, padrao: Any = None) -> Any:
     """Obtém dados temporários"""
     chat_id = str(chat_id)
-    return _temp_data.get(chat_id, {}).get(chave, padrao)
+    valor = await _backend.obter_campo(chave_temp(chat_id), chave)
+    return padrao if valor is None else valor
 
-def limpar_dados_temporarios(chat_id: str, chave: str = None) -> None:
+async def limpar_dados_temporarios(chat_id: str, chave: str = None) -> None:
     """Limpa dados temporários"""
     chat_id = str(chat_id)
-    
+
     if chave:
-        if chat_id in _temp_data and chave in _temp_data[chat_id]:
-            del _temp_data[chat_id][chave]
+        await _backend.remover_campo(chave_temp(chat_id), chave)
     else:
-        if chat_id in _temp_data:
-            del _temp_data[chat_id]
+        await _backend.remover(chave_temp(chat_id))
+
+# ===============================================
+# CACHE AUXILIAR
+# ===============================================
+
+async def definir_cache(chave: str, valor: Any, ttl: Optional[int] = None) -> None:
+    """Valor compartilhado entre chats no mesmo backend (ex.: core/qr_foto.py)"""
+    await _backend.definir(chave_cache(chave), valor, ttl)
+
+async def obter_cache(chave: str) -> Any:
+    """Valor gravado com definir_cache, ou None"""
+    return await _backend.obter(chave_cache(chave))
+
+# ===============================================
+# CONJUNTOS COMPARTILHADOS
+# ===============================================
+
+async def adicionar_ao_conjunto(nome: str, membro: str) -> None:
+    """Inclui um membro no conjunto `nome`, visível a todos os processos do bot"""
+    await _backend.adicionar_membro(chave_conjunto(nome), str(membro))
+
+async def remover_do_conjunto(nome: str, membro: str) -> None:
+    """Retira um membro do conjunto `nome`"""
+    await _backend.remover_membro(chave_conjunto(nome), str(membro))
+
+async def membros_do_conjunto(nome: str) -> Set[str]:
+    """Membros atuais do conjunto `nome`"""
+    return await _backend.membros(chave_conjunto(nome))
 
 # ===============================================
 # LIMPEZA AUTOMÁTICA
 # ===============================================
 
-def limpar_sessoes_expiradas() -> int:
-    """Remove sessões expiradas"""
-    removidas = 0
-    chats_para_remover = []
-    
-    for chat_id, sessao in _sessions.items():
-        if _sessao_expirou(sessao):
-            chats_para_remover.append(chat_id)
-    
-    for chat_id in chats_para_remover:
-        limpar_sessao(chat_id)
-        removidas += 1
-    
+async def limpar_sessoes_expiradas() -> int:
+    """
+    Remove sessões expiradas
+
+    No Redis as chaves expiram sozinhas (TTL) e nada precisa ser feito;
+    na memória, remove as entradas cujo TTL já venceu.
+    """
+    removidas = await _backend.limpar_expirados()
+
     if removidas > 0:
         logger.info(f"🧹 {removidas} sessões expiradas removidas")
-    
+
     return removidas
 
-def obter_estatisticas_sessoes() -> Dict[str, int]:
+async def obter_estatisticas_sessoes() -> Dict[str, int]:
     """Obtém estatísticas das sessões"""
-    total = len(_sessions)
-    autenticadas = sum(1 for s in _sessions.values() if s.get('autenticado', False))
-    
+    total = 0
+    autenticadas = 0
+    async for _, sessao in _backend.listar(f'{PREFIXO}:sessao:'):
+        total += 1
+        if sessao.get('autenticado', False):
+            autenticadas += 1
+
     return {
         'total': total,
         'autenticadas': autenticadas,
         'nao_autenticadas': total - autenticadas,
-        'dados_temporarios': len(_temp_data)
-    }
\ No newline at end of file
+        'dados_temporarios': await _backend.contar(f'{PREFIXO}:temp:')
+    }
@@ -0,0 +1,340 @@
+# ===============================================
+# ARQUIVO: mandacaru_bot/core/session_backends.py
+# Backends de armazenamento das sessões do bot
+# ===============================================
+#
+# core/session.py fala apenas com a interface abaixo; o backend é escolhido
+# por SESSION_BACKEND ("memoria" ou "redis").
+#
+# Layout das chaves (Redis):
+#   bot:sessao:{<chat_id>}            JSON da sessão, com TTL
+#   bot:temp:{<chat_id>}              hash campo -> JSON (dados temporários)
+#   bot:fsm:{<chat_id>}:<resto>       estado/dados do FSM do aiogram
+#   bot:cache:<chave>                 cache auxiliar sem chat (ex.: QR de fotos), com TTL
+#   bot:conjunto:<nome>               conjunto de membros compartilhado entre processos
+#                                     (ex.: chats com respostas de checklist pendentes)
+#
+# O chat_id entre chaves é a "hash tag" do Redis Cluster: todas as chaves de
+# um chat ficam no mesmo shard, e chats diferentes se distribuem entre os
+# shards.
+
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Set
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+
+logger = logging.getLogger(__name__)
+
+PREFIXO = 'bot'
+
+
+def chave_sessao(chat_id: str) -> str:
+    return f'{PREFIXO}:sessao:{{{chat_id}}}'
+
+
+def chave_temp(chat_id: str) -> str:
+    return f'{PREFIXO}:temp:{{{chat_id}}}'
+
+
+def chave_cache(chave: str) -> str:
+    return f'{PREFIXO}:cache:{chave}'
+
+
+def chave_conjunto(nome: str) -> str:
+    return f'{PREFIXO}:conjunto:{nome}'
+
+
+def chave_fsm(key: StorageKey, parte: str) -> str:
+    return (
+        f'{PREFIXO}:fsm:{{{key.chat_id}}}:{key.user_id}:{key.bot_id}:'
+        f'{key.thread_id or 0}:{key.destiny}:{parte}'
+    )
+
+
+# ===============================================
+# INTERFACE
+# ===============================================
+
+class BackendSessao:
+    """
+    Operações mínimas usadas por core/session.py e pelo storage do FSM
+
+    Todas são corrotinas: o bot roda num único event loop e uma ida ao
+    Redis não pode parar os outros chats enquanto espera a resposta.
+    """
+
+    async def obter(self, chave: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def definir(self, chave: str, valor: Any, ttl: Optional[int] = None) -> None:
+        raise NotImplementedError
+
+    async def remover(self, *chaves: str) -> None:
+        raise NotImplementedError
+
+    async def obter_campo(self, chave: str, campo: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def definir_campo(self, chave: str, campo: str, valor: Any, ttl: Optional[int] = None) -> None:
+        raise NotImplementedError
+
+    async def remover_campo(self, chave: str, campo: str) -> None:
+        raise NotImplementedError
+
+    async def renovar(self, chave: str, ttl: int) -> None:
+        """Reinicia o TTL de uma chave existente"""
+        raise NotImplementedError
+
+    async def adicionar_membro(self, chave: str, membro: str) -> None:
+        raise NotImplementedError
+
+    async def remover_membro(self, chave: str, membro: str) -> None:
+        raise NotImplementedError
+
+    async def membros(self, chave: str) -> Set[str]:
+        raise NotImplementedError
+
+    def listar(self, prefixo: str):
+        """Iterador assíncrono de (chave, valor) das chaves simples com o prefixo"""
+        raise NotImplementedError
+
+    async def contar(self, prefixo: str) -> int:
+        raise NotImplementedError
+
+    async def limpar_expirados(self) -> int:
+        """Remove entradas vencidas; backends com TTL nativo retornam 0"""
+        return 0
+
+    async def fechar(self) -> None:
+        """Libera conexões do backend"""
+
+
+# ===============================================
+# MEMÓRIA (PROCESSO ÚNICO)
+# ===============================================
+
+class BackendMemoria(BackendSessao):
+    """
+    Armazena em dicionários do processo
+
+    Expiração preguiçosa na leitura; limpar_expirados() remove o restante.
+    Serve para desenvolvimento e para um único processo do bot.
+    """
+
+    def __init__(self):
+        self._valores: Dict[str, Any] = {}
+        self._hashes: Dict[str, Dict[str, Any]] = {}
+        self._conjuntos: Dict[str, Set[str]] = {}
+        self._expira_em: Dict[str, float] = {}
+
+    def _vivo(self, chave: str) -> bool:
+        expira = self._expira_em.get(chave)
+        if expira is not None and expira <= time.monotonic():
+            self._remover(chave)
+            return False
+        return True
+
+    def _expirar(self, chave: str, ttl: Optional[int]):
+        if ttl:
+            self._expira_em[chave] = time.monotonic() + ttl
+        else:
+            self._expira_em.pop(chave, None)
+
+    def _remover(self, *chaves):
+        for chave in chaves:
+            self._valores.pop(chave, None)
+            self._hashes.pop(chave, None)
+            self._conjuntos.pop(chave, None)
+            self._expira_em.pop(chave, None)
+
+    async def obter(self, chave):
+        if not self._vivo(chave):
+            return None
+        return self._valores.get(chave)
+
+    async def definir(self, chave, valor, ttl=None):
+        self._valores[chave] = valor
+        self._expirar(chave, ttl)
+
+    async def remover(self, *chaves):
+        self._remover(*chaves)
+
+    async def obter_campo(self, chave, campo):
+        if not self._vivo(chave):
+            return None
+        return self._hashes.get(chave, {}).get(campo)
+
+    async def definir_campo(self, chave, campo, valor, ttl=None):
+        self._vivo(chave)
+        self._hashes.setdefault(chave, {})[campo] = valor
+        self._expirar(chave, ttl)
+
+    async def remover_campo(self, chave, campo):
+        campos = self._hashes.get(chave)
+        if campos is not None:
+            campos.pop(campo, None)
+            if not campos:
+                self._remover(chave)
+
+    async def renovar(self, chave, ttl):
+        if chave in self._valores or chave in self._hashes:
+            self._expirar(chave, ttl)
+
+    async def adicionar_membro(self, chave, membro):
+        self._conjuntos.setdefault(chave, set()).add(membro)
+
+    async def remover_membro(self, chave, membro):
+        membros = self._conjuntos.get(chave)
+        if membros is not None:
+            membros.discard(membro)
+            if not membros:
+                self._remover(chave)
+
+    async def membros(self, chave):
+        return set(self._conjuntos.get(chave, ()))
+
+    async def listar(self, prefixo):
+        for chave in list(self._valores):
+            if chave.startswith(prefixo) and self._vivo(chave):
+                yield chave, self._valores[chave]
+
+    async def contar(self, prefixo):
+        return sum(
+            1 for chave in list(self._valores) + list(self._hashes)
+            if chave.startswith(prefixo) and self._vivo(chave)
+        )
+
+    async def limpar_expirados(self):
+        agora = time.monotonic()
+        vencidas = [chave for chave, expira in self._expira_em.items() if expira <= agora]
+        self._remover(*vencidas)
+        return len(vencidas)
+
+
+# ===============================================
+# REDIS (VÁRIOS PROCESSOS)
+# ===============================================
+
+class BackendRedis(BackendSessao):
+    """
+    Armazena no Redis com TTL nativo, pelo cliente assíncrono (redis.asyncio)
+
+    Valores são gravados em JSON. `cliente` permite injetar outro cliente
+    assíncrono compatível (por exemplo fakeredis.aioredis.FakeRedis em testes).
+    """
+
+    def __init__(self, url: str = None, cliente=None):
+        if cliente is None:
+            import redis.asyncio
+            cliente = redis.asyncio.Redis.from_url(url, decode_responses=True)
+        self.redis = cliente
+
+    @staticmethod
+    def _dump(valor):
+        return json.dumps(valor, default=str)
+
+    @staticmethod
+    def _load(bruto):
+        return None if bruto is None else json.loads(bruto)
+
+    async def obter(self, chave):
+        return self._load(await self.redis.get(chave))
+
+    async def definir(self, chave, valor, ttl=None):
+        await self.redis.set(chave, self._dump(valor), ex=ttl or None)
+
+    async def remover(self, *chaves):
+        if chaves:
+            await self.redis.delete(*chaves)
+
+    async def obter_campo(self, chave, campo):
+        return self._load(await self.redis.hget(chave, campo))
+
+    async def definir_campo(self, chave, campo, valor, ttl=None):
+        async with self.redis.pipeline() as pipe:
+            pipe.hset(chave, campo, self._dump(valor))
+            if ttl:
+                pipe.expire(chave, ttl)
+            await pipe.execute()
+
+    async def remover_campo(self, chave, campo):
+        await self.redis.hdel(chave, campo)
+
+    async def renovar(self, chave, ttl):
+        await self.redis.expire(chave, ttl)
+
+    async def adicionar_membro(self, chave, membro):
+        await self.redis.sadd(chave, membro)
+
+    async def remover_membro(self, chave, membro):
+        await self.redis.srem(chave, membro)
+
+    async def membros(self, chave):
+        return set(await self.redis.smembers(chave))
+
+    async def listar(self, prefixo):
+        async for chave in self.redis.scan_iter(match=f'{prefixo}*', count=500):
+            valor = await self.redis.get(chave)
+            if valor is not None:
+                yield chave, self._load(valor)
+
+    async def contar(self, prefixo):
+        total = 0
+        async for _ in self.redis.scan_iter(match=f'{prefixo}*', count=500):
+            total += 1
+        return total
+
+    async def fechar(self):
+        await self.redis.aclose()
+
+
+def criar_backend(nome: str, redis_url: str = None) -> BackendSessao:
+    """Instancia o backend configurado; cai para memória se o Redis não estiver disponível"""
+    if nome == 'redis':
+        try:
+            # Conferência única na importação, antes do event loop existir
+            import redis
+            with redis.Redis.from_url(redis_url, socket_connect_timeout=5) as cliente:
+                cliente.ping()
+            logger.info("✅ Sessões do bot armazenadas no Redis")
+            return BackendRedis(redis_url)
+        except Exception as e:
+            logger.error(f"❌ Redis indisponível para sessões ({e}); usando memória local")
+    return BackendMemoria()
+
+
+# ===============================================
+# STORAGE DO FSM (AIOGRAM)
+# ===============================================
+
+class StorageSessao(BaseStorage):
+    """Storage do FSM do aiogram gravando no mesmo backend das sessões"""
+
+    def __init__(self, backend: BackendSessao, ttl: Optional[int] = None):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def set_state(self, key: StorageKey, state=None) -> None:
+        if state is None:
+            await self.backend.remover(chave_fsm(key, 'estado'))
+            return
+        valor = state.state if isinstance(state, State) else state
+        await self.backend.definir(chave_fsm(key, 'estado'), valor, self.ttl)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await self.backend.obter(chave_fsm(key, 'estado'))
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        if not data:
+            await self.backend.remover(chave_fsm(key, 'dados'))
+            return
+        await self.backend.definir(chave_fsm(key, 'dados'), data, self.ttl)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return dict(await self.backend.obter(chave_fsm(key, 'dados')) or {})
+
+    async def close(self) -> None:
+        await self.backend.fechar()